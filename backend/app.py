@@ -57,6 +57,8 @@ def seed_db():
             'serial_number': 'LORA-ENTRADA-01',
             'protocol': 'LoRa',
             'location': 'Entrada Principal',
+            'role': 'entry',
+            'zone': 'principal',
             'description': 'Sensor LoRa na entrada principal do parque',
             'status': 'active'
         },
@@ -64,6 +66,8 @@ def seed_db():
             'serial_number': 'LORA-SAIDA-01',
             'protocol': 'LoRa',
             'location': 'Saída Principal',
+            'role': 'exit',
+            'zone': 'principal',
             'description': 'Sensor LoRa na saída principal do parque',
             'status': 'active'
         },
@@ -71,6 +75,8 @@ def seed_db():
             'serial_number': 'ZIGB-LATERAL-01',
             'protocol': 'ZigBee',
             'location': 'Entrada Lateral Norte',
+            'role': 'entry',
+            'zone': 'principal',
             'description': 'Sensor ZigBee na entrada lateral norte',
             'status': 'active'
         },
@@ -78,6 +84,8 @@ def seed_db():
             'serial_number': 'ZIGB-LATERAL-02',
             'protocol': 'ZigBee',
             'location': 'Entrada Lateral Sul',
+            'role': 'entry',
+            'zone': 'principal',
             'description': 'Sensor ZigBee na entrada lateral sul',
             'status': 'active'
         },
@@ -85,6 +93,8 @@ def seed_db():
             'serial_number': 'SIGF-BANHEIRO-01',
             'protocol': 'Sigfox',
             'location': 'Banheiros',
+            'role': 'zone',
+            'zone': 'banheiros',
             'description': 'Sensor Sigfox próximo aos banheiros',
             'status': 'active'
         },
@@ -39,12 +39,44 @@ def create_app(config_name='development'):
     from app.config import config
     app.config.from_object(config[config_name])
     
+    # Flask 3 lê as opções de JSON do provider (app.json), não de app.config
+    app.json.sort_keys = app.config.get('JSON_SORT_KEYS', False)
+    app.json.compact = app.config.get('JSON_COMPACT')
+    
     # Inicializar extensões com app
     db.init_app(app)
     migrate.init_app(app, db)
     jwt.init_app(app)
     ma.init_app(app)
     
+    # Motor de ocupação em tempo real
+    from app.services.occupancy_service import occupancy_engine
+    occupancy_engine.init_app(app)
+    
+    # Contadores deslizantes de leituras (overview 24h)
+    from app.services.rolling_counters import reading_counters
+    reading_counters.init_app(app)
+    
+    # Cache de respostas GET (dashboards)
+    from app.utils.cache import response_cache
+    response_cache.init_app(app)
+    
+    # Métricas por endpoint (latência, consultas SQL) em /health/metrics
+    from app.utils.metrics import request_metrics
+    request_metrics.init_app(app)
+    
+    # Profiler de SQL por fingerprint (relatório e EXPLAIN sob demanda)
+    from app.utils.sql_profiler import sql_profiler
+    sql_profiler.init_app(app)
+    
+    # Controle de admissão: 503 + Retry-After quando as vagas se esgotam
+    from app.utils.admission import admission_control
+    admission_control.init_app(app)
+    
+    # Chaves de API dos dispositivos (ingestão sem login)
+    from app.utils.device_auth import device_keys
+    device_keys.init_app(app)
+    
     # Configurar CORS - Permitir todas as origens para desenvolvimento
     CORS(app, resources={
         r"/*": {
@@ -121,7 +153,7 @@ def setup_logging(app):
 
 def register_blueprints(app):
     """Registra blueprints da aplicação"""
-    from app.routes import sensors, readings, statistics, auth, health, pool
+    from app.routes import sensors, readings, statistics, auth, health, pool, admin
     from flask import send_from_directory
     import os
     
@@ -142,6 +174,7 @@ def register_blueprints(app):
     app.register_blueprint(readings.bp, url_prefix=f'{api_prefix}/readings')
     app.register_blueprint(statistics.bp, url_prefix=f'{api_prefix}/statistics')
     app.register_blueprint(pool.pool_bp)  # Pool já tem o prefix definido
+    app.register_blueprint(admin.bp, url_prefix=f'{api_prefix}/admin')
     
     app.logger.info(f"Blueprints registrados com prefixo: {api_prefix}")
 
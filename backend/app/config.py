@@ -37,9 +37,28 @@ class Config:
     SQLALCHEMY_DATABASE_URI = f"mysql+pymysql://{DB_USER}:{quote_plus(DB_PASSWORD)}@{DB_HOST}:{DB_PORT}/{DB_NAME}?charset=utf8mb4"
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     SQLALCHEMY_ECHO = False
-    SQLALCHEMY_POOL_SIZE = 10
-    SQLALCHEMY_POOL_RECYCLE = 3600
-    SQLALCHEMY_POOL_TIMEOUT = 30
+    
+    # Threads de requisição por processo (gunicorn.conf.py / waitress --threads)
+    WEB_THREADS = int(os.environ.get('WEB_THREADS', 4))
+    
+    # Pool de conexões por processo: uma conexão por thread de requisição e
+    # folga para exportações em streaming e EXPLAIN do profiler. No MySQL,
+    # o total é WEB_WORKERS × (pool_size + max_overflow).
+    # pool_pre_ping descarta conexões fechadas pelo servidor (wait_timeout)
+    # e pool_use_lifo mantém poucas conexões quentes, deixando as ociosas
+    # expirarem pelo pool_recycle
+    DB_POOL_SIZE = int(os.environ.get('DB_POOL_SIZE', 0)) or WEB_THREADS
+    DB_MAX_OVERFLOW = int(os.environ.get('DB_MAX_OVERFLOW', -1))
+    if DB_MAX_OVERFLOW < 0:
+        DB_MAX_OVERFLOW = max(2, WEB_THREADS // 2)
+    SQLALCHEMY_ENGINE_OPTIONS = {
+        'pool_size': DB_POOL_SIZE,
+        'max_overflow': DB_MAX_OVERFLOW,
+        'pool_timeout': int(os.environ.get('DB_POOL_TIMEOUT', 10)),
+        'pool_recycle': int(os.environ.get('DB_POOL_RECYCLE', 1800)),
+        'pool_pre_ping': True,
+        'pool_use_lifo': True,
+    }
     
     # MQTT Configuration (Herdado da Fase 2)
     MQTT_BROKER_HOST = os.environ.get('MQTT_BROKER_HOST', 'localhost')
@@ -51,6 +70,64 @@ class Config:
     # Gateway Configuration
     GATEWAY_ID = os.environ.get('GATEWAY_ID', 'gateway_001')
     
+    # Parque (contagem de ocupação)
+    PARK_MAX_CAPACITY = int(os.environ.get('PARK_MAX_CAPACITY', 5000))
+    PARK_TIMEZONE = os.environ.get('PARK_TIMEZONE', 'America/Sao_Paulo')
+    # Intervalo (segundos) para ressincronizar a ocupação com o banco.
+    # 0 = desabilitado (um único processo recebe todas as leituras)
+    OCCUPANCY_RESYNC_INTERVAL = int(os.environ.get('OCCUPANCY_RESYNC_INTERVAL', 0))
+    # Intervalo (segundos) para conferir os contadores de leituras com o banco
+    # (recarrega só os minutos recentes; curto com vários processos)
+    ROLLING_COUNTERS_RECONCILE_INTERVAL = int(os.environ.get('ROLLING_COUNTERS_RECONCILE_INTERVAL', 300))
+    # Intervalo (segundos) para recarregar a janela de 24h inteira (0 = nunca)
+    ROLLING_COUNTERS_REBUILD_INTERVAL = int(os.environ.get('ROLLING_COUNTERS_REBUILD_INTERVAL', 3600))
+    
+    # Cache de respostas GET (por processo)
+    RESPONSE_CACHE_ENABLED = os.environ.get('RESPONSE_CACHE_ENABLED', 'true').lower() == 'true'
+    RESPONSE_CACHE_DEFAULT_TTL = int(os.environ.get('RESPONSE_CACHE_DEFAULT_TTL', 10))
+    RESPONSE_CACHE_MAX_ENTRIES = int(os.environ.get('RESPONSE_CACHE_MAX_ENTRIES', 1024))
+    
+    # Métricas por endpoint (GET /health/metrics, formato Prometheus)
+    METRICS_ENABLED = os.environ.get('METRICS_ENABLED', 'true').lower() == 'true'
+    # Registrar no log requisições acima destes limites (0 = desativado)
+    METRICS_SLOW_REQUEST_MS = int(os.environ.get('METRICS_SLOW_REQUEST_MS', 0))
+    METRICS_SLOW_QUERY_COUNT = int(os.environ.get('METRICS_SLOW_QUERY_COUNT', 0))
+    
+    # Profiler de SQL por fingerprint (GET /api/v1/admin/sql-profile)
+    # Desligado por padrão (custo por consulta); ligar para diagnóstico
+    SQL_PROFILER_ENABLED = os.environ.get('SQL_PROFILER_ENABLED', 'false').lower() == 'true'
+    SQL_PROFILER_MAX_FINGERPRINTS = int(os.environ.get('SQL_PROFILER_MAX_FINGERPRINTS', 500))
+    
+    # Controle de admissão (503 + Retry-After sob sobrecarga, por processo)
+    # Vagas simultâneas por classe de endpoint (0 = sem limite); ingestão e
+    # health checks (critical) nunca são recusados. Com waitress, mantenha
+    # heavy + default abaixo de --threads para sobrar thread para a ingestão.
+    ADMISSION_CONTROL_ENABLED = os.environ.get('ADMISSION_CONTROL_ENABLED', 'true').lower() == 'true'
+    ADMISSION_HEAVY_CONCURRENCY = int(os.environ.get('ADMISSION_HEAVY_CONCURRENCY', 2))
+    ADMISSION_DEFAULT_CONCURRENCY = int(os.environ.get('ADMISSION_DEFAULT_CONCURRENCY', 16))
+    # Espera máxima por uma vaga e tempo máximo na fila do proxy (X-Request-Start)
+    ADMISSION_QUEUE_TIMEOUT_MS = int(os.environ.get('ADMISSION_QUEUE_TIMEOUT_MS', 500))
+    ADMISSION_MAX_QUEUE_MS = int(os.environ.get('ADMISSION_MAX_QUEUE_MS', 5000))
+    ADMISSION_RETRY_AFTER = int(os.environ.get('ADMISSION_RETRY_AFTER', 5))
+    
+    # Chaves de API dos dispositivos (ingestão sem login por usuário/senha)
+    # O banco guarda HMAC-SHA256(DEVICE_KEY_SECRET, chave); o segredo
+    # aleatório de cada chave não é gravado. Trocar o DEVICE_KEY_SECRET
+    # invalida todas as chaves emitidas. Os hashes ficam em memória por
+    # DEVICE_KEY_CACHE_TTL segundos: uma revogação leva até esse tempo para
+    # chegar aos demais workers
+    DEVICE_KEY_SECRET = os.environ.get('DEVICE_KEY_SECRET') or SECRET_KEY
+    DEVICE_KEY_CACHE_TTL = int(os.environ.get('DEVICE_KEY_CACHE_TTL', 300))
+
+    # Leituras por requisição em POST /pool/readings/batch
+    POOL_BATCH_MAX_READINGS = int(os.environ.get('POOL_BATCH_MAX_READINGS', 500))
+
+    # Exportação em streaming: linhas lidas do banco por bloco
+    EXPORT_CHUNK_SIZE = int(os.environ.get('EXPORT_CHUNK_SIZE', 5000))
+    
+    # Ingestão MQTT: linhas por INSERT (e chaves por consulta de duplicatas)
+    INGEST_BATCH_SIZE = int(os.environ.get('INGEST_BATCH_SIZE', 500))
+    
     # API Configuration
     API_PREFIX = os.environ.get('API_PREFIX', '/api/v1')
     API_TITLE = os.environ.get('API_TITLE', 'CEU Tres Pontes API')
@@ -67,9 +144,9 @@ class Config:
     LOG_LEVEL = os.environ.get('LOG_LEVEL', 'INFO')
     LOG_FILE = os.environ.get('LOG_FILE', 'backend.log')
     
-    # JSON Configuration
+    # JSON Configuration (aplicado em app.json; None = indentado só em DEBUG)
     JSON_SORT_KEYS = False
-    JSONIFY_PRETTYPRINT_REGULAR = True
+    JSON_COMPACT = None
     
     # Upload Configuration (para futuro)
     MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16MB max
@@ -111,6 +188,9 @@ class TestingConfig(Config):
         f"{Config.DB_HOST}:{Config.DB_PORT}/{DB_NAME}?charset=utf8mb4"
     )
     
+    # Respostas sempre recalculadas nos testes
+    RESPONSE_CACHE_ENABLED = False
+    
     # Desabilitar CSRF para testes
     WTF_CSRF_ENABLED = False
     
@@ -123,6 +203,9 @@ class ProductionConfig(Config):
     DEBUG = False
     TESTING = False
     
+    # Respostas JSON sem indentação
+    JSON_COMPACT = True
+    
     # Em produção, as secret keys DEVEM vir do ambiente
     SECRET_KEY = os.environ.get('SECRET_KEY')
     JWT_SECRET_KEY = os.environ.get('JWT_SECRET_KEY')
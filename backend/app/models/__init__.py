@@ -9,6 +9,7 @@ from app.models.alert import Alert
 from app.models.statistics import Statistics
 from app.models.user import User
 from app.models.pool_reading import PoolReading
+from app.models.device_key import DeviceKey
 
 __all__ = [
     'Sensor',
@@ -16,5 +17,6 @@ __all__ = [
     'Alert',
     'Statistics',
     'User',
-    'PoolReading'
+    'PoolReading',
+    'DeviceKey'
 ]
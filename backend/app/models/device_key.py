@@ -0,0 +1,57 @@
+"""
+DeviceKey Model
+Chave de API de um dispositivo (gateway, simulador, sensor com IP)
+"""
+
+from datetime import datetime
+from app import db
+
+
+class DeviceKey(db.Model):
+    """
+    Modelo de Chave de Dispositivo
+
+    A chave completa ('dk_<key_id>.<segredo>.<assinatura>') só é exibida
+    na emissão; o banco guarda apenas o HMAC-SHA256 dela, sem o segredo
+    aleatório (ver app.utils.device_auth).
+    """
+    __tablename__ = 'device_keys'
+
+    # Campos principais
+    id = db.Column(db.Integer, primary_key=True)
+    key_id = db.Column(db.String(32), unique=True, nullable=False, index=True)
+    key_hash = db.Column(db.String(64), nullable=False)
+    name = db.Column(db.String(100), nullable=False)
+    description = db.Column(db.Text)
+
+    # Status
+    is_active = db.Column(db.Boolean, default=True, nullable=False)
+
+    # Timestamps
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    revoked_at = db.Column(db.DateTime)
+
+    def __repr__(self):
+        return f'<DeviceKey {self.key_id} ({self.name})>'
+
+    def to_dict(self):
+        """
+        Converte a chave para dicionário (sem o hash)
+
+        Returns:
+            dict: Representação da chave
+        """
+        return {
+            'id': self.id,
+            'key_id': self.key_id,
+            'name': self.name,
+            'description': self.description,
+            'is_active': self.is_active,
+            'created_at': self.created_at.isoformat(),
+            'revoked_at': self.revoked_at.isoformat() if self.revoked_at else None
+        }
+
+    @classmethod
+    def get_by_key_id(cls, key_id):
+        """Busca chave pelo identificador público"""
+        return cls.query.filter_by(key_id=key_id).first()
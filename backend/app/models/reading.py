@@ -19,12 +19,12 @@ class Reading(db.Model):
     __tablename__ = 'readings'
     
     # Campos principais
-    id = db.Column(db.BigInteger, primary_key=True)
+    # INTEGER no SQLite: só assim a chave é autoincremento (rowid)
+    id = db.Column(db.BigInteger().with_variant(db.Integer, 'sqlite'), primary_key=True)
     sensor_id = db.Column(
         db.Integer,
         db.ForeignKey('sensors.id', ondelete='CASCADE'),
-        nullable=False,
-        index=True
+        nullable=False
     )
     
     # Dados da leitura
@@ -35,18 +35,22 @@ class Reading(db.Model):
     sensor_metadata = db.Column(db.JSON)  # battery_level, rssi, temperature, etc.
     
     # Message ID do MQTT (para rastreamento)
-    message_id = db.Column(db.String(100), index=True)
-    gateway_id = db.Column(db.String(50), index=True)
+    message_id = db.Column(db.String(100))
+    gateway_id = db.Column(db.String(50))
     
     # Timestamp de inserção no banco
     created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
     
-    # Índices compostos para queries otimizadas
+    # Índices compostos para queries otimizadas. Conjunto mínimo para a carga
+    # da aplicação (scripts/analyze_reading_indexes.py): cada índice a mais
+    # é escrito em todo INSERT da ingestão.
+    # idx_sensor_timestamp também atende a FK sensor_id; ix_readings_timestamp
+    # (timestamp, id) mantém a exportação ordenada sem filesort.
     __table_args__ = (
         db.Index('idx_sensor_timestamp', 'sensor_id', 'timestamp'),
         db.Index('idx_timestamp_activity', 'timestamp', 'activity'),
-        db.Index('idx_sensor_activity', 'sensor_id', 'activity'),
-        db.Index('idx_gateway_timestamp', 'gateway_id', 'timestamp'),
+        # Idempotência da ingestão MQTT (reentregas QoS 1)
+        db.UniqueConstraint('gateway_id', 'message_id', name='uq_readings_gateway_message'),
     )
     
     def __repr__(self):
@@ -190,6 +194,70 @@ class Reading(db.Model):
         
         return query.count()
     
+    @classmethod
+    def visible_ids(cls, connection, ids):
+        """
+        Ids, entre os informados, visíveis numa conexão
+        
+        Usado pelas recuperações em memória: na mesma transação da
+        agregação, indica quais lotes registrados durante a query já
+        estavam no snapshot (um id por lote basta, o commit é atômico).
+        
+        Args:
+            connection: Conexão (e transação) da agregação
+            ids: Ids de leituras
+        
+        Returns:
+            set: Ids presentes no snapshot da conexão
+        """
+        from sqlalchemy import select
+        
+        ids = list(ids)
+        if not ids:
+            return set()
+        return set(connection.execute(select(cls.id).where(cls.id.in_(ids))).scalars())
+    
+    @classmethod
+    def get_sensor_rollup(cls, since=None, sensor_ids=None):
+        """
+        Agrega as leituras por sensor em uma única query (GROUP BY)
+        
+        Args:
+            since: Considerar apenas leituras a partir desta data (opcional)
+            sensor_ids: Restringir a estes sensores (opcional)
+        
+        Returns:
+            dict: {sensor_id: {'total_readings', 'total_detections',
+                   'last_reading', 'avg_battery_level'}}
+        """
+        from sqlalchemy import func, case
+        
+        battery_level = cls.sensor_metadata['battery_level'].as_float()
+        
+        query = db.session.query(
+            cls.sensor_id,
+            func.count(cls.id).label('total_readings'),
+            func.sum(case((cls.activity == 1, 1), else_=0)).label('total_detections'),
+            func.max(cls.timestamp).label('last_reading'),
+            func.avg(battery_level).label('avg_battery_level')
+        )
+        
+        if since is not None:
+            query = query.filter(cls.timestamp >= since)
+        
+        if sensor_ids is not None:
+            query = query.filter(cls.sensor_id.in_(sensor_ids))
+        
+        return {
+            row.sensor_id: {
+                'total_readings': row.total_readings,
+                'total_detections': int(row.total_detections or 0),
+                'last_reading': row.last_reading,
+                'avg_battery_level': float(row.avg_battery_level) if row.avg_battery_level is not None else None
+            }
+            for row in query.group_by(cls.sensor_id).all()
+        }
+    
     @classmethod
     def get_hourly_detections(cls, date, sensor_id=None):
         """
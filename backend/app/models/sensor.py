@@ -26,6 +26,15 @@ class Sensor(db.Model):
     location = db.Column(db.String(100), nullable=False)
     description = db.Column(db.Text)
     
+    # Papel do sensor na contagem de ocupação
+    # entry = entrada, exit = saída, zone = presença em uma área interna
+    role = db.Column(
+        db.Enum('entry', 'exit', 'zone', name='sensor_role'),
+        nullable=True,
+        index=True
+    )
+    zone = db.Column(db.String(50))  # Área do parque (ex: principal, piscina)
+    
     # Status
     status = db.Column(
         db.Enum('active', 'inactive', 'maintenance', 'error', name='sensor_status'),
@@ -79,12 +88,14 @@ class Sensor(db.Model):
     def __repr__(self):
         return f'<Sensor {self.serial_number} ({self.protocol})>'
     
-    def to_dict(self, include_stats=False):
+    def to_dict(self, include_stats=False, stats=None):
         """
         Converte o sensor para dicionário
         
         Args:
             include_stats: Incluir estatísticas de leituras
+            stats: Estatísticas já calculadas (ver get_statistics_bulk).
+                   Se None e include_stats=True, calcula para este sensor.
         
         Returns:
             dict: Representação do sensor
@@ -95,6 +106,8 @@ class Sensor(db.Model):
             'protocol': self.protocol,
             'location': self.location,
             'description': self.description,
+            'role': self.role,
+            'zone': self.zone,
             'status': self.status,
             'protocol_config': self.protocol_config,
             'firmware_version': self.firmware_version,
@@ -107,74 +120,78 @@ class Sensor(db.Model):
         }
         
         if include_stats:
-            data['stats'] = self.get_statistics()
+            data['stats'] = stats if stats is not None else self.get_statistics()
         
         return data
     
-    def get_statistics(self, hours=24):
+    def get_statistics(self, hours=24, rollup=None):
         """
         Obtém estatísticas do sensor
         
         Args:
             hours: Número de horas para calcular estatísticas
+            rollup: Linha agregada de Reading.get_sensor_rollup (opcional).
+                    Se None, executa a agregação apenas para este sensor.
         
         Returns:
             dict: Estatísticas do sensor
         """
         from datetime import timedelta
-        from sqlalchemy import func
         from app.models.reading import Reading
         
-        cutoff_time = datetime.utcnow() - timedelta(hours=hours)
+        if rollup is None:
+            cutoff_time = datetime.utcnow() - timedelta(hours=hours)
+            rollup = Reading.get_sensor_rollup(
+                since=cutoff_time,
+                sensor_ids=[self.id]
+            ).get(self.id, {})
         
-        # Contar leituras recentes
-        recent_readings = Reading.query.filter(
-            Reading.sensor_id == self.id,
-            Reading.timestamp >= cutoff_time
-        ).count()
-        
-        # Contar detecções (activity = 1)
-        recent_detections = Reading.query.filter(
-            Reading.sensor_id == self.id,
-            Reading.timestamp >= cutoff_time,
-            Reading.activity == 1
-        ).count()
-        
-        # Média do battery_level
-        avg_battery = db.session.query(
-            func.avg(Reading.metadata['battery_level'].astext.cast(db.Float))
-        ).filter(
-            Reading.sensor_id == self.id,
-            Reading.timestamp >= cutoff_time
-        ).scalar()
+        recent_readings = rollup.get('total_readings', 0)
+        avg_battery = rollup.get('avg_battery_level')
         
         return {
             'readings_last_24h': recent_readings,
-            'detections_last_24h': recent_detections,
+            'detections_last_24h': rollup.get('total_detections', 0),
             'avg_battery_level': round(avg_battery, 2) if avg_battery else None,
-            'is_online': (
+            'is_online': bool(
                 self.last_reading_at and
-                (datetime.utcnow() - self.last_reading_at).seconds < 300  # 5 minutos
+                (datetime.utcnow() - self.last_reading_at).total_seconds() < 300  # 5 minutos
             ),
-            'uptime_percentage': self._calculate_uptime(hours)
+            'uptime_percentage': self._calculate_uptime(hours, recent_readings)
         }
     
-    def _calculate_uptime(self, hours=24):
-        """Calcula porcentagem de uptime baseado nas leituras"""
+    @classmethod
+    def get_statistics_bulk(cls, sensors, hours=24):
+        """
+        Obtém estatísticas de vários sensores com uma única query agregada
+        
+        Args:
+            sensors: Lista de sensores
+            hours: Número de horas para calcular estatísticas
+        
+        Returns:
+            dict: {sensor_id: estatísticas}
+        """
         from datetime import timedelta
         from app.models.reading import Reading
         
-        cutoff_time = datetime.utcnow() - timedelta(hours=hours)
+        if not sensors:
+            return {}
         
-        # Contar intervalos de 5 minutos com pelo menos 1 leitura
-        total_intervals = hours * 12  # 12 intervalos de 5 min por hora
-        
-        readings_count = Reading.query.filter(
-            Reading.sensor_id == self.id,
-            Reading.timestamp >= cutoff_time
-        ).count()
+        cutoff_time = datetime.utcnow() - timedelta(hours=hours)
+        rollup = Reading.get_sensor_rollup(
+            since=cutoff_time,
+            sensor_ids=[sensor.id for sensor in sensors]
+        )
         
-        if readings_count == 0:
+        return {
+            sensor.id: sensor.get_statistics(hours, rollup=rollup.get(sensor.id, {}))
+            for sensor in sensors
+        }
+    
+    def _calculate_uptime(self, hours=24, readings_count=0):
+        """Calcula porcentagem de uptime baseado na quantidade de leituras"""
+        if not readings_count:
             return 0.0
         
         # Estimar uptime baseado na quantidade de leituras
@@ -192,7 +209,7 @@ class Sensor(db.Model):
             data: Dicionário com campos a atualizar
         """
         updateable_fields = [
-            'location', 'description', 'status', 'protocol_config',
+            'location', 'description', 'role', 'zone', 'status', 'protocol_config',
             'firmware_version', 'battery_level', 'signal_strength'
         ]
         
@@ -212,6 +229,11 @@ class Sensor(db.Model):
         """Retorna todos os sensores ativos"""
         return cls.query.filter_by(status='active').all()
     
+    @classmethod
+    def get_by_role(cls, role):
+        """Retorna sensores com um papel específico (entry, exit, zone)"""
+        return cls.query.filter_by(role=role).all()
+    
     @classmethod
     def get_by_protocol(cls, protocol):
         """Retorna sensores de um protocolo específico"""
@@ -0,0 +1,120 @@
+"""
+Admin Routes
+Endpoints de diagnóstico restritos a administradores
+"""
+
+from flask import Blueprint, request
+from flask_jwt_extended import jwt_required
+from app import db
+from app.models.device_key import DeviceKey
+from app.utils.decorators import admin_required
+from app.utils.device_auth import device_keys
+from app.utils.responses import success_response, error_response
+from app.utils.sql_profiler import sql_profiler
+
+bp = Blueprint('admin', __name__)
+
+
+@bp.route('/sql-profile', methods=['GET'])
+@jwt_required()
+@admin_required
+def sql_profile():
+    """
+    Consultas SQL agrupadas por fingerprint (deste processo)
+
+    Query params:
+        top (int): Quantidade de fingerprints (padrão: 20, máx.: 200)
+        sort (str): total, count, max ou avg (padrão: total)
+        explain (bool): Captura o EXPLAIN da amostra de cada fingerprint
+
+    Returns:
+        200: Totais e fingerprints com contagem, tempo total/máximo e plano
+        404: Profiler desativado
+    """
+    if not sql_profiler.enabled:
+        return error_response('Profiler de SQL desativado', 404)
+
+    top = min(max(request.args.get('top', default=20, type=int), 1), 200)
+    sort = request.args.get('sort', default='total')
+    explain = request.args.get('explain', default='false').lower() in ('1', 'true', 'yes')
+
+    report = sql_profiler.report(top, sort, db.engine if explain else None)
+    return success_response(report)
+
+
+@bp.route('/sql-profile', methods=['DELETE'])
+@jwt_required()
+@admin_required
+def reset_sql_profile():
+    """
+    Zera o profiler de SQL deste processo
+
+    Returns:
+        200: Profiler zerado
+    """
+    sql_profiler.reset()
+    return success_response({}, message='Profiler de SQL zerado')
+
+
+@bp.route('/device-keys', methods=['GET'])
+@jwt_required()
+@admin_required
+def list_device_keys():
+    """
+    Lista as chaves de API dos dispositivos (sem os hashes)
+
+    Returns:
+        200: Chaves e contadores de verificação deste processo
+    """
+    keys = DeviceKey.query.order_by(DeviceKey.created_at.desc()).all()
+    return success_response({
+        'device_keys': [key.to_dict() for key in keys],
+        'stats': device_keys.get_stats()
+    })
+
+
+@bp.route('/device-keys', methods=['POST'])
+@jwt_required()
+@admin_required
+def create_device_key():
+    """
+    Emite uma chave de API para um dispositivo
+
+    Body (JSON):
+    {
+        "name": "simulador-piscina",
+        "description": "..." (opcional)
+    }
+
+    Returns:
+        201: Chave emitida; o campo `key` só é exibido nesta resposta
+        400: Nome ausente
+    """
+    data = request.get_json(silent=True) or {}
+    name = (data.get('name') or '').strip()
+    if not name or len(name) > 100:
+        return error_response('Campo name é obrigatório (até 100 caracteres)', 400)
+
+    device_key, key = device_keys.issue(name, data.get('description'))
+    return success_response(
+        {'device_key': device_key.to_dict(), 'key': key},
+        message='Chave emitida; guarde-a agora, ela não será exibida novamente',
+        status=201
+    )
+
+
+@bp.route('/device-keys/<key_id>', methods=['DELETE'])
+@jwt_required()
+@admin_required
+def revoke_device_key(key_id):
+    """
+    Revoga a chave de um dispositivo
+
+    Returns:
+        200: Chave revogada
+        404: Chave não encontrada
+    """
+    device_key = device_keys.revoke(key_id)
+    if device_key is None:
+        return error_response('Chave não encontrada', 404)
+    return success_response({'device_key': device_key.to_dict()}, message='Chave revogada')
@@ -3,14 +3,17 @@ Health Check Routes
 Endpoints para verificar saúde da API
 """
 
-from flask import Blueprint, jsonify
+from flask import Blueprint, Response, jsonify
 from datetime import datetime
 from app import db
+from app.utils.metrics import request_metrics
+from app.utils.admission import admission_class, admission_control
 
 bp = Blueprint('health', __name__)
 
 
 @bp.route('/health', methods=['GET'])
+@admission_class('critical')
 def health_check():
     """
     Health check básico
@@ -27,6 +30,7 @@ def health_check():
 
 
 @bp.route('/health/db', methods=['GET'])
+@admission_class('critical')
 def database_health():
     """
     Health check do banco de dados
@@ -53,7 +57,30 @@ def database_health():
         }), 503
 
 
+@bp.route('/health/metrics', methods=['GET'])
+@admission_class('critical')
+def metrics():
+    """
+    Métricas por endpoint no formato Prometheus
+    
+    Latência, requisições por status, consultas SQL por requisição, tempo
+    de SQL e linhas. Os valores são do processo que atendeu a requisição.
+    
+    Returns:
+        Texto no formato de exposição do Prometheus
+    """
+    if not request_metrics.enabled:
+        return jsonify({'error': 'Métricas desativadas'}), 404
+    
+    body = request_metrics.render()
+    if admission_control.enabled:
+        body += admission_control.render()
+    
+    return Response(body, mimetype='text/plain; version=0.0.4')
+
+
 @bp.route('/health/detailed', methods=['GET'])
+@admission_class('critical')
 def detailed_health():
     """
     Health check detalhado com estatísticas
@@ -61,13 +88,14 @@ def detailed_health():
     Returns:
         JSON com informações detalhadas do sistema
     """
-    from app.models import Sensor, Reading, Alert
+    from app.models import Sensor, Alert
+    from app.services.rolling_counters import reading_counters
     
     try:
         # Estatísticas básicas
         total_sensors = Sensor.query.count()
         active_sensors = Sensor.query.filter_by(status='active').count()
-        total_readings = Reading.query.count()
+        total_readings = reading_counters.get_total_readings()
         open_alerts = Alert.query.filter_by(status='open').count()
         
         # Verificar conexão com banco
@@ -2,7 +2,7 @@
 Rotas da API para monitoramento da piscina.
 Endpoints para gerenciar leituras dos sensores da piscina.
 """
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, current_app, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from marshmallow import ValidationError
 from datetime import datetime, date
@@ -15,6 +15,10 @@ from app.schemas.pool_schema import (
     LatestReadingsSchema
 )
 from app.services.pool_service import PoolService
+from app.utils.cache import cached
+from app.utils.admission import admission_class
+from app.utils.device_auth import device_auth_required
+from app.utils.columnar import response_format, wants_bands
 
 
 # Criar blueprint
@@ -23,20 +27,21 @@ pool_bp = Blueprint('pool', __name__, url_prefix='/api/v1/pool')
 
 # Schemas
 reading_create_schema = PoolReadingCreateSchema()
+readings_create_schema = PoolReadingCreateSchema(many=True)
 reading_response_schema = PoolReadingResponseSchema()
-readings_response_schema = PoolReadingResponseSchema(many=True)
 query_schema = PoolReadingListQuerySchema()
 statistics_schema = PoolStatisticsSchema()
 latest_schema = LatestReadingsSchema()
 
 
 @pool_bp.route('/readings', methods=['POST'])
-@jwt_required()
+@device_auth_required
+@admission_class('critical')
 def create_reading():
     """
     Cria uma nova leitura de sensor da piscina.
     
-    Requer autenticação JWT.
+    Requer chave de dispositivo (X-Device-Key) ou autenticação JWT.
     
     Body (JSON):
     {
@@ -82,8 +87,74 @@ def create_reading():
         }), 500
 
 
+@pool_bp.route('/readings/batch', methods=['POST'])
+@device_auth_required
+@admission_class('critical')
+def create_readings_batch():
+    """
+    Cria várias leituras da piscina em uma única requisição e transação.
+    
+    Requer chave de dispositivo (X-Device-Key) ou autenticação JWT.
+    
+    Body (JSON):
+    {
+        "readings": [
+            {"sensor_type": "water_temp", "temperature": 28.5},
+            {"sensor_type": "water_quality", "water_quality": "Boa"}
+        ]
+    }
+    
+    Returns:
+        201: Leituras criadas
+        400: Dados inválidos (nenhuma leitura é gravada)
+        401: Não autenticado
+    """
+    try:
+        payload = request.get_json(silent=True) or {}
+        items = payload.get('readings')
+        
+        if not isinstance(items, list) or not items:
+            return jsonify({
+                'error': 'Campo readings deve ser uma lista não vazia'
+            }), 400
+        
+        max_readings = current_app.config.get('POOL_BATCH_MAX_READINGS', 500)
+        if len(items) > max_readings:
+            return jsonify({
+                'error': f'Máximo de {max_readings} leituras por requisição'
+            }), 400
+        
+        # Validar dados de entrada
+        data = readings_create_schema.load(items)
+        
+        # Criar leituras
+        readings = PoolService.create_readings(data)
+        
+        return jsonify({
+            'message': f'{len(readings)} leituras criadas com sucesso',
+            'created': len(readings)
+        }), 201
+        
+    except ValidationError as e:
+        return jsonify({
+            'error': 'Dados inválidos',
+            'details': e.messages
+        }), 400
+    except ValueError as e:
+        return jsonify({
+            'error': 'Erro ao criar leituras',
+            'details': str(e)
+        }), 400
+    except Exception as e:
+        return jsonify({
+            'error': 'Erro interno do servidor',
+            'details': str(e)
+        }), 500
+
+
 @pool_bp.route('/readings', methods=['GET'])
 @jwt_required()
+@cached(ttl=10, tags=('pool',))
 def get_readings():
     """
     Lista leituras da piscina com filtros opcionais.
@@ -117,7 +188,7 @@ def get_readings():
         
         # Retornar resposta
         return jsonify({
-            'data': readings_response_schema.dump(readings),
+            'data': readings,
             'pagination': {
                 'total': total,
                 'limit': query_params.get('limit', 100),
@@ -139,6 +210,7 @@ def get_readings():
 
 @pool_bp.route('/readings/latest', methods=['GET'])
 @jwt_required()
+@cached(ttl=5, tags=('pool',))
 def get_latest_readings():
     """
     Retorna a última leitura de cada tipo de sensor.
@@ -165,6 +237,8 @@ def get_latest_readings():
 
 @pool_bp.route('/statistics', methods=['GET'])
 @jwt_required()
+@cached(ttl=30, tags=('pool',))
+@admission_class('heavy')
 def get_statistics():
     """
     Retorna estatísticas agregadas das leituras da piscina.
@@ -201,6 +275,8 @@ def get_statistics():
 
 @pool_bp.route('/temperature/history', methods=['GET'])
 @jwt_required()
+@cached(ttl=30, tags=('pool',))
+@admission_class('heavy')
 def get_temperature_history():
     """
     Retorna histórico de temperatura para gráficos.
@@ -211,6 +287,7 @@ def get_temperature_history():
         sensor_type: 'water_temp' ou 'ambient_temp' (obrigatório)
         days: Número de dias de histórico (padrão: 7)
         limit: Número máximo de pontos (padrão: 100)
+        format: 'rows' (padrão) ou 'columnar' ({"t": [epoch], "v": [°C]})
     
     Returns:
         200: Histórico de temperatura
@@ -230,9 +307,26 @@ def get_temperature_history():
                 'error': 'sensor_type deve ser water_temp ou ambient_temp'
             }), 400
         
+        output = response_format()
+        if output is None:
+            return jsonify({
+                'error': 'format deve ser rows ou columnar'
+            }), 400
+        
         days = request.args.get('days', default=7, type=int)
         limit = request.args.get('limit', default=100, type=int)
         
+        if output == 'columnar':
+            return jsonify({
+                'data': PoolService.get_temperature_history_series(
+                    sensor_type=sensor_type,
+                    days=days,
+                    limit=limit
+                ),
+                'sensor_type': sensor_type,
+                'period_days': days
+            }), 200
+        
         readings = PoolService.get_temperature_history(
             sensor_type=sensor_type,
             days=days,
@@ -240,7 +334,7 @@ def get_temperature_history():
         )
         
         return jsonify({
-            'data': readings_response_schema.dump(readings),
+            'data': readings,
             'sensor_type': sensor_type,
             'period_days': days
         }), 200
@@ -254,6 +348,8 @@ def get_temperature_history():
 
 @pool_bp.route('/temperature/daily-average', methods=['GET'])
 @jwt_required()
+@cached(ttl=300, tags=('pool',))
+@admission_class('heavy')
 def get_daily_temperature_average():
     """
     Retorna a média diária de temperatura para gráficos.
@@ -263,6 +359,8 @@ def get_daily_temperature_average():
     Query Parameters:
         sensor_type: 'water_temp' ou 'ambient_temp' (obrigatório)
         days: Número de dias de histórico (padrão: 10)
+        format: 'rows' (padrão) ou 'columnar' ({"t": [epoch], "v": [°C]})
+        bands: true para incluir mínima e máxima do dia ("min", "max"; só columnar)
     
     Returns:
         200: Média diária de temperatura
@@ -289,6 +387,23 @@ def get_daily_temperature_average():
                 'error': 'Parâmetro days deve estar entre 1 e 365'
             }), 400
         
+        output = response_format()
+        if output is None:
+            return jsonify({
+                'error': 'format deve ser rows ou columnar'
+            }), 400
+        
+        if output == 'columnar':
+            return jsonify({
+                'data': PoolService.get_daily_temperature_series(
+                    sensor_type=sensor_type,
+                    days=days,
+                    bands=wants_bands()
+                ),
+                'sensor_type': sensor_type,
+                'period_days': days
+            }), 200
+        
         daily_averages = PoolService.get_daily_temperature_average(
             sensor_type=sensor_type,
             days=days
@@ -309,6 +424,7 @@ def get_daily_temperature_average():
 
 @pool_bp.route('/alerts', methods=['GET'])
 @jwt_required()
+@cached(ttl=10, tags=('pool',))
 def get_alerts():
     """
     Retorna alertas ativos de qualidade da água.
@@ -336,6 +452,7 @@ def get_alerts():
 
 # Endpoint de health check (sem autenticação)
 @pool_bp.route('/health', methods=['GET'])
+@admission_class('critical')
 def health_check():
     """
     Health check do módulo de piscina.
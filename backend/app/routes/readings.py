@@ -8,12 +8,19 @@ from flask_jwt_extended import jwt_required
 from app import db
 from app.models.reading import Reading
 from app.models.sensor import Sensor
+from app.services.reading_service import ReadingService
+from app.services.ingestion_service import IngestionService
+from app.services.rolling_counters import reading_counters
+from app.utils.cache import cached, invalidate_tags
+from app.utils.admission import admission_class
+from app.utils.device_auth import device_auth_required
 from datetime import datetime, timedelta
 
 bp = Blueprint('readings', __name__)
 
 
 @bp.route('', methods=['GET'])
+@cached(ttl=5, tags=('readings',))
 def list_readings():
     """
     Listar leituras
@@ -28,40 +35,26 @@ def list_readings():
     end_date = request.args.get('end_date')
     limit = request.args.get('limit', default=100, type=int)
     
-    query = Reading.query
-    
-    if sensor_id:
-        query = query.filter_by(sensor_id=sensor_id)
+    start = end = None
     
     if start_date:
         try:
             start = datetime.fromisoformat(start_date.replace('Z', '+00:00'))
-            query = query.filter(Reading.timestamp >= start)
         except ValueError:
             return jsonify({'error': 'Formato de start_date inválido. Use ISO format.'}), 400
     
     if end_date:
         try:
             end = datetime.fromisoformat(end_date.replace('Z', '+00:00'))
-            query = query.filter(Reading.timestamp <= end)
         except ValueError:
             return jsonify({'error': 'Formato de end_date inválido. Use ISO format.'}), 400
     
-    # Ordenar por timestamp decrescente (mais recentes primeiro)
-    readings = query.order_by(Reading.timestamp.desc()).limit(limit).all()
+    # Ordenadas por timestamp decrescente (mais recentes primeiro)
+    readings = ReadingService.list_readings(sensor_id, start, end, limit)
     
     return jsonify({
         'count': len(readings),
-        'readings': [{
-            'id': reading.id,
-            'sensor_id': reading.sensor_id,
-            'sensor_serial': reading.sensor.serial_number if reading.sensor else None,
-            'activity': reading.activity,
-            'battery_level': reading.battery_level,
-            'signal_strength': reading.signal_strength,
-            'timestamp': reading.timestamp.isoformat(),
-            'metadata': reading.metadata
-        } for reading in readings]
+        'readings': readings
     }), 200
 
 
@@ -73,6 +66,8 @@ def get_reading(reading_id):
     if not reading:
         return jsonify({'error': 'Leitura não encontrada'}), 404
     
+    metadata = reading.sensor_metadata or {}
+    
     return jsonify({
         'id': reading.id,
         'sensor_id': reading.sensor_id,
@@ -83,20 +78,24 @@ def get_reading(reading_id):
             'location': reading.sensor.location
         } if reading.sensor else None,
         'activity': reading.activity,
-        'battery_level': reading.battery_level,
-        'signal_strength': reading.signal_strength,
-        'temperature': reading.temperature,
-        'humidity': reading.humidity,
+        'battery_level': metadata.get('battery_level'),
+        'signal_strength': metadata.get('signal_strength', metadata.get('rssi_dbm')),
+        'temperature': metadata.get('temperature'),
+        'humidity': metadata.get('humidity'),
         'timestamp': reading.timestamp.isoformat(),
-        'metadata': reading.metadata
+        'metadata': reading.sensor_metadata
     }), 200
 
 
 @bp.route('', methods=['POST'])
+@device_auth_required
+@admission_class('critical')
 def create_reading():
     """
     Criar nova leitura (usado pelo gateway MQTT)
     
+    Requer chave de dispositivo (X-Device-Key) ou autenticação JWT.
+    
     Payload:
     {
         "sensor_id": int,
@@ -156,6 +155,8 @@ def create_reading():
         
         db.session.commit()
         
+        ReadingService.after_commit([(sensor, reading.activity, reading.timestamp)], reading.id)
+        
         return jsonify({
             'message': 'Leitura criada com sucesso',
             'reading': {
@@ -172,10 +173,14 @@ def create_reading():
 
 
 @bp.route('/bulk', methods=['POST'])
+@device_auth_required
+@admission_class('critical')
 def create_bulk_readings():
     """
     Criar múltiplas leituras de uma vez
     
+    Requer chave de dispositivo (X-Device-Key) ou autenticação JWT.
+    
     Payload:
     {
         "readings": [
@@ -195,6 +200,8 @@ def create_bulk_readings():
     
     readings_created = 0
     errors = []
+    ingested = []
+    created = []
     
     try:
         for reading_data in data['readings']:
@@ -235,10 +242,16 @@ def create_bulk_readings():
             sensor.last_reading_at = datetime.utcnow()
             sensor.total_readings += 1
             
+            ingested.append((sensor, reading.activity, reading.timestamp))
+            created.append(reading)
             readings_created += 1
         
+        db.session.flush()
+        reading_id = created[0].id if created else None
         db.session.commit()
         
+        ReadingService.after_commit(ingested, reading_id)
+        
         return jsonify({
             'message': f'{readings_created} leituras criadas com sucesso',
             'created': readings_created,
@@ -250,7 +263,47 @@ def create_bulk_readings():
         return jsonify({'error': str(e)}), 500
 
 
+@bp.route('/ingest', methods=['POST'])
+@device_auth_required
+@admission_class('critical')
+def ingest_mqtt_messages():
+    """
+    Ingerir mensagens MQTT de sensores (idempotente)
+    
+    Mensagens já gravadas (mesmo gateway_id + message_id) são ignoradas,
+    de modo que reentregas e reenvios de backlog não duplicam leituras.
+    Requer chave de dispositivo (X-Device-Key) ou autenticação JWT.
+    
+    Payload:
+    {
+        "messages": [
+            {
+                "message_id": "gateway_001_42",
+                "gateway_id": "gateway_001",
+                "timestamp": "...",
+                "sensor": {"serial_number": "..."},
+                "data": {"activity": 1, "timestamp": "..."},
+                "metadata": {...}
+            }
+        ]
+    }
+    """
+    data = request.get_json(silent=True) or {}
+    messages = data.get('messages')
+    
+    if not isinstance(messages, list):
+        return jsonify({'error': 'Campo messages deve ser uma lista'}), 400
+    
+    try:
+        result = IngestionService.ingest_mqtt_messages(messages)
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+    
+    return jsonify(result), 200 if result['inserted'] == 0 else 201
+
+
 @bp.route('/sensor/<int:sensor_id>/latest', methods=['GET'])
+@cached(ttl=5, tags=('readings',))
 def get_latest_reading(sensor_id):
     """Obter última leitura de um sensor"""
     sensor = Sensor.query.get(sensor_id)
@@ -258,20 +311,12 @@ def get_latest_reading(sensor_id):
     if not sensor:
         return jsonify({'error': 'Sensor não encontrado'}), 404
     
-    reading = Reading.query.filter_by(sensor_id=sensor_id)\
-        .order_by(Reading.timestamp.desc()).first()
+    reading = ReadingService.get_latest_reading(sensor_id)
     
     if not reading:
         return jsonify({'error': 'Nenhuma leitura encontrada para este sensor'}), 404
     
-    return jsonify({
-        'id': reading.id,
-        'sensor_id': reading.sensor_id,
-        'activity': reading.activity,
-        'battery_level': reading.battery_level,
-        'signal_strength': reading.signal_strength,
-        'timestamp': reading.timestamp.isoformat()
-    }), 200
+    return jsonify(reading), 200
 
 
 @bp.route('/<int:reading_id>', methods=['DELETE'])
@@ -284,9 +329,17 @@ def delete_reading(reading_id):
         return jsonify({'error': 'Leitura não encontrada'}), 404
     
     try:
+        sensor = reading.sensor
+        activity, timestamp = reading.activity, reading.timestamp
+        
         db.session.delete(reading)
+        if sensor:
+            sensor.total_readings = max(0, (sensor.total_readings or 0) - 1)
         db.session.commit()
         
+        reading_counters.record_deleted(sensor, activity, timestamp)
+        invalidate_tags('readings')
+        
         return jsonify({'message': 'Leitura deletada com sucesso'}), 200
         
     except Exception as e:
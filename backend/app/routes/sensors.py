@@ -7,12 +7,16 @@ from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt
 from app import db
 from app.models.sensor import Sensor
+from app.services.occupancy_service import occupancy_engine
+from app.services.rolling_counters import reading_counters
+from app.utils.cache import cached, invalidate_tags
 from datetime import datetime
 
 bp = Blueprint('sensors', __name__)
 
 
 @bp.route('', methods=['GET'])
+@cached(ttl=30, tags=('sensors', 'readings'))
 def list_sensors():
     """
     Listar todos os sensores
@@ -20,11 +24,13 @@ def list_sensors():
     - status: filtrar por status (active, inactive, maintenance)
     - protocol: filtrar por protocolo (LoRa, ZigBee, Sigfox, RFID)
     - location: filtrar por localização
+    - include_stats: incluir estatísticas das últimas 24h (true/false)
     """
     # Filtros opcionais
     status = request.args.get('status')
     protocol = request.args.get('protocol')
     location = request.args.get('location')
+    include_stats = request.args.get('include_stats', 'false').lower() in ('1', 'true', 'yes')
     
     query = Sensor.query
     
@@ -37,22 +43,33 @@ def list_sensors():
     
     sensors = query.all()
     
+    sensors_data = [{
+        'id': sensor.id,
+        'serial_number': sensor.serial_number,
+        'protocol': sensor.protocol,
+        'location': sensor.location,
+        'role': sensor.role,
+        'zone': sensor.zone,
+        'status': sensor.status,
+        'battery_level': sensor.battery_level,
+        'last_reading_at': sensor.last_reading_at.isoformat() if sensor.last_reading_at else None,
+        'created_at': sensor.created_at.isoformat()
+    } for sensor in sensors]
+    
+    if include_stats:
+        # Estatísticas de todos os sensores em uma única query agregada
+        stats = Sensor.get_statistics_bulk(sensors)
+        for sensor, sensor_data in zip(sensors, sensors_data):
+            sensor_data['stats'] = stats[sensor.id]
+    
     return jsonify({
         'count': len(sensors),
-        'sensors': [{
-            'id': sensor.id,
-            'serial_number': sensor.serial_number,
-            'protocol': sensor.protocol,
-            'location': sensor.location,
-            'status': sensor.status,
-            'battery_level': sensor.battery_level,
-            'last_reading_at': sensor.last_reading_at.isoformat() if sensor.last_reading_at else None,
-            'created_at': sensor.created_at.isoformat()
-        } for sensor in sensors]
+        'sensors': sensors_data
     }), 200
 
 
 @bp.route('/<int:sensor_id>', methods=['GET'])
+@cached(ttl=30, tags=('sensors', 'readings'))
 def get_sensor(sensor_id):
     """Obter detalhes de um sensor específico"""
     sensor = Sensor.query.get(sensor_id)
@@ -66,6 +83,8 @@ def get_sensor(sensor_id):
         'protocol': sensor.protocol,
         'location': sensor.location,
         'description': sensor.description,
+        'role': sensor.role,
+        'zone': sensor.zone,
         'status': sensor.status,
         'battery_level': sensor.battery_level,
         'signal_strength': sensor.signal_strength,
@@ -88,7 +107,9 @@ def create_sensor():
         "serial_number": "string",
         "protocol": "LoRa|ZigBee|Sigfox|RFID",
         "location": "string",
-        "description": "string"
+        "description": "string",
+        "role": "entry|exit|zone" (opcional),
+        "zone": "string" (opcional)
     }
     """
     data = request.get_json()
@@ -110,19 +131,25 @@ def create_sensor():
             protocol=data['protocol'],
             location=data['location'],
             description=data.get('description', ''),
+            role=data.get('role'),
+            zone=data.get('zone'),
             status='active'
         )
         
         db.session.add(sensor)
         db.session.commit()
         
+        invalidate_tags('sensors')
+        
         return jsonify({
             'message': 'Sensor criado com sucesso',
             'sensor': {
                 'id': sensor.id,
                 'serial_number': sensor.serial_number,
                 'protocol': sensor.protocol,
-                'location': sensor.location
+                'location': sensor.location,
+                'role': sensor.role,
+                'zone': sensor.zone
             }
         }), 201
         
@@ -141,7 +168,9 @@ def update_sensor(sensor_id):
     {
         "location": "string",
         "description": "string",
-        "status": "active|inactive|maintenance"
+        "status": "active|inactive|maintenance",
+        "role": "entry|exit|zone",
+        "zone": "string"
     }
     """
     sensor = Sensor.query.get(sensor_id)
@@ -163,15 +192,29 @@ def update_sensor(sensor_id):
         if 'signal_strength' in data:
             sensor.signal_strength = data['signal_strength']
         
+        role_changed = False
+        for field in ('role', 'zone'):
+            if field in data and data[field] != getattr(sensor, field):
+                setattr(sensor, field, data[field])
+                role_changed = True
+        
         sensor.updated_at = datetime.utcnow()
         db.session.commit()
         
+        invalidate_tags('sensors')
+        
+        # Papel/zona alterados: recontar a ocupação do dia a partir do banco
+        if role_changed:
+            occupancy_engine.reset()
+        
         return jsonify({
             'message': 'Sensor atualizado com sucesso',
             'sensor': {
                 'id': sensor.id,
                 'serial_number': sensor.serial_number,
                 'location': sensor.location,
+                'role': sensor.role,
+                'zone': sensor.zone,
                 'status': sensor.status
             }
         }), 200
@@ -198,6 +241,13 @@ def delete_sensor(sensor_id):
         db.session.delete(sensor)
         db.session.commit()
         
+        if sensor.role:
+            occupancy_engine.reset()
+        
+        # As leituras do sensor foram removidas em cascata
+        reading_counters.reset()
+        invalidate_tags('sensors', 'readings')
+        
         return jsonify({'message': 'Sensor deletado com sucesso'}), 200
         
     except Exception as e:
@@ -206,6 +256,7 @@ def delete_sensor(sensor_id):
 
 
 @bp.route('/protocols', methods=['GET'])
+@cached(ttl=300, tags=('sensors',))
 def list_protocols():
     """Listar protocolos suportados"""
     return jsonify({
@@ -213,7 +264,17 @@ def list_protocols():
     }), 200
 
 
+@bp.route('/roles', methods=['GET'])
+@cached(ttl=300, tags=('sensors',))
+def list_roles():
+    """Listar papéis de sensor na contagem de ocupação"""
+    return jsonify({
+        'roles': ['entry', 'exit', 'zone']
+    }), 200
+
+
 @bp.route('/status-options', methods=['GET'])
+@cached(ttl=300, tags=('sensors',))
 def list_status_options():
     """Listar opções de status"""
     return jsonify({
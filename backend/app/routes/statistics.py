@@ -3,124 +3,68 @@ Statistics Routes
 Endpoints para estatísticas e relatórios
 """
 
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, Response, current_app, request, jsonify, stream_with_context
 from flask_jwt_extended import jwt_required
-from app import db
 from app.models.reading import Reading
 from app.models.sensor import Sensor
 from app.models.statistics import Statistics
+from app.services.occupancy_service import occupancy_engine
+from app.services.statistics_service import StatisticsService
+from app.services.export_service import ExportService, EXPORT_FORMATS
+from app.utils.cache import cached
+from app.utils.admission import admission_class
+from app.utils.columnar import response_format
 from datetime import datetime, timedelta
-from sqlalchemy import func
 
 bp = Blueprint('statistics', __name__)
 
 
 @bp.route('/overview', methods=['GET'])
+@cached(ttl=5, tags=('readings', 'sensors'))
 def get_overview():
     """
     Visão geral do sistema
     Retorna estatísticas gerais sobre sensores e leituras
+    Query params:
+    - window: janela adicional em minutos (1 a 1440)
     """
-    # Contar sensores por status
-    sensors_by_status = db.session.query(
-        Sensor.status, 
-        func.count(Sensor.id)
-    ).group_by(Sensor.status).all()
-    
-    # Contar sensores por protocolo
-    sensors_by_protocol = db.session.query(
-        Sensor.protocol,
-        func.count(Sensor.id)
-    ).group_by(Sensor.protocol).all()
-    
-    # Total de leituras
-    total_readings = Reading.query.count()
+    window = request.args.get('window', type=int)
     
-    # Leituras nas últimas 24h
-    yesterday = datetime.utcnow() - timedelta(days=1)
-    readings_24h = Reading.query.filter(Reading.timestamp >= yesterday).count()
+    if window is not None and not 1 <= window <= 1440:
+        return jsonify({'error': 'window deve estar entre 1 e 1440 minutos'}), 400
     
-    # Leituras com atividade nas últimas 24h
-    activity_24h = Reading.query.filter(
-        Reading.timestamp >= yesterday,
-        Reading.activity == 1
-    ).count()
-    
-    return jsonify({
-        'sensors': {
-            'total': Sensor.query.count(),
-            'by_status': {status: count for status, count in sensors_by_status},
-            'by_protocol': {protocol: count for protocol, count in sensors_by_protocol}
-        },
-        'readings': {
-            'total': total_readings,
-            'last_24h': readings_24h,
-            'activity_24h': activity_24h
-        },
-        'timestamp': datetime.utcnow().isoformat()
-    }), 200
+    return jsonify(StatisticsService.get_overview(window)), 200
 
 
 @bp.route('/activity', methods=['GET'])
+@cached(ttl=30, tags=('readings',))
+@admission_class('heavy')
 def get_activity_stats():
     """
     Estatísticas de atividade
     Query params:
     - period: day, week, month (default: day)
     - sensor_id: filtrar por sensor específico
+    - format: rows (default) ou columnar (timeline como {"t": [epoch], "v": [detecções]})
     """
     period = request.args.get('period', 'day')
     sensor_id = request.args.get('sensor_id', type=int)
     
-    # Definir período
-    if period == 'day':
-        start_date = datetime.utcnow() - timedelta(days=1)
-        interval = timedelta(hours=1)
-    elif period == 'week':
-        start_date = datetime.utcnow() - timedelta(weeks=1)
-        interval = timedelta(days=1)
-    elif period == 'month':
-        start_date = datetime.utcnow() - timedelta(days=30)
-        interval = timedelta(days=1)
-    else:
-        return jsonify({'error': 'Período inválido. Use: day, week, month'}), 400
-    
-    # Query base
-    query = Reading.query.filter(Reading.timestamp >= start_date)
+    output = response_format()
+    if output is None:
+        return jsonify({'error': 'format deve ser rows ou columnar'}), 400
     
-    if sensor_id:
-        query = query.filter_by(sensor_id=sensor_id)
-    
-    # Contar atividades
-    total_detections = query.filter(Reading.activity == 1).count()
-    total_readings = query.count()
-    
-    # Atividade por hora/dia
-    readings = query.all()
-    
-    # Agrupar por intervalo
-    activity_timeline = {}
-    current = start_date
-    end = datetime.utcnow()
-    
-    while current <= end:
-        next_interval = current + interval
-        count = len([r for r in readings if current <= r.timestamp < next_interval and r.activity == 1])
-        activity_timeline[current.isoformat()] = count
-        current = next_interval
+    try:
+        stats = StatisticsService.get_activity_stats(period, sensor_id, columnar=output == 'columnar')
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     
-    return jsonify({
-        'period': period,
-        'start_date': start_date.isoformat(),
-        'end_date': datetime.utcnow().isoformat(),
-        'total_detections': total_detections,
-        'total_readings': total_readings,
-        'detection_rate': round((total_detections / total_readings * 100), 2) if total_readings > 0 else 0,
-        'timeline': activity_timeline
-    }), 200
+    return jsonify(stats), 200
 
 
 @bp.route('/sensors', methods=['GET'])
+@cached(ttl=30, tags=('readings', 'sensors'))
+@admission_class('heavy')
 def get_sensors_stats():
     """
     Estatísticas por sensor
@@ -128,25 +72,17 @@ def get_sensors_stats():
     """
     sensors = Sensor.query.all()
     
+    # Totais, detecções, última leitura e bateria média de todos os sensores
+    # em uma única query agregada
+    rollup = Reading.get_sensor_rollup()
+    
     stats = []
     for sensor in sensors:
-        # Leituras totais
-        total_readings = Reading.query.filter_by(sensor_id=sensor.id).count()
-        
-        # Detecções (activity = 1)
-        detections = Reading.query.filter_by(
-            sensor_id=sensor.id,
-            activity=1
-        ).count()
-        
-        # Última leitura
-        last_reading = Reading.query.filter_by(sensor_id=sensor.id)\
-            .order_by(Reading.timestamp.desc()).first()
-        
-        # Média de bateria
-        avg_battery = db.session.query(func.avg(Reading.battery_level))\
-            .filter(Reading.sensor_id == sensor.id)\
-            .scalar()
+        sensor_rollup = rollup.get(sensor.id, {})
+        total_readings = sensor_rollup.get('total_readings', 0)
+        detections = sensor_rollup.get('total_detections', 0)
+        last_reading = sensor_rollup.get('last_reading')
+        avg_battery = sensor_rollup.get('avg_battery_level')
         
         stats.append({
             'sensor_id': sensor.id,
@@ -157,7 +93,7 @@ def get_sensors_stats():
             'total_readings': total_readings,
             'total_detections': detections,
             'detection_rate': round((detections / total_readings * 100), 2) if total_readings > 0 else 0,
-            'last_reading': last_reading.timestamp.isoformat() if last_reading else None,
+            'last_reading': last_reading.isoformat() if last_reading else None,
             'avg_battery_level': round(avg_battery, 2) if avg_battery else None,
             'current_battery_level': sensor.battery_level
         })
@@ -172,66 +108,20 @@ def get_sensors_stats():
 def get_capacity_stats():
     """
     Estatísticas de capacidade do parque
-    Calcula ocupação atual baseada nas detecções
-    """
-    # Capacidade máxima (exemplo - ajustar conforme necessário)
-    max_capacity = 5000
-    
-    # Calcular ocupação nas últimas 24h
-    yesterday = datetime.utcnow() - timedelta(days=1)
-    
-    # Entradas (detecções nos sensores de entrada)
-    entries_sensors = Sensor.query.filter(
-        Sensor.location.ilike('%entrada%')
-    ).all()
-    
-    total_entries = 0
-    for sensor in entries_sensors:
-        entries = Reading.query.filter(
-            Reading.sensor_id == sensor.id,
-            Reading.timestamp >= yesterday,
-            Reading.activity == 1
-        ).count()
-        total_entries += entries
-    
-    # Saídas (detecções nos sensores de saída)
-    exits_sensors = Sensor.query.filter(
-        Sensor.location.ilike('%saída%')
-    ).all()
-    
-    total_exits = 0
-    for sensor in exits_sensors:
-        exits = Reading.query.filter(
-            Reading.sensor_id == sensor.id,
-            Reading.timestamp >= yesterday,
-            Reading.activity == 1
-        ).count()
-        total_exits += exits
-    
-    # Ocupação atual estimada
-    current_occupation = max(0, total_entries - total_exits)
-    occupation_percentage = round((current_occupation / max_capacity * 100), 2)
+    Ocupação atual mantida em memória pelo motor de ocupação
+    (entradas - saídas desde a meia-noite no fuso do parque)
     
-    # Determinar status
-    if occupation_percentage < 70:
-        status = 'normal'
-    elif occupation_percentage < 90:
-        status = 'alert'
-    else:
-        status = 'critical'
+    Query params:
+    - max_capacity: capacidade máxima (default: PARK_MAX_CAPACITY)
+    """
+    max_capacity = request.args.get('max_capacity', type=int)
     
-    return jsonify({
-        'max_capacity': max_capacity,
-        'current_occupation': current_occupation,
-        'occupation_percentage': occupation_percentage,
-        'status': status,
-        'entries_24h': total_entries,
-        'exits_24h': total_exits,
-        'timestamp': datetime.utcnow().isoformat()
-    }), 200
+    return jsonify(occupancy_engine.get_capacity_stats(max_capacity)), 200
 
 
 @bp.route('/history', methods=['GET'])
+@cached(ttl=60, tags=('readings',))
+@admission_class('heavy')
 def get_historical_stats():
     """
     Estatísticas históricas
@@ -273,39 +163,60 @@ def get_historical_stats():
 
 @bp.route('/export', methods=['GET'])
 @jwt_required()
+@admission_class('heavy')
 def export_stats():
     """
-    Exportar estatísticas (CSV ou JSON)
+    Exportar leituras em streaming (CSV, NDJSON ou JSON)
     Query params:
-    - format: csv ou json (default: json)
+    - format: csv, ndjson ou json (default: json)
     - period: day, week, month
+    - gzip: true para compactar o arquivo (.gz)
     """
     format_type = request.args.get('format', 'json')
     period = request.args.get('period', 'day')
+    use_gzip = request.args.get('gzip', 'false').lower() in ('true', '1', 'yes')
+    
+    if format_type not in EXPORT_FORMATS:
+        return jsonify({'error': 'Formato inválido. Use csv, ndjson ou json'}), 400
     
     # Buscar dados conforme período
+    end_date = datetime.utcnow()
     if period == 'day':
-        start_date = datetime.utcnow() - timedelta(days=1)
+        start_date = end_date - timedelta(days=1)
     elif period == 'week':
-        start_date = datetime.utcnow() - timedelta(weeks=1)
+        start_date = end_date - timedelta(weeks=1)
     elif period == 'month':
-        start_date = datetime.utcnow() - timedelta(days=30)
+        start_date = end_date - timedelta(days=30)
     else:
         return jsonify({'error': 'Período inválido'}), 400
     
-    readings = Reading.query.filter(Reading.timestamp >= start_date).all()
+    chunks = ExportService.iter_reading_chunks(
+        start_date,
+        end_date,
+        chunk_size=current_app.config.get('EXPORT_CHUNK_SIZE', 5000)
+    )
     
-    if format_type == 'json':
-        return jsonify({
+    if format_type == 'csv':
+        parts = ExportService.csv_lines(chunks)
+    elif format_type == 'ndjson':
+        parts = ExportService.ndjson_lines(chunks)
+    else:
+        parts = ExportService.json_document(chunks, {
             'period': period,
             'start_date': start_date.isoformat(),
-            'end_date': datetime.utcnow().isoformat(),
-            'readings': [{
-                'sensor_id': r.sensor_id,
-                'activity': r.activity,
-                'timestamp': r.timestamp.isoformat()
-            } for r in readings]
-        }), 200
+            'end_date': end_date.isoformat()
+        })
+    
+    mimetype, extension = EXPORT_FORMATS[format_type]
+    filename = f"readings_{period}_{end_date.strftime('%Y%m%d_%H%M%S')}.{extension}"
+    
+    if use_gzip:
+        parts = ExportService.gzip_stream(parts)
+        mimetype = 'application/gzip'
+        filename += '.gz'
     
-    # TODO: Implementar exportação CSV
-    return jsonify({'error': 'Formato CSV ainda não implementado'}), 501
+    return Response(
+        stream_with_context(parts),
+        mimetype=mimetype,
+        headers={'Content-Disposition': f'attachment; filename={filename}'}
+    )
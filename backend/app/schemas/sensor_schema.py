@@ -15,6 +15,8 @@ class SensorSchema(Schema):
     )
     location = fields.Str(required=True, validate=validate.Length(max=200))
     description = fields.Str(validate=validate.Length(max=500))
+    role = fields.Str(validate=validate.OneOf(['entry', 'exit', 'zone']), allow_none=True)
+    zone = fields.Str(validate=validate.Length(max=50), allow_none=True)
     status = fields.Str(
         validate=validate.OneOf(['active', 'inactive', 'maintenance', 'error']),
         load_default='active'
@@ -38,6 +40,8 @@ class SensorCreateSchema(Schema):
     )
     location = fields.Str(required=True, validate=validate.Length(max=200))
     description = fields.Str(validate=validate.Length(max=500))
+    role = fields.Str(validate=validate.OneOf(['entry', 'exit', 'zone']), allow_none=True)
+    zone = fields.Str(validate=validate.Length(max=50), allow_none=True)
     status = fields.Str(
         validate=validate.OneOf(['active', 'inactive', 'maintenance', 'error']),
         load_default='active'
@@ -58,6 +62,8 @@ class SensorUpdateSchema(Schema):
     """Schema para atualização de sensor"""
     location = fields.Str(validate=validate.Length(max=200))
     description = fields.Str(validate=validate.Length(max=500))
+    role = fields.Str(validate=validate.OneOf(['entry', 'exit', 'zone']), allow_none=True)
+    zone = fields.Str(validate=validate.Length(max=50), allow_none=True)
     status = fields.Str(
         validate=validate.OneOf(['active', 'inactive', 'maintenance', 'error'])
     )
@@ -0,0 +1,144 @@
+"""
+Service de Exportação
+Exportação de leituras em streaming (CSV, NDJSON, JSON), com gzip opcional
+"""
+
+import csv
+import io
+import json
+import zlib
+from datetime import datetime
+from typing import Iterator, Iterable, Optional
+from sqlalchemy import select
+from app import db
+from app.models.reading import Reading
+
+
+EXPORT_FORMATS = {
+    'csv': ('text/csv', 'csv'),
+    'ndjson': ('application/x-ndjson', 'ndjson'),
+    'json': ('application/json', 'json'),
+}
+
+EXPORT_COLUMNS = ('sensor_id', 'activity', 'timestamp')
+
+
+class ExportService:
+    """Serviço de exportação de leituras"""
+
+    @staticmethod
+    def iter_reading_chunks(
+        start_date: datetime,
+        end_date: Optional[datetime] = None,
+        chunk_size: int = 5000
+    ) -> Iterator[list]:
+        """
+        Percorrer as leituras do período em blocos
+
+        Usa cursor no servidor (stream_results) e yield_per, de modo que
+        apenas um bloco de tuplas fica em memória por vez.
+
+        Args:
+            start_date: Data inicial
+            end_date: Data final (opcional)
+            chunk_size: Linhas por bloco
+
+        Yields:
+            list: Bloco de tuplas (sensor_id, activity, timestamp)
+        """
+        stmt = select(
+            Reading.sensor_id,
+            Reading.activity,
+            Reading.timestamp
+        ).where(
+            Reading.timestamp >= start_date
+        )
+
+        if end_date:
+            stmt = stmt.where(Reading.timestamp <= end_date)
+
+        stmt = stmt.order_by(Reading.timestamp, Reading.id).execution_options(
+            stream_results=True,
+            yield_per=chunk_size
+        )
+
+        result = db.session.execute(stmt)
+        try:
+            for partition in result.partitions():
+                yield partition
+        finally:
+            result.close()
+
+    @staticmethod
+    def csv_lines(chunks: Iterable[list]) -> Iterator[str]:
+        """Gerar o CSV bloco a bloco (com cabeçalho)"""
+        buffer = io.StringIO()
+        writer = csv.writer(buffer, lineterminator='\n')
+        writer.writerow(EXPORT_COLUMNS)
+
+        for chunk in chunks:
+            for sensor_id, activity, timestamp in chunk:
+                writer.writerow((sensor_id, activity, timestamp.isoformat()))
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+
+        if buffer.tell():
+            yield buffer.getvalue()
+
+    @staticmethod
+    def ndjson_lines(chunks: Iterable[list]) -> Iterator[str]:
+        """Gerar NDJSON (um objeto por linha) bloco a bloco"""
+        for chunk in chunks:
+            yield ''.join(
+                '{"sensor_id":%d,"activity":%d,"timestamp":"%s"}\n' % (
+                    sensor_id, activity, timestamp.isoformat()
+                )
+                for sensor_id, activity, timestamp in chunk
+            )
+
+    @staticmethod
+    def json_document(chunks: Iterable[list], header: dict) -> Iterator[str]:
+        """
+        Gerar um documento JSON único em streaming
+
+        Mantém o formato anterior do export: objeto com os campos de
+        `header` e a lista `readings`.
+        """
+        head = json.dumps(header, separators=(',', ':'))
+        yield head[:-1] + ',"readings":['
+
+        first = True
+        for chunk in chunks:
+            body = ','.join(
+                '{"sensor_id":%d,"activity":%d,"timestamp":"%s"}' % (
+                    sensor_id, activity, timestamp.isoformat()
+                )
+                for sensor_id, activity, timestamp in chunk
+            )
+            if not body:
+                continue
+            yield body if first else ',' + body
+            first = False
+
+        yield ']}'
+
+    @staticmethod
+    def gzip_stream(parts: Iterable[str], level: int = 6) -> Iterator[bytes]:
+        """
+        Comprimir um fluxo de texto em gzip sem acumulá-lo em memória
+
+        Args:
+            parts: Partes de texto (UTF-8)
+            level: Nível de compressão zlib
+
+        Yields:
+            bytes: Blocos gzip
+        """
+        # wbits=31: formato gzip (cabeçalho + CRC)
+        compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+        for part in parts:
+            data = compressor.compress(part.encode('utf-8'))
+            if data:
+                yield data
+        yield compressor.flush()
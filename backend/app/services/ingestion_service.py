@@ -0,0 +1,214 @@
+"""
+Service de Ingestão
+Gravação idempotente de mensagens MQTT de sensores
+"""
+
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Set
+from flask import current_app
+from sqlalchemy import insert, select, tuple_
+from sqlalchemy.exc import IntegrityError
+from app import db
+from app.models.reading import Reading
+from app.models.sensor import Sensor
+from app.services.reading_service import ReadingService
+from app.utils.dedup import RecentKeys
+
+
+# Chaves (gateway_id, message_id) gravadas recentemente neste processo
+recent_messages = RecentKeys()
+
+
+def _parse_timestamp(value: str) -> datetime:
+    """Timestamp ISO da mensagem em UTC sem tzinfo (formato do banco)"""
+    timestamp = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    if timestamp.tzinfo is not None:
+        timestamp = timestamp.astimezone(timezone.utc).replace(tzinfo=None)
+    return timestamp
+
+
+class IngestionService:
+    """Serviço de ingestão de mensagens MQTT"""
+
+    @staticmethod
+    def ingest_mqtt_messages(messages: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Gravar um lote de mensagens de sensores de forma idempotente
+
+        Reentregas são descartadas primeiro pelo LRU em memória e, para
+        chaves fora dele, por uma consulta ao índice único (gateway_id,
+        message_id) antes do INSERT. Só as leituras novas são gravadas e
+        contadas. Reenviar o mesmo lote não altera o banco nem os
+        contadores.
+
+        Args:
+            messages: Mensagens no formato publicado pelo gateway
+
+        Returns:
+            dict: received, inserted, duplicates e errors
+        """
+        errors = []
+        pending = {}
+        unkeyed = []
+
+        for message in messages:
+            try:
+                row = {
+                    'serial_number': message['sensor']['serial_number'],
+                    'activity': int(message['data']['activity']),
+                    'timestamp': _parse_timestamp(message['data'].get('timestamp') or message['timestamp']),
+                    'sensor_metadata': message.get('metadata') or None,
+                    'message_id': message.get('message_id'),
+                    'gateway_id': message.get('gateway_id')
+                }
+            except (KeyError, TypeError, ValueError, AttributeError) as e:
+                errors.append({'message_id': message.get('message_id') if isinstance(message, dict) else None,
+                               'error': f'Mensagem inválida: {e}'})
+                continue
+
+            if row['message_id'] is None:
+                unkeyed.append(row)
+            else:
+                # Duplicatas dentro do próprio lote: mantém a primeira
+                pending.setdefault((row['gateway_id'], row['message_id']), row)
+
+        # Guarda em memória (reentregas recentes não chegam ao banco)
+        keys = list(pending)
+        fresh = recent_messages.filter_new(keys)
+        rows = [pending[key] for key, is_new in zip(keys, fresh) if is_new] + unkeyed
+        duplicates = len(messages) - len(errors) - len(rows)
+
+        # Resolver sensores em uma única query
+        serials = {row['serial_number'] for row in rows}
+        sensors = {
+            sensor.serial_number: sensor
+            for sensor in Sensor.query.filter(Sensor.serial_number.in_(serials)).all()
+        } if serials else {}
+
+        values = []
+        ingested = []
+        for row in rows:
+            sensor = sensors.get(row['serial_number'])
+            if sensor is None:
+                errors.append({'message_id': row['message_id'],
+                               'error': f"Sensor não encontrado: {row['serial_number']}"})
+                continue
+            values.append({
+                'sensor_id': sensor.id,
+                'activity': row['activity'],
+                'timestamp': row['timestamp'],
+                'sensor_metadata': row['sensor_metadata'],
+                'message_id': row['message_id'],
+                'gateway_id': row['gateway_id'],
+                'created_at': datetime.utcnow()
+            })
+            ingested.append((sensor, row['activity'], row['timestamp'], row['sensor_metadata']))
+
+        if not values:
+            return {
+                'received': len(messages),
+                'inserted': 0,
+                'duplicates': duplicates,
+                'errors': errors
+            }
+
+        batch_size = current_app.config.get('INGEST_BATCH_SIZE', 500)
+        for attempt in (1, 2):
+            try:
+                # Chaves fora do LRU que já estão no banco não são regravadas
+                existing = IngestionService._existing_keys(
+                    [(row['gateway_id'], row['message_id']) for row in values if row['message_id'] is not None],
+                    batch_size
+                )
+                new_rows = [
+                    index for index, row in enumerate(values)
+                    if (row['gateway_id'], row['message_id']) not in existing
+                ]
+                new_values = [values[index] for index in new_rows]
+                new_ingested = [ingested[index] for index in new_rows]
+
+                reading_id = None
+                for start in range(0, len(new_values), batch_size):
+                    result = db.session.execute(insert(Reading).values(new_values[start:start + batch_size]))
+                    # Id de uma das linhas inseridas (a primeira no MySQL, a última no SQLite)
+                    reading_id = result.lastrowid
+
+                IngestionService._update_sensor_stats(new_ingested)
+
+                db.session.commit()
+                break
+            except IntegrityError:
+                # Outro processo gravou a mesma chave entre a consulta e o
+                # INSERT: a nova tentativa já a encontra no banco
+                db.session.rollback()
+                if attempt == 2:
+                    raise
+            except Exception:
+                db.session.rollback()
+                raise
+
+        recent_messages.add_many(
+            (row['gateway_id'], row['message_id']) for row in values if row['message_id'] is not None
+        )
+        inserted = len(new_values)
+        duplicates += len(values) - inserted
+
+        if new_ingested:
+            ReadingService.after_commit([
+                (sensor, activity, timestamp) for sensor, activity, timestamp, _ in new_ingested
+            ], reading_id)
+
+        return {
+            'received': len(messages),
+            'inserted': inserted,
+            'duplicates': duplicates,
+            'errors': errors
+        }
+
+    @staticmethod
+    def _existing_keys(keys: List[tuple], batch_size: int) -> Set[tuple]:
+        """
+        Chaves (gateway_id, message_id) já gravadas
+
+        Consulta o índice único uq_readings_gateway_message em lotes.
+
+        Args:
+            keys: Chaves candidatas
+            batch_size: Chaves por query
+
+        Returns:
+            set: Chaves que já existem em readings
+        """
+        existing = set()
+        for start in range(0, len(keys), batch_size):
+            existing.update(
+                tuple(row) for row in db.session.execute(
+                    select(Reading.gateway_id, Reading.message_id).where(
+                        tuple_(Reading.gateway_id, Reading.message_id).in_(keys[start:start + batch_size])
+                    )
+                )
+            )
+        return existing
+
+    @staticmethod
+    def _update_sensor_stats(ingested: List[tuple]) -> None:
+        """
+        Atualizar contadores e últimos valores dos sensores do lote
+
+        Args:
+            ingested: Tuplas (sensor, activity, timestamp, metadata) das
+                      leituras efetivamente gravadas
+        """
+        counts = Counter(sensor.id for sensor, _, _, _ in ingested)
+
+        for sensor, _, timestamp, metadata in ingested:
+            if sensor.last_reading_at is None or timestamp > sensor.last_reading_at:
+                sensor.last_reading_at = timestamp
+            if metadata:
+                if 'battery_level' in metadata:
+                    sensor.battery_level = metadata['battery_level']
+                if 'rssi_dbm' in metadata:
+                    sensor.signal_strength = metadata['rssi_dbm']
+            if sensor.id in counts:
+                sensor.total_readings = (sensor.total_readings or 0) + counts.pop(sensor.id)
@@ -0,0 +1,270 @@
+"""
+Service de Ocupação
+Contagem de entradas/saídas em tempo real, atualizada no momento da ingestão
+"""
+
+import threading
+import time
+from datetime import datetime, timezone, date
+from typing import Dict, Any, List, Optional, Tuple
+from zoneinfo import ZoneInfo
+from sqlalchemy import func, select
+from app import db
+from app.models.reading import Reading
+from app.models.sensor import Sensor
+
+
+DEFAULT_ZONE = 'principal'
+
+# Contador incrementado por papel de sensor (demais papéis contam como detecção)
+ROLE_KEYS = {'entry': 'entries', 'exit': 'exits'}
+
+
+class OccupancyEngine:
+    """
+    Motor de ocupação do parque
+
+    Mantém contadores de entradas e saídas por zona, atualizados a cada
+    leitura ingerida. Os contadores são zerados à meia-noite no fuso do
+    parque e, ao reiniciar, são reconstruídos com uma única query agregada.
+    A leitura da capacidade é feita apenas em memória.
+    """
+
+    def __init__(self, app=None):
+        self.lock = threading.Lock()
+        self.timezone = ZoneInfo('America/Sao_Paulo')
+        self.max_capacity = 5000
+        self.resync_interval = 0
+
+        # Estado
+        self.day: Optional[date] = None
+        self.zones: Dict[str, Dict[str, int]] = {}
+        self.loaded = False
+        self.last_sync = 0.0
+
+        # Recuperação do banco: uma por vez; lotes registrados durante a
+        # query ficam no diário [(leituras, reading_id)] para reaplicação
+        self.recover_lock = threading.Lock()
+        self.journal: Optional[List[Tuple[list, Optional[int]]]] = None
+
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        """Configura o motor a partir da configuração da aplicação"""
+        self.timezone = ZoneInfo(app.config.get('PARK_TIMEZONE', 'America/Sao_Paulo'))
+        self.max_capacity = app.config.get('PARK_MAX_CAPACITY', 5000)
+        self.resync_interval = app.config.get('OCCUPANCY_RESYNC_INTERVAL', 0)
+        app.extensions['occupancy'] = self
+
+    def _local_day(self, utc_timestamp: datetime) -> date:
+        """Data local (fuso do parque) de um timestamp UTC sem tzinfo"""
+        return utc_timestamp.replace(tzinfo=timezone.utc).astimezone(self.timezone).date()
+
+    def _midnight_utc(self, day: date) -> datetime:
+        """Meia-noite local de `day`, em UTC sem tzinfo (mesmo formato do banco)"""
+        local_midnight = datetime.combine(day, datetime.min.time(), tzinfo=self.timezone)
+        return local_midnight.astimezone(timezone.utc).replace(tzinfo=None)
+
+    @staticmethod
+    def _empty_zone() -> Dict[str, int]:
+        return {'entries': 0, 'exits': 0, 'detections': 0}
+
+    def _roll_day(self, now: datetime) -> None:
+        """Zera os contadores se o dia local mudou (chamar com lock)"""
+        today = self._local_day(now)
+        if self.day != today:
+            self.day = today
+            self.zones = {}
+
+    def recover(self) -> None:
+        """
+        Reconstrói os contadores do dia a partir do banco
+
+        Executa uma única query agrupada por papel e zona do sensor, numa
+        conexão própria (sem o snapshot da sessão atual). Lotes registrados
+        enquanto a query roda ficam num diário e, ao instalar o resultado,
+        são reaplicados todos, exceto os que já estão no snapshot da
+        agregação (conferidos por id na mesma transação; commits fora da
+        ordem dos ids não se perdem). Requer contexto de aplicação.
+        """
+        with self.recover_lock:
+            with self.lock:
+                self.journal = []
+
+            try:
+                now = datetime.utcnow()
+                today = self._local_day(now)
+
+                with db.engine.connect() as connection:
+                    rows = connection.execute(
+                        select(
+                            Sensor.role,
+                            Sensor.zone,
+                            func.count(Reading.id)
+                        ).join(
+                            Reading, Reading.sensor_id == Sensor.id
+                        ).where(
+                            Sensor.role.isnot(None),
+                            Reading.activity == 1,
+                            Reading.timestamp >= self._midnight_utc(today)
+                        ).group_by(Sensor.role, Sensor.zone)
+                    ).all()
+
+                    zones: Dict[str, Dict[str, int]] = {}
+                    for role, zone, count in rows:
+                        counters = zones.setdefault(zone or DEFAULT_ZONE, self._empty_zone())
+                        counters[ROLE_KEYS.get(role, 'detections')] += count
+
+                    # Lotes do diário já presentes na agregação
+                    with self.lock:
+                        checked = len(self.journal)
+                        pending = [reading_id for _, reading_id in self.journal]
+                    included = Reading.visible_ids(connection, filter(None, pending))
+
+                    with self.lock:
+                        journal, self.journal = self.journal, None
+                        # Lotes registrados durante a primeira conferência
+                        included |= Reading.visible_ids(
+                            connection, filter(None, (reading_id for _, reading_id in journal[checked:]))
+                        )
+
+                        self.day = today
+                        self.zones = zones
+                        self.loaded = True
+                        self.last_sync = time.monotonic()
+
+                        for readings, reading_id in journal:
+                            if reading_id not in included:
+                                self._apply(readings)
+            except Exception:
+                with self.lock:
+                    self.journal = None
+                raise
+
+    def _needs_sync(self) -> bool:
+        """Indica se o estado deve ser (re)carregado do banco"""
+        if not self.loaded:
+            return True
+        return bool(
+            self.resync_interval and
+            time.monotonic() - self.last_sync >= self.resync_interval
+        )
+
+    def record(self, sensor: Sensor, activity: int, timestamp: datetime, reading_id: int = None) -> None:
+        """
+        Registra uma leitura ingerida (chamar após o commit)
+
+        Args:
+            sensor: Sensor que gerou a leitura
+            activity: 0 = nada, 1 = detecção
+            timestamp: Timestamp da leitura (UTC)
+            reading_id: Id da leitura gravada
+        """
+        self.record_many([(sensor, activity, timestamp)], reading_id)
+
+    def record_many(self, readings, reading_id: int = None) -> None:
+        """
+        Registra um lote de leituras gravadas no mesmo commit
+
+        Args:
+            readings: Iterável de tuplas (sensor, activity, timestamp)
+            reading_id: Id de uma das leituras do commit (identifica o lote
+                        numa recuperação em andamento; None = desconhecido,
+                        o lote é reaplicado)
+        """
+        readings = [
+            (sensor.role, sensor.zone, timestamp) for sensor, activity, timestamp in readings
+            if activity == 1 and sensor.role
+        ]
+        if not readings:
+            return
+
+        if self._needs_sync():
+            with self.lock:
+                if self.journal is not None:
+                    # Recuperação em andamento: ela inclui ou reaplica este lote
+                    self.journal.append((readings, reading_id))
+                    return
+            # O estado recuperado do banco já inclui este lote
+            self.recover()
+            return
+
+        with self.lock:
+            if self.journal is not None:
+                self.journal.append((readings, reading_id))
+            self._apply(readings)
+
+    def _apply(self, readings) -> None:
+        """Soma um lote de (role, zone, timestamp) aos contadores (chamar com lock)"""
+        self._roll_day(datetime.utcnow())
+
+        for role, zone, timestamp in readings:
+            # Leituras atrasadas do dia anterior não entram na contagem de hoje
+            if self._local_day(timestamp) != self.day:
+                continue
+
+            counters = self.zones.setdefault(zone or DEFAULT_ZONE, self._empty_zone())
+            counters[ROLE_KEYS.get(role, 'detections')] += 1
+
+    def reset(self) -> None:
+        """Descarta o estado em memória (será recuperado do banco no próximo uso)"""
+        with self.lock:
+            self.loaded = False
+            self.day = None
+            self.zones = {}
+
+    def get_capacity_stats(self, max_capacity: int = None) -> Dict[str, Any]:
+        """
+        Obter estatísticas de capacidade a partir da memória
+
+        Args:
+            max_capacity: Capacidade máxima do parque (padrão: PARK_MAX_CAPACITY)
+
+        Returns:
+            Dict: Estatísticas de capacidade
+        """
+        max_capacity = max_capacity or self.max_capacity
+
+        if self._needs_sync():
+            self.recover()
+
+        with self.lock:
+            self._roll_day(datetime.utcnow())
+            day = self.day
+            zones = {zone: dict(counters) for zone, counters in self.zones.items()}
+
+        total_entries = sum(counters['entries'] for counters in zones.values())
+        total_exits = sum(counters['exits'] for counters in zones.values())
+
+        # Ocupação atual estimada
+        current_occupation = max(0, total_entries - total_exits)
+        occupation_percentage = round((current_occupation / max_capacity * 100), 2)
+
+        # Status
+        if occupation_percentage < 70:
+            status = 'normal'
+        elif occupation_percentage < 90:
+            status = 'alert'
+        else:
+            status = 'critical'
+
+        for counters in zones.values():
+            counters['occupation'] = max(0, counters['entries'] - counters['exits'])
+
+        return {
+            'max_capacity': max_capacity,
+            'current_occupation': current_occupation,
+            'occupation_percentage': occupation_percentage,
+            'status': status,
+            # Contagem desde a meia-noite local (mantida a chave usada pelos dashboards)
+            'entries_24h': total_entries,
+            'exits_24h': total_exits,
+            'since': self._midnight_utc(day).isoformat(),
+            'zones': zones,
+            'timestamp': datetime.utcnow().isoformat()
+        }
+
+
+# Instância única por processo
+occupancy_engine = OccupancyEngine()
@@ -4,9 +4,29 @@ Contém toda a lógica de negócio relacionada ao monitoramento da piscina.
 """
 from datetime import datetime, date, time, timedelta
 from typing import Dict, List, Optional, Tuple
-from sqlalchemy import func, and_, or_, desc
+from sqlalchemy import func, and_, or_, desc, select
 from app import db
 from app.models.pool_reading import PoolReading
+from app.utils.cache import invalidate_tags
+from app.utils.row_encoder import RowEncoder, decimal_2, hms_time, iso_date, sql_datetime
+from app.utils.columnar import epoch_local, park_timezone, series
+
+
+# Nível de alerta por qualidade da água (PoolReading.get_alert_level)
+ALERT_LEVELS = {'Regular': 'warning', 'Imprópria': 'danger'}
+
+# Mesmo formato de PoolReadingResponseSchema, sem hidratar PoolReading
+POOL_READING_ENCODER = RowEncoder(
+    ('id', PoolReading.id),
+    ('sensor_type', PoolReading.sensor_type),
+    ('reading_date', PoolReading.reading_date, iso_date),
+    ('reading_time', PoolReading.reading_time, hms_time),
+    ('temperature', PoolReading.temperature, decimal_2),
+    ('water_quality', PoolReading.water_quality),
+    ('created_at', PoolReading.created_at, sql_datetime),
+    ('updated_at', PoolReading.updated_at, sql_datetime),
+    derived={'alert_level': ('water_quality', ALERT_LEVELS.get)}
+)
 
 
 class PoolService:
@@ -50,12 +70,59 @@ class PoolService:
             db.session.add(reading)
             db.session.commit()
             
+            invalidate_tags('pool')
+            
             return reading
             
         except Exception as e:
             db.session.rollback()
             raise ValueError(f"Erro ao criar leitura: {str(e)}")
     
+    @staticmethod
+    def create_readings(items: List[Dict]) -> List[PoolReading]:
+        """
+        Cria várias leituras da piscina em uma única transação.
+        
+        Args:
+            items: Dados já validados de cada leitura
+            
+        Returns:
+            List[PoolReading]: Leituras criadas
+            
+        Raises:
+            ValueError: Se a gravação falhar (nenhuma leitura é gravada)
+        """
+        try:
+            today = date.today()
+            now = datetime.now().time()
+            readings = []
+            
+            for data in items:
+                sensor_type = data.get('sensor_type')
+                reading = PoolReading(
+                    sensor_type=sensor_type,
+                    reading_date=data.get('reading_date') or today,
+                    reading_time=data.get('reading_time') or now
+                )
+                
+                if sensor_type in ['water_temp', 'ambient_temp']:
+                    reading.temperature = data.get('temperature')
+                elif sensor_type == 'water_quality':
+                    reading.water_quality = data.get('water_quality')
+                
+                readings.append(reading)
+            
+            db.session.add_all(readings)
+            db.session.commit()
+            
+            invalidate_tags('pool')
+            
+            return readings
+            
+        except Exception as e:
+            db.session.rollback()
+            raise ValueError(f"Erro ao criar leituras: {str(e)}")
+    
     @staticmethod
     def get_readings(
         sensor_type: Optional[str] = None,
@@ -63,7 +130,7 @@ class PoolService:
         end_date: Optional[date] = None,
         limit: int = 100,
         offset: int = 0
-    ) -> Tuple[List[PoolReading], int]:
+    ) -> Tuple[List[Dict], int]:
         """
         Busca leituras com filtros opcionais.
         
@@ -75,33 +142,33 @@ class PoolService:
             offset: Offset para paginação
             
         Returns:
-            Tuple[List[PoolReading], int]: Lista de leituras e total de registros
+            Tuple[List[Dict], int]: Leituras serializadas (POOL_READING_ENCODER)
+            e total de registros
         """
-        query = PoolReading.query
+        conditions = []
         
         # Aplicar filtros
         if sensor_type:
-            query = query.filter(PoolReading.sensor_type == sensor_type)
+            conditions.append(PoolReading.sensor_type == sensor_type)
         
         if start_date:
-            query = query.filter(PoolReading.reading_date >= start_date)
+            conditions.append(PoolReading.reading_date >= start_date)
         
         if end_date:
-            query = query.filter(PoolReading.reading_date <= end_date)
+            conditions.append(PoolReading.reading_date <= end_date)
         
         # Contar total
-        total = query.count()
+        total = db.session.execute(
+            select(func.count(PoolReading.id)).where(*conditions)
+        ).scalar()
         
-        # Ordenar por data/hora decrescente
-        query = query.order_by(
+        # Ordenar por data/hora decrescente e aplicar paginação
+        stmt = POOL_READING_ENCODER.select().where(*conditions).order_by(
             desc(PoolReading.reading_date),
             desc(PoolReading.reading_time)
-        )
-        
-        # Aplicar paginação
-        readings = query.limit(limit).offset(offset).all()
+        ).limit(limit).offset(offset)
         
-        return readings, total
+        return POOL_READING_ENCODER.encode_all(db.session.execute(stmt)), total
     
     @staticmethod
     def get_latest_readings() -> Dict[str, Optional[PoolReading]]:
@@ -251,7 +318,7 @@ class PoolService:
         sensor_type: str,
         days: int = 7,
         limit: int = 100
-    ) -> List[PoolReading]:
+    ) -> List[Dict]:
         """
         Busca histórico de temperatura para gráficos.
         
@@ -261,84 +328,164 @@ class PoolService:
             limit: Número máximo de pontos
             
         Returns:
-            List[PoolReading]: Lista de leituras ordenadas por data/hora
+            List[Dict]: Leituras serializadas (POOL_READING_ENCODER),
+            ordenadas por data/hora
         """
         if sensor_type not in ['water_temp', 'ambient_temp']:
             return []
         
         start_date = date.today() - timedelta(days=days)
         
-        readings = PoolReading.query.filter(
-            and_(
-                PoolReading.sensor_type == sensor_type,
-                PoolReading.reading_date >= start_date
-            )
+        stmt = POOL_READING_ENCODER.select().where(
+            PoolReading.sensor_type == sensor_type,
+            PoolReading.reading_date >= start_date
         ).order_by(
             PoolReading.reading_date.asc(),
             PoolReading.reading_time.asc()
-        ).limit(limit).all()
+        ).limit(limit)
         
-        return readings
+        return POOL_READING_ENCODER.encode_all(db.session.execute(stmt))
     
     @staticmethod
-    def get_daily_temperature_average(
+    def get_temperature_history_series(
         sensor_type: str,
-        days: int = 10
-    ) -> List[Dict]:
+        days: int = 7,
+        limit: int = 100
+    ) -> Dict[str, List]:
         """
-        Calcula a média diária de temperatura dos últimos N dias.
+        Histórico de temperatura em formato colunar (mesmos pontos de
+        get_temperature_history).
         
         Args:
             sensor_type: 'water_temp' ou 'ambient_temp'
-            days: Número de dias de histórico (padrão: 10)
+            days: Número de dias de histórico
+            limit: Número máximo de pontos
             
         Returns:
-            List[Dict]: Lista com a média de cada dia no formato:
-                        [{'date': 'YYYY-MM-DD', 'avg_temperature': float}, ...]
+            Dict: {'t': [epoch (s)], 'v': [temperatura]}
         """
         if sensor_type not in ['water_temp', 'ambient_temp']:
-            return []
+            return series([], [])
         
-        start_date = date.today() - timedelta(days=days - 1)
+        start_date = date.today() - timedelta(days=days)
         
-        # Buscar todas as leituras do período
-        readings = PoolReading.query.filter(
-            and_(
+        rows = db.session.execute(
+            select(
+                PoolReading.reading_date,
+                PoolReading.reading_time,
+                PoolReading.temperature
+            ).where(
                 PoolReading.sensor_type == sensor_type,
                 PoolReading.reading_date >= start_date
+            ).order_by(
+                PoolReading.reading_date.asc(),
+                PoolReading.reading_time.asc()
+            ).limit(limit)
+        ).all()
+        
+        tz = park_timezone()
+        return series(
+            [epoch_local(reading_date, reading_time, tz) for reading_date, reading_time, _ in rows],
+            [float(temperature) if temperature is not None else None for _, _, temperature in rows]
+        )
+    
+    @staticmethod
+    def _daily_temperature_rows(sensor_type: str, days: int) -> List[Tuple]:
+        """
+        Média, mínima, máxima e contagem por dia (GROUP BY no banco).
+        
+        Returns:
+            List[Tuple]: (reading_date, avg, min, max, count), em ordem de data
+        """
+        start_date = date.today() - timedelta(days=days - 1)
+        
+        return db.session.execute(
+            select(
+                PoolReading.reading_date,
+                func.avg(PoolReading.temperature),
+                func.min(PoolReading.temperature),
+                func.max(PoolReading.temperature),
+                func.count(PoolReading.temperature)
+            ).where(
+                PoolReading.sensor_type == sensor_type,
+                PoolReading.reading_date >= start_date,
+                PoolReading.temperature.isnot(None)
+            ).group_by(
+                PoolReading.reading_date
+            ).order_by(
+                PoolReading.reading_date.asc()
             )
-        ).order_by(
-            PoolReading.reading_date.asc()
         ).all()
+    
+    @staticmethod
+    def get_daily_temperature_average(
+        sensor_type: str,
+        days: int = 10
+    ) -> List[Dict]:
+        """
+        Calcula a média diária de temperatura dos últimos N dias.
         
-        # Agrupar por data e calcular média
-        daily_averages = {}
-        for reading in readings:
-            reading_date_str = reading.reading_date.isoformat()
-            
-            if reading_date_str not in daily_averages:
-                daily_averages[reading_date_str] = {
-                    'sum': 0,
-                    'count': 0
-                }
+        Args:
+            sensor_type: 'water_temp' ou 'ambient_temp'
+            days: Número de dias de histórico (padrão: 10)
             
-            if reading.temperature is not None:
-                daily_averages[reading_date_str]['sum'] += float(reading.temperature)
-                daily_averages[reading_date_str]['count'] += 1
+        Returns:
+            List[Dict]: Lista com a média de cada dia no formato:
+                        [{'date': 'YYYY-MM-DD', 'avg_temperature': float,
+                          'min_temperature': float, 'max_temperature': float,
+                          'reading_count': int}, ...]
+        """
+        if sensor_type not in ['water_temp', 'ambient_temp']:
+            return []
         
-        # Calcular médias e formatar resultado
-        result = []
-        for day_date in sorted(daily_averages.keys()):
-            data = daily_averages[day_date]
-            if data['count'] > 0:
-                avg_temp = round(data['sum'] / data['count'], 2)
-                result.append({
-                    'date': day_date,
-                    'avg_temperature': avg_temp,
-                    'reading_count': data['count']
-                })
+        return [
+            {
+                'date': reading_date.isoformat(),
+                'avg_temperature': round(float(avg_temp), 2),
+                'min_temperature': float(min_temp),
+                'max_temperature': float(max_temp),
+                'reading_count': count
+            }
+            for reading_date, avg_temp, min_temp, max_temp, count
+            in PoolService._daily_temperature_rows(sensor_type, days)
+        ]
+    
+    @staticmethod
+    def get_daily_temperature_series(
+        sensor_type: str,
+        days: int = 10,
+        bands: bool = False
+    ) -> Dict[str, List]:
+        """
+        Média diária de temperatura em formato colunar.
         
-        return result
+        Args:
+            sensor_type: 'water_temp' ou 'ambient_temp'
+            days: Número de dias de histórico (padrão: 10)
+            bands: Incluir mínima e máxima de cada dia
+            
+        Returns:
+            Dict: {'t': [meia-noite local do dia, epoch (s)], 'v': [média]}
+                  e, com bands, 'min' e 'max'
+        """
+        if sensor_type not in ['water_temp', 'ambient_temp']:
+            return series([], [])
+        
+        rows = PoolService._daily_temperature_rows(sensor_type, days)
+        tz = park_timezone()
+        
+        extra = {}
+        if bands:
+            extra = {
+                'min': [float(row[2]) for row in rows],
+                'max': [float(row[3]) for row in rows]
+            }
+        
+        return series(
+            [epoch_local(row[0], tz=tz) for row in rows],
+            [round(float(row[1]), 2) for row in rows],
+            **extra
+        )
     
     @staticmethod
     def check_water_quality_alerts() -> List[Dict]:
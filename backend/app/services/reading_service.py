@@ -9,6 +9,51 @@ from app import db
 from app.models.reading import Reading
 from app.models.sensor import Sensor
 from app.services.sensor_service import SensorService
+from app.services.occupancy_service import occupancy_engine
+from app.services.rolling_counters import reading_counters
+from app.utils.cache import invalidate_tags
+from app.utils.row_encoder import RowEncoder, iso_datetime
+
+
+def _metadata_value(*keys):
+    """Primeiro valor presente em sensor_metadata entre as chaves dadas"""
+    def extract(metadata):
+        if not isinstance(metadata, dict):
+            return None
+        for key in keys:
+            if metadata.get(key) is not None:
+                return metadata[key]
+        return None
+    return extract
+
+
+# Resposta de GET /readings: serial do sensor vem do JOIN (sem lazy load
+# por leitura); bateria e sinal saem do JSON de metadados já lido
+READING_LIST_ENCODER = RowEncoder(
+    ('id', Reading.id),
+    ('sensor_id', Reading.sensor_id),
+    ('sensor_serial', Sensor.serial_number),
+    ('activity', Reading.activity),
+    ('timestamp', Reading.timestamp, iso_datetime),
+    ('metadata', Reading.sensor_metadata),
+    derived={
+        'battery_level': ('metadata', _metadata_value('battery_level')),
+        'signal_strength': ('metadata', _metadata_value('signal_strength', 'rssi_dbm')),
+    }
+)
+
+# Resposta de GET /readings/sensor/<id>/latest
+LATEST_READING_ENCODER = RowEncoder(
+    ('id', Reading.id),
+    ('sensor_id', Reading.sensor_id),
+    ('activity', Reading.activity),
+    ('timestamp', Reading.timestamp, iso_datetime),
+    ('metadata', Reading.sensor_metadata),
+    derived={
+        'battery_level': ('metadata', _metadata_value('battery_level')),
+        'signal_strength': ('metadata', _metadata_value('signal_strength', 'rssi_dbm')),
+    }
+)
 
 
 class ReadingService:
@@ -20,9 +65,12 @@ class ReadingService:
         start_date: Optional[datetime] = None,
         end_date: Optional[datetime] = None,
         limit: int = 50
-    ) -> List[Reading]:
+    ) -> List[dict]:
         """
-        Listar leituras com filtros
+        Listar leituras com filtros (mais recentes primeiro)
+        
+        Consulta Core só com as colunas da resposta e o serial do sensor
+        por JOIN; as tuplas são serializadas por READING_LIST_ENCODER.
         
         Args:
             sensor_id: Filtrar por sensor
@@ -31,20 +79,21 @@ class ReadingService:
             limit: Limite de resultados
             
         Returns:
-            List[Reading]: Lista de leituras
+            List[dict]: Leituras serializadas
         """
-        query = Reading.query
+        stmt = READING_LIST_ENCODER.select().outerjoin(Sensor, Sensor.id == Reading.sensor_id)
         
         if sensor_id:
-            query = query.filter_by(sensor_id=sensor_id)
+            stmt = stmt.where(Reading.sensor_id == sensor_id)
         
         if start_date:
-            query = query.filter(Reading.timestamp >= start_date)
+            stmt = stmt.where(Reading.timestamp >= start_date)
         
         if end_date:
-            query = query.filter(Reading.timestamp <= end_date)
+            stmt = stmt.where(Reading.timestamp <= end_date)
         
-        return query.order_by(Reading.timestamp.desc()).limit(limit).all()
+        stmt = stmt.order_by(Reading.timestamp.desc()).limit(limit)
+        return READING_LIST_ENCODER.encode_all(db.session.execute(stmt))
     
     @staticmethod
     def get_reading_by_id(reading_id: int) -> Reading:
@@ -109,6 +158,8 @@ class ReadingService:
         
         db.session.commit()
         
+        ReadingService.after_commit([(sensor, reading.activity, reading.timestamp)], reading.id)
+        
         return reading
     
     @staticmethod
@@ -146,7 +197,22 @@ class ReadingService:
         }
     
     @staticmethod
-    def get_latest_reading(sensor_id: int) -> Optional[Reading]:
+    def after_commit(ingested: List[tuple], reading_id: Optional[int] = None) -> None:
+        """
+        Atualizar os contadores em memória após gravar leituras
+        
+        Deve ser chamado depois do commit, com todas as leituras do lote.
+        
+        Args:
+            ingested: Lista de tuplas (sensor, activity, timestamp)
+            reading_id: Id de uma das leituras gravadas no commit
+        """
+        occupancy_engine.record_many(ingested, reading_id)
+        reading_counters.record_many(ingested, reading_id)
+        invalidate_tags('readings')
+    
+    @staticmethod
+    def get_latest_reading(sensor_id: int) -> Optional[dict]:
         """
         Obter última leitura de um sensor
         
@@ -154,10 +220,14 @@ class ReadingService:
             sensor_id: ID do sensor
             
         Returns:
-            Reading: Última leitura ou None
+            dict: Última leitura serializada ou None
         """
-        return Reading.query.filter_by(sensor_id=sensor_id)\
-            .order_by(Reading.timestamp.desc()).first()
+        stmt = LATEST_READING_ENCODER.select().where(
+            Reading.sensor_id == sensor_id
+        ).order_by(Reading.timestamp.desc()).limit(1)
+        
+        row = db.session.execute(stmt).first()
+        return LATEST_READING_ENCODER.encode(row) if row else None
     
     @staticmethod
     def _update_sensor_stats(sensor: Sensor, reading_data: dict) -> None:
@@ -0,0 +1,411 @@
+"""
+Contadores Deslizantes de Leituras
+Contagens por minuto (últimas 24h) mantidas em memória na ingestão
+"""
+
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import Dict, Any, Iterable, List, Optional, Tuple
+from sqlalchemy import func, extract, select
+from app import db
+from app.models.reading import Reading
+from app.models.sensor import Sensor
+
+
+BUCKET_SECONDS = 60
+BUCKET_COUNT = 24 * 60  # 24h de buckets de 1 minuto
+EPOCH = datetime(1970, 1, 1)
+
+# Minutos já conferidos que são recarregados de novo em cada reconciliação
+# (leituras com timestamp um pouco anterior ao momento da gravação)
+RECONCILE_OVERLAP_MINUTES = 10
+
+
+def _minute_of(timestamp: datetime) -> int:
+    """Índice absoluto do minuto de um timestamp UTC sem tzinfo"""
+    return int((timestamp - EPOCH).total_seconds()) // BUCKET_SECONDS
+
+
+class RollingCounters:
+    """
+    Contadores deslizantes em anel de buckets por minuto
+
+    Cada bucket guarda contagens de leituras, detecções, leituras por
+    protocolo e por status do sensor. Qualquer janela de até 24h é obtida
+    somando os buckets, sem consultar a tabela `readings`.
+
+    A reconciliação com o banco é periódica e incremental: recarrega só
+    os minutos desde a última conferência (com RECONCILE_OVERLAP_MINUTES
+    de folga), o que traz as leituras gravadas por outros processos. As
+    24h inteiras são recarregadas a cada ROLLING_COUNTERS_REBUILD_INTERVAL
+    (leituras atrasadas fora da folga, exclusões). O total histórico vem
+    de SUM(sensors.total_readings), sem COUNT(*) em `readings`.
+    """
+
+    def __init__(self, app=None):
+        self.lock = threading.Lock()
+        self.reconcile_interval = 300
+        self.rebuild_interval = 3600
+
+        # Anel de buckets: minuto absoluto e contagens de cada posição
+        self.bucket_minutes = [None] * BUCKET_COUNT
+        self.bucket_counts = [Counter() for _ in range(BUCKET_COUNT)]
+
+        # Total histórico (soma do banco + leituras ingeridas desde então)
+        self.total_readings = 0
+
+        self.loaded = False
+        self.last_reconcile = 0.0
+        self.last_rebuild = 0.0
+        self.synced_minute = 0
+        self.stats = {
+            'reconciliations': 0,
+            'rebuilds': 0,
+            'corrections': 0
+        }
+
+        # Carga do banco: uma por vez; lotes registrados durante a query
+        # ficam no diário [(entradas, reading_id)] para reaplicação
+        self.load_lock = threading.Lock()
+        self.journal: Optional[List[Tuple[list, Optional[int]]]] = None
+
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        """Configura os contadores a partir da configuração da aplicação"""
+        self.reconcile_interval = app.config.get('ROLLING_COUNTERS_RECONCILE_INTERVAL', 300)
+        self.rebuild_interval = app.config.get('ROLLING_COUNTERS_REBUILD_INTERVAL', 3600)
+        app.extensions['rolling_counters'] = self
+
+    # ------------------------------------------------------------------
+    # Atualização
+    # ------------------------------------------------------------------
+
+    def _add(self, minute: int, now_minute: int, keys: Iterable[str], amount: int = 1) -> None:
+        """Soma `amount` às chaves do bucket de `minute` (chamar com lock)"""
+        # Fora da janela de 24h (ou no futuro): não entra nos buckets
+        if minute <= now_minute - BUCKET_COUNT or minute > now_minute:
+            return
+
+        slot = minute % BUCKET_COUNT
+        if self.bucket_minutes[slot] != minute:
+            self.bucket_minutes[slot] = minute
+            self.bucket_counts[slot].clear()
+
+        counts = self.bucket_counts[slot]
+        for key in keys:
+            counts[key] += amount
+
+    @staticmethod
+    def _keys(activity: int, protocol: Optional[str], status: Optional[str]) -> Tuple[str, ...]:
+        keys = ['readings', f'protocol:{protocol}', f'status:{status}']
+        if activity == 1:
+            keys.append('detections')
+        return tuple(keys)
+
+    def record(self, sensor: Sensor, activity: int, timestamp: datetime, reading_id: int = None) -> None:
+        """
+        Registra uma leitura ingerida (chamar após o commit)
+
+        Args:
+            sensor: Sensor que gerou a leitura
+            activity: 0 = nada, 1 = detecção
+            timestamp: Timestamp da leitura (UTC)
+            reading_id: Id da leitura gravada
+        """
+        self.record_many([(sensor, activity, timestamp)], reading_id)
+
+    def record_many(self, readings, reading_id: int = None) -> None:
+        """
+        Registra um lote de leituras gravadas no mesmo commit
+
+        Args:
+            readings: Iterável de tuplas (sensor, activity, timestamp)
+            reading_id: Id de uma das leituras do commit (identifica o lote
+                        numa carga em andamento; None = desconhecido)
+        """
+        entries = [
+            (_minute_of(timestamp), self._keys(activity, sensor.protocol, sensor.status))
+            for sensor, activity, timestamp in readings
+        ]
+        if not entries:
+            return
+
+        if not self.loaded:
+            with self.lock:
+                if self.journal is not None:
+                    # Carga em andamento: ela inclui ou reaplica este lote
+                    self.journal.append((entries, reading_id))
+                    return
+            # O estado carregado do banco já inclui este lote
+            self._reconcile(due_only=True)
+            return
+
+        now_minute = _minute_of(datetime.utcnow())
+        with self.lock:
+            if self.journal is not None:
+                self.journal.append((entries, reading_id))
+            self.total_readings += len(entries)
+            for minute, keys in entries:
+                self._add(minute, now_minute, keys)
+
+    def record_deleted(self, sensor: Optional[Sensor], activity: int, timestamp: datetime) -> None:
+        """Desconta uma leitura removida do banco"""
+        if not self.loaded:
+            return
+
+        now_minute = _minute_of(datetime.utcnow())
+        with self.lock:
+            self.total_readings = max(0, self.total_readings - 1)
+            self._add(
+                _minute_of(timestamp),
+                now_minute,
+                self._keys(
+                    activity,
+                    sensor.protocol if sensor else None,
+                    sensor.status if sensor else None
+                ),
+                amount=-1
+            )
+
+    # ------------------------------------------------------------------
+    # Reconciliação com o banco
+    # ------------------------------------------------------------------
+
+    def _load(self, now: datetime, first_minute: Optional[int] = None) -> bool:
+        """
+        Recarrega do banco os buckets a partir de `first_minute` e o total
+
+        Total e contagens são lidos na mesma transação. Lotes registrados
+        durante a query são reaplicados, exceto os que já estão no snapshot
+        dela (conferidos por id na mesma transação). Chamar com load_lock.
+
+        Args:
+            now: Instante de referência (UTC)
+            first_minute: Primeiro minuto recarregado (None = janela de 24h)
+
+        Returns:
+            bool: True se algum bucket ou o total mudou
+        """
+        now_minute = _minute_of(now)
+        oldest = now_minute - BUCKET_COUNT + 1
+        first_minute = oldest if first_minute is None else max(oldest, first_minute)
+        cutoff = EPOCH + timedelta(minutes=first_minute)
+
+        with self.lock:
+            self.journal = []
+
+        try:
+            with db.engine.connect() as connection:
+                total_readings = connection.execute(
+                    select(func.coalesce(func.sum(Sensor.total_readings), 0))
+                ).scalar()
+                rows = connection.execute(
+                    select(
+                        extract('year', Reading.timestamp).label('year'),
+                        extract('month', Reading.timestamp).label('month'),
+                        extract('day', Reading.timestamp).label('day'),
+                        extract('hour', Reading.timestamp).label('hour'),
+                        extract('minute', Reading.timestamp).label('minute'),
+                        Reading.activity,
+                        Sensor.protocol,
+                        Sensor.status,
+                        func.count(Reading.id)
+                    ).join(
+                        Sensor, Sensor.id == Reading.sensor_id
+                    ).where(
+                        Reading.timestamp >= cutoff
+                    ).group_by(
+                        'year', 'month', 'day', 'hour', 'minute',
+                        Reading.activity, Sensor.protocol, Sensor.status
+                    )
+                ).all()
+
+                fresh: Dict[int, Counter] = {}
+                for year, month, day, hour, minute, activity, protocol, status, count in rows:
+                    bucket_minute = _minute_of(datetime(int(year), int(month), int(day), int(hour), int(minute)))
+                    counts = fresh.setdefault(bucket_minute, Counter())
+                    for key in self._keys(activity, protocol, status):
+                        counts[key] += count
+
+                # Lotes do diário já presentes na carga
+                with self.lock:
+                    checked = len(self.journal)
+                    pending = [reading_id for _, reading_id in self.journal]
+                included = Reading.visible_ids(connection, filter(None, pending))
+
+                with self.lock:
+                    journal, self.journal = self.journal, None
+                    # Lotes registrados durante a primeira conferência
+                    included |= Reading.visible_ids(
+                        connection, filter(None, (reading_id for _, reading_id in journal[checked:]))
+                    )
+                    before = (self.total_readings, self._snapshot(first_minute, now_minute))
+
+                    for minute in range(first_minute, now_minute + 1):
+                        slot = minute % BUCKET_COUNT
+                        self.bucket_minutes[slot] = minute
+                        self.bucket_counts[slot] = fresh.get(minute, Counter())
+                    self.total_readings = total_readings
+
+                    for entries, reading_id in journal:
+                        if reading_id in included:
+                            continue
+                        self.total_readings += len(entries)
+                        for minute, keys in entries:
+                            if minute >= first_minute:
+                                self._add(minute, now_minute, keys)
+
+                    changed = before != (self.total_readings, self._snapshot(first_minute, now_minute))
+                    self.loaded = True
+                    self.synced_minute = now_minute
+                    if changed:
+                        self.stats['corrections'] += 1
+        except Exception:
+            with self.lock:
+                self.journal = None
+            raise
+
+        return changed
+
+    def _snapshot(self, first_minute: int, last_minute: int) -> Dict[int, Dict[str, int]]:
+        """Contagens não nulas dos buckets de um intervalo (chamar com lock)"""
+        snapshot = {}
+        for minute in range(first_minute, last_minute + 1):
+            slot = minute % BUCKET_COUNT
+            if self.bucket_minutes[slot] == minute:
+                counts = {key: count for key, count in self.bucket_counts[slot].items() if count}
+                if counts:
+                    snapshot[minute] = counts
+        return snapshot
+
+    def reconcile(self, force_rebuild: bool = False) -> bool:
+        """
+        Confere os contadores com o banco e corrige os que divergirem
+
+        Recarrega os minutos desde a última conferência (mais a folga) ou,
+        no primeiro uso, com force_rebuild e a cada rebuild_interval, a
+        janela de 24h inteira.
+
+        Args:
+            force_rebuild: Recarregar a janela inteira
+
+        Returns:
+            bool: True se algum bucket ou o total foi corrigido
+        """
+        return self._reconcile(force_rebuild=force_rebuild)
+
+    def _reconcile_due(self, monotonic: float) -> bool:
+        """Indica se o estado precisa ser carregado ou conferido"""
+        return not self.loaded or bool(
+            self.reconcile_interval and monotonic - self.last_reconcile >= self.reconcile_interval
+        )
+
+    def _reconcile(self, force_rebuild: bool = False, due_only: bool = False) -> bool:
+        """
+        Executa uma reconciliação (uma por vez)
+
+        Com `due_only`, só reconcilia se ainda estiver vencida ao assumir a
+        vez: threads que encontram o intervalo vencido ao mesmo tempo não
+        repetem a carga. Com o estado já carregado, nem esperam a carga em
+        andamento (seguem com os buckets atuais).
+        """
+        if due_only and self.loaded:
+            if not self.load_lock.acquire(blocking=False):
+                return False
+        else:
+            self.load_lock.acquire()
+
+        try:
+            now = datetime.utcnow()
+            monotonic = time.monotonic()
+            with self.lock:
+                if due_only and not self._reconcile_due(monotonic):
+                    return False
+
+                self.last_reconcile = monotonic
+                self.stats['reconciliations'] += 1
+                rebuild = (
+                    force_rebuild or not self.loaded or
+                    bool(self.rebuild_interval and monotonic - self.last_rebuild >= self.rebuild_interval)
+                )
+                if rebuild:
+                    self.last_rebuild = monotonic
+                    self.stats['rebuilds'] += 1
+                first_minute = None if rebuild else self.synced_minute - RECONCILE_OVERLAP_MINUTES
+
+            return self._load(now, first_minute)
+        finally:
+            self.load_lock.release()
+
+    def _maybe_reconcile(self) -> None:
+        if self._reconcile_due(time.monotonic()):
+            self._reconcile(due_only=True)
+
+    # ------------------------------------------------------------------
+    # Leitura
+    # ------------------------------------------------------------------
+
+    def window_totals(self, minutes: int = BUCKET_COUNT, reconcile: bool = True) -> Dict[str, Any]:
+        """
+        Soma os buckets de uma janela deslizante
+
+        Args:
+            minutes: Tamanho da janela em minutos (1 a 1440)
+            reconcile: Permitir reconciliação periódica com o banco
+
+        Returns:
+            Dict: Leituras, detecções e contagens por protocolo e status
+        """
+        if reconcile:
+            self._maybe_reconcile()
+
+        minutes = max(1, min(BUCKET_COUNT, minutes))
+        now_minute = _minute_of(datetime.utcnow())
+        first_minute = now_minute - minutes + 1
+
+        totals = Counter()
+        with self.lock:
+            for minute, counts in zip(self.bucket_minutes, self.bucket_counts):
+                if minute is not None and first_minute <= minute <= now_minute:
+                    totals.update(counts)
+
+        by_protocol = {}
+        by_status = {}
+        for key, count in totals.items():
+            if not count:
+                continue
+            if key.startswith('protocol:'):
+                by_protocol[key[len('protocol:'):]] = count
+            elif key.startswith('status:'):
+                by_status[key[len('status:'):]] = count
+
+        return {
+            'minutes': minutes,
+            'readings': totals['readings'],
+            'detections': totals['detections'],
+            'by_protocol': by_protocol,
+            'by_status': by_status
+        }
+
+    def get_total_readings(self) -> int:
+        """Total histórico de leituras, sem COUNT(*) na tabela"""
+        self._maybe_reconcile()
+        with self.lock:
+            return self.total_readings
+
+    def reset(self) -> None:
+        """Descarta o estado em memória (será reconstruído no próximo uso)"""
+        with self.lock:
+            self.loaded = False
+            self.bucket_minutes = [None] * BUCKET_COUNT
+            for counts in self.bucket_counts:
+                counts.clear()
+            self.total_readings = 0
+
+
+# Instância única por processo
+reading_counters = RollingCounters()
@@ -6,6 +6,7 @@ Lógica de negócio relacionada a sensores
 from typing import Optional, List
 from app import db
 from app.models.sensor import Sensor
+from app.utils.cache import invalidate_tags
 from app.schemas.sensor_schema import SensorSchema
 
 
@@ -96,6 +97,8 @@ class SensorService:
         db.session.add(sensor)
         db.session.commit()
         
+        invalidate_tags('sensors')
+        
         return sensor
     
     @staticmethod
@@ -121,6 +124,8 @@ class SensorService:
                 setattr(sensor, key, value)
         
         db.session.commit()
+        
+        invalidate_tags('sensors')
         return sensor
     
     @staticmethod
@@ -137,6 +142,8 @@ class SensorService:
         sensor = SensorService.get_sensor_by_id(sensor_id)
         db.session.delete(sensor)
         db.session.commit()
+        
+        invalidate_tags('sensors', 'readings')
     
     @staticmethod
     def get_protocols() -> List[str]:
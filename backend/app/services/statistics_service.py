@@ -5,20 +5,30 @@ Lógica de negócio relacionada a estatísticas e relatórios
 
 from datetime import datetime, timedelta
 from typing import Dict, Any
-from sqlalchemy import func
+from flask import current_app
+from sqlalchemy import case, func, select
 from app import db
 from app.models.reading import Reading
 from app.models.sensor import Sensor
+from app.services.occupancy_service import occupancy_engine
+from app.services.rolling_counters import reading_counters
+from app.utils.columnar import epoch_utc, series
 
 
 class StatisticsService:
     """Serviço de estatísticas e relatórios"""
     
     @staticmethod
-    def get_overview() -> Dict[str, Any]:
+    def get_overview(window_minutes: int = None) -> Dict[str, Any]:
         """
         Obter visão geral do sistema
         
+        As contagens de leituras vêm dos contadores deslizantes em memória,
+        sem varrer a tabela de leituras.
+        
+        Args:
+            window_minutes: Janela adicional em minutos (1 a 1440), opcional
+        
         Returns:
             Dict: Estatísticas gerais
         """
@@ -34,44 +44,47 @@ class StatisticsService:
             func.count(Sensor.id)
         ).group_by(Sensor.protocol).all()
         
-        # Total de leituras
-        total_readings = Reading.query.count()
-        
-        # Leituras nas últimas 24h
-        yesterday = datetime.utcnow() - timedelta(days=1)
-        readings_24h = Reading.query.filter(Reading.timestamp >= yesterday).count()
+        # Leituras nas últimas 24h (e total histórico)
+        last_24h = reading_counters.window_totals()
         
-        # Leituras com atividade nas últimas 24h
-        activity_24h = Reading.query.filter(
-            Reading.timestamp >= yesterday,
-            Reading.activity == 1
-        ).count()
-        
-        return {
+        overview = {
             'sensors': {
-                'total': Sensor.query.count(),
+                'total': sum(count for _, count in sensors_by_status),
                 'by_status': {status: count for status, count in sensors_by_status},
                 'by_protocol': {protocol: count for protocol, count in sensors_by_protocol}
             },
             'readings': {
-                'total': total_readings,
-                'last_24h': readings_24h,
-                'activity_24h': activity_24h
+                'total': reading_counters.get_total_readings(),
+                'last_24h': last_24h['readings'],
+                'activity_24h': last_24h['detections'],
+                'by_protocol_24h': last_24h['by_protocol'],
+                'by_status_24h': last_24h['by_status']
             },
             'timestamp': datetime.utcnow().isoformat()
         }
+        
+        if window_minutes:
+            overview['window'] = reading_counters.window_totals(window_minutes)
+        
+        return overview
     
     @staticmethod
     def get_activity_stats(
         period: str = 'day',
-        sensor_id: int = None
+        sensor_id: int = None,
+        columnar: bool = False
     ) -> Dict[str, Any]:
         """
         Obter estatísticas de atividade
         
+        Totais em uma consulta agregada; a linha do tempo percorre uma vez
+        só os timestamps das detecções, distribuindo-os nos intervalos.
+        
         Args:
             period: Período (day, week, month)
             sensor_id: ID do sensor (opcional)
+            columnar: Linha do tempo como {'t': [epoch], 'v': [detecções]}
+                      em vez de {início ISO: detecções}
             
         Returns:
             Dict: Estatísticas de atividade
@@ -87,33 +100,47 @@ class StatisticsService:
             raise ValueError('Período inválido. Use: day, week, month')
         
         time_range, interval = period_map[period]
-        start_date = datetime.utcnow() - time_range
-        
-        # Query base
-        query = Reading.query.filter(Reading.timestamp >= start_date)
-        
-        if sensor_id:
-            query = query.filter_by(sensor_id=sensor_id)
-        
-        # Contar atividades
-        total_detections = query.filter(Reading.activity == 1).count()
-        total_readings = query.count()
-        
-        # Atividade por intervalo
-        readings = query.all()
-        
-        activity_timeline = {}
-        current = start_date
         end = datetime.utcnow()
+        start_date = end - time_range
         
-        while current <= end:
-            next_interval = current + interval
-            count = len([
-                r for r in readings 
-                if current <= r.timestamp < next_interval and r.activity == 1
-            ])
-            activity_timeline[current.isoformat()] = count
-            current = next_interval
+        conditions = [Reading.timestamp >= start_date]
+        if sensor_id:
+            conditions.append(Reading.sensor_id == sensor_id)
+        
+        # Contar leituras e detecções
+        total_readings, total_detections = db.session.execute(
+            select(
+                func.count(Reading.id),
+                func.coalesce(func.sum(case((Reading.activity == 1, 1), else_=0)), 0)
+            ).where(*conditions)
+        ).one()
+        # SUM volta como Decimal no MySQL (serializado como string no JSON)
+        total_detections = int(total_detections)
+        
+        # Detecções por intervalo (início + k * intervalo, até o fim do período)
+        buckets = int(time_range / interval) + 1
+        step = interval.total_seconds()
+        counts = [0] * buckets
+        
+        result = db.session.execute(
+            select(Reading.timestamp).where(*conditions, Reading.activity == 1).execution_options(
+                stream_results=True,
+                yield_per=current_app.config.get('EXPORT_CHUNK_SIZE', 5000)
+            )
+        )
+        try:
+            for (timestamp,) in result:
+                index = int((timestamp - start_date).total_seconds() // step)
+                if 0 <= index < buckets:
+                    counts[index] += 1
+        finally:
+            result.close()
+        
+        starts = [start_date + interval * index for index in range(buckets)]
+        if columnar:
+            timeline = series([epoch_utc(start) for start in starts], counts)
+        else:
+            timeline = {start.isoformat(): count for start, count in zip(starts, counts)}
         
         return {
             'period': period,
@@ -121,10 +148,10 @@ class StatisticsService:
             'end_date': datetime.utcnow().isoformat(),
             'total_detections': total_detections,
             'total_readings': total_readings,
-            'detection_rate': round(
+            'detection_rate': float(round(
                 (total_detections / total_readings * 100), 2
-            ) if total_readings > 0 else 0,
-            'timeline': activity_timeline
+            )) if total_readings > 0 else 0,
+            'timeline': timeline
         }
     
     @staticmethod
@@ -137,20 +164,16 @@ class StatisticsService:
         """
         sensors = Sensor.query.all()
         
+        # Uma única query agregada para todos os sensores
+        rollup = Reading.get_sensor_rollup()
+        
         stats = []
         for sensor in sensors:
-            # Leituras totais
-            total_readings = Reading.query.filter_by(sensor_id=sensor.id).count()
-            
-            # Detecções
-            detections = Reading.query.filter_by(
-                sensor_id=sensor.id,
-                activity=1
-            ).count()
-            
-            # Última leitura
-            last_reading = Reading.query.filter_by(sensor_id=sensor.id)\
-                .order_by(Reading.timestamp.desc()).first()
+            sensor_rollup = rollup.get(sensor.id, {})
+            total_readings = sensor_rollup.get('total_readings', 0)
+            detections = sensor_rollup.get('total_detections', 0)
+            last_reading = sensor_rollup.get('last_reading')
+            avg_battery = sensor_rollup.get('avg_battery_level')
             
             stats.append({
                 'sensor_id': sensor.id,
@@ -163,7 +186,8 @@ class StatisticsService:
                 'detection_rate': round(
                     (detections / total_readings * 100), 2
                 ) if total_readings > 0 else 0,
-                'last_reading': last_reading.timestamp.isoformat() if last_reading else None,
+                'last_reading': last_reading.isoformat() if last_reading else None,
+                'avg_battery_level': round(avg_battery, 2) if avg_battery else None,
                 'current_battery_level': sensor.battery_level
             })
         
@@ -173,64 +197,16 @@ class StatisticsService:
         }
     
     @staticmethod
-    def get_capacity_stats(max_capacity: int = 5000) -> Dict[str, Any]:
+    def get_capacity_stats(max_capacity: int = None) -> Dict[str, Any]:
         """
         Obter estatísticas de capacidade
         
+        Lidas do motor de ocupação em memória, atualizado na ingestão.
+        
         Args:
-            max_capacity: Capacidade máxima do parque
+            max_capacity: Capacidade máxima do parque (padrão: PARK_MAX_CAPACITY)
             
         Returns:
             Dict: Estatísticas de capacidade
         """
-        yesterday = datetime.utcnow() - timedelta(days=1)
-        
-        # Entradas
-        entries_sensors = Sensor.query.filter(
-            Sensor.location.ilike('%entrada%')
-        ).all()
-        
-        total_entries = sum([
-            Reading.query.filter(
-                Reading.sensor_id == sensor.id,
-                Reading.timestamp >= yesterday,
-                Reading.activity == 1
-            ).count()
-            for sensor in entries_sensors
-        ])
-        
-        # Saídas
-        exits_sensors = Sensor.query.filter(
-            Sensor.location.ilike('%saída%')
-        ).all()
-        
-        total_exits = sum([
-            Reading.query.filter(
-                Reading.sensor_id == sensor.id,
-                Reading.timestamp >= yesterday,
-                Reading.activity == 1
-            ).count()
-            for sensor in exits_sensors
-        ])
-        
-        # Ocupação estimada
-        current_occupation = max(0, total_entries - total_exits)
-        occupation_percentage = round((current_occupation / max_capacity * 100), 2)
-        
-        # Status
-        if occupation_percentage < 70:
-            status = 'normal'
-        elif occupation_percentage < 90:
-            status = 'alert'
-        else:
-            status = 'critical'
-        
-        return {
-            'max_capacity': max_capacity,
-            'current_occupation': current_occupation,
-            'occupation_percentage': occupation_percentage,
-            'status': status,
-            'entries_24h': total_entries,
-            'exits_24h': total_exits,
-            'timestamp': datetime.utcnow().isoformat()
-        }
+        return occupancy_engine.get_capacity_stats(max_capacity)
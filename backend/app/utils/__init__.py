@@ -6,6 +6,12 @@ from .error_handlers import register_error_handlers
 from .validators import validate_request_json
 from .decorators import admin_required, role_required
 from .responses import success_response, error_response, paginated_response
+from .cache import cached, invalidate_tags, response_cache
+from .metrics import request_metrics
+from .sql_profiler import sql_profiler
+from .admission import admission_class, admission_control
+from .device_auth import device_auth_required, device_keys
+from .row_encoder import RowEncoder
 
 __all__ = [
     'register_error_handlers',
@@ -15,4 +21,14 @@ __all__ = [
     'success_response',
     'error_response',
     'paginated_response',
+    'cached',
+    'invalidate_tags',
+    'response_cache',
+    'request_metrics',
+    'sql_profiler',
+    'admission_class',
+    'admission_control',
+    'device_auth_required',
+    'device_keys',
+    'RowEncoder',
 ]
@@ -0,0 +1,275 @@
+"""
+Controle de admissão
+Limites de concorrência por classe de endpoint e descarte de requisições
+que esperaram demais na fila, com 503 + Retry-After
+"""
+
+import threading
+import time
+from functools import wraps
+from typing import Dict, Optional
+from flask import current_app, g, jsonify, request
+
+
+CRITICAL = 'critical'
+HEAVY = 'heavy'
+DEFAULT = 'default'
+
+
+class ClassState:
+    """Vagas e contadores de uma classe de endpoint"""
+
+    __slots__ = ('limit', 'in_flight', 'waiting', 'admitted', 'rejected', 'queue_rejected',
+                 'wait_seconds', 'max_wait', 'condition')
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.in_flight = 0
+        self.waiting = 0
+        self.admitted = 0
+        self.rejected = 0
+        self.queue_rejected = 0
+        self.wait_seconds = 0.0
+        self.max_wait = 0.0
+        self.condition = threading.Condition()
+
+    def acquire(self, timeout: float) -> bool:
+        """
+        Ocupa uma vaga, aguardando até `timeout` segundos
+
+        Returns:
+            bool: False se nenhuma vaga abriu no prazo
+        """
+        with self.condition:
+            if self.limit > 0 and self.in_flight >= self.limit:
+                started = time.monotonic()
+                deadline = started + timeout
+                self.waiting += 1
+                try:
+                    while self.in_flight >= self.limit:
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            self.rejected += 1
+                            return False
+                        self.condition.wait(remaining)
+                finally:
+                    self.waiting -= 1
+                waited = time.monotonic() - started
+                self.wait_seconds += waited
+                self.max_wait = max(self.max_wait, waited)
+
+            self.in_flight += 1
+            self.admitted += 1
+            return True
+
+    def release(self) -> None:
+        with self.condition:
+            self.in_flight -= 1
+            self.condition.notify()
+
+
+class AdmissionControl:
+    """
+    Controle de admissão das requisições (por processo)
+
+    Cada endpoint pertence a uma classe, declarada com @admission_class:
+
+    - critical: ingestão e health checks; nunca recusados
+    - heavy: agregações e exportações; poucas vagas (ADMISSION_HEAVY_CONCURRENCY)
+    - default: demais endpoints (ADMISSION_DEFAULT_CONCURRENCY)
+
+    Sem vaga livre em ADMISSION_QUEUE_TIMEOUT_MS, a requisição recebe 503
+    com Retry-After, em vez de ocupar uma thread do servidor que a ingestão
+    precisa. Requisições não críticas que já esperaram mais que
+    ADMISSION_MAX_QUEUE_MS na fila do proxy (cabeçalho X-Request-Start,
+    ex.: nginx `proxy_set_header X-Request-Start "t=${msec}"`) também são
+    recusadas: o cliente provavelmente já desistiu.
+
+    Endpoints heavy ocupam a vaga só ao executar (abaixo de @cached, acertos
+    de cache não consomem vaga); em respostas em streaming a vaga é liberada
+    ao fim do envio. Limite 0 desativa o limite da classe.
+    """
+
+    def __init__(self, app=None):
+        self.enabled = True
+        self.queue_timeout = 0.5
+        self.max_queue_time = 5.0
+        self.retry_after = 5
+        self.classes: Dict[str, ClassState] = {
+            CRITICAL: ClassState(0),
+            HEAVY: ClassState(2),
+            DEFAULT: ClassState(16),
+        }
+
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        """Configura limites e registra os hooks da aplicação"""
+        self.enabled = app.config.get('ADMISSION_CONTROL_ENABLED', True)
+        self.queue_timeout = app.config.get('ADMISSION_QUEUE_TIMEOUT_MS', 500) / 1000
+        self.max_queue_time = app.config.get('ADMISSION_MAX_QUEUE_MS', 5000) / 1000
+        self.retry_after = app.config.get('ADMISSION_RETRY_AFTER', 5)
+        self.classes[HEAVY].limit = app.config.get('ADMISSION_HEAVY_CONCURRENCY', 2)
+        self.classes[DEFAULT].limit = app.config.get('ADMISSION_DEFAULT_CONCURRENCY', 16)
+        app.extensions['admission_control'] = self
+
+        if not self.enabled:
+            return
+
+        app.before_request(self._before_request)
+        app.teardown_request(self._teardown_request)
+
+    # ------------------------------------------------------------------
+    # Hooks
+    # ------------------------------------------------------------------
+
+    def _before_request(self):
+        view = current_app.view_functions.get(request.endpoint)
+        name = getattr(view, 'admission_class', DEFAULT)
+        if name == CRITICAL:
+            return None
+
+        queued = _queue_time()
+        if queued is not None and self.max_queue_time and queued > self.max_queue_time:
+            state = self.classes[name]
+            with state.condition:
+                state.queue_rejected += 1
+            return self._reject(name, f'Requisição aguardou {queued * 1000:.0f} ms na fila')
+
+        # Endpoints com @admission_class ocupam a vaga no próprio decorator
+        if name == DEFAULT:
+            if not self.classes[DEFAULT].acquire(self.queue_timeout):
+                return self._reject(DEFAULT, 'Limite de requisições simultâneas atingido')
+            g.admission_slot = DEFAULT
+        return None
+
+    def _teardown_request(self, exc=None):
+        name = g.pop('admission_slot', None)
+        if name is not None:
+            self.classes[name].release()
+
+    def _reject(self, name: str, details: str):
+        response = jsonify({
+            'error': 'Servidor sobrecarregado, tente novamente',
+            'details': details,
+            'class': name
+        })
+        response.status_code = 503
+        response.headers['Retry-After'] = str(self.retry_after)
+        return response
+
+    # ------------------------------------------------------------------
+    # Exposição
+    # ------------------------------------------------------------------
+
+    def get_stats(self) -> Dict[str, Dict]:
+        stats = {}
+        for name, state in self.classes.items():
+            with state.condition:
+                stats[name] = {
+                    'limit': state.limit,
+                    'in_flight': state.in_flight,
+                    'waiting': state.waiting,
+                    'admitted': state.admitted,
+                    'rejected': state.rejected,
+                    'queue_rejected': state.queue_rejected,
+                    'wait_seconds': round(state.wait_seconds, 6),
+                    'max_wait_ms': round(state.max_wait * 1000, 3),
+                }
+        return stats
+
+    def render(self) -> str:
+        """Contadores no formato texto do Prometheus"""
+        stats = self.get_stats()
+        lines = []
+        for metric, key, kind, help_text in (
+            ('admission_limit', 'limit', 'gauge', 'Vagas simultâneas da classe (0 = sem limite)'),
+            ('admission_in_flight', 'in_flight', 'gauge', 'Requisições em execução'),
+            ('admission_waiting', 'waiting', 'gauge', 'Requisições aguardando vaga'),
+            ('admission_admitted_total', 'admitted', 'counter', 'Requisições admitidas'),
+            ('admission_wait_seconds_total', 'wait_seconds', 'counter', 'Tempo total aguardando vaga'),
+        ):
+            lines += [f'# HELP {metric} {help_text}', f'# TYPE {metric} {kind}']
+            for name, values in stats.items():
+                lines.append(f'{metric}{{class="{name}"}} {values[key]}')
+
+        lines += [
+            '# HELP admission_rejected_total Requisições recusadas com 503',
+            '# TYPE admission_rejected_total counter',
+        ]
+        for name, values in stats.items():
+            lines.append(f'admission_rejected_total{{class="{name}",reason="concurrency"}} {values["rejected"]}')
+            lines.append(f'admission_rejected_total{{class="{name}",reason="queue_time"}} {values["queue_rejected"]}')
+        return '\n'.join(lines) + '\n'
+
+
+def _queue_time() -> Optional[float]:
+    """
+    Tempo (s) desde que o proxy recebeu a requisição (X-Request-Start)
+
+    Aceita 't=<epoch>' ou '<epoch>' em segundos, milissegundos ou
+    microssegundos.
+    """
+    header = request.headers.get('X-Request-Start')
+    if not header:
+        return None
+    try:
+        started = float(header.strip().removeprefix('t='))
+    except ValueError:
+        return None
+    if started > 1e14:
+        started /= 1e6
+    elif started > 1e11:
+        started /= 1e3
+    return max(0.0, time.time() - started)
+
+
+# Instância única por processo
+admission_control = AdmissionControl()
+
+
+def admission_class(name: str):
+    """
+    Decorator que define a classe de admissão de um endpoint
+
+    Deve ficar abaixo de `@cached`, para que acertos de cache não ocupem
+    vaga da classe.
+
+    Args:
+        name: 'critical', 'heavy' ou 'default'
+
+    Usage:
+        @bp.route('/activity')
+        @cached(ttl=30, tags=('readings',))
+        @admission_class('heavy')
+        def get_activity_stats():
+            ...
+    """
+    def decorator(f):
+        @wraps(f)
+        def wrapper(*args, **kwargs):
+            control = admission_control
+            if not control.enabled or name == CRITICAL:
+                return f(*args, **kwargs)
+
+            state = control.classes[name]
+            if not state.acquire(control.queue_timeout):
+                return control._reject(name, 'Limite de requisições simultâneas atingido')
+
+            try:
+                response = current_app.make_response(f(*args, **kwargs))
+            except Exception:
+                state.release()
+                raise
+
+            # Streaming: a vaga segue ocupada até o fim do envio
+            if response.is_streamed:
+                response.call_on_close(state.release)
+            else:
+                state.release()
+            return response
+
+        wrapper.admission_class = name
+        return wrapper
+    return decorator
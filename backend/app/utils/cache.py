@@ -0,0 +1,269 @@
+"""
+Cache de respostas GET
+TTL por endpoint, ETag forte (304) e invalidação por tags
+"""
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+from typing import Dict, Iterable, Optional, Set
+from flask import current_app, request
+from flask_jwt_extended import get_jwt, verify_jwt_in_request
+
+
+class CacheEntry:
+    """Resposta armazenada em cache"""
+
+    __slots__ = ('body', 'status', 'mimetype', 'etag', 'expires_at', 'tags')
+
+    def __init__(self, body: bytes, status: int, mimetype: str, expires_at: float, tags: Iterable[str]):
+        self.body = body
+        self.status = status
+        self.mimetype = mimetype
+        self.etag = hashlib.sha256(body).hexdigest()[:32]
+        self.expires_at = expires_at
+        self.tags = tuple(tags)
+
+
+class ResponseCache:
+    """
+    Cache de respostas em memória (por processo)
+
+    As chaves combinam caminho, query string e role do usuário. Misses
+    concorrentes da mesma chave são resolvidos por uma única requisição
+    (single-flight); as demais aguardam o resultado. Escritas nos services
+    invalidam as entradas pelas tags declaradas em cada endpoint.
+    """
+
+    def __init__(self, app=None):
+        self.lock = threading.Lock()
+        self.enabled = True
+        self.default_ttl = 10
+        self.max_entries = 1024
+        self.wait_timeout = 10.0
+
+        self.entries: 'OrderedDict[tuple, CacheEntry]' = OrderedDict()
+        self.tag_index: Dict[str, Set[tuple]] = {}
+        self.inflight: Dict[tuple, threading.Event] = {}
+        # Geração de cada tag, incrementada a cada invalidação da tag (e a
+        # geral, a cada clear): respostas calculadas antes da invalidação
+        # de uma de suas tags não são armazenadas
+        self.tag_generations: Dict[str, int] = {}
+        self.generation = 0
+
+        self.stats = {'hits': 0, 'misses': 0, 'not_modified': 0, 'invalidations': 0}
+
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        """Configura o cache a partir da configuração da aplicação"""
+        self.enabled = app.config.get('RESPONSE_CACHE_ENABLED', True)
+        self.default_ttl = app.config.get('RESPONSE_CACHE_DEFAULT_TTL', 10)
+        self.max_entries = app.config.get('RESPONSE_CACHE_MAX_ENTRIES', 1024)
+        app.extensions['response_cache'] = self
+
+    # ------------------------------------------------------------------
+    # Armazenamento
+    # ------------------------------------------------------------------
+
+    def get(self, key: tuple) -> Optional[CacheEntry]:
+        """Entrada válida para a chave, ou None"""
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            if entry.expires_at <= time.monotonic():
+                self._remove(key)
+                return None
+            self.entries.move_to_end(key)
+            return entry
+
+    def generations(self, tags: Iterable[str]) -> tuple:
+        """Gerações atuais (geral e de cada tag), tomadas antes de calcular a resposta"""
+        with self.lock:
+            return self._generations(tags)
+
+    def _generations(self, tags: Iterable[str]) -> tuple:
+        return (self.generation,) + tuple(self.tag_generations.get(tag, 0) for tag in tags)
+
+    def set(self, key: tuple, entry: CacheEntry, generations: tuple) -> bool:
+        """Armazena a entrada se nenhuma das suas tags foi invalidada desde `generations`"""
+        with self.lock:
+            if generations != self._generations(entry.tags):
+                return False
+
+            self._remove(key)
+            self.entries[key] = entry
+            for tag in entry.tags:
+                self.tag_index.setdefault(tag, set()).add(key)
+
+            while len(self.entries) > self.max_entries:
+                self._remove(next(iter(self.entries)))
+            return True
+
+    def _remove(self, key: tuple) -> None:
+        """Remove uma entrada e suas referências de tag (chamar com lock)"""
+        entry = self.entries.pop(key, None)
+        if entry is None:
+            return
+        for tag in entry.tags:
+            keys = self.tag_index.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self.tag_index[tag]
+
+    def invalidate_tags(self, *tags: str) -> None:
+        """
+        Invalida todas as entradas marcadas com alguma das tags
+
+        Args:
+            tags: Tags afetadas pela escrita (ex: 'readings', 'sensors', 'pool')
+        """
+        with self.lock:
+            self.stats['invalidations'] += 1
+            for tag in tags:
+                self.tag_generations[tag] = self.tag_generations.get(tag, 0) + 1
+                for key in list(self.tag_index.get(tag, ())):
+                    self._remove(key)
+
+    def clear(self) -> None:
+        """Descarta todas as entradas"""
+        with self.lock:
+            self.generation += 1
+            self.entries.clear()
+            self.tag_index.clear()
+
+    def count(self, stat: str) -> None:
+        """Incrementa um contador de estatísticas"""
+        with self.lock:
+            self.stats[stat] += 1
+
+    # ------------------------------------------------------------------
+    # Single-flight
+    # ------------------------------------------------------------------
+
+    def begin(self, key: tuple):
+        """
+        Registra um miss para a chave
+
+        Returns:
+            tuple: (é_líder, evento). O líder calcula a resposta e deve
+            chamar `end`; os demais aguardam o evento.
+        """
+        with self.lock:
+            event = self.inflight.get(key)
+            if event is not None:
+                return False, event
+            event = threading.Event()
+            self.inflight[key] = event
+            return True, event
+
+    def end(self, key: tuple) -> None:
+        with self.lock:
+            event = self.inflight.pop(key, None)
+        if event is not None:
+            event.set()
+
+
+# Instância única por processo
+response_cache = ResponseCache()
+
+
+def invalidate_tags(*tags: str) -> None:
+    """Atalho para invalidar o cache de respostas após uma escrita"""
+    response_cache.invalidate_tags(*tags)
+
+
+def _current_role() -> Optional[str]:
+    """Role do token JWT da requisição, se houver"""
+    try:
+        verify_jwt_in_request(optional=True)
+        return get_jwt().get('role')
+    except Exception:
+        return None
+
+
+def _build_response(entry: CacheEntry, cache_status: str):
+    response = current_app.response_class(entry.body, status=entry.status, mimetype=entry.mimetype)
+    response.set_etag(entry.etag)
+    response.headers['Cache-Control'] = 'private, no-cache'
+    response.headers['Vary'] = 'Authorization'
+    response.headers['X-Cache'] = cache_status
+    return response.make_conditional(request)
+
+
+def cached(ttl: int = None, tags: Iterable[str] = ()):
+    """
+    Decorator de cache para endpoints GET
+
+    Deve ficar abaixo de `@jwt_required()`, para que apenas requisições
+    autenticadas cheguem ao cache. Somente respostas 200 são armazenadas.
+
+    Args:
+        ttl: Tempo de vida em segundos (padrão: RESPONSE_CACHE_DEFAULT_TTL)
+        tags: Tags usadas na invalidação
+
+    Usage:
+        @bp.route('/overview')
+        @cached(ttl=5, tags=('readings', 'sensors'))
+        def get_overview():
+            ...
+    """
+    tags = tuple(tags)
+
+    def decorator(f):
+        @wraps(f)
+        def wrapper(*args, **kwargs):
+            cache = response_cache
+            if not cache.enabled or request.method != 'GET':
+                return f(*args, **kwargs)
+
+            key = (
+                request.path,
+                tuple(sorted(request.args.items(multi=True))),
+                _current_role()
+            )
+
+            entry = cache.get(key)
+            if entry is None:
+                leader, event = cache.begin(key)
+                if not leader:
+                    # Outra requisição já está calculando esta resposta
+                    event.wait(cache.wait_timeout)
+                    entry = cache.get(key)
+
+            if entry is not None:
+                cache.count('hits')
+                response = _build_response(entry, 'HIT')
+                if response.status_code == 304:
+                    cache.count('not_modified')
+                return response
+
+            cache.count('misses')
+            generations = cache.generations(tags)
+            try:
+                response = current_app.make_response(f(*args, **kwargs))
+
+                if response.status_code != 200 or response.is_streamed:
+                    return response
+
+                entry = CacheEntry(
+                    body=response.get_data(),
+                    status=response.status_code,
+                    mimetype=response.mimetype,
+                    expires_at=time.monotonic() + (ttl if ttl is not None else cache.default_ttl),
+                    tags=tags
+                )
+                cache.set(key, entry, generations)
+            finally:
+                if leader:
+                    cache.end(key)
+
+            return _build_response(entry, 'MISS')
+
+        return wrapper
+    return decorator
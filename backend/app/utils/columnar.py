@@ -0,0 +1,67 @@
+"""
+Séries colunares
+Formato compacto para gráficos: {"t": [...], "v": [...]}, com timestamps em
+segundos desde a época, em vez de uma lista de objetos que repete as chaves
+em cada ponto
+"""
+
+from datetime import date, datetime, time, timezone
+from typing import Dict, List, Optional
+from zoneinfo import ZoneInfo
+from flask import current_app, request
+
+
+FORMATS = ('rows', 'columnar')
+
+_EPOCH = datetime(1970, 1, 1)
+
+
+def response_format() -> Optional[str]:
+    """
+    Formato pedido em ?format= ('rows' por padrão)
+
+    Returns:
+        str: 'rows' ou 'columnar', ou None se o valor for inválido
+    """
+    value = request.args.get('format', 'rows').lower()
+    return value if value in FORMATS else None
+
+
+def wants_bands() -> bool:
+    """?bands=true: incluir as faixas min/max na série colunar"""
+    return request.args.get('bands', 'false').lower() in ('true', '1', 'yes')
+
+
+def epoch_utc(value: datetime) -> int:
+    """datetime ingênuo em UTC (ex.: Reading.timestamp) → segundos desde a época"""
+    return int((value - _EPOCH).total_seconds())
+
+
+def park_timezone() -> ZoneInfo:
+    """Fuso do parque (PARK_TIMEZONE), usado nas datas/horas locais da piscina"""
+    return ZoneInfo(current_app.config.get('PARK_TIMEZONE', 'America/Sao_Paulo'))
+
+
+def epoch_local(day: date, moment: time = time.min, tz: Optional[ZoneInfo] = None) -> int:
+    """
+    Data e hora locais do parque → segundos desde a época
+
+    Args:
+        day: Data local
+        moment: Hora local (padrão: meia-noite)
+        tz: Fuso (padrão: PARK_TIMEZONE)
+    """
+    local = datetime.combine(day, moment, tzinfo=tz or park_timezone())
+    return int(local.astimezone(timezone.utc).timestamp())
+
+
+def series(t: List[int], v: List, **bands: List) -> Dict[str, List]:
+    """
+    Monta a série colunar
+
+    Args:
+        t: Timestamps (segundos desde a época)
+        v: Valores, na mesma ordem
+        bands: Colunas adicionais de mesmo tamanho (ex.: min=[...], max=[...])
+    """
+    return {'t': t, 'v': v, **bands}
@@ -0,0 +1,67 @@
+"""
+Guarda de duplicatas em memória
+LRU de chaves de mensagens já gravadas (gateway_id, message_id)
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Hashable, Iterable, List
+
+
+class RecentKeys:
+    """
+    Conjunto LRU de chaves vistas recentemente
+
+    Usado antes do INSERT para descartar reentregas (QoS 1) sem consultar
+    o índice único. É exato (sem falsos positivos): uma chave só entra no
+    conjunto depois que a leitura foi gravada, e o índice único no banco
+    continua sendo a garantia final para chaves já expulsas do LRU.
+    """
+
+    def __init__(self, capacity: int = 100000):
+        self.capacity = capacity
+        self.lock = threading.Lock()
+        self.keys: 'OrderedDict[Hashable, None]' = OrderedDict()
+        self.stats = {'hits': 0, 'misses': 0}
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def __contains__(self, key: Hashable) -> bool:
+        with self.lock:
+            return key in self.keys
+
+    def filter_new(self, keys: Iterable[Hashable]) -> List[bool]:
+        """
+        Indica, para cada chave, se ela ainda não foi vista
+
+        Args:
+            keys: Chaves na ordem do lote
+
+        Returns:
+            List[bool]: True para chaves novas
+        """
+        result = []
+        with self.lock:
+            for key in keys:
+                if key in self.keys:
+                    self.keys.move_to_end(key)
+                    self.stats['hits'] += 1
+                    result.append(False)
+                else:
+                    self.stats['misses'] += 1
+                    result.append(True)
+        return result
+
+    def add_many(self, keys: Iterable[Hashable]) -> None:
+        """Marca as chaves como vistas (chamar após o commit)"""
+        with self.lock:
+            for key in keys:
+                self.keys[key] = None
+                self.keys.move_to_end(key)
+            while len(self.keys) > self.capacity:
+                self.keys.popitem(last=False)
+
+    def clear(self) -> None:
+        with self.lock:
+            self.keys.clear()
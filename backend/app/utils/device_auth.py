@@ -0,0 +1,270 @@
+"""
+Autenticação de dispositivos
+Chaves de API autenticadas por HMAC e verificação em memória para as rotas de ingestão
+"""
+
+import base64
+import hashlib
+import hmac
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from functools import wraps
+from typing import TYPE_CHECKING, Dict, Optional, Tuple
+from flask import g, jsonify, request
+from flask_jwt_extended import verify_jwt_in_request
+
+if TYPE_CHECKING:
+    from app.models.device_key import DeviceKey
+
+
+KEY_PREFIX = 'dk_'
+
+# Identificadores desconhecidos ficam em cache por menos tempo, para que
+# uma chave recém-emitida passe a valer logo em todos os workers
+NEGATIVE_TTL = 30
+
+
+class CachedKey:
+    """Hash e identidade de uma chave, como lidos do banco"""
+
+    __slots__ = ('key_hash', 'identity', 'expires_at')
+
+    def __init__(self, key_hash: Optional[str], identity: Optional[Dict], expires_at: float):
+        self.key_hash = key_hash
+        self.identity = identity
+        self.expires_at = expires_at
+
+
+class DeviceKeyStore:
+    """
+    Chaves de API dos dispositivos (por processo)
+
+    Formato: 'dk_<key_id>.<segredo>.<assinatura>', com o segredo aleatório
+    e a assinatura igual ao HMAC-SHA256(DEVICE_KEY_SECRET, key_id e
+    segredo). A assinatura é conferida antes de qualquer consulta: chaves
+    forjadas são recusadas sem acessar o banco nem ocupar o cache. O
+    segredo só existe na chave entregue ao dispositivo; o banco guarda o
+    HMAC da chave completa, então nem o DEVICE_KEY_SECRET nem uma cópia
+    do banco, sozinhos, permitem montar uma chave válida. Para chaves bem
+    assinadas, o estado (ativa/revogada) e o hash gravado vêm do cache em
+    memória, com um
+    SELECT por key_id a cada DEVICE_KEY_CACHE_TTL segundos, sem o hash de
+    senha nem o UPDATE de último login do /auth/login.
+
+    Revogações neste processo valem na hora; nos demais workers, ao
+    expirar a entrada em cache.
+    """
+
+    def __init__(self, app=None):
+        self.lock = threading.Lock()
+        self.secret = b''
+        self.ttl = 300
+        self.max_entries = 10000
+        self.entries: 'OrderedDict[str, CachedKey]' = OrderedDict()
+        self.stats = {'verified': 0, 'rejected': 0, 'cache_hits': 0, 'cache_misses': 0}
+
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        """Configura segredo e TTL do cache"""
+        self.secret = (app.config.get('DEVICE_KEY_SECRET') or app.config['SECRET_KEY']).encode()
+        self.ttl = app.config.get('DEVICE_KEY_CACHE_TTL', 300)
+        self.entries.clear()
+        app.extensions['device_keys'] = self
+
+    # ------------------------------------------------------------------
+    # Chaves
+    # ------------------------------------------------------------------
+
+    def hash_key(self, key: str) -> str:
+        return hmac.new(self.secret, key.encode(), hashlib.sha256).hexdigest()
+
+    def sign(self, key_id: str, token: str) -> str:
+        """Assinatura da chave: HMAC-SHA256 de key_id e segredo (base64 url-safe, sem padding)"""
+        message = f'device-key:{key_id}.{token}'.encode()
+        digest = hmac.new(self.secret, message, hashlib.sha256).digest()
+        return base64.urlsafe_b64encode(digest).rstrip(b'=').decode()
+
+    def issue(self, name: str, description: Optional[str] = None) -> Tuple['DeviceKey', str]:
+        """
+        Emite uma nova chave
+
+        Args:
+            name: Nome do dispositivo
+            description: Descrição (opcional)
+
+        Returns:
+            Tuple[DeviceKey, str]: Registro gravado e a chave completa
+            (exibida apenas nesta resposta)
+        """
+        from app import db
+        from app.models.device_key import DeviceKey
+
+        key_id = secrets.token_hex(8)
+        # Sem '.': o segredo é delimitado pelos pontos da chave
+        token = secrets.token_hex(16)
+        key = f'{KEY_PREFIX}{key_id}.{token}.{self.sign(key_id, token)}'
+
+        device_key = DeviceKey(key_id=key_id, key_hash=self.hash_key(key), name=name, description=description)
+        db.session.add(device_key)
+        db.session.commit()
+
+        self.invalidate(key_id)
+        return device_key, key
+
+    def revoke(self, key_id: str) -> Optional['DeviceKey']:
+        """
+        Revoga uma chave
+
+        Returns:
+            DeviceKey revogada, ou None se não existir
+        """
+        from app import db
+        from app.models.device_key import DeviceKey
+
+        device_key = DeviceKey.get_by_key_id(key_id)
+        if device_key is None:
+            return None
+
+        if device_key.is_active:
+            device_key.is_active = False
+            device_key.revoked_at = datetime.utcnow()
+            db.session.commit()
+
+        self.invalidate(key_id)
+        return device_key
+
+    def invalidate(self, key_id: Optional[str] = None) -> None:
+        """Descarta a entrada em cache de uma chave (ou todas)"""
+        with self.lock:
+            if key_id is None:
+                self.entries.clear()
+            else:
+                self.entries.pop(key_id, None)
+
+    # ------------------------------------------------------------------
+    # Verificação
+    # ------------------------------------------------------------------
+
+    def verify(self, key: str) -> Optional[Dict]:
+        """
+        Verifica uma chave
+
+        Args:
+            key: Chave completa enviada pelo dispositivo
+
+        Returns:
+            dict: {'id', 'key_id', 'name'} do dispositivo, ou None se inválida
+        """
+        parts = key[len(KEY_PREFIX):].split('.')
+        if not key.startswith(KEY_PREFIX) or len(parts) != 3 or not all(parts):
+            return self._rejected()
+        key_id, token, signature = parts
+
+        # Chave forjada: recusada sem consulta ao banco
+        if not hmac.compare_digest(signature.encode(), self.sign(key_id, token).encode()):
+            return self._rejected()
+
+        # Segredo conferido contra o hash gravado na emissão
+        entry = self._lookup(key_id)
+        if entry.key_hash is None or not hmac.compare_digest(entry.key_hash, self.hash_key(key)):
+            return self._rejected()
+
+        self._count('verified')
+        return entry.identity
+
+    def _lookup(self, key_id: str) -> CachedKey:
+        now = time.monotonic()
+        with self.lock:
+            entry = self.entries.get(key_id)
+            if entry is not None and entry.expires_at > now:
+                self.entries.move_to_end(key_id)
+                self.stats['cache_hits'] += 1
+                return entry
+            self.stats['cache_misses'] += 1
+
+        from app.models.device_key import DeviceKey
+
+        device_key = DeviceKey.get_by_key_id(key_id)
+        if device_key is None or not device_key.is_active:
+            entry = CachedKey(None, None, now + min(self.ttl, NEGATIVE_TTL))
+        else:
+            entry = CachedKey(
+                device_key.key_hash,
+                {'id': device_key.id, 'key_id': device_key.key_id, 'name': device_key.name},
+                now + self.ttl
+            )
+
+        with self.lock:
+            self.entries[key_id] = entry
+            self.entries.move_to_end(key_id)
+            # Descarta as chaves usadas há mais tempo
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+        return entry
+
+    def _count(self, stat: str) -> None:
+        with self.lock:
+            self.stats[stat] += 1
+
+    def _rejected(self) -> None:
+        self._count('rejected')
+        return None
+
+    def get_stats(self) -> Dict:
+        with self.lock:
+            return {**self.stats, 'cached_keys': len(self.entries)}
+
+
+# Instância única por processo
+device_keys = DeviceKeyStore()
+
+
+def _request_key() -> Optional[str]:
+    """Chave do dispositivo (X-Device-Key ou 'Authorization: Bearer dk_...')"""
+    key = request.headers.get('X-Device-Key')
+    if key:
+        return key.strip()
+
+    authorization = request.headers.get('Authorization', '')
+    if authorization.startswith('Bearer ' + KEY_PREFIX):
+        return authorization[len('Bearer '):].strip()
+    return None
+
+
+def device_auth_required(f):
+    """
+    Decorator das rotas de ingestão: aceita chave de dispositivo ou JWT
+
+    Com chave de dispositivo, a identidade fica em `g.device`; sem ela,
+    exige um JWT válido, como @jwt_required().
+
+    Usage:
+        @bp.route('/readings', methods=['POST'])
+        @device_auth_required
+        @admission_class('critical')
+        def create_reading():
+            ...
+    """
+    @wraps(f)
+    def wrapper(*args, **kwargs):
+        key = _request_key()
+        if key is None:
+            verify_jwt_in_request()
+            return f(*args, **kwargs)
+
+        device = device_keys.verify(key)
+        if device is None:
+            return jsonify({
+                'error': 'Chave de dispositivo inválida',
+                'details': 'Chave desconhecida ou revogada'
+            }), 401
+
+        g.device = device
+        return f(*args, **kwargs)
+
+    return wrapper
@@ -0,0 +1,222 @@
+"""
+Métricas de requisições
+Latência, consultas SQL e linhas por endpoint, em formato Prometheus
+"""
+
+import bisect
+import threading
+import time
+from typing import Dict, List, Tuple
+from flask import current_app, g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+
+# Limites dos buckets (segundos / consultas por requisição)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+
+
+class Histogram:
+    """Histograma cumulativo no formato do Prometheus"""
+
+    __slots__ = ('bounds', 'counts', 'count', 'sum')
+
+    def __init__(self, bounds: Tuple[float, ...]):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def lines(self, name: str, labels: str) -> List[str]:
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.bounds + (float('inf'),), self.counts):
+            cumulative += count
+            le = '+Inf' if bound == float('inf') else f'{bound:g}'
+            lines.append(f'{name}_bucket{{{labels},le="{le}"}} {cumulative}')
+        lines.append(f'{name}_sum{{{labels}}} {self.sum:.6f}')
+        lines.append(f'{name}_count{{{labels}}} {self.count}')
+        return lines
+
+
+class EndpointMetrics:
+    """Métricas acumuladas de um endpoint"""
+
+    __slots__ = ('latency', 'queries', 'statuses', 'sql_queries', 'sql_seconds', 'sql_rows')
+
+    def __init__(self):
+        self.latency = Histogram(LATENCY_BUCKETS)
+        self.queries = Histogram(QUERY_BUCKETS)
+        self.statuses: Dict[int, int] = {}
+        self.sql_queries = 0
+        self.sql_seconds = 0.0
+        self.sql_rows = 0
+
+
+class RequestMetrics:
+    """
+    Coleta de métricas por endpoint (por processo)
+
+    Um par before/after_request mede a latência de cada requisição e
+    eventos do SQLAlchemy (before/after_cursor_execute) somam, na própria
+    requisição, número de consultas, tempo de SQL e linhas retornadas.
+    Consultas fora de requisições (threads de fundo) não são contadas.
+
+    Requisições acima de METRICS_SLOW_REQUEST_MS ou com mais de
+    METRICS_SLOW_QUERY_COUNT consultas são registradas no log.
+    """
+
+    def __init__(self, app=None):
+        self.lock = threading.Lock()
+        self.enabled = True
+        self.slow_request_ms = 0
+        self.slow_query_count = 0
+        self.started_at = time.time()
+        self.endpoints: Dict[Tuple[str, str], EndpointMetrics] = {}
+        self._listening = False
+
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        """Registra os hooks da aplicação e do SQLAlchemy"""
+        self.enabled = app.config.get('METRICS_ENABLED', True)
+        self.slow_request_ms = app.config.get('METRICS_SLOW_REQUEST_MS', 0)
+        self.slow_query_count = app.config.get('METRICS_SLOW_QUERY_COUNT', 0)
+        app.extensions['request_metrics'] = self
+
+        if not self.enabled:
+            return
+
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+
+        if not self._listening:
+            event.listen(Engine, 'before_cursor_execute', self._before_cursor_execute)
+            event.listen(Engine, 'after_cursor_execute', self._after_cursor_execute)
+            self._listening = True
+
+    # ------------------------------------------------------------------
+    # Hooks
+    # ------------------------------------------------------------------
+
+    def _before_request(self):
+        g.metrics_started = time.perf_counter()
+        g.metrics_sql = [0, 0.0, 0]  # consultas, segundos, linhas
+
+    def _after_request(self, response):
+        started = g.pop('metrics_started', None)
+        if started is None:
+            return response
+
+        elapsed = time.perf_counter() - started
+        queries, sql_seconds, rows = g.pop('metrics_sql', (0, 0.0, 0))
+        key = (request.endpoint or 'unmatched', request.method)
+
+        with self.lock:
+            metrics = self.endpoints.get(key)
+            if metrics is None:
+                metrics = self.endpoints[key] = EndpointMetrics()
+            metrics.latency.observe(elapsed)
+            metrics.queries.observe(queries)
+            metrics.statuses[response.status_code] = metrics.statuses.get(response.status_code, 0) + 1
+            metrics.sql_queries += queries
+            metrics.sql_seconds += sql_seconds
+            metrics.sql_rows += rows
+
+        slow = self.slow_request_ms and elapsed * 1000 >= self.slow_request_ms
+        chatty = self.slow_query_count and queries > self.slow_query_count
+        if slow or chatty:
+            current_app.logger.warning(
+                f"Requisição lenta: {request.method} {request.path} ({key[0]}) "
+                f"{elapsed * 1000:.1f} ms, {queries} consultas, "
+                f"{sql_seconds * 1000:.1f} ms de SQL, {rows} linhas"
+            )
+        return response
+
+    @staticmethod
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        # O início fica no contexto da execução: descartado com ela, mesmo se a consulta falhar
+        if context is not None and has_request_context() and 'metrics_sql' in g:
+            context.metrics_query_start = time.perf_counter()
+
+    @staticmethod
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if not has_request_context() or 'metrics_sql' not in g:
+            return
+        started = getattr(context, 'metrics_query_start', None)
+        if started is None:
+            return
+        sql = g.metrics_sql
+        sql[0] += 1
+        sql[1] += time.perf_counter() - started
+        # rowcount do driver: linhas do SELECT (pymysql) ou afetadas; -1 se desconhecido
+        if cursor.rowcount and cursor.rowcount > 0:
+            sql[2] += cursor.rowcount
+
+    # ------------------------------------------------------------------
+    # Exposição
+    # ------------------------------------------------------------------
+
+    def reset(self) -> None:
+        with self.lock:
+            self.endpoints.clear()
+            self.started_at = time.time()
+
+    def render(self) -> str:
+        """Métricas no formato texto do Prometheus (versão 0.0.4)"""
+        with self.lock:
+            snapshot = sorted(self.endpoints.items())
+            lines = [
+                '# HELP http_request_duration_seconds Latência das requisições por endpoint',
+                '# TYPE http_request_duration_seconds histogram',
+            ]
+            for (endpoint, method), metrics in snapshot:
+                lines += metrics.latency.lines('http_request_duration_seconds', _labels(endpoint, method))
+
+            lines += [
+                '# HELP http_requests_total Requisições por endpoint e status',
+                '# TYPE http_requests_total counter',
+            ]
+            for (endpoint, method), metrics in snapshot:
+                for status, count in sorted(metrics.statuses.items()):
+                    lines.append(f'http_requests_total{{{_labels(endpoint, method)},status="{status}"}} {count}')
+
+            lines += [
+                '# HELP http_request_sql_queries Consultas SQL por requisição',
+                '# TYPE http_request_sql_queries histogram',
+            ]
+            for (endpoint, method), metrics in snapshot:
+                lines += metrics.queries.lines('http_request_sql_queries', _labels(endpoint, method))
+
+            for name, attribute, help_text in (
+                ('sql_queries_total', 'sql_queries', 'Consultas SQL executadas'),
+                ('sql_duration_seconds_total', 'sql_seconds', 'Tempo total em consultas SQL'),
+                ('sql_rows_total', 'sql_rows', 'Linhas retornadas ou afetadas (rowcount do driver)'),
+            ):
+                lines += [f'# HELP {name} {help_text}', f'# TYPE {name} counter']
+                for (endpoint, method), metrics in snapshot:
+                    value = getattr(metrics, attribute)
+                    value = f'{value:.6f}' if isinstance(value, float) else value
+                    lines.append(f'{name}{{{_labels(endpoint, method)}}} {value}')
+
+        lines += [
+            '# HELP process_start_time_seconds Início da coleta (epoch)',
+            '# TYPE process_start_time_seconds gauge',
+            f'process_start_time_seconds {self.started_at:.3f}',
+        ]
+        return '\n'.join(lines) + '\n'
+
+
+def _labels(endpoint: str, method: str) -> str:
+    return f'endpoint="{endpoint}",method="{method}"'
+
+
+# Instância única por processo
+request_metrics = RequestMetrics()
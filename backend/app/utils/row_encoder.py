@@ -0,0 +1,101 @@
+"""
+Codificador de linhas
+Consultas Core com apenas as colunas da resposta e serialização das tuplas
+sem hidratar objetos ORM nem passar por schemas Marshmallow
+"""
+
+from decimal import Decimal
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+from sqlalchemy import select
+
+
+# ------------------------------------------------------------------
+# Formatadores (aplicados apenas a valores não nulos)
+# ------------------------------------------------------------------
+
+def iso_datetime(value) -> str:
+    """datetime → '2024-01-15T14:30:00.123456' (isoformat)"""
+    return value.isoformat()
+
+
+def iso_date(value) -> str:
+    """date → '2024-01-15'"""
+    return value.isoformat()
+
+
+def hms_time(value) -> str:
+    """time → '14:30:00' (mesmo formato de fields.Time('%H:%M:%S'))"""
+    return value.isoformat('seconds')
+
+
+def sql_datetime(value) -> str:
+    """datetime → '2024-01-15 14:30:00' (mesmo formato de fields.DateTime('%Y-%m-%d %H:%M:%S'))"""
+    return value.isoformat(' ', 'seconds')
+
+
+_TWO_PLACES = Decimal('0.01')
+
+
+def decimal_2(value) -> str:
+    """
+    Decimal → '28.50'
+
+    Mesmo resultado de fields.Decimal(places=2) serializado pelo jsonify
+    (Decimal vira string).
+    """
+    return str(Decimal(value).quantize(_TWO_PLACES))
+
+
+class RowEncoder:
+    """
+    Consulta e serialização de uma resposta em lista
+
+    Cada campo é (nome, expressão SQL, formatador opcional). `select()`
+    gera a consulta Core só com essas colunas, na mesma ordem, e
+    `encode_all()` converte as tuplas em dicionários numa única passada,
+    formatando apenas as colunas que precisam (datas, decimais).
+
+    Campos derivados são calculados a partir do valor de outra coluna,
+    sem nova consulta: {'battery_level': ('metadata', extrair_bateria)}.
+
+    Usage:
+        encoder = RowEncoder(
+            ('id', Reading.id),
+            ('timestamp', Reading.timestamp, iso_datetime),
+        )
+        rows = db.session.execute(encoder.select().limit(100)).all()
+        return jsonify({'readings': encoder.encode_all(rows)})
+    """
+
+    def __init__(self, *fields: Tuple, derived: Optional[Dict[str, Tuple[str, Callable]]] = None):
+        self.names = tuple(field[0] for field in fields)
+        self.columns = tuple(field[1] for field in fields)
+
+        # Plano pré-calculado: só as colunas com formatador são revisitadas
+        self._formatted = tuple(
+            (field[0], field[2]) for field in fields if len(field) > 2 and field[2] is not None
+        )
+        self._derived = tuple(
+            (name, source, function) for name, (source, function) in (derived or {}).items()
+        )
+
+    def select(self):
+        """SELECT das colunas da resposta (acrescente joins, filtros e ordem)"""
+        return select(*self.columns)
+
+    def encode(self, row: Sequence) -> Dict:
+        """Converte uma linha em dicionário"""
+        item = dict(zip(self.names, row))
+        for name, formatter in self._formatted:
+            value = item[name]
+            if value is not None:
+                item[name] = formatter(value)
+        for name, source, function in self._derived:
+            value = item[source]
+            item[name] = function(value) if value is not None else None
+        return item
+
+    def encode_all(self, rows: Iterable[Sequence]) -> List[Dict]:
+        """Converte as linhas em lista de dicionários"""
+        encode = self.encode
+        return [encode(row) for row in rows]
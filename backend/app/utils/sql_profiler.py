@@ -0,0 +1,288 @@
+"""
+Profiler de SQL por fingerprint
+Agrupa as consultas pela forma (literais e parâmetros normalizados) e,
+sob demanda, captura o plano de execução (EXPLAIN) das mais custosas
+"""
+
+import re
+import threading
+import time
+from typing import Dict, List, Optional
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+
+# Normalização: literais e marcadores de parâmetro viram '?'
+_STRING_LITERAL = re.compile(r"'(?:[^'\\]|\\.|'')*'")
+_PLACEHOLDER = re.compile(r"%\(\w+\)s|%s|:\w+|\?")
+_NUMBER = re.compile(r"(?<![\w.])-?\d+(?:\.\d+)?(?:[eE][-+]?\d+)?\b")
+_IN_LIST = re.compile(r"\bIN\s*\(\s*\?(?:\s*,\s*\?)*\s*\)", re.IGNORECASE)
+_VALUES_LIST = re.compile(r"\bVALUES\s*(\([^()]*\))(?:\s*,\s*\([^()]*\))*", re.IGNORECASE)
+_WHITESPACE = re.compile(r"\s+")
+
+# Sentenças aceitas pelo EXPLAIN sem efeitos colaterais
+_EXPLAINABLE = ('select', 'with', 'update', 'delete')
+
+# Tamanho máximo do cache sentença → fingerprint
+_FINGERPRINT_CACHE_SIZE = 2048
+
+
+def fingerprint(statement: str) -> str:
+    """
+    Forma normalizada de uma sentença SQL
+
+    Literais e parâmetros viram '?', listas IN e VALUES de qualquer
+    tamanho viram uma só forma e espaços são compactados, de modo que
+    execuções da mesma consulta com valores diferentes se agrupem.
+
+    Args:
+        statement: Sentença SQL (como enviada ao driver)
+
+    Returns:
+        Fingerprint da sentença
+    """
+    normalized = _STRING_LITERAL.sub('?', statement)
+    normalized = _PLACEHOLDER.sub('?', normalized)
+    normalized = _NUMBER.sub('?', normalized)
+    normalized = _IN_LIST.sub('IN (...)', normalized)
+    normalized = _VALUES_LIST.sub(r'VALUES \1, ...', normalized)
+    return _WHITESPACE.sub(' ', normalized).strip()
+
+
+class QueryStats:
+    """Estatísticas acumuladas de um fingerprint"""
+
+    __slots__ = ('count', 'total', 'max', 'rows', 'statement', 'parameters')
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.rows = 0
+        # Execução mais lenta, usada como amostra no EXPLAIN
+        self.statement = None
+        self.parameters = None
+
+    def to_dict(self, fingerprint: str) -> Dict:
+        return {
+            'fingerprint': fingerprint,
+            'count': self.count,
+            'total_ms': round(self.total * 1000, 3),
+            'avg_ms': round(self.total / self.count * 1000, 3) if self.count else 0.0,
+            'max_ms': round(self.max * 1000, 3),
+            'rows': self.rows,
+            'sample': self.statement,
+        }
+
+
+class SQLProfiler:
+    """
+    Profiler de consultas SQL (por processo)
+
+    Eventos do SQLAlchemy (before/after_cursor_execute) medem cada
+    execução e acumulam contagem, tempo total, tempo máximo e linhas por
+    fingerprint, guardando a execução mais lenta como amostra. Diferente
+    do SQLALCHEMY_ECHO, nada é registrado por consulta: o relatório é
+    montado sob demanda e o EXPLAIN só roda quando pedido.
+
+    Fingerprints além de SQL_PROFILER_MAX_FINGERPRINTS não são
+    acompanhados, apenas contados em 'dropped'.
+    """
+
+    SORT_KEYS = {
+        'total': lambda stats: stats.total,
+        'count': lambda stats: stats.count,
+        'max': lambda stats: stats.max,
+        'avg': lambda stats: stats.total / stats.count if stats.count else 0.0,
+    }
+
+    def __init__(self, app=None):
+        self.lock = threading.Lock()
+        self.enabled = False
+        self.max_fingerprints = 500
+        self.started_at = time.time()
+        self.queries: Dict[str, QueryStats] = {}
+        self.dropped = 0
+        self._fingerprints: Dict[str, str] = {}
+        self._local = threading.local()
+        self._listening = False
+
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        """Registra os eventos do SQLAlchemy"""
+        self.enabled = app.config.get('SQL_PROFILER_ENABLED', False)
+        self.max_fingerprints = app.config.get('SQL_PROFILER_MAX_FINGERPRINTS', 500)
+        app.extensions['sql_profiler'] = self
+
+        if not self.enabled or self._listening:
+            return
+
+        event.listen(Engine, 'before_cursor_execute', self._before_cursor_execute)
+        event.listen(Engine, 'after_cursor_execute', self._after_cursor_execute)
+        self._listening = True
+
+    # ------------------------------------------------------------------
+    # Eventos
+    # ------------------------------------------------------------------
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        # O início fica no contexto da execução: descartado com ela, mesmo se a consulta falhar
+        if context is not None and not getattr(self._local, 'paused', False):
+            context.sql_profiler_start = time.perf_counter()
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        if getattr(self._local, 'paused', False):
+            return
+        started = getattr(context, 'sql_profiler_start', None)
+        if started is None:
+            return
+        elapsed = time.perf_counter() - started
+        rows = cursor.rowcount if cursor.rowcount and cursor.rowcount > 0 else 0
+
+        key = self._fingerprints.get(statement)
+        if key is None:
+            key = fingerprint(statement)
+            if len(self._fingerprints) >= _FINGERPRINT_CACHE_SIZE:
+                self._fingerprints.clear()
+            self._fingerprints[statement] = key
+
+        with self.lock:
+            stats = self.queries.get(key)
+            if stats is None:
+                if len(self.queries) >= self.max_fingerprints:
+                    self.dropped += 1
+                    return
+                stats = self.queries[key] = QueryStats()
+            stats.count += 1
+            stats.total += elapsed
+            stats.rows += rows
+            if elapsed >= stats.max:
+                stats.max = elapsed
+                stats.statement = statement
+                # executemany traz a lista de todas as linhas: sem amostra de parâmetros
+                stats.parameters = None if executemany else parameters
+
+    # ------------------------------------------------------------------
+    # Relatório
+    # ------------------------------------------------------------------
+
+    def reset(self) -> None:
+        with self.lock:
+            self.queries.clear()
+            self.dropped = 0
+            self.started_at = time.time()
+
+    def report(self, limit: int = 20, sort: str = 'total', engine: Optional[Engine] = None) -> Dict:
+        """
+        Relatório dos fingerprints mais custosos
+
+        Args:
+            limit: Quantidade máxima de fingerprints
+            sort: Critério de ordenação ('total', 'count', 'max' ou 'avg')
+            engine: Se informado, captura o EXPLAIN da amostra de cada um
+
+        Returns:
+            Dicionário com totais e a lista de fingerprints
+        """
+        sort = sort if sort in self.SORT_KEYS else 'total'
+        key = self.SORT_KEYS[sort]
+
+        with self.lock:
+            total_queries = sum(stats.count for stats in self.queries.values())
+            total_seconds = sum(stats.total for stats in self.queries.values())
+            ranked = sorted(self.queries.items(), key=lambda item: key(item[1]), reverse=True)
+            top = [(stats.to_dict(fp), stats.parameters) for fp, stats in ranked[:limit]]
+            fingerprints = len(self.queries)
+            dropped = self.dropped
+
+        entries = []
+        for entry, parameters in top:
+            entry['share'] = round(entry['total_ms'] / (total_seconds * 1000) * 100, 1) if total_seconds else 0.0
+            if engine is not None:
+                entry['explain'] = self.explain(engine, entry['sample'], parameters)
+            entries.append(entry)
+
+        return {
+            'since': time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(self.started_at)),
+            'sort': sort,
+            'total_queries': total_queries,
+            'total_ms': round(total_seconds * 1000, 3),
+            'fingerprints': fingerprints,
+            'dropped': dropped,
+            'queries': entries,
+        }
+
+    def explain(self, engine: Engine, statement: str, parameters=None) -> Dict:
+        """
+        Plano de execução de uma sentença
+
+        Usa EXPLAIN no MySQL e EXPLAIN QUERY PLAN no SQLite (a sentença não
+        é executada) e aponta leitura completa de tabela e ordenação ou
+        agrupamento sem índice (filesort / tabela temporária).
+
+        Args:
+            engine: Engine do SQLAlchemy
+            statement: Sentença SQL da amostra
+            parameters: Parâmetros da amostra
+
+        Returns:
+            Dicionário com 'plan' (linhas do plano) e 'flags', ou 'error'
+        """
+        if not statement or not statement.lstrip().lower().startswith(_EXPLAINABLE):
+            return {'error': 'Sentença sem plano de execução'}
+
+        dialect = engine.dialect.name
+        if dialect == 'mysql':
+            prefix = 'EXPLAIN '
+        elif dialect == 'sqlite':
+            prefix = 'EXPLAIN QUERY PLAN '
+        else:
+            return {'error': f'EXPLAIN não suportado para {dialect}'}
+
+        self._local.paused = True
+        try:
+            with engine.connect() as conn:
+                rows = conn.exec_driver_sql(prefix + statement, parameters or ()).mappings().all()
+        except Exception as e:
+            return {'error': str(e)}
+        finally:
+            self._local.paused = False
+
+        plan = [dict(row) for row in rows]
+        flags = _mysql_flags(plan) if dialect == 'mysql' else _sqlite_flags(plan)
+        return {'plan': plan, 'flags': flags}
+
+
+def _mysql_flags(plan: List[Dict]) -> List[str]:
+    flags = []
+    for row in plan:
+        table = row.get('table')
+        extra = row.get('Extra') or ''
+        if row.get('type') == 'ALL':
+            flags.append(f'full_scan:{table}')
+        if 'Using filesort' in extra:
+            flags.append(f'filesort:{table}')
+        if 'Using temporary' in extra:
+            flags.append(f'temporary:{table}')
+    return flags
+
+
+def _sqlite_flags(plan: List[Dict]) -> List[str]:
+    flags = []
+    for row in plan:
+        detail = row.get('detail') or ''
+        # 'SCAN readings' lê a tabela inteira; 'SCAN ... USING INDEX' percorre um índice
+        if detail.startswith('SCAN ') and 'USING' not in detail:
+            flags.append(f"full_scan:{detail.split()[1]}")
+        # Inclui 'FOR RIGHT PART OF ORDER BY' (índice ordena só as primeiras colunas)
+        if 'TEMP B-TREE FOR' in detail and 'ORDER BY' in detail:
+            flags.append('filesort')
+        if 'TEMP B-TREE FOR GROUP BY' in detail or 'TEMP B-TREE FOR DISTINCT' in detail:
+            flags.append('temporary')
+    return flags
+
+
+# Instância única por processo
+sql_profiler = SQLProfiler()
@@ -0,0 +1,244 @@
+"""
+Gateway asyncio
+Sistema de Controle de Acesso - CEU Tres Pontes
+
+Variante do Gateway em que coleta, publicação, status e alertas são
+corrotinas de um único event loop.
+"""
+
+import asyncio
+import time
+from typing import Any, Dict, List, Optional
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from backend.gateway.async_mqtt_client import AsyncMQTTClient
+from backend.gateway.config_loader import get_topic
+from backend.gateway.gateway import Gateway
+
+
+class AsyncGateway(Gateway):
+    """
+    Gateway sobre AsyncMQTTClient.
+
+    Mesmos sensores, mensagens, estatísticas e reenvio do buffer após
+    reconexão do Gateway com threads. Cada laço (coleta, publicação,
+    status a cada 30s, alertas a cada 60s) é uma task; a coleta cede o
+    event loop a cada `collect_chunk` sensores para que frotas grandes não
+    atrasem o keepalive nem as confirmações do broker.
+    """
+
+    STATUS_INTERVAL = 30
+    ALERT_INTERVAL = 60
+
+    def __init__(
+        self,
+        config: Dict[str, Any] = None,
+        collect_chunk: int = 500,
+        publish_status_updates: bool = True
+    ):
+        """
+        Inicializa o gateway.
+
+        Args:
+            config: Dicionário de configuração. Se None, carrega do arquivo.
+            collect_chunk: Sensores coletados entre cessões do event loop
+            publish_status_updates: Publicar status no tópico de status
+        """
+        super().__init__(config, publish_status_updates=publish_status_updates)
+        self.collect_chunk = collect_chunk
+        self.wake_event = asyncio.Event()
+        self.tasks: List[asyncio.Task] = []
+
+    def _create_mqtt_client(self) -> AsyncMQTTClient:
+        return AsyncMQTTClient(self.config, client_id=self.gateway_id)
+
+    async def collect_readings_async(self):
+        """Coleta leituras de todos os sensores, cedendo o event loop entre blocos."""
+        for start in range(0, len(self.sensors), self.collect_chunk):
+            self.collect_readings(self.sensors[start:start + self.collect_chunk])
+            await asyncio.sleep(0)
+
+    async def publish_readings(self):
+        """Publica leituras no broker MQTT (as de conexões fora do ar voltam ao buffer)."""
+        deferred = []
+        while self.sensor_readings_buffer:
+            messages = self._next_batch(deferred)
+            if not messages:
+                continue
+
+            try:
+                handles = await self.mqtt_client.publish_many(messages, message_class='readings')
+            except Exception as e:
+                self.stats['errors'] += len(messages)
+                self.logger.error(f"❌ Erro ao publicar leituras: {e}")
+                continue
+
+            self._record_published(handles)
+
+        self.sensor_readings_buffer = deferred + self.sensor_readings_buffer
+
+    async def publish_status(self, status: str = 'online'):
+        """Publica status do gateway."""
+        if not self.publish_status_updates:
+            return
+
+        try:
+            topic, message = self._status_message(status)
+            await self.mqtt_client.publish(topic, message, retain=True, message_class='status')
+        except Exception as e:
+            self.logger.error(f"❌ Erro ao publicar status: {e}")
+
+    async def send_alert(self, alert_type: str, severity: str, message: str, data: Dict = None):
+        """Envia um alerta via MQTT."""
+        try:
+            alert_message = self.formatter.format_alert_message(
+                alert_type, severity, message, data
+            )
+            topic = get_topic(self.config, 'alerts')
+            await self.mqtt_client.publish(topic, alert_message, message_class='alerts')
+
+            self.stats['alerts_sent'] += 1
+            self.logger.warning(f"⚠️  Alerta enviado: {message}")
+
+        except Exception as e:
+            self.logger.error(f"❌ Erro ao enviar alerta: {e}")
+
+    async def check_alerts(self):
+        """Verifica e envia alertas se necessário."""
+        try:
+            for alert in self._pending_alerts():
+                await self.send_alert(*alert)
+        except Exception as e:
+            self.logger.error(f"❌ Erro ao verificar alertas: {e}")
+
+    async def _every(self, interval: float, action):
+        """Executa `action()` a cada `interval` segundos enquanto rodando."""
+        while self.running:
+            await asyncio.sleep(interval)
+            if not self.mqtt_client.is_connected():
+                continue
+            try:
+                await action()
+            except Exception as e:
+                self.logger.error(f"❌ Erro em tarefa periódica: {e}")
+                self.stats['errors'] += 1
+
+    async def _collect_loop(self):
+        """Coleta leituras a cada PUBLISH_INTERVAL e acorda a publicação."""
+        while self.running:
+            try:
+                await self.collect_readings_async()
+            except Exception as e:
+                self.logger.error(f"❌ Erro na coleta: {e}")
+                self.stats['errors'] += 1
+            self.wake_event.set()
+            await asyncio.sleep(self.publish_interval)
+
+    async def _publish_loop(self):
+        """Publica o buffer quando há leituras novas ou após reconexão."""
+        self.logger.info("🔄 Loop de publicação iniciado")
+        while self.running:
+            await self.wake_event.wait()
+            self.wake_event.clear()
+            if not self.mqtt_client.is_connected():
+                continue
+            try:
+                await self.publish_readings()
+            except Exception as e:
+                self.logger.error(f"❌ Erro no loop de publicação: {e}")
+                self.stats['errors'] += 1
+
+    async def start(self) -> bool:
+        """Inicia o gateway (conecta e cria as tasks)."""
+        if self.running:
+            self.logger.warning("⚠️  Gateway já está rodando")
+            return True
+
+        self.logger.info(f"🚀 Iniciando Gateway asyncio '{self.gateway_name}'...")
+
+        if not await self.mqtt_client.connect():
+            self.logger.error("❌ Falha ao conectar ao broker MQTT")
+            await self.mqtt_client.disconnect()
+            return False
+
+        await self.publish_status()
+
+        self.running = True
+        self.stats['start_time'] = time.time()
+        self.wake_event.clear()
+
+        loop = asyncio.get_running_loop()
+        self.tasks = [
+            loop.create_task(self._collect_loop(), name=f"{self.gateway_id}-collect"),
+            loop.create_task(self._publish_loop(), name=f"{self.gateway_id}-publish"),
+            loop.create_task(self._every(self.STATUS_INTERVAL, self.publish_status),
+                             name=f"{self.gateway_id}-status"),
+            loop.create_task(self._every(self.ALERT_INTERVAL, self.check_alerts),
+                             name=f"{self.gateway_id}-alerts"),
+        ]
+
+        self.logger.info(f"✅ Gateway '{self.gateway_name}' iniciado com sucesso!")
+        self.logger.info(f"📊 Sensores registrados: {len(self.sensors)}")
+        return True
+
+    async def stop(self):
+        """Para o gateway."""
+        if not self.running:
+            return
+
+        self.logger.info("🛑 Parando Gateway...")
+        self.running = False
+
+        for task in self.tasks:
+            task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+        self.tasks = []
+
+        if self.mqtt_client.is_connected():
+            await self.publish_status('offline')
+
+            if not await self.mqtt_client.wait_for_inflight(timeout=self.mqtt_client.publish_timeout):
+                self.logger.warning("⚠️  Mensagens sem confirmação do broker ao parar")
+
+        await self.mqtt_client.disconnect()
+        self.logger.info("👋 Gateway parado")
+
+    async def run(self, duration: Optional[float] = None):
+        """
+        Executa o gateway até ser cancelado ou por `duration` segundos.
+
+        Args:
+            duration: Tempo de execução (None = até cancelamento)
+        """
+        if not await self.start():
+            return
+        try:
+            if duration is None:
+                await asyncio.Event().wait()
+            else:
+                await asyncio.sleep(duration)
+        finally:
+            await self.stop()
+
+
+if __name__ == "__main__":
+    from sensores import LoRaSensor, ZigBeeSensor, SigfoxSensor, RFIDSensor
+
+    print("=== GATEWAY ASYNCIO CEU TRES PONTES ===\n")
+    print("⚠️  Certifique-se de que o Mosquitto está rodando!\n")
+
+    gateway = AsyncGateway()
+    gateway.register_sensors([
+        LoRaSensor(location="Entrada Principal"),
+        ZigBeeSensor(location="Saída Norte", node_type="Router"),
+        SigfoxSensor(location="Portão Sul"),
+        RFIDSensor(location="Catraca 1", frequency_type="HF")
+    ])
+
+    try:
+        asyncio.run(gateway.run())
+    except KeyboardInterrupt:
+        print("\n⏹️  Interrompido pelo usuário")
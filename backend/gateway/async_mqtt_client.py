@@ -0,0 +1,367 @@
+"""
+Cliente MQTT asyncio
+Sistema de Controle de Acesso - CEU Tres Pontes
+
+Variante do MQTTClient em que o socket do paho é conduzido pelo event loop
+(add_reader/add_writer), sem a thread de rede do loop_start.
+"""
+
+import asyncio
+import inspect
+import socket
+import time
+from typing import Any, Callable, Iterable, List, Optional, Tuple
+
+import paho.mqtt.client as mqtt
+
+from backend.gateway.mqtt_client import DeliveryHandle, MQTTClient
+
+
+class AsyncMQTTClient(MQTTClient):
+    """
+    Cliente MQTT para uso dentro de um event loop asyncio.
+
+    Mantém a API do MQTTClient (estatísticas, QoS por classe, janela de
+    mensagens em voo, DeliveryHandle), com `connect`, `disconnect`,
+    `publish`, `publish_many` e `wait_for_inflight` como corrotinas.
+    Todos os callbacks do paho rodam na thread do event loop.
+
+    A reconexão usa o mesmo backoff exponencial com jitter do
+    ConnectionManager, com a espera feita por `asyncio.sleep`.
+    """
+
+    def __init__(self, config, client_id: str = None, dispatcher=None, brokers=None):
+        """
+        Inicializa o cliente.
+
+        Args:
+            config: Dicionário com configurações MQTT
+            client_id: ID do cliente (opcional)
+            dispatcher: AsyncMessageDispatcher (opcional; sem ele os
+                        callbacks rodam direto no event loop)
+            brokers: Brokers em ordem de failover (padrão: BROKER_HOSTS)
+        """
+        super().__init__(config, client_id=client_id, dispatcher=dispatcher, brokers=brokers)
+
+        self.client.on_socket_open = self._on_socket_open
+        self.client.on_socket_close = self._on_socket_close
+        self.client.on_socket_register_write = self._on_socket_register_write
+        self.client.on_socket_unregister_write = self._on_socket_unregister_write
+        # O paho recebe o socket já conectado em `_supervise`
+        self.client._create_socket_connection = self._take_socket
+
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.async_hooks: List[Callable[[bool], Any]] = []
+        self._connected_event: Optional[asyncio.Event] = None
+        self._disconnected_event: Optional[asyncio.Event] = None
+        self._state_changed: Optional[asyncio.Event] = None
+        self._progress: Optional[asyncio.Event] = None
+        self._supervisor: Optional[asyncio.Task] = None
+        self._misc_task: Optional[asyncio.Task] = None
+        self._pending_socket: Optional[socket.socket] = None
+
+    # ------------------------------------------------------------------
+    # Socket no event loop
+    # ------------------------------------------------------------------
+
+    def _take_socket(self) -> socket.socket:
+        """Entrega ao paho o socket aberto fora do event loop."""
+        sock, self._pending_socket = self._pending_socket, None
+        if sock is None:
+            raise OSError("Socket do broker não foi aberto")
+        return sock
+
+    def _on_socket_open(self, client, userdata, sock):
+        self.loop.add_reader(sock, client.loop_read)
+        self._misc_task = self.loop.create_task(self._misc_loop())
+
+    def _on_socket_close(self, client, userdata, sock):
+        self.loop.remove_reader(sock)
+        self.loop.remove_writer(sock)
+        if self._misc_task is not None:
+            self._misc_task.cancel()
+            self._misc_task = None
+
+    def _on_socket_register_write(self, client, userdata, sock):
+        self.loop.add_writer(sock, client.loop_write)
+
+    def _on_socket_unregister_write(self, client, userdata, sock):
+        self.loop.remove_writer(sock)
+
+    async def _misc_loop(self):
+        """Keepalive (PINGREQ) e reenvio de mensagens QoS > 0."""
+        while self.client.loop_misc() == mqtt.MQTT_ERR_SUCCESS:
+            await asyncio.sleep(1)
+
+    # ------------------------------------------------------------------
+    # Conexão
+    # ------------------------------------------------------------------
+
+    def _signal(self, event: Optional[asyncio.Event]) -> None:
+        if event is not None:
+            event.set()
+
+    def _on_connect(self, client, userdata, flags, rc):
+        reconnected = self.connection.ever_connected
+        super()._on_connect(client, userdata, flags, rc)
+        if rc == 0:
+            self._connected_event.set()
+            self._disconnected_event.clear()
+            for hook in self.async_hooks:
+                self.loop.create_task(self._run_hook(hook, reconnected))
+        self._signal(self._state_changed)
+
+    def _on_disconnect(self, client, userdata, rc):
+        super()._on_disconnect(client, userdata, rc)
+        if self._connected_event is not None:
+            self._connected_event.clear()
+            self._disconnected_event.set()
+        self._signal(self._state_changed)
+
+    async def _run_hook(self, hook: Callable[[bool], Any], reconnected: bool):
+        try:
+            result = hook(reconnected)
+            if inspect.isawaitable(result):
+                await result
+        except Exception as e:
+            self.logger.error(f"❌ Erro em hook de conexão: {e}")
+
+    def add_connect_hook(self, hook: Callable[[bool], Any]):
+        """
+        Registra hook(reconnected), função ou corrotina, executado como task
+        após cada conexão.
+
+        Args:
+            hook: Função que recebe True quando é uma reconexão
+        """
+        self.async_hooks.append(hook)
+
+    def _open_socket(self, host: str, port: int) -> socket.socket:
+        return socket.create_connection((host, port), timeout=self.client._connect_timeout)
+
+    async def _supervise(self):
+        """Conecta e reconecta com backoff até `disconnect()`."""
+        while not self.connection.stopping:
+            self._disconnected_event.clear()
+            try:
+                broker = self.connection.broker
+                self.client.connect_async(broker['host'], broker['port'], broker['keepalive'])
+                # DNS e handshake TCP bloqueiam: fora da thread do event loop.
+                # O paho recebe o socket pronto aqui, e os callbacks de socket
+                # (add_reader/add_writer) rodam na thread do event loop.
+                self._pending_socket = await self.loop.run_in_executor(
+                    None, self._open_socket, broker['host'], broker['port']
+                )
+                try:
+                    self.client.reconnect()
+                finally:
+                    if self._pending_socket is not None:
+                        self._pending_socket.close()
+                        self._pending_socket = None
+            except (OSError, socket.timeout) as e:
+                self.logger.debug(f"Falha ao abrir conexão: {e}")
+                self.connection.record_connect_failure()
+                self._signal(self._state_changed)
+            else:
+                await self._disconnected_event.wait()
+                if self.connection.stopping:
+                    break
+
+            delay = self.connection.next_delay or self.connection.min_delay
+            await asyncio.sleep(delay)
+
+    async def connect(self, retry_attempts: int = 3, timeout: float = None) -> bool:
+        """
+        Conecta ao broker MQTT.
+
+        Retorna assim que o CONNACK chega; a task de supervisão segue
+        tentando em segundo plano se o broker estiver fora do ar.
+
+        Args:
+            retry_attempts: Falhas toleradas antes de desistir da espera
+            timeout: Espera máxima em segundos (padrão: CONNECT_TIMEOUT)
+
+        Returns:
+            True se conectado com sucesso
+        """
+        if self._supervisor is None or self._supervisor.done():
+            self.loop = asyncio.get_running_loop()
+            self._connected_event = asyncio.Event()
+            self._disconnected_event = asyncio.Event()
+            self._state_changed = asyncio.Event()
+            self._progress = asyncio.Event()
+            self.connection.begin()
+            self.logger.info(
+                f"🔄 Conectando ao broker {self.connection.broker['host']}:{self.connection.broker['port']}..."
+            )
+            self._supervisor = self.loop.create_task(self._supervise())
+
+        async def ready():
+            while not self._connected_event.is_set() and self.connection.failures < retry_attempts:
+                self._state_changed.clear()
+                await self._state_changed.wait()
+
+        waiter = self.loop.create_task(ready())
+        await asyncio.wait(
+            {waiter, self._supervisor},
+            timeout=self.connect_timeout if timeout is None else timeout,
+            return_when=asyncio.FIRST_COMPLETED
+        )
+        waiter.cancel()
+
+        # Erro de configuração (ex.: porta inválida) encerra a supervisão
+        if self._supervisor.done() and not self._supervisor.cancelled():
+            error = self._supervisor.exception()
+            if error is not None:
+                self.logger.error(f"❌ Erro ao conectar: {error}")
+                self._supervisor = None
+                return False
+        return self._connected_event.is_set()
+
+    async def wait_connected(self, timeout: float = None) -> bool:
+        """Aguarda a conexão (ou reconexão) ficar ativa."""
+        try:
+            await asyncio.wait_for(self._connected_event.wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    async def disconnect(self, timeout: float = 2.0):
+        """
+        Desconecta do broker MQTT e encerra a supervisão.
+
+        Args:
+            timeout: Espera máxima (s) pelo envio do DISCONNECT
+        """
+        if self._supervisor is None:
+            self.connection.finish()
+            return
+        was_connected = self.connected
+        self.connection.finish()
+        self.client.disconnect()
+
+        if was_connected:
+            try:
+                await asyncio.wait_for(self._disconnected_event.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+            self.logger.info("👋 Desconectando do broker...")
+
+        self._supervisor.cancel()
+        try:
+            await self._supervisor
+        except asyncio.CancelledError:
+            pass
+        self._supervisor = None
+
+    # ------------------------------------------------------------------
+    # Publicação
+    # ------------------------------------------------------------------
+
+    def _complete(self, entry: Tuple[DeliveryHandle, bool], acked_at: float):
+        super()._complete(entry, acked_at)
+        # Acorda quem espera vaga na janela ou o fim das mensagens em voo
+        if self._progress is not None:
+            self._progress.set()
+            self._progress = asyncio.Event()
+
+    async def _wait_progress(self, deadline: Optional[float]) -> bool:
+        event = self._progress
+        remaining = None if deadline is None else deadline - time.monotonic()
+        if remaining is not None and remaining <= 0:
+            return False
+        try:
+            await asyncio.wait_for(event.wait(), remaining)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    async def publish(
+        self,
+        topic: str,
+        message: str,
+        retain: bool = False,
+        qos: int = None,
+        message_class: str = None,
+        block: bool = True,
+        timeout: float = None
+    ) -> DeliveryHandle:
+        """
+        Publica uma mensagem (mesma semântica de MQTTClient.publish).
+
+        Com a janela de mensagens em voo cheia, aguarda uma confirmação
+        sem bloquear o event loop.
+
+        Returns:
+            DeliveryHandle: verdadeiro se a mensagem foi aceita
+        """
+        if qos is None:
+            qos = self.qos_for(message_class)
+
+        if not self.connected:
+            self.logger.error("❌ Não conectado ao broker. Não é possível publicar.")
+            return self._rejected(topic, qos, mqtt.MQTT_ERR_NO_CONN)
+
+        holds_slot = qos > 0
+        if holds_slot:
+            wait = self.publish_timeout if timeout is None else timeout
+            deadline = time.monotonic() + wait
+            while not self.inflight_window.acquire(blocking=False):
+                if not block or not await self._wait_progress(deadline):
+                    return self._window_full(topic, qos)
+
+        return self._send(topic, message, qos, retain, holds_slot)
+
+    async def publish_many(
+        self,
+        messages: Iterable[Tuple[str, str]],
+        message_class: str = 'readings',
+        retain: bool = False
+    ) -> List[DeliveryHandle]:
+        """
+        Publica um lote de mensagens da mesma classe.
+
+        Returns:
+            Lista de DeliveryHandle, na ordem do lote
+        """
+        qos = self.qos_for(message_class)
+        return [
+            await self.publish(topic, message, retain=retain, qos=qos)
+            for topic, message in messages
+        ]
+
+    async def wait_for_delivery(self, handle: DeliveryHandle, timeout: float = None) -> bool:
+        """
+        Aguarda a confirmação de uma entrega sem bloquear o event loop.
+
+        Returns:
+            True se confirmada pelo broker dentro do prazo
+        """
+        if not handle.done():
+            future = self.loop.create_future()
+
+            def resolve(_):
+                if not future.done():
+                    future.set_result(None)
+
+            handle.add_done_callback(
+                lambda h: self.loop.call_soon_threadsafe(resolve, h)
+            )
+            try:
+                await asyncio.wait_for(future, timeout)
+            except asyncio.TimeoutError:
+                pass
+        return handle.acked()
+
+    async def wait_for_inflight(self, timeout: float = None) -> bool:
+        """
+        Aguarda todas as mensagens em voo serem confirmadas.
+
+        Returns:
+            True se não restam mensagens em voo
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self.inflight:
+            if not await self._wait_progress(deadline):
+                return not self.inflight
+        return True
@@ -0,0 +1,75 @@
+"""
+MQTT Subscriber asyncio
+Sistema de Controle de Acesso - CEU Tres Pontes
+
+Variante do MQTTSubscriber que roda inteiramente em um event loop asyncio.
+"""
+
+import asyncio
+import time
+from typing import Any, Dict
+
+from backend.gateway.async_mqtt_client import AsyncMQTTClient
+from backend.gateway.message_dispatcher import AsyncMessageDispatcher
+from backend.gateway.mqtt_subscriber import MQTTSubscriber
+
+
+class AsyncMQTTSubscriber(MQTTSubscriber):
+    """
+    Subscriber MQTT sobre AsyncMQTTClient.
+
+    Mesmos tópicos, grupo de consumidores, cache, callbacks e estatísticas
+    do MQTTSubscriber; os workers de processamento são tasks do event loop
+    (WORKERS=0 processa direto no callback do socket). `start` e `stop`
+    são corrotinas.
+    """
+
+    def _create_dispatcher(self, subscriber_config: Dict[str, Any]) -> AsyncMessageDispatcher:
+        return AsyncMessageDispatcher(
+            workers=subscriber_config['workers'],
+            queue_size=subscriber_config.get('queue_size', 10000),
+            overflow_policy=subscriber_config.get('overflow_policy', 'drop_oldest'),
+            name=f"{self.client_id}-worker"
+        )
+
+    def _create_mqtt_client(self) -> AsyncMQTTClient:
+        return AsyncMQTTClient(self.config, client_id=self.client_id, dispatcher=self.dispatcher)
+
+    async def start(self) -> bool:
+        """Inicia o subscriber e conecta ao broker."""
+        self.logger.info(f"🚀 Iniciando Subscriber asyncio '{self.client_id}'...")
+
+        if self.dispatcher is not None:
+            self.dispatcher.start()
+
+        if not await self.mqtt_client.connect():
+            self.logger.error("❌ Falha ao conectar ao broker MQTT")
+            await self.mqtt_client.disconnect()
+            if self.dispatcher is not None:
+                await self.dispatcher.stop()
+            return False
+
+        self._subscribe_topics()
+        self.stats['start_time'] = time.time()
+
+        self.logger.info("✅ Subscriber iniciado com sucesso!")
+        self.logger.info(f"📡 Broker: {self.config['broker']['host']}:{self.config['broker']['port']}")
+
+        return True
+
+    async def stop(self):
+        """Para o subscriber (sai do grupo, desconecta e esvazia as filas)."""
+        self.logger.info("🛑 Parando Subscriber...")
+
+        if self.shared_topics and self.mqtt_client.is_connected():
+            for topic in self.shared_topics:
+                self.mqtt_client.unsubscribe(topic)
+            self.shared_topics = []
+            await asyncio.sleep(self.unsubscribe_grace)
+
+        await self.mqtt_client.disconnect()
+
+        if self.dispatcher is not None:
+            await self.dispatcher.stop()
+
+        self.logger.info("👋 Subscriber parado")
@@ -5,7 +5,7 @@ Sistema de Controle de Acesso - CEU Tres Pontes
 
 import os
 import configparser
-from typing import Dict, Any
+from typing import Dict, Any, List
 
 
 def load_mqtt_config(config_file: str = None) -> Dict[str, Any]:
@@ -27,11 +27,15 @@ def load_mqtt_config(config_file: str = None) -> Dict[str, Any]:
     config = configparser.ConfigParser()
     config.read(config_file, encoding='utf-8')
     
+    host = config.get('MQTT', 'BROKER_HOST', fallback='localhost')
+    port = config.getint('MQTT', 'BROKER_PORT', fallback=1883)
+    
     # Extrair configurações
     mqtt_config = {
         'broker': {
-            'host': config.get('MQTT', 'BROKER_HOST', fallback='localhost'),
-            'port': config.getint('MQTT', 'BROKER_PORT', fallback=1883),
+            'host': host,
+            'port': port,
+            'hosts': parse_broker_hosts(config.get('MQTT', 'BROKER_HOSTS', fallback=''), host, port),
             'keepalive': config.getint('MQTT', 'BROKER_KEEPALIVE', fallback=60),
             'username': config.get('MQTT', 'BROKER_USERNAME', fallback=''),
             'password': config.get('MQTT', 'BROKER_PASSWORD', fallback=''),
@@ -44,12 +48,30 @@ def load_mqtt_config(config_file: str = None) -> Dict[str, Any]:
             'commands': config.get('MQTT', 'TOPIC_COMMANDS', fallback='comandos'),
         },
         'qos': config.getint('MQTT', 'QOS_LEVEL', fallback=1),
+        'qos_classes': {
+            'readings': config.getint('MQTT', 'QOS_READINGS', fallback=0),
+            'alerts': config.getint('MQTT', 'QOS_ALERTS', fallback=1),
+            'status': config.getint('MQTT', 'QOS_STATUS', fallback=1),
+        },
+        'reconnect': {
+            'min_delay': config.getfloat('MQTT', 'RECONNECT_MIN_DELAY', fallback=1.0),
+            'max_delay': config.getfloat('MQTT', 'RECONNECT_MAX_DELAY', fallback=60.0),
+            'connect_timeout': config.getfloat('MQTT', 'CONNECT_TIMEOUT', fallback=10.0),
+            'failover_after': config.getint('MQTT', 'FAILOVER_AFTER', fallback=2),
+        },
+        'flow_control': {
+            'max_inflight': config.getint('MQTT', 'MAX_INFLIGHT', fallback=20),
+            'publish_timeout': config.getfloat('MQTT', 'PUBLISH_TIMEOUT', fallback=5.0),
+        },
         'gateway': {
             'id': config.get('GATEWAY', 'GATEWAY_ID', fallback='gateway_001'),
             'name': config.get('GATEWAY', 'GATEWAY_NAME', fallback='Gateway Principal'),
             'location': config.get('GATEWAY', 'GATEWAY_LOCATION', fallback='Sala de Controle'),
             'publish_interval': config.getint('GATEWAY', 'PUBLISH_INTERVAL', fallback=2),
             'batch_size': config.getint('GATEWAY', 'BATCH_SIZE', fallback=10),
+            'connections': config.getint('GATEWAY', 'CONNECTIONS', fallback=1),
+            'workers': config.getint('GATEWAY', 'WORKERS', fallback=1),
+            'sensors_file': config.get('GATEWAY', 'SENSORS_FILE', fallback=''),
         },
         'logging': {
             'level': config.get('LOGGING', 'LOG_LEVEL', fallback='INFO'),
@@ -57,6 +79,16 @@ def load_mqtt_config(config_file: str = None) -> Dict[str, Any]:
             'max_size': config.getint('LOGGING', 'LOG_MAX_SIZE', fallback=10485760),
             'backup_count': config.getint('LOGGING', 'LOG_BACKUP_COUNT', fallback=5),
         },
+        'subscriber': {
+            'cache_size': config.getint('SUBSCRIBER', 'CACHE_SIZE', fallback=1000),
+            'workers': config.getint('SUBSCRIBER', 'WORKERS', fallback=4),
+            'queue_size': config.getint('SUBSCRIBER', 'QUEUE_SIZE', fallback=10000),
+            'overflow_policy': config.get('SUBSCRIBER', 'OVERFLOW_POLICY', fallback='drop_oldest'),
+            'share_group': config.get('SUBSCRIBER', 'SHARE_GROUP', fallback=''),
+            'client_id_prefix': config.get('SUBSCRIBER', 'CLIENT_ID_PREFIX', fallback='subscriber'),
+            'instances': config.getint('SUBSCRIBER', 'INSTANCES', fallback=1),
+            'unsubscribe_grace': config.getfloat('SUBSCRIBER', 'UNSUBSCRIBE_GRACE', fallback=0.5),
+        },
         'parque': {
             'nome': config.get('PARQUE', 'NOME', fallback='CEU Tres Pontes'),
             'capacidade_maxima': config.getint('PARQUE', 'CAPACIDADE_MAXIMA', fallback=5000),
@@ -67,6 +99,33 @@ def load_mqtt_config(config_file: str = None) -> Dict[str, Any]:
     return mqtt_config
 
 
+def parse_broker_hosts(value: str, default_host: str, default_port: int) -> List[Dict[str, Any]]:
+    """
+    Interpreta a lista de brokers (BROKER_HOSTS).
+    
+    Args:
+        value: Lista separada por vírgulas no formato host[:porta]
+        default_host: Host usado quando a lista está vazia
+        default_port: Porta usada quando omitida
+    
+    Returns:
+        Lista de dicionários {'host', 'port'}
+    
+    Examples:
+        >>> parse_broker_hosts('mqtt1:1883, mqtt2', 'localhost', 1883)
+        [{'host': 'mqtt1', 'port': 1883}, {'host': 'mqtt2', 'port': 1883}]
+    """
+    hosts = []
+    for item in value.split(','):
+        item = item.strip()
+        if not item:
+            continue
+        host, _, port = item.rpartition(':') if ':' in item else (item, '', '')
+        hosts.append({'host': host, 'port': int(port) if port else default_port})
+    
+    return hosts or [{'host': default_host, 'port': default_port}]
+
+
 def get_topic(config: Dict[str, Any], topic_type: str, sensor_id: str = None) -> str:
     """
     Gera o tópico MQTT completo.
@@ -123,6 +182,20 @@ def validate_config(config: Dict[str, Any]) -> tuple[bool, str]:
     if config['qos'] not in [0, 1, 2]:
         return False, "QoS deve ser 0, 1 ou 2"
     
+    for message_class, qos in config.get('qos_classes', {}).items():
+        if qos not in [0, 1, 2]:
+            return False, f"QoS de {message_class} deve ser 0, 1 ou 2"
+    
+    for broker in config['broker'].get('hosts', []):
+        if not broker['host'] or not (1 <= broker['port'] <= 65535):
+            return False, f"Broker inválido em BROKER_HOSTS: {broker}"
+    
+    if config['gateway'].get('connections', 1) < 1:
+        return False, "CONNECTIONS deve ser maior que zero"
+    
+    if config.get('flow_control', {}).get('max_inflight', 1) < 1:
+        return False, "MAX_INFLIGHT deve ser maior que zero"
+    
     return True, "Configuração válida"
 
 
@@ -0,0 +1,306 @@
+"""
+Gerenciador de Conexão MQTT
+Sistema de Controle de Acesso - CEU Tres Pontes
+
+Conexão orientada a eventos (CONNACK) com reconexão por backoff
+exponencial com jitter.
+"""
+
+import logging
+import random
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+import paho.mqtt.client as mqtt
+
+from backend.gateway.message_dispatcher import LatencyHistogram
+
+
+class ConnectionManager:
+    """
+    Estado da conexão de um cliente paho.
+
+    `connect()` retorna assim que o CONNACK chega (sem polling). Quedas e
+    falhas de conexão reprogramam o próximo atraso de reconexão do paho
+    com backoff exponencial e jitter, para que vários gateways não voltem
+    todos ao mesmo tempo após um restart do broker.
+
+    Hooks registrados com `add_hook()` rodam em uma thread própria a cada
+    conexão bem-sucedida (ex.: reenvio do buffer local), sem bloquear a
+    thread de rede do paho.
+
+    Com mais de um broker em `brokers`, após `failover_after` falhas
+    seguidas a próxima tentativa vai para o broker seguinte da lista.
+    """
+
+    def __init__(
+        self,
+        client: mqtt.Client,
+        broker: Dict[str, Any],
+        min_delay: float = 1.0,
+        max_delay: float = 60.0,
+        name: str = 'mqtt',
+        brokers: List[Dict[str, Any]] = None,
+        failover_after: int = 2
+    ):
+        """
+        Inicializa o gerenciador.
+
+        Args:
+            client: Cliente paho
+            broker: Configuração do broker (host, port, keepalive)
+            min_delay: Atraso inicial de reconexão (s)
+            max_delay: Atraso máximo de reconexão (s)
+            name: Nome usado na thread de hooks
+            brokers: Brokers em ordem de preferência ({'host', 'port'});
+                     padrão: apenas `broker`
+            failover_after: Falhas seguidas antes de trocar de broker
+        """
+        if min_delay <= 0 or max_delay < min_delay:
+            raise ValueError("Atrasos de reconexão inválidos")
+
+        self.client = client
+        base = {key: value for key, value in broker.items() if key != 'hosts'}
+        self.brokers = [{**base, **entry} for entry in (brokers or [{}])]
+        self.broker_index = 0
+        self.broker = self.brokers[0]
+        self.failover_after = max(1, failover_after)
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self.name = name
+
+        self.condition = threading.Condition()
+        self.connected_event = threading.Event()
+        self.started = False
+        self.stopping = False
+        self.failures = 0          # falhas seguidas desde a última conexão
+        self.next_delay: Optional[float] = None
+        self.down_since: Optional[float] = None
+        self.ever_connected = False
+        self.hooks: List[Callable[[bool], Any]] = []
+
+        self.time_to_connected = LatencyHistogram()
+        self.last_time_to_connected_ms: Optional[float] = None
+        self.stats = {
+            'connects': 0,
+            'reconnects': 0,
+            'connect_failures': 0,
+            'disconnects': 0,
+            'failovers': 0
+        }
+
+        self.logger = logging.getLogger(__name__)
+
+        self.client.on_connect_fail = self._on_connect_fail
+
+    def add_hook(self, hook: Callable[[bool], Any]):
+        """
+        Registra hook(reconnected) executado após cada conexão.
+
+        Args:
+            hook: Função que recebe True quando é uma reconexão
+        """
+        self.hooks.append(hook)
+
+    def backoff_delay(self, failures: int) -> float:
+        """
+        Atraso antes da próxima tentativa (backoff exponencial com jitter).
+
+        Metade do atraso é fixa e metade aleatória ("equal jitter"), o que
+        espalha as tentativas sem nunca ficar abaixo de `min_delay`.
+
+        Args:
+            failures: Falhas seguidas (1 = primeira)
+
+        Returns:
+            Atraso em segundos
+        """
+        ceiling = min(self.max_delay, self.min_delay * 2 ** max(0, failures - 1))
+        return max(self.min_delay, ceiling / 2 + random.uniform(0, ceiling / 2))
+
+    def _schedule_retry(self):
+        """Programa no paho o atraso da próxima reconexão."""
+        with self.condition:
+            self.failures += 1
+            self.next_delay = self.backoff_delay(self.failures)
+            delay = self.next_delay
+            failover = len(self.brokers) > 1 and self.failures % self.failover_after == 0
+            self.condition.notify_all()
+        if failover:
+            self._failover()
+        # Com mínimo == máximo o paho usa exatamente este atraso
+        self.client.reconnect_delay_set(delay, delay)
+
+    def _failover(self):
+        """Aponta as próximas tentativas para o broker seguinte da lista."""
+        with self.condition:
+            self.broker_index = (self.broker_index + 1) % len(self.brokers)
+            self.broker = self.brokers[self.broker_index]
+            self.stats['failovers'] += 1
+        # Só atualiza host/porta; a thread de rede usa-os na próxima tentativa
+        self.client.connect_async(
+            self.broker['host'],
+            self.broker['port'],
+            self.broker['keepalive']
+        )
+        self.logger.warning(
+            f"🔀 Failover para o broker {self.broker['host']}:{self.broker['port']}"
+        )
+
+    def connect(self, retry_attempts: int = 3, timeout: float = None) -> bool:
+        """
+        Inicia a conexão e aguarda o CONNACK.
+
+        A thread de rede do paho continua tentando em segundo plano mesmo
+        que este método retorne False.
+
+        Args:
+            retry_attempts: Falhas toleradas antes de desistir da espera
+            timeout: Espera máxima em segundos (None = sem limite)
+
+        Returns:
+            True se conectado
+        """
+        with self.condition:
+            if not self.started:
+                self.begin()
+                self.client.reconnect_delay_set(self.min_delay, self.min_delay)
+                self.client.connect_async(
+                    self.broker['host'],
+                    self.broker['port'],
+                    self.broker['keepalive']
+                )
+                self.client.loop_start()
+                self.logger.info(
+                    f"🔄 Conectando ao broker {self.broker['host']}:{self.broker['port']}..."
+                )
+
+            deadline = None if timeout is None else time.monotonic() + timeout
+            while not self.connected_event.is_set() and self.failures < retry_attempts:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    break
+                self.condition.wait(remaining)
+
+            return self.connected_event.is_set()
+
+    def begin(self):
+        """Marca o início das tentativas de conexão."""
+        with self.condition:
+            self.started = True
+            self.stopping = False
+            self.failures = 0
+            self.down_since = time.monotonic()
+
+    def finish(self):
+        """Marca a parada pedida (quedas seguintes não reconectam)."""
+        with self.condition:
+            self.stopping = True
+            self.started = False
+
+    def wait_connected(self, timeout: float = None) -> bool:
+        """Aguarda a conexão (ou reconexão) ficar ativa."""
+        return self.connected_event.wait(timeout)
+
+    def disconnect(self):
+        """Desconecta e para a thread de rede (sem reconectar)."""
+        self.finish()
+        self.client.disconnect()
+        self.client.loop_stop()
+        self.connected_event.clear()
+
+    def on_connect(self, rc: int):
+        """Chamar no on_connect do paho."""
+        if rc != 0:
+            # Conexão recusada: o broker fecha o socket e o on_disconnect
+            # programa a próxima tentativa
+            with self.condition:
+                self.stats['connect_failures'] += 1
+            return
+
+        now = time.monotonic()
+        with self.condition:
+            reconnected = self.ever_connected
+            self.ever_connected = True
+            self.stats['connects'] += 1
+            if reconnected:
+                self.stats['reconnects'] += 1
+            if self.down_since is not None:
+                self.last_time_to_connected_ms = (now - self.down_since) * 1000
+                self.time_to_connected.observe(self.last_time_to_connected_ms)
+                self.down_since = None
+            self.failures = 0
+            self.next_delay = None
+            self.connected_event.set()
+            self.condition.notify_all()
+
+        if self.last_time_to_connected_ms is not None:
+            self.logger.info(f"⏱️  Conectado em {self.last_time_to_connected_ms:.0f} ms")
+
+        if self.hooks:
+            threading.Thread(
+                target=self._run_hooks,
+                args=(reconnected,),
+                name=f"{self.name}-hooks",
+                daemon=True
+            ).start()
+
+    def on_disconnect(self, rc: int):
+        """Chamar no on_disconnect do paho."""
+        with self.condition:
+            was_connected = self.connected_event.is_set()
+            self.connected_event.clear()
+            if was_connected:
+                self.stats['disconnects'] += 1
+                self.down_since = time.monotonic()
+            stopping = self.stopping
+
+        if rc != 0 and not stopping:
+            self._schedule_retry()
+            self.logger.warning(f"🔁 Nova tentativa de conexão em {self.next_delay:.1f}s")
+
+    def _on_connect_fail(self, client, userdata):
+        """Falha de rede ao (re)conectar (broker fora do ar)."""
+        self.record_connect_failure()
+
+    def record_connect_failure(self):
+        """Registra uma falha de conexão e programa a próxima tentativa."""
+        with self.condition:
+            self.stats['connect_failures'] += 1
+        self._schedule_retry()
+        self.logger.warning(
+            f"⚠️  Broker indisponível. Nova tentativa em {self.next_delay:.1f}s"
+        )
+
+    def _run_hooks(self, reconnected: bool):
+        for hook in list(self.hooks):
+            try:
+                hook(reconnected)
+            except Exception as e:
+                self.logger.error(f"❌ Erro em hook de conexão: {e}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Retorna métricas da conexão.
+
+        Returns:
+            Dicionário com contadores, backoff atual e tempo até conectar
+        """
+        with self.condition:
+            return {
+                'connected': self.connected_event.is_set(),
+                'broker': f"{self.broker['host']}:{self.broker['port']}",
+                'consecutive_failures': self.failures,
+                'next_retry_delay': round(self.next_delay, 3) if self.next_delay else None,
+                'down_for_seconds': (
+                    round(time.monotonic() - self.down_since, 3)
+                    if self.down_since is not None and self.started else None
+                ),
+                'last_time_to_connected_ms': (
+                    round(self.last_time_to_connected_ms, 3)
+                    if self.last_time_to_connected_ms is not None else None
+                ),
+                'time_to_connected': self.time_to_connected.summary(),
+                **self.stats
+            }
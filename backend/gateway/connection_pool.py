@@ -0,0 +1,194 @@
+"""
+Pool de Conexões MQTT
+Sistema de Controle de Acesso - CEU Tres Pontes
+
+Várias conexões MQTT por gateway, com os sensores distribuídos entre elas.
+"""
+
+import logging
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, List, Tuple
+
+from backend.gateway.message_dispatcher import LatencyHistogram
+from backend.gateway.mqtt_client import DeliveryHandle, MQTTClient
+
+
+class MQTTConnectionPool:
+    """
+    Conjunto de MQTTClient com a mesma interface de publicação de um cliente.
+
+    Cada mensagem vai para a conexão escolhida por hash (crc32) do tópico;
+    como o tópico de leituras termina no serial do sensor, as leituras de
+    um sensor saem sempre pela mesma conexão, na ordem de publicação.
+
+    Cada conexão tem client id próprio (`<gateway>_c<n>`) e, com vários
+    brokers em BROKER_HOSTS, começa por um broker diferente da lista
+    (distribuição de carga) e usa os demais como failover.
+    """
+
+    def __init__(self, config: Dict[str, Any], client_id: str, connections: int):
+        """
+        Inicializa o pool.
+
+        Args:
+            config: Dicionário com configurações MQTT
+            client_id: Prefixo dos client ids
+            connections: Número de conexões
+        """
+        if connections < 1:
+            raise ValueError("connections deve ser maior que zero")
+
+        self.config = config
+        self.client_id = client_id
+        brokers = config['broker'].get('hosts') or [
+            {'host': config['broker']['host'], 'port': config['broker']['port']}
+        ]
+
+        self.clients: List[MQTTClient] = []
+        for index in range(connections):
+            offset = index % len(brokers)
+            self.clients.append(MQTTClient(
+                config,
+                client_id=f"{client_id}_c{index}",
+                brokers=brokers[offset:] + brokers[:offset]
+            ))
+
+        self.publish_timeout = self.clients[0].publish_timeout
+        # Uma thread por conexão: lotes de conexões diferentes saem em paralelo
+        self.executor = ThreadPoolExecutor(
+            max_workers=connections,
+            thread_name_prefix=f"{client_id}-pub"
+        )
+
+        self.logger = logging.getLogger(__name__)
+
+    def client_for(self, topic: str) -> MQTTClient:
+        """Conexão responsável pelo tópico."""
+        return self.clients[zlib.crc32(topic.encode('utf-8')) % len(self.clients)]
+
+    def _on_all(self, action: Callable[[MQTTClient], Any]) -> List[Any]:
+        """Executa `action` em todas as conexões em paralelo."""
+        return list(self.executor.map(action, self.clients))
+
+    def connect(self, retry_attempts: int = 3, timeout: float = None) -> bool:
+        """
+        Conecta todas as conexões em paralelo.
+
+        Returns:
+            True se todas conectaram
+        """
+        results = self._on_all(lambda client: client.connect(retry_attempts, timeout))
+        connected = sum(1 for result in results if result)
+        self.logger.info(f"🔗 {connected}/{len(self.clients)} conexões MQTT ativas")
+        return connected == len(self.clients)
+
+    def disconnect(self):
+        """Desconecta todas as conexões."""
+        self._on_all(lambda client: client.disconnect())
+
+    def add_connect_hook(self, hook: Callable[[bool], Any]):
+        """Registra hook(reconnected) em todas as conexões."""
+        for client in self.clients:
+            client.add_connect_hook(hook)
+
+    def is_connected(self) -> bool:
+        """True se alguma conexão está ativa (as demais são checadas por tópico)."""
+        return any(client.is_connected() for client in self.clients)
+
+    def is_connected_for(self, topic: str) -> bool:
+        """True se a conexão responsável pelo tópico está ativa."""
+        return self.client_for(topic).is_connected()
+
+    def qos_for(self, message_class: str = None) -> int:
+        return self.clients[0].qos_for(message_class)
+
+    def publish(self, topic: str, message: str, **kwargs) -> DeliveryHandle:
+        """Publica pela conexão do tópico (mesmos argumentos de MQTTClient.publish)."""
+        return self.client_for(topic).publish(topic, message, **kwargs)
+
+    def publish_many(
+        self,
+        messages: Iterable[Tuple[str, str]],
+        message_class: str = 'readings',
+        retain: bool = False
+    ) -> List[DeliveryHandle]:
+        """
+        Publica um lote, em paralelo entre as conexões.
+
+        Args:
+            messages: Pares (tópico, mensagem)
+            message_class: Classe das mensagens (define o QoS)
+            retain: Se as mensagens devem ser retidas pelo broker
+
+        Returns:
+            Lista de DeliveryHandle, na ordem do lote
+        """
+        groups: Dict[int, List[Tuple[int, str, str]]] = {}
+        count = 0
+        for position, (topic, message) in enumerate(messages):
+            index = zlib.crc32(topic.encode('utf-8')) % len(self.clients)
+            groups.setdefault(index, []).append((position, topic, message))
+            count = position + 1
+
+        def send(index: int):
+            group = groups[index]
+            handles = self.clients[index].publish_many(
+                ((topic, message) for _, topic, message in group),
+                message_class=message_class,
+                retain=retain
+            )
+            return [(position, handle) for (position, _, _), handle in zip(group, handles)]
+
+        handles: List[DeliveryHandle] = [None] * count
+        for result in self.executor.map(send, list(groups)):
+            for position, handle in result:
+                handles[position] = handle
+        return handles
+
+    def wait_for_inflight(self, timeout: float = None) -> bool:
+        """Aguarda as mensagens em voo de todas as conexões."""
+        return all(self._on_all(lambda client: client.wait_for_inflight(timeout)))
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Retorna estatísticas somadas do pool e resumo por conexão.
+
+        Returns:
+            Dicionário com estatísticas
+        """
+        per_client = [client.get_stats() for client in self.clients]
+
+        latency = LatencyHistogram()
+        for client in self.clients:
+            with client.lock:
+                latency.merge(client.publish_latency)
+
+        def total(key: str) -> int:
+            return sum(stats[key] for stats in per_client)
+
+        return {
+            'client_id': self.client_id,
+            'connections': len(self.clients),
+            'connected': sum(1 for stats in per_client if stats['connected']),
+            'messages_published': total('messages_published'),
+            'messages_received': total('messages_received'),
+            'inflight': total('inflight'),
+            'max_inflight': total('max_inflight'),
+            'publish_rejected': total('publish_rejected'),
+            'publish_window_timeouts': total('publish_window_timeouts'),
+            'publish_latency': latency.summary(),
+            'connection_failures': total('connection_failures'),
+            'per_connection': [
+                {
+                    'client_id': stats['client_id'],
+                    'broker': stats['broker'],
+                    'connected': stats['connected'],
+                    'messages_published': stats['messages_published'],
+                    'inflight': stats['inflight'],
+                    'reconnects': stats['connection']['reconnects'],
+                    'failovers': stats['connection']['failovers'],
+                }
+                for stats in per_client
+            ]
+        }
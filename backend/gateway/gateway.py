@@ -8,7 +8,7 @@ Gateway que gerencia sensores e publica dados via MQTT.
 import time
 import logging
 from datetime import datetime
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 from threading import Thread, Event
 import sys
 import os
@@ -18,21 +18,45 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspa
 
 from sensores.base_sensor import BaseSensor
 from backend.gateway.mqtt_client import MQTTClient
+from backend.gateway.connection_pool import MQTTConnectionPool
 from backend.gateway.message_formatter import MessageFormatter
 from backend.gateway.config_loader import load_mqtt_config, get_topic
 
 
+def capacity_alerts(total_detections: int, max_capacity: int) -> List[Tuple[str, str, str, Dict]]:
+    """
+    Alertas de capacidade do parque.
+    
+    Args:
+        total_detections: Detecções acumuladas
+        max_capacity: Capacidade máxima do parque
+    
+    Returns:
+        Tuplas (tipo, severidade, mensagem, dados)
+    """
+    current_percentage = (total_detections / max_capacity) * 100
+    data = {'current': total_detections, 'max': max_capacity}
+    
+    if current_percentage >= 80 and current_percentage < 90:
+        return [('capacity', 'medium', f'Capacidade do parque em {current_percentage:.1f}%', data)]
+    if current_percentage >= 90:
+        return [('capacity', 'high', f'Capacidade do parque CRÍTICA: {current_percentage:.1f}%', data)]
+    return []
+
+
 class Gateway:
     """
     Gateway que coleta dados dos sensores e publica via MQTT.
     """
     
-    def __init__(self, config: Dict[str, Any] = None):
+    def __init__(self, config: Dict[str, Any] = None, publish_status_updates: bool = True):
         """
         Inicializa o Gateway.
         
         Args:
             config: Dicionário de configuração. Se None, carrega do arquivo.
+            publish_status_updates: Publicar status no tópico de status (False
+                                    quando um supervisor publica o status agregado)
         """
         # Carregar configuração
         self.config = config or load_mqtt_config()
@@ -40,9 +64,11 @@ class Gateway:
         self.gateway_name = self.config['gateway']['name']
         self.publish_interval = self.config['gateway']['publish_interval']
         self.batch_size = self.config['gateway']['batch_size']
+        self.publish_status_updates = publish_status_updates
         
         # Componentes
-        self.mqtt_client = MQTTClient(self.config, client_id=self.gateway_id)
+        self.mqtt_client = self._create_mqtt_client()
+        self.mqtt_client.add_connect_hook(self._on_mqtt_connected)
         self.formatter = MessageFormatter(self.gateway_id)
         
         # Sensores gerenciados
@@ -54,6 +80,8 @@ class Gateway:
         self.publish_thread: Optional[Thread] = None
         self.monitor_thread: Optional[Thread] = None
         self.stop_event = Event()
+        # Acorda o loop de publicação antes do intervalo (ex.: reconexão)
+        self.wake_event = Event()
         
         # Estatísticas
         self.stats = {
@@ -70,6 +98,13 @@ class Gateway:
         
         self.logger.info(f"🏭 Gateway '{self.gateway_name}' inicializado")
     
+    def _create_mqtt_client(self):
+        """Cria o cliente MQTT do gateway (pool se CONNECTIONS > 1)."""
+        connections = self.config['gateway'].get('connections', 1)
+        if connections > 1:
+            return MQTTConnectionPool(self.config, self.gateway_id, connections)
+        return MQTTClient(self.config, client_id=self.gateway_id)
+    
     def _setup_logging(self) -> logging.Logger:
         """Configura o sistema de logging."""
         logger = logging.getLogger(f"Gateway.{self.gateway_id}")
@@ -122,9 +157,14 @@ class Gateway:
         for sensor in sensors:
             self.register_sensor(sensor)
     
-    def collect_readings(self):
-        """Coleta leituras de todos os sensores registrados."""
-        for sensor in self.sensors:
+    def collect_readings(self, sensors: List[BaseSensor] = None):
+        """
+        Coleta leituras dos sensores registrados.
+        
+        Args:
+            sensors: Subconjunto dos sensores (padrão: todos)
+        """
+        for sensor in self.sensors if sensors is None else sensors:
             try:
                 # Simular detecção do sensor
                 reading = sensor.simulate_detection()
@@ -141,88 +181,119 @@ class Gateway:
                 self.stats['errors'] += 1
                 self.logger.error(f"❌ Erro ao coletar do sensor {sensor.serial_number}: {e}")
     
-    def publish_readings(self):
-        """Publica leituras no broker MQTT."""
-        if not self.sensor_readings_buffer:
-            return
+    def _next_batch(self, deferred: List[Dict[str, Any]] = None) -> List[Tuple[str, str]]:
+        """
+        Retira o próximo lote do buffer e formata as mensagens.
+        
+        Args:
+            deferred: Recebe as leituras cuja conexão está fora do ar
+                      (ficam fora do lote, para voltar ao buffer)
+        
+        Returns:
+            Pares (tópico, mensagem) do lote
+        """
+        batch = self.sensor_readings_buffer[:self.batch_size]
+        self.sensor_readings_buffer = self.sensor_readings_buffer[self.batch_size:]
         
+        messages = []
+        for reading in batch:
+            try:
+                message = self.formatter.format_sensor_reading(reading)
+                topic = get_topic(
+                    self.config,
+                    'sensors',
+                    reading['serial_number']
+                )
+                if deferred is not None and not self.mqtt_client.is_connected_for(topic):
+                    deferred.append(reading)
+                    continue
+                messages.append((topic, message))
+            except Exception as e:
+                self.stats['errors'] += 1
+                self.logger.error(f"❌ Erro ao formatar leitura: {e}")
+        return messages
+    
+    def _record_published(self, handles: list):
+        """Contabiliza as entregas aceitas e rejeitadas de um lote."""
+        accepted = sum(1 for handle in handles if handle)
+        self.stats['readings_published'] += accepted
+        self.stats['errors'] += len(handles) - accepted
+    
+    def publish_readings(self):
+        """Publica leituras no broker MQTT (as de conexões fora do ar voltam ao buffer)."""
+        deferred = []
         while self.sensor_readings_buffer:
-            # Pegar leituras do buffer
-            batch = self.sensor_readings_buffer[:self.batch_size]
-            self.sensor_readings_buffer = self.sensor_readings_buffer[self.batch_size:]
+            messages = self._next_batch(deferred)
+            if not messages:
+                continue
             
-            # Publicar cada leitura
-            for reading in batch:
-                try:
-                    # Formatar mensagem
-                    message = self.formatter.format_sensor_reading(reading)
-                    
-                    # Definir tópico
-                    topic = get_topic(
-                        self.config,
-                        'sensors',
-                        reading['serial_number']
-                    )
-                    
-                    # Publicar
-                    if self.mqtt_client.publish(topic, message):
-                        self.stats['readings_published'] += 1
-                    else:
-                        self.stats['errors'] += 1
-                        
-                except Exception as e:
-                    self.stats['errors'] += 1
-                    self.logger.error(f"❌ Erro ao publicar leitura: {e}")
+            # Publicar o lote com o QoS da classe 'readings'
+            try:
+                handles = self.mqtt_client.publish_many(messages, message_class='readings')
+            except Exception as e:
+                self.stats['errors'] += len(messages)
+                self.logger.error(f"❌ Erro ao publicar leituras: {e}")
+                continue
+            
+            self._record_published(handles)
+        
+        # Aguardam a reconexão da sua conexão (hook _on_mqtt_connected)
+        self.sensor_readings_buffer = deferred + self.sensor_readings_buffer
+    
+    def status_details(self) -> Dict[str, Any]:
+        """Detalhes publicados na mensagem de status 'online'."""
+        uptime = time.time() - self.stats['start_time'] if self.stats['start_time'] else 0
+        
+        return {
+            'sensors_connected': len(self.sensors),
+            'sensors_active': sum(1 for s in self.sensors if hasattr(s, 'activity') and s.activity == 1),
+            'uptime_seconds': int(uptime),
+            'readings_collected': self.stats['readings_collected'],
+            'readings_published': self.stats['readings_published'],
+            'errors': self.stats['errors'],
+            'buffer_size': len(self.sensor_readings_buffer)
+        }
+    
+    def _status_message(self, status: str = 'online') -> Tuple[str, str]:
+        """Tópico e mensagem de status do gateway."""
+        details = self.status_details() if status == 'online' else {}
+        return get_topic(self.config, 'status'), self.formatter.format_status_message(status, details)
     
     def publish_status(self):
         """Publica status do gateway."""
+        if not self.publish_status_updates:
+            return
+        
         try:
-            uptime = time.time() - self.stats['start_time'] if self.stats['start_time'] else 0
-            
-            status_data = {
-                'sensors_connected': len(self.sensors),
-                'sensors_active': sum(1 for s in self.sensors if hasattr(s, 'activity') and s.activity == 1),
-                'uptime_seconds': int(uptime),
-                'readings_collected': self.stats['readings_collected'],
-                'readings_published': self.stats['readings_published'],
-                'errors': self.stats['errors'],
-                'buffer_size': len(self.sensor_readings_buffer)
-            }
-            
-            message = self.formatter.format_status_message('online', status_data)
-            topic = get_topic(self.config, 'status')
-            
-            self.mqtt_client.publish(topic, message, retain=True)
+            topic, message = self._status_message()
+            self.mqtt_client.publish(topic, message, retain=True, message_class='status')
             
         except Exception as e:
             self.logger.error(f"❌ Erro ao publicar status: {e}")
     
+    def _pending_alerts(self) -> List[Tuple[str, str, str, Dict]]:
+        """
+        Alertas a enviar no momento.
+        
+        Returns:
+            Tuplas (tipo, severidade, mensagem, dados)
+        """
+        # Verificar capacidade do parque
+        alerts = capacity_alerts(
+            sum(s.total_detections for s in self.sensors),
+            self.config['parque']['capacidade_maxima']
+        )
+        
+        # Verificar sensores offline (exemplo)
+        # Aqui você pode adicionar lógica para detectar sensores inativos
+        
+        return alerts
+    
     def check_alerts(self):
         """Verifica e envia alertas se necessário."""
         try:
-            # Verificar capacidade do parque
-            total_detections = sum(s.total_detections for s in self.sensors)
-            max_capacity = self.config['parque']['capacidade_maxima']
-            current_percentage = (total_detections / max_capacity) * 100
-            
-            if current_percentage >= 80 and current_percentage < 90:
-                self.send_alert(
-                    'capacity',
-                    'medium',
-                    f'Capacidade do parque em {current_percentage:.1f}%',
-                    {'current': total_detections, 'max': max_capacity}
-                )
-            elif current_percentage >= 90:
-                self.send_alert(
-                    'capacity',
-                    'high',
-                    f'Capacidade do parque CRÍTICA: {current_percentage:.1f}%',
-                    {'current': total_detections, 'max': max_capacity}
-                )
-            
-            # Verificar sensores offline (exemplo)
-            # Aqui você pode adicionar lógica para detectar sensores inativos
-            
+            for alert in self._pending_alerts():
+                self.send_alert(*alert)
         except Exception as e:
             self.logger.error(f"❌ Erro ao verificar alertas: {e}")
     
@@ -242,7 +313,7 @@ class Gateway:
             )
             
             topic = get_topic(self.config, 'alerts')
-            self.mqtt_client.publish(topic, alert_message)
+            self.mqtt_client.publish(topic, alert_message, message_class='alerts')
             
             self.stats['alerts_sent'] += 1
             self.logger.warning(f"⚠️  Alerta enviado: {message}")
@@ -250,6 +321,21 @@ class Gateway:
         except Exception as e:
             self.logger.error(f"❌ Erro ao enviar alerta: {e}")
     
+    def _on_mqtt_connected(self, reconnected: bool):
+        """
+        Hook de conexão: após uma reconexão, reenvia o buffer acumulado.
+        
+        Args:
+            reconnected: True se não é a primeira conexão
+        """
+        if not reconnected or not self.running:
+            return
+        
+        self.logger.info(
+            f"🔁 Reconectado. Reenviando {len(self.sensor_readings_buffer)} leituras do buffer"
+        )
+        self.wake_event.set()
+    
     def _publish_loop(self):
         """Loop de publicação (roda em thread separada)."""
         self.logger.info("🔄 Loop de publicação iniciado")
@@ -276,8 +362,9 @@ class Gateway:
                         self.check_alerts()
                         last_alert_check = time.time()
                 
-                # Aguardar intervalo configurado
-                self.stop_event.wait(self.publish_interval)
+                # Aguardar intervalo configurado (ou reconexão/parada)
+                self.wake_event.wait(self.publish_interval)
+                self.wake_event.clear()
                 
             except Exception as e:
                 self.logger.error(f"❌ Erro no loop de publicação: {e}")
@@ -295,6 +382,7 @@ class Gateway:
         # Conectar ao MQTT
         if not self.mqtt_client.connect():
             self.logger.error("❌ Falha ao conectar ao broker MQTT")
+            self.mqtt_client.disconnect()
             return
         
         # Publicar status inicial
@@ -321,18 +409,23 @@ class Gateway:
         
         self.running = False
         self.stop_event.set()
+        self.wake_event.set()
         
         # Aguardar threads terminarem
         if self.publish_thread:
             self.publish_thread.join(timeout=5)
         
         # Publicar status offline
-        try:
-            message = self.formatter.format_status_message('offline', {})
-            topic = get_topic(self.config, 'status')
-            self.mqtt_client.publish(topic, message, retain=True)
-        except:
-            pass
+        if self.publish_status_updates:
+            try:
+                topic, message = self._status_message('offline')
+                self.mqtt_client.publish(topic, message, retain=True, message_class='status')
+            except:
+                pass
+        
+        # Aguardar confirmação do que ainda está em voo
+        if not self.mqtt_client.wait_for_inflight(timeout=self.mqtt_client.publish_timeout):
+            self.logger.warning("⚠️  Mensagens sem confirmação do broker ao parar")
         
         # Desconectar MQTT
         self.mqtt_client.disconnect()
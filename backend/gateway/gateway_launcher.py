@@ -0,0 +1,482 @@
+"""
+Launcher de Gateways
+Sistema de Controle de Acesso - CEU Tres Pontes
+
+Executa N processos Gateway no mesmo host, cada um com uma fatia (shard)
+dos sensores, reinicia os que caírem e publica um status agregado.
+
+Uso:
+    python backend/gateway/gateway_launcher.py --workers 4 --from-db
+    python backend/gateway/gateway_launcher.py --workers 4 --sensors-file sensores.json
+    python backend/gateway/gateway_launcher.py --workers 4 --simulate 2000
+"""
+
+import argparse
+import json
+import logging
+import os
+import queue
+import signal
+import sys
+import time
+import zlib
+from typing import Any, Dict, List, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from backend.gateway.config_loader import load_mqtt_config, get_topic
+from backend.gateway.message_formatter import MessageFormatter
+from backend.gateway.mqtt_client import MQTTClient
+from backend.gateway.process_supervisor import ProcessSupervisor
+
+
+PROTOCOLS = ('LoRa', 'ZigBee', 'Sigfox', 'RFID')
+
+# Contadores acumulados pelo processo (recomeçam do zero quando ele reinicia)
+CUMULATIVE_STATS = ('readings_collected', 'readings_published', 'errors', 'total_detections')
+
+
+# ----------------------------------------------------------------------
+# Sensores
+# ----------------------------------------------------------------------
+
+def load_sensor_specs(path: str) -> List[Dict[str, str]]:
+    """
+    Carrega a lista de sensores de um arquivo JSON.
+
+    Args:
+        path: Arquivo com [{"serial_number", "protocol", "location"}, ...]
+
+    Returns:
+        Lista de especificações de sensores
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        specs = json.load(f)
+
+    for spec in specs:
+        if not spec.get('serial_number') or spec.get('protocol') not in PROTOCOLS:
+            raise ValueError(f"Sensor inválido em {path}: {spec}")
+    return specs
+
+
+def load_sensor_specs_from_db() -> List[Dict[str, str]]:
+    """
+    Carrega os sensores ativos da tabela `sensors`.
+
+    Usa as mesmas variáveis de ambiente (DB_HOST, DB_PORT, DB_USER,
+    DB_PASSWORD, DB_NAME) da aplicação Flask.
+
+    Returns:
+        Lista de especificações de sensores
+    """
+    import pymysql
+
+    connection = pymysql.connect(
+        host=os.environ.get('DB_HOST', 'localhost'),
+        port=int(os.environ.get('DB_PORT', 3306)),
+        user=os.environ.get('DB_USER', 'ceu_tres_pontes'),
+        password=os.environ.get('DB_PASSWORD', 'password'),
+        database=os.environ.get('DB_NAME', 'ceu_tres_pontes_db'),
+        charset='utf8mb4'
+    )
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT serial_number, protocol, location FROM sensors "
+                "WHERE status = 'active' ORDER BY serial_number"
+            )
+            return [
+                {'serial_number': serial, 'protocol': protocol, 'location': location}
+                for serial, protocol, location in cursor.fetchall()
+            ]
+    finally:
+        connection.close()
+
+
+def simulated_sensor_specs(count: int) -> List[Dict[str, str]]:
+    """
+    Gera `count` sensores simulados com seriais fixos.
+
+    Seriais fixos mantêm cada sensor no mesmo processo entre execuções.
+
+    Args:
+        count: Número de sensores
+
+    Returns:
+        Lista de especificações de sensores
+    """
+    return [
+        {
+            'serial_number': f"SIM-{PROTOCOLS[i % len(PROTOCOLS)].upper()}-{i:06d}",
+            'protocol': PROTOCOLS[i % len(PROTOCOLS)],
+            'location': f"Sensor simulado {i}"
+        }
+        for i in range(count)
+    ]
+
+
+def build_sensor(spec: Dict[str, str]):
+    """
+    Cria o simulador correspondente ao protocolo do sensor.
+
+    Args:
+        spec: Especificação do sensor
+
+    Returns:
+        Instância de BaseSensor
+    """
+    from sensores import LoRaSensor, ZigBeeSensor, SigfoxSensor, RFIDSensor
+
+    classes = {
+        'LoRa': LoRaSensor,
+        'ZigBee': ZigBeeSensor,
+        'Sigfox': SigfoxSensor,
+        'RFID': RFIDSensor,
+    }
+    return classes[spec['protocol']](location=spec['location'], serial_number=spec['serial_number'])
+
+
+def shard_sensors(specs: List[Dict[str, str]], shards: int) -> List[List[Dict[str, str]]]:
+    """
+    Divide os sensores em `shards` fatias por hash (crc32) do serial.
+
+    O mesmo sensor cai sempre na mesma fatia, então um processo reiniciado
+    volta a publicar exatamente os mesmos sensores.
+
+    Args:
+        specs: Especificações dos sensores
+        shards: Número de fatias
+
+    Returns:
+        Lista com as especificações de cada fatia
+    """
+    result: List[List[Dict[str, str]]] = [[] for _ in range(shards)]
+    for spec in specs:
+        result[zlib.crc32(spec['serial_number'].encode('utf-8')) % shards].append(spec)
+    return result
+
+
+# ----------------------------------------------------------------------
+# Processo de trabalho
+# ----------------------------------------------------------------------
+
+def worker_config(config: Dict[str, Any], index: int) -> Dict[str, Any]:
+    """
+    Configuração de um processo: gateway id e arquivo de log próprios.
+
+    Args:
+        config: Configuração carregada pelo processo (alterada no lugar)
+        index: Número do processo
+
+    Returns:
+        A configuração do processo
+    """
+    config['gateway']['id'] = f"{config['gateway']['id']}_{index:02d}"
+    config['gateway']['name'] = f"{config['gateway']['name']} #{index}"
+
+    root, ext = os.path.splitext(config['logging']['file'])
+    config['logging']['file'] = f"{root}_{index}{ext}"
+    return config
+
+
+def run_gateway_worker(
+    index: int,
+    specs: List[Dict[str, str]],
+    config_file: Optional[str],
+    stop_event,
+    stats_queue,
+    report_interval: float = 5.0
+) -> int:
+    """
+    Executa um Gateway com a fatia `specs` até `stop_event` ser sinalizado.
+
+    Roda no processo filho. O status do gateway não é publicado pelo
+    processo: as estatísticas vão para `stats_queue` e o supervisor publica
+    o status agregado no tópico de status.
+
+    Args:
+        index: Número do processo
+        specs: Sensores da fatia
+        config_file: Arquivo de configuração (None = padrão)
+        stop_event: StopFlag de parada
+        stats_queue: multiprocessing.Queue de estatísticas
+        report_interval: Intervalo (s) entre envios de estatísticas
+
+    Returns:
+        Código de saída do processo
+    """
+    from backend.gateway.gateway import Gateway
+
+    class ShardGateway(Gateway):
+        # Capacidade depende das detecções de todas as fatias: o supervisor verifica
+        def _pending_alerts(self):
+            return []
+
+    # Ctrl+C chega a todo o grupo de processos; quem decide é o pai
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, signal.SIG_IGN)
+
+    config = worker_config(load_mqtt_config(config_file), index)
+    gateway = ShardGateway(config, publish_status_updates=False)
+    gateway.register_sensors([build_sensor(spec) for spec in specs])
+    gateway.logger.info(f"🔢 Processo {index} (pid {os.getpid()}): {len(specs)} sensores")
+
+    def report():
+        details = gateway.status_details()
+        details['gateway_id'] = gateway.gateway_id
+        details['pid'] = os.getpid()
+        details['total_detections'] = sum(s.total_detections for s in gateway.sensors)
+        try:
+            stats_queue.put_nowait((index, details))
+        except queue.Full:
+            pass
+
+    gateway.start()
+    if not gateway.running:
+        return 1
+
+    try:
+        while not stop_event.wait(report_interval):
+            report()
+    finally:
+        gateway.stop()
+        report()
+
+    return 0
+
+
+def _worker_main(index, specs, config_file, stop_event, stats_queue, report_interval):
+    sys.exit(run_gateway_worker(index, specs, config_file, stop_event, stats_queue, report_interval))
+
+
+# ----------------------------------------------------------------------
+# Supervisor
+# ----------------------------------------------------------------------
+
+class GatewayLauncher(ProcessSupervisor):
+    """
+    Supervisor dos processos gateway.
+
+    Cada processo publica as leituras da sua fatia com gateway id próprio
+    (`<gateway>_<nn>`). O supervisor recebe as estatísticas dos processos e
+    publica, com o gateway id base, um único status agregado (somas e
+    detalhe por processo) e os alertas de capacidade do parque.
+    """
+
+    process_name = 'gateway'
+
+    STATUS_INTERVAL = 30
+    ALERT_INTERVAL = 60
+
+    def __init__(
+        self,
+        specs: List[Dict[str, str]],
+        workers: int,
+        config_file: Optional[str] = None,
+        restart_delay: float = 2.0,
+        report_interval: float = 5.0
+    ):
+        """
+        Inicializa o launcher.
+
+        Args:
+            specs: Sensores a distribuir entre os processos
+            workers: Número de processos gateway
+            config_file: Arquivo de configuração MQTT (None = padrão)
+            restart_delay: Espera inicial (s) antes de reiniciar um processo
+            report_interval: Intervalo (s) entre estatísticas dos processos
+        """
+        super().__init__(workers, restart_delay, logger_name="GatewayLauncher")
+        self.config_file = config_file
+        self.config = load_mqtt_config(config_file)
+        self.gateway_id = self.config['gateway']['id']
+        self.report_interval = report_interval
+
+        self.shards = shard_sensors(specs, workers)
+        self.stats_queue = self.context.Queue(maxsize=workers * 100)
+        self.worker_stats: List[Optional[Dict[str, Any]]] = [None] * workers
+        # Totais dos processos anteriores de cada índice
+        self.carried: List[Dict[str, int]] = [dict.fromkeys(CUMULATIVE_STATS, 0) for _ in range(workers)]
+
+        self.mqtt_client = MQTTClient(self.config, client_id=f"{self.gateway_id}_supervisor")
+        self.formatter = MessageFormatter(self.gateway_id)
+        self.last_status = 0.0
+        self.last_alert_check = 0.0
+
+    def _process_target(self, index: int):
+        return _worker_main, (
+            index, self.shards[index], self.config_file,
+            self.stop_event, self.stats_queue, self.report_interval
+        )
+
+    def start(self):
+        """Conecta o supervisor ao broker e inicia os processos."""
+        sizes = ', '.join(str(len(shard)) for shard in self.shards)
+        self.logger.info(f"🏭 Iniciando {self.instances} gateways (sensores por processo: {sizes})")
+
+        if not self.mqtt_client.connect():
+            self.logger.warning("⚠️  Supervisor sem conexão MQTT; status agregado será publicado após conectar")
+        super().start()
+
+    def drain_stats(self):
+        """
+        Lê as estatísticas enviadas pelos processos.
+
+        Os contadores acumulados de um processo reiniciado somam os do
+        processo anterior do mesmo índice, para que os totais não recuem.
+        """
+        while True:
+            try:
+                index, details = self.stats_queue.get_nowait()
+            except queue.Empty:
+                return
+            previous = self.worker_stats[index]
+            if previous is not None and previous['pid'] != details['pid']:
+                # Processo reiniciado: os totais do anterior continuam somando
+                self.carried[index] = {key: previous[key] for key in CUMULATIVE_STATS}
+            for key in CUMULATIVE_STATS:
+                details[key] += self.carried[index][key]
+            self.worker_stats[index] = details
+
+    def merged_status(self) -> Dict[str, Any]:
+        """
+        Status agregado de todos os processos.
+
+        Returns:
+            Detalhes no formato do status do Gateway, com a lista `workers`
+        """
+        reported = [stats for stats in self.worker_stats if stats]
+
+        def total(key: str) -> int:
+            return sum(stats[key] for stats in reported)
+
+        return {
+            'sensors_connected': total('sensors_connected'),
+            'sensors_active': total('sensors_active'),
+            'uptime_seconds': max((stats['uptime_seconds'] for stats in reported), default=0),
+            'readings_collected': total('readings_collected'),
+            'readings_published': total('readings_published'),
+            'errors': total('errors'),
+            'buffer_size': total('buffer_size'),
+            'workers_alive': sum(1 for index in range(self.instances) if self.is_alive(index)),
+            'workers_restarts': self.restarts,
+            'workers': [
+                {
+                    'index': index,
+                    'gateway_id': stats['gateway_id'] if stats else None,
+                    'pid': stats['pid'] if stats else None,
+                    'alive': self.is_alive(index),
+                    'sensors': len(self.shards[index]),
+                    'readings_published': stats['readings_published'] if stats else 0,
+                    'errors': stats['errors'] if stats else 0,
+                    'buffer_size': stats['buffer_size'] if stats else 0,
+                }
+                for index, stats in enumerate(self.worker_stats)
+            ]
+        }
+
+    def publish_status(self, status: str = 'online'):
+        """Publica o status agregado (retido) no tópico de status."""
+        details = self.merged_status() if status == 'online' else {}
+        try:
+            self.mqtt_client.publish(
+                get_topic(self.config, 'status'),
+                self.formatter.format_status_message(status, details),
+                retain=True,
+                message_class='status'
+            )
+        except Exception as e:
+            self.logger.error(f"❌ Erro ao publicar status: {e}")
+
+    def check_alerts(self):
+        """Envia alertas de capacidade com as detecções de todos os processos."""
+        from backend.gateway.gateway import capacity_alerts
+
+        total_detections = sum(stats['total_detections'] for stats in self.worker_stats if stats)
+        for alert_type, severity, message, data in capacity_alerts(
+            total_detections, self.config['parque']['capacidade_maxima']
+        ):
+            try:
+                self.mqtt_client.publish(
+                    get_topic(self.config, 'alerts'),
+                    self.formatter.format_alert_message(alert_type, severity, message, data),
+                    message_class='alerts'
+                )
+                self.logger.warning(f"⚠️  Alerta enviado: {message}")
+            except Exception as e:
+                self.logger.error(f"❌ Erro ao enviar alerta: {e}")
+
+    def on_tick(self):
+        self.drain_stats()
+        if not self.mqtt_client.is_connected():
+            return
+
+        now = time.monotonic()
+        if now - self.last_status >= self.STATUS_INTERVAL:
+            self.last_status = now
+            self.publish_status()
+        if now - self.last_alert_check >= self.ALERT_INTERVAL:
+            self.last_alert_check = now
+            self.check_alerts()
+
+    def stop(self, timeout: float = 15.0):
+        """
+        Encerra os processos e publica o status final.
+
+        Args:
+            timeout: Espera máxima (s) pelo encerramento
+        """
+        super().stop(timeout)
+        self.drain_stats()
+
+        if self.mqtt_client.is_connected():
+            self.publish_status('offline')
+            self.mqtt_client.wait_for_inflight(timeout=self.mqtt_client.publish_timeout)
+        self.mqtt_client.disconnect()
+        self.logger.info("👋 Gateways encerrados")
+
+
+def main():
+    config = load_mqtt_config()
+    gateway_config = config['gateway']
+
+    parser = argparse.ArgumentParser(description="Executa N gateways, cada um com uma fatia dos sensores")
+    parser.add_argument('--workers', type=int, default=gateway_config.get('workers', 1),
+                        help="Número de processos (padrão: WORKERS da configuração)")
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument('--sensors-file', default=gateway_config.get('sensors_file') or None,
+                        help="JSON com os sensores (padrão: SENSORS_FILE da configuração)")
+    source.add_argument('--from-db', action='store_true', help="Sensores ativos da tabela sensors")
+    source.add_argument('--simulate', type=int, default=None, help="Gera N sensores simulados")
+    parser.add_argument('--config', default=None, help="Arquivo mqtt_config.ini alternativo")
+    args = parser.parse_args()
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+
+    if args.from_db:
+        specs = load_sensor_specs_from_db()
+    elif args.simulate is not None:
+        specs = simulated_sensor_specs(args.simulate)
+    elif args.sensors_file:
+        specs = load_sensor_specs(args.sensors_file)
+    else:
+        parser.error("informe --sensors-file, --from-db ou --simulate")
+
+    launcher = GatewayLauncher(specs, args.workers, args.config)
+
+    def handle_signal(signum, frame):
+        launcher.stop_event.set()
+
+    signal.signal(signal.SIGINT, handle_signal)
+    signal.signal(signal.SIGTERM, handle_signal)
+
+    launcher.start()
+    launcher.supervise()
+    launcher.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,500 @@
+"""
+Broker MQTT em Processo
+Sistema de Controle de Acesso - CEU Tres Pontes
+
+Broker MQTT 3.1.1 mínimo em asyncio, para testes e benchmarks sem
+Mosquitto: sobe numa thread do próprio processo, em porta efêmera.
+"""
+
+import asyncio
+import logging
+import threading
+import uuid
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+
+# Tipos de pacote (MQTT 3.1.1, seção 2.2.1)
+CONNECT = 1
+CONNACK = 2
+PUBLISH = 3
+PUBACK = 4
+PUBREC = 5
+PUBREL = 6
+PUBCOMP = 7
+SUBSCRIBE = 8
+SUBACK = 9
+UNSUBSCRIBE = 10
+UNSUBACK = 11
+PINGREQ = 12
+PINGRESP = 13
+DISCONNECT = 14
+
+# QoS máximo concedido (QoS 2 é aceito na entrada e entregue como QoS 1)
+MAX_QOS = 1
+
+# Acima disso o publicador espera o subscriber esvaziar o buffer de envio
+WRITE_HIGH_WATER = 1024 * 1024
+
+
+def topic_matches(topic_filter: str, topic: str) -> bool:
+    """
+    Verifica se o tópico casa com o filtro (curingas + e #).
+
+    Tópicos iniciados por '$' não casam com curinga no primeiro nível.
+
+    Args:
+        topic_filter: Filtro de subscrição
+        topic: Tópico publicado
+
+    Returns:
+        True se o tópico casa com o filtro
+    """
+    if topic.startswith('$') and topic_filter[:1] in ('+', '#'):
+        return False
+
+    filter_levels = topic_filter.split('/')
+    topic_levels = topic.split('/')
+    for index, level in enumerate(filter_levels):
+        if level == '#':
+            return True
+        if index >= len(topic_levels):
+            return False
+        if level != '+' and level != topic_levels[index]:
+            return False
+    return len(filter_levels) == len(topic_levels)
+
+
+def _encode_length(length: int) -> bytes:
+    encoded = bytearray()
+    while True:
+        byte = length % 128
+        length //= 128
+        encoded.append(byte | 0x80 if length else byte)
+        if not length:
+            return bytes(encoded)
+
+
+def _packet(header: int, body: bytes) -> bytes:
+    return bytes((header,)) + _encode_length(len(body)) + body
+
+
+def _string(data: bytes, offset: int) -> Tuple[str, int]:
+    length = int.from_bytes(data[offset:offset + 2], 'big')
+    end = offset + 2 + length
+    return data[offset + 2:end].decode('utf-8'), end
+
+
+def _binary(data: bytes, offset: int) -> Tuple[bytes, int]:
+    length = int.from_bytes(data[offset:offset + 2], 'big')
+    end = offset + 2 + length
+    return data[offset + 2:end], end
+
+
+def _publish_packet(topic: str, payload: bytes, qos: int, retain: bool, mid: int) -> bytes:
+    encoded_topic = topic.encode('utf-8')
+    body = len(encoded_topic).to_bytes(2, 'big') + encoded_topic
+    if qos:
+        body += mid.to_bytes(2, 'big')
+    return _packet(0x30 | (qos << 1) | int(retain), body + payload)
+
+
+@dataclass
+class _Session:
+    """Conexão de um cliente."""
+    client_id: str
+    writer: asyncio.StreamWriter
+    will: Optional[Tuple[str, bytes, int, bool]] = None
+    subscriptions: Dict[str, int] = field(default_factory=dict)
+    next_mid: int = 0
+    closed: bool = False
+
+    def send(self, data: bytes):
+        if not self.closed:
+            self.writer.write(data)
+
+    def deliver(self, topic: str, payload: bytes, qos: int, retain: bool = False):
+        mid = 0
+        if qos:
+            self.next_mid = self.next_mid % 65535 + 1
+            mid = self.next_mid
+        self.send(_publish_packet(topic, payload, qos, retain, mid))
+
+
+class InProcessBroker:
+    """
+    Broker MQTT 3.1.1 para testes, rodando num event loop em thread própria.
+
+    Suporta CONNECT (sem autenticação), PUBLISH QoS 0/1 (QoS 2 é aceito e
+    entregue como QoS 1), SUBSCRIBE/UNSUBSCRIBE com curingas, mensagens
+    retidas, will, keepalive e subscrições compartilhadas
+    ($share/<grupo>/<filtro>, distribuídas em round-robin).
+
+    Sessões são sempre limpas (clean session) e mensagens QoS 1 para os
+    subscribers não são reenviadas: o objetivo é reproduzir o caminho
+    normal de publicação sem serviços externos, não substituir o Mosquitto.
+
+    Exemplo:
+        with InProcessBroker() as broker:
+            config = broker.configure(load_mqtt_config())
+            client = MQTTClient(config)
+    """
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 0):
+        """
+        Inicializa o broker (sem iniciar).
+
+        Args:
+            host: Endereço de escuta
+            port: Porta (0 = efêmera, escolhida pelo sistema)
+        """
+        self.host = host
+        self.port = port
+
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.thread: Optional[threading.Thread] = None
+        self.server: Optional[asyncio.AbstractServer] = None
+
+        self.sessions: Dict[str, _Session] = {}
+        # filtro -> {client_id: qos}
+        self.subscriptions: Dict[str, Dict[str, int]] = {}
+        # (grupo, filtro) -> membros [(client_id, qos)] e próxima posição do round-robin
+        self.shared: Dict[Tuple[str, str], List[Tuple[str, int]]] = {}
+        self.shared_next: Dict[Tuple[str, str], int] = {}
+        self.retained: Dict[str, Tuple[bytes, int]] = {}
+        # tópico -> (destinos diretos, grupos); limpo a cada mudança de subscrição
+        self.route_cache: Dict[str, Tuple[Dict[str, int], List[Tuple[str, str]]]] = {}
+
+        self.stats = {
+            'connections': 0,
+            'messages_received': 0,
+            'messages_delivered': 0,
+        }
+
+        self.logger = logging.getLogger(__name__)
+
+    # ------------------------------------------------------------------
+    # Ciclo de vida
+    # ------------------------------------------------------------------
+
+    def start(self) -> int:
+        """
+        Inicia o broker numa thread própria.
+
+        Returns:
+            Porta em que o broker está escutando
+        """
+        if self.thread is not None:
+            return self.port
+
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(
+            target=self.loop.run_forever,
+            name="inprocess-broker",
+            daemon=True
+        )
+        self.thread.start()
+
+        future = asyncio.run_coroutine_threadsafe(
+            asyncio.start_server(self._handle_client, self.host, self.port),
+            self.loop
+        )
+        self.server = future.result(10)
+        self.port = self.server.sockets[0].getsockname()[1]
+        self.logger.info(f"🧪 Broker em processo escutando em {self.host}:{self.port}")
+        return self.port
+
+    def stop(self):
+        """Fecha as conexões e encerra o broker."""
+        if self.thread is None:
+            return
+
+        async def shutdown():
+            self.server.close()
+            for session in list(self.sessions.values()):
+                session.closed = True
+                session.writer.close()
+            await self.server.wait_closed()
+
+        try:
+            asyncio.run_coroutine_threadsafe(shutdown(), self.loop).result(5)
+        except Exception as e:
+            self.logger.debug(f"Erro ao encerrar broker: {e}")
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join(5)
+        self.loop.close()
+        self.thread = None
+        self.logger.info("👋 Broker em processo encerrado")
+
+    def __enter__(self) -> 'InProcessBroker':
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+
+    def configure(self, config: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Aponta uma configuração MQTT (load_mqtt_config) para este broker.
+
+        Args:
+            config: Configuração a alterar
+
+        Returns:
+            A mesma configuração
+        """
+        config['broker'].update(
+            host=self.host,
+            port=self.port,
+            username='',
+            password='',
+            hosts=[{'host': self.host, 'port': self.port}]
+        )
+        return config
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Estatísticas do broker."""
+        return {
+            **self.stats,
+            'clients': len(self.sessions),
+            'subscriptions': sum(len(clients) for clients in self.subscriptions.values()),
+            'shared_groups': len(self.shared),
+            'retained': len(self.retained),
+        }
+
+    # ------------------------------------------------------------------
+    # Conexões
+    # ------------------------------------------------------------------
+
+    async def _read_packet(self, reader: asyncio.StreamReader) -> Tuple[int, bytes]:
+        header = (await reader.readexactly(1))[0]
+        length, multiplier = 0, 1
+        while True:
+            byte = (await reader.readexactly(1))[0]
+            length += (byte & 0x7F) * multiplier
+            multiplier *= 128
+            if not byte & 0x80:
+                break
+        return header, await reader.readexactly(length) if length else b''
+
+    async def _handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        session = None
+        clean_exit = False
+        try:
+            header, body = await asyncio.wait_for(self._read_packet(reader), 10)
+            if header >> 4 != CONNECT:
+                return
+            session, keepalive = self._connect(body, writer)
+            if session is None:
+                return
+
+            # Keepalive: sem pacotes em 1,5x o intervalo, a conexão cai
+            timeout = keepalive * 1.5 if keepalive else None
+            while True:
+                header, body = await asyncio.wait_for(self._read_packet(reader), timeout)
+                kind = header >> 4
+                if kind == DISCONNECT:
+                    clean_exit = True
+                    return
+                await self._handle_packet(session, header, kind, body)
+        except (asyncio.IncompleteReadError, asyncio.TimeoutError, ConnectionError):
+            pass
+        except Exception as e:
+            self.logger.error(f"❌ Erro no broker em processo: {e}")
+        finally:
+            if session is not None:
+                self._disconnect(session, publish_will=not clean_exit)
+            writer.close()
+
+    def _connect(self, body: bytes, writer: asyncio.StreamWriter) -> Tuple[Optional[_Session], int]:
+        protocol, offset = _string(body, 0)
+        level, flags = body[offset], body[offset + 1]
+        keepalive = int.from_bytes(body[offset + 2:offset + 4], 'big')
+        client_id, offset = _string(body, offset + 4)
+
+        if protocol not in ('MQTT', 'MQIsdp') or level not in (3, 4):
+            writer.write(_packet(0x20, b'\x00\x01'))        # versão não suportada
+            return None, 0
+
+        will = None
+        if flags & 0x04:
+            will_topic, offset = _string(body, offset)
+            will_message, offset = _binary(body, offset)
+            will = (will_topic, will_message, min((flags >> 3) & 0x03, MAX_QOS), bool(flags & 0x20))
+
+        if not client_id:
+            client_id = f"auto-{uuid.uuid4().hex[:12]}"
+
+        # Mesmo client id: a conexão nova substitui a anterior
+        previous = self.sessions.get(client_id)
+        if previous is not None:
+            self._disconnect(previous, publish_will=False)
+            previous.writer.close()
+
+        session = _Session(client_id, writer, will)
+        self.sessions[client_id] = session
+        self.stats['connections'] += 1
+        writer.write(_packet(0x20, b'\x00\x00'))
+        return session, keepalive
+
+    def _disconnect(self, session: _Session, publish_will: bool):
+        if session.closed:
+            return
+        session.closed = True
+        if self.sessions.get(session.client_id) is session:
+            del self.sessions[session.client_id]
+        for topic_filter in list(session.subscriptions):
+            self._unsubscribe(session, topic_filter)
+        if publish_will and session.will is not None:
+            self._route(*session.will)
+
+    # ------------------------------------------------------------------
+    # Pacotes
+    # ------------------------------------------------------------------
+
+    async def _handle_packet(self, session: _Session, header: int, kind: int, body: bytes):
+        if kind == PUBLISH:
+            qos = (header >> 1) & 0x03
+            retain = bool(header & 0x01)
+            topic, offset = _string(body, 0)
+            if qos:
+                mid = body[offset:offset + 2]
+                offset += 2
+                session.send(_packet(0x40 if qos == 1 else 0x50, mid))
+            self.stats['messages_received'] += 1
+            await self._drain(self._route(topic, body[offset:], min(qos, MAX_QOS), retain))
+
+        elif kind == PUBREL:
+            session.send(_packet(0x70, body[:2]))
+
+        elif kind == SUBSCRIBE:
+            mid = body[:2]
+            offset, granted = 2, bytearray()
+            requested = []
+            while offset < len(body):
+                topic_filter, offset = _string(body, offset)
+                qos = min(body[offset], MAX_QOS)
+                offset += 1
+                self._subscribe(session, topic_filter, qos)
+                granted.append(qos)
+                requested.append((topic_filter, qos))
+            session.send(_packet(0x90, mid + bytes(granted)))
+            for topic_filter, qos in requested:
+                self._send_retained(session, topic_filter, qos)
+
+        elif kind == UNSUBSCRIBE:
+            offset = 2
+            while offset < len(body):
+                topic_filter, offset = _string(body, offset)
+                self._unsubscribe(session, topic_filter)
+            session.send(_packet(0xB0, body[:2]))
+
+        elif kind == PINGREQ:
+            session.send(_packet(0xD0, b''))
+
+        # PUBACK/PUBREC/PUBCOMP dos subscribers: sem reenvio, nada a fazer
+
+    async def _drain(self, sessions: List[_Session]):
+        """Contrapressão: espera subscribers com buffer de envio cheio."""
+        for session in sessions:
+            if session.closed:
+                continue
+            if session.writer.transport.get_write_buffer_size() > WRITE_HIGH_WATER:
+                try:
+                    await session.writer.drain()
+                except ConnectionError:
+                    pass
+
+    # ------------------------------------------------------------------
+    # Subscrições e roteamento
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _parse_filter(topic_filter: str) -> Tuple[Optional[str], str]:
+        """Separa grupo e filtro de '$share/<grupo>/<filtro>'."""
+        if topic_filter.startswith('$share/'):
+            _, group, real_filter = topic_filter.split('/', 2)
+            return group, real_filter
+        return None, topic_filter
+
+    def _subscribe(self, session: _Session, topic_filter: str, qos: int):
+        group, real_filter = self._parse_filter(topic_filter)
+        if group is None:
+            self.subscriptions.setdefault(real_filter, {})[session.client_id] = qos
+        else:
+            members = self.shared.setdefault((group, real_filter), [])
+            members[:] = [m for m in members if m[0] != session.client_id]
+            members.append((session.client_id, qos))
+        session.subscriptions[topic_filter] = qos
+        self.route_cache.clear()
+
+    def _unsubscribe(self, session: _Session, topic_filter: str):
+        if session.subscriptions.pop(topic_filter, None) is None:
+            return
+        group, real_filter = self._parse_filter(topic_filter)
+        if group is None:
+            clients = self.subscriptions.get(real_filter, {})
+            clients.pop(session.client_id, None)
+            if not clients:
+                self.subscriptions.pop(real_filter, None)
+        else:
+            key = (group, real_filter)
+            members = [m for m in self.shared.get(key, []) if m[0] != session.client_id]
+            if members:
+                self.shared[key] = members
+            else:
+                self.shared.pop(key, None)
+                self.shared_next.pop(key, None)
+        self.route_cache.clear()
+
+    def _routes(self, topic: str) -> Tuple[Dict[str, int], List[Tuple[str, str]]]:
+        routes = self.route_cache.get(topic)
+        if routes is None:
+            direct: Dict[str, int] = {}
+            for topic_filter, clients in self.subscriptions.items():
+                if topic_matches(topic_filter, topic):
+                    # Filtros sobrepostos: uma entrega, com o maior QoS
+                    for client_id, qos in clients.items():
+                        direct[client_id] = max(qos, direct.get(client_id, 0))
+            groups = [key for key in self.shared if topic_matches(key[1], topic)]
+            routes = self.route_cache[topic] = (direct, groups)
+        return routes
+
+    def _route(self, topic: str, payload: bytes, qos: int, retain: bool) -> List[_Session]:
+        """Entrega a mensagem aos subscribers; retorna as sessões que receberam."""
+        if retain:
+            if payload:
+                self.retained[topic] = (payload, qos)
+            else:
+                self.retained.pop(topic, None)
+
+        direct, groups = self._routes(topic)
+        targets = []
+        for client_id, sub_qos in direct.items():
+            session = self.sessions.get(client_id)
+            if session is not None:
+                targets.append((session, min(qos, sub_qos)))
+
+        for key in groups:
+            members = self.shared.get(key)
+            if not members:
+                continue
+            position = self.shared_next.get(key, 0) % len(members)
+            self.shared_next[key] = position + 1
+            client_id, sub_qos = members[position]
+            session = self.sessions.get(client_id)
+            if session is not None:
+                targets.append((session, min(qos, sub_qos)))
+
+        for session, delivery_qos in targets:
+            session.deliver(topic, payload, delivery_qos)
+        self.stats['messages_delivered'] += len(targets)
+        return [session for session, _ in targets]
+
+    def _send_retained(self, session: _Session, topic_filter: str, qos: int):
+        group, real_filter = self._parse_filter(topic_filter)
+        if group is not None:
+            return
+        for topic, (payload, retained_qos) in list(self.retained.items()):
+            if topic_matches(real_filter, topic):
+                session.deliver(topic, payload, min(qos, retained_qos), retain=True)
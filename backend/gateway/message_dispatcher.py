@@ -0,0 +1,402 @@
+"""
+Despachante de Mensagens MQTT
+Sistema de Controle de Acesso - CEU Tres Pontes
+
+Entrega as mensagens recebidas a um pool de threads, fora da thread de rede do paho.
+"""
+
+import asyncio
+import bisect
+import logging
+import queue
+import threading
+import time
+import zlib
+from typing import Any, Callable, Dict, List, Optional
+
+
+# Limites superiores (ms) dos buckets do histograma de latência
+LATENCY_BUCKETS_MS = (
+    0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, float('inf')
+)
+
+OVERFLOW_POLICIES = ('drop_oldest', 'drop_newest', 'block')
+
+_STOP = object()
+
+
+class LatencyHistogram:
+    """
+    Histograma de latência com buckets fixos.
+
+    Cada worker mantém o seu (sem lock); os histogramas são somados apenas
+    na leitura das estatísticas.
+    """
+
+    def __init__(self):
+        self.counts = [0] * len(LATENCY_BUCKETS_MS)
+        self.total = 0
+        self.sum_ms = 0.0
+        self.max_ms = 0.0
+
+    def observe(self, value_ms: float):
+        self.counts[bisect.bisect_left(LATENCY_BUCKETS_MS, value_ms)] += 1
+        self.total += 1
+        self.sum_ms += value_ms
+        if value_ms > self.max_ms:
+            self.max_ms = value_ms
+
+    def merge(self, other: 'LatencyHistogram'):
+        for index, count in enumerate(other.counts):
+            self.counts[index] += count
+        self.total += other.total
+        self.sum_ms += other.sum_ms
+        self.max_ms = max(self.max_ms, other.max_ms)
+
+    def percentile(self, fraction: float) -> Optional[float]:
+        """Limite superior do bucket que contém o percentil (ms)"""
+        if not self.total:
+            return None
+        target = fraction * self.total
+        seen = 0
+        for bound, count in zip(LATENCY_BUCKETS_MS, self.counts):
+            seen += count
+            if seen >= target:
+                return min(bound, round(self.max_ms, 3))
+        return round(self.max_ms, 3)
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            'count': self.total,
+            'avg_ms': round(self.sum_ms / self.total, 3) if self.total else None,
+            'p50_ms': self.percentile(0.50),
+            'p95_ms': self.percentile(0.95),
+            'p99_ms': self.percentile(0.99),
+            'max_ms': round(self.max_ms, 3),
+        }
+
+
+class _Shard:
+    """Fila e estado de um worker"""
+
+    def __init__(self, index: int, queue_size: int):
+        self.index = index
+        self.queue: 'queue.Queue' = queue.Queue(maxsize=queue_size)
+        self.thread: Optional[threading.Thread] = None
+        self.processed = 0
+        self.errors = 0
+        self.max_depth = 0
+        # Tempo na fila + processamento
+        self.latency = LatencyHistogram()
+        # Somente processamento (callback)
+        self.service = LatencyHistogram()
+
+
+class MessageDispatcher:
+    """
+    Pool de workers para processar mensagens MQTT.
+
+    A thread de rede do paho apenas enfileira (topic, payload, callback).
+    As mensagens são distribuídas por hash do tópico; como o tópico de
+    leituras termina no serial do sensor, mensagens de um mesmo sensor
+    caem sempre no mesmo worker e mantêm a ordem de chegada.
+
+    Quando a fila de um worker está cheia, aplica-se a política de
+    overflow: 'drop_oldest' (descarta a mais antiga da fila),
+    'drop_newest' (descarta a mensagem recebida) ou 'block' (aguarda até
+    `block_timeout` segundos e então descarta a recebida).
+    """
+
+    def __init__(
+        self,
+        workers: int = 4,
+        queue_size: int = 10000,
+        overflow_policy: str = 'drop_oldest',
+        block_timeout: float = 1.0,
+        name: str = 'dispatcher'
+    ):
+        """
+        Inicializa o despachante.
+
+        Args:
+            workers: Número de threads de processamento
+            queue_size: Capacidade da fila de cada worker
+            overflow_policy: 'drop_oldest', 'drop_newest' ou 'block'
+            block_timeout: Espera máxima (s) na política 'block'
+            name: Prefixo dos nomes das threads
+        """
+        if workers < 1:
+            raise ValueError("workers deve ser maior que zero")
+        if overflow_policy not in OVERFLOW_POLICIES:
+            raise ValueError(f"Política de overflow inválida: {overflow_policy}")
+
+        self.name = name
+        self.overflow_policy = overflow_policy
+        self.block_timeout = block_timeout
+        self.shards: List[_Shard] = [_Shard(i, queue_size) for i in range(workers)]
+
+        self.lock = threading.Lock()
+        self.running = False
+        self.stats = {
+            'enqueued': 0,
+            'dropped': 0
+        }
+
+        self.logger = logging.getLogger(__name__)
+
+    def start(self):
+        """Inicia as threads de processamento."""
+        if self.running:
+            return
+        self.running = True
+        for shard in self.shards:
+            shard.thread = threading.Thread(
+                target=self._worker,
+                args=(shard,),
+                name=f"{self.name}-{shard.index}",
+                daemon=True
+            )
+            shard.thread.start()
+        self.logger.info(f"🧵 {len(self.shards)} workers de processamento iniciados")
+
+    def stop(self, timeout: float = 5.0):
+        """
+        Para os workers após processar o que já está nas filas.
+
+        Args:
+            timeout: Espera máxima (s) por worker
+        """
+        if not self.running:
+            return
+        self.running = False
+        for shard in self.shards:
+            # A sentinela precisa entrar mesmo com a fila cheia
+            while True:
+                try:
+                    shard.queue.put(_STOP, timeout=timeout)
+                    break
+                except queue.Full:
+                    self._drop_oldest(shard)
+        for shard in self.shards:
+            shard.thread.join(timeout)
+
+    def _drop_oldest(self, shard: _Shard):
+        try:
+            shard.queue.get_nowait()
+            with self.lock:
+                self.stats['dropped'] += 1
+        except queue.Empty:
+            pass
+
+    def shard_for(self, topic: str) -> _Shard:
+        """Worker responsável pelo tópico."""
+        return self.shards[zlib.crc32(topic.encode('utf-8')) % len(self.shards)]
+
+    def submit(self, topic: str, payload: bytes, callback: Callable[[str, str], Any]) -> bool:
+        """
+        Enfileira uma mensagem (chamado na thread de rede do paho).
+
+        Args:
+            topic: Tópico da mensagem
+            payload: Payload bruto (bytes)
+            callback: Função callback(topic, message)
+
+        Returns:
+            True se a mensagem foi enfileirada
+        """
+        shard = self.shard_for(topic)
+        item = (callback, topic, payload, time.perf_counter())
+
+        try:
+            shard.queue.put_nowait(item)
+        except queue.Full:
+            if self.overflow_policy == 'drop_newest':
+                return self._dropped(shard)
+
+            if self.overflow_policy == 'block':
+                try:
+                    shard.queue.put(item, timeout=self.block_timeout)
+                except queue.Full:
+                    return self._dropped(shard)
+            else:
+                self._drop_oldest(shard)
+                try:
+                    shard.queue.put_nowait(item)
+                except queue.Full:
+                    return self._dropped(shard)
+
+        depth = shard.queue.qsize()
+        if depth > shard.max_depth:
+            shard.max_depth = depth
+        with self.lock:
+            self.stats['enqueued'] += 1
+        return True
+
+    def _dropped(self, shard: _Shard) -> bool:
+        with self.lock:
+            self.stats['dropped'] += 1
+        self.logger.warning(
+            f"⚠️  Fila do worker {shard.index} cheia ({shard.queue.maxsize}). Mensagem descartada."
+        )
+        return False
+
+    def _worker(self, shard: _Shard):
+        """Loop de processamento de um worker."""
+        while True:
+            item = shard.queue.get()
+            if item is _STOP:
+                break
+
+            callback, topic, payload, enqueued_at = item
+            started = time.perf_counter()
+            try:
+                callback(topic, payload.decode('utf-8'))
+            except Exception as e:
+                shard.errors += 1
+                self.logger.error(f"❌ Erro ao processar mensagem de {topic}: {e}")
+            finished = time.perf_counter()
+
+            shard.processed += 1
+            shard.latency.observe((finished - enqueued_at) * 1000)
+            shard.service.observe((finished - started) * 1000)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Retorna métricas de filas e latência.
+
+        Returns:
+            Dicionário com profundidade das filas, descartes e percentis
+        """
+        latency = LatencyHistogram()
+        service = LatencyHistogram()
+        for shard in self.shards:
+            latency.merge(shard.latency)
+            service.merge(shard.service)
+
+        with self.lock:
+            enqueued = self.stats['enqueued']
+            dropped = self.stats['dropped']
+
+        return {
+            'workers': len(self.shards),
+            'overflow_policy': self.overflow_policy,
+            'enqueued': enqueued,
+            'dropped': dropped,
+            'processed': sum(shard.processed for shard in self.shards),
+            'errors': sum(shard.errors for shard in self.shards),
+            'queue_depth': [shard.queue.qsize() for shard in self.shards],
+            'max_queue_depth': [shard.max_depth for shard in self.shards],
+            'latency': latency.summary(),
+            'processing_time': service.summary(),
+        }
+
+
+class AsyncMessageDispatcher(MessageDispatcher):
+    """
+    Variante asyncio do despachante: workers são tasks do event loop.
+
+    Mesma distribuição por tópico, ordem por sensor e métricas da versão
+    com threads. `submit` roda no próprio event loop (callback do paho),
+    onde não é possível bloquear: a política 'block' descarta a mensagem
+    recebida, como 'drop_newest'.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        for shard in self.shards:
+            shard.queue = asyncio.Queue(maxsize=shard.queue.maxsize)
+        self.tasks: List[asyncio.Task] = []
+
+    def start(self):
+        """Inicia as tasks de processamento (chamar dentro do event loop)."""
+        if self.running:
+            return
+        self.running = True
+        loop = asyncio.get_running_loop()
+        self.tasks = [
+            loop.create_task(self._worker(shard), name=f"{self.name}-{shard.index}")
+            for shard in self.shards
+        ]
+        self.logger.info(f"🧵 {len(self.shards)} workers asyncio de processamento iniciados")
+
+    async def stop(self, timeout: float = 5.0):
+        """
+        Para os workers após processar o que já está nas filas.
+
+        Args:
+            timeout: Espera máxima (s) pelo esvaziamento das filas
+        """
+        if not self.running:
+            return
+        self.running = False
+        for shard in self.shards:
+            while True:
+                try:
+                    shard.queue.put_nowait(_STOP)
+                    break
+                except asyncio.QueueFull:
+                    self._drop_oldest(shard)
+        done, pending = await asyncio.wait(self.tasks, timeout=timeout)
+        for task in pending:
+            task.cancel()
+        self.tasks = []
+
+    def _drop_oldest(self, shard: _Shard):
+        try:
+            shard.queue.get_nowait()
+            with self.lock:
+                self.stats['dropped'] += 1
+        except asyncio.QueueEmpty:
+            pass
+
+    def submit(self, topic: str, payload: bytes, callback: Callable[[str, str], Any]) -> bool:
+        """
+        Enfileira uma mensagem (chamado no event loop).
+
+        Args:
+            topic: Tópico da mensagem
+            payload: Payload bruto (bytes)
+            callback: Função callback(topic, message)
+
+        Returns:
+            True se a mensagem foi enfileirada
+        """
+        shard = self.shard_for(topic)
+        item = (callback, topic, payload, time.perf_counter())
+
+        try:
+            shard.queue.put_nowait(item)
+        except asyncio.QueueFull:
+            if self.overflow_policy != 'drop_oldest':
+                return self._dropped(shard)
+            self._drop_oldest(shard)
+            shard.queue.put_nowait(item)
+
+        depth = shard.queue.qsize()
+        if depth > shard.max_depth:
+            shard.max_depth = depth
+        with self.lock:
+            self.stats['enqueued'] += 1
+        return True
+
+    async def _worker(self, shard: _Shard):
+        """Loop de processamento de um worker."""
+        while True:
+            item = await shard.queue.get()
+            if item is _STOP:
+                break
+
+            callback, topic, payload, enqueued_at = item
+            started = time.perf_counter()
+            try:
+                result = callback(topic, payload.decode('utf-8'))
+                if asyncio.iscoroutine(result):
+                    await result
+            except Exception as e:
+                shard.errors += 1
+                self.logger.error(f"❌ Erro ao processar mensagem de {topic}: {e}")
+            finished = time.perf_counter()
+
+            shard.processed += 1
+            shard.latency.observe((finished - enqueued_at) * 1000)
+            shard.service.observe((finished - started) * 1000)
@@ -8,8 +8,96 @@ Cliente para publicação e subscrição de mensagens via MQTT.
 import paho.mqtt.client as mqtt
 import logging
 import time
-from typing import Callable, Dict, Any, Optional
-from threading import Lock
+from typing import Callable, Dict, Any, Iterable, List, Optional, Tuple
+from threading import BoundedSemaphore, Condition, Event, Lock
+
+from backend.gateway.connection_manager import ConnectionManager
+from backend.gateway.message_dispatcher import LatencyHistogram
+
+
+def subscription_filter(topic: str) -> str:
+    """
+    Filtro de tópico efetivo de uma subscrição.
+    
+    Em subscrições compartilhadas ('$share/<grupo>/<filtro>') as mensagens
+    chegam com o tópico real, então o casamento usa apenas o <filtro>.
+    """
+    if topic.startswith('$share/'):
+        return topic.split('/', 2)[2]
+    return topic
+
+
+class DeliveryHandle:
+    """
+    Resultado de uma publicação.
+    
+    Avalia como True se a mensagem foi aceita pelo cliente (mesmo sentido
+    do antigo retorno booleano de `publish`). A confirmação do broker
+    (PUBACK/PUBCOMP; para QoS 0, a escrita no socket) pode ser aguardada
+    com `wait()` ou tratada de forma assíncrona com `add_done_callback()`.
+    """
+    
+    def __init__(self, topic: str, qos: int, rc: int = mqtt.MQTT_ERR_SUCCESS):
+        self.topic = topic
+        self.qos = qos
+        self.rc = rc
+        self.mid: Optional[int] = None
+        self.published_at = time.perf_counter()
+        self.acked_at: Optional[float] = None
+        self._event = Event()
+        self._callbacks: List[Callable[['DeliveryHandle'], Any]] = []
+        self._lock = Lock()
+        
+        # Rejeitada localmente: não haverá confirmação
+        if rc != mqtt.MQTT_ERR_SUCCESS:
+            self._event.set()
+    
+    def __bool__(self) -> bool:
+        return self.rc == mqtt.MQTT_ERR_SUCCESS
+    
+    def done(self) -> bool:
+        """Indica se a publicação foi confirmada (ou rejeitada)."""
+        return self._event.is_set()
+    
+    def acked(self) -> bool:
+        """Indica se o broker confirmou a mensagem."""
+        return self.acked_at is not None
+    
+    def wait(self, timeout: float = None) -> bool:
+        """
+        Aguarda a confirmação.
+        
+        Args:
+            timeout: Espera máxima em segundos (None = indefinida)
+        
+        Returns:
+            True se confirmada pelo broker dentro do prazo
+        """
+        self._event.wait(timeout)
+        return self.acked()
+    
+    @property
+    def latency_ms(self) -> Optional[float]:
+        """Tempo entre a publicação e a confirmação (ms)."""
+        if self.acked_at is None:
+            return None
+        return (self.acked_at - self.published_at) * 1000
+    
+    def add_done_callback(self, callback: Callable[['DeliveryHandle'], Any]):
+        """Registra callback(handle), chamado na confirmação (ou já, se concluída)."""
+        with self._lock:
+            if not self._event.is_set():
+                self._callbacks.append(callback)
+                return
+        callback(self)
+    
+    def _resolve(self, acked_at: Optional[float]):
+        with self._lock:
+            self.acked_at = acked_at
+            self._event.set()
+            callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            callback(self)
 
 
 class MQTTClient:
@@ -17,21 +105,45 @@ class MQTTClient:
     Cliente MQTT para comunicação com o broker Mosquitto.
     """
     
-    def __init__(self, config: Dict[str, Any], client_id: str = None):
+    def __init__(
+        self,
+        config: Dict[str, Any],
+        client_id: str = None,
+        dispatcher=None,
+        brokers: List[Dict[str, Any]] = None
+    ):
         """
         Inicializa o cliente MQTT.
         
         Args:
             config: Dicionário com configurações MQTT
             client_id: ID do cliente (opcional)
+            dispatcher: MessageDispatcher para processar mensagens fora da
+                        thread de rede (opcional; sem ele os callbacks rodam
+                        na própria thread do paho)
+            brokers: Brokers em ordem de failover (padrão: BROKER_HOSTS)
         """
         self.config = config
         self.client_id = client_id or config['gateway']['id']
         self.broker = config['broker']
         self.qos = config['qos']
         
+        # QoS por classe de mensagem (readings, alerts, status)
+        self.qos_classes = config.get('qos_classes', {})
+        
+        # Janela de mensagens em voo (QoS > 0) aguardando PUBACK
+        flow_config = config.get('flow_control', {})
+        self.max_inflight = flow_config.get('max_inflight', 20)
+        self.publish_timeout = flow_config.get('publish_timeout', 5.0)
+        self.inflight_window = BoundedSemaphore(self.max_inflight)
+        self.inflight: Dict[int, Tuple[DeliveryHandle, bool]] = {}
+        self.early_acks: Dict[int, float] = {}
+        self.inflight_done = Condition()
+        self.publish_latency = LatencyHistogram()
+        
         # Criar cliente MQTT
         self.client = mqtt.Client(client_id=self.client_id)
+        self.client.max_inflight_messages_set(self.max_inflight)
         
         # Configurar autenticação se fornecida
         if self.broker.get('username') and self.broker.get('password'):
@@ -40,6 +152,19 @@ class MQTTClient:
                 self.broker['password']
             )
         
+        # Conexão orientada a eventos com reconexão por backoff
+        reconnect_config = config.get('reconnect', {})
+        self.connect_timeout = reconnect_config.get('connect_timeout', 10.0)
+        self.connection = ConnectionManager(
+            self.client,
+            self.broker,
+            min_delay=reconnect_config.get('min_delay', 1.0),
+            max_delay=reconnect_config.get('max_delay', 60.0),
+            name=self.client_id,
+            brokers=brokers or self.broker.get('hosts'),
+            failover_after=reconnect_config.get('failover_after', 2)
+        )
+        
         # Callbacks
         self.client.on_connect = self._on_connect
         self.client.on_disconnect = self._on_disconnect
@@ -50,13 +175,15 @@ class MQTTClient:
         self.connected = False
         self.subscribed_topics = []
         self.message_callbacks = {}
+        self.dispatcher = dispatcher
         self.lock = Lock()
         
         # Estatísticas
         self.stats = {
             'messages_published': 0,
             'messages_received': 0,
-            'connection_attempts': 0,
+            'publish_rejected': 0,
+            'publish_window_timeouts': 0,
             'connection_failures': 0
         }
         
@@ -67,15 +194,18 @@ class MQTTClient:
         """Callback quando conectado ao broker."""
         if rc == 0:
             self.connected = True
-            self.logger.info(f"✅ Conectado ao broker MQTT: {self.broker['host']}:{self.broker['port']}")
+            self.logger.info(
+                f"✅ Conectado ao broker MQTT: {self.connection.broker['host']}:{self.connection.broker['port']}"
+            )
             
-            # Re-subscrever tópicos após reconexão
+            # Re-subscrever tópicos após reconexão (antes de liberar os hooks)
             for topic in self.subscribed_topics:
                 self.client.subscribe(topic, self.qos)
                 self.logger.info(f"📥 Re-subscrito ao tópico: {topic}")
         else:
             self.connected = False
-            self.stats['connection_failures'] += 1
+            with self.lock:
+                self.stats['connection_failures'] += 1
             error_messages = {
                 1: "Protocolo incorreto",
                 2: "Client ID inválido",
@@ -85,6 +215,8 @@ class MQTTClient:
             }
             error_msg = error_messages.get(rc, f"Erro desconhecido: {rc}")
             self.logger.error(f"❌ Falha na conexão: {error_msg}")
+        
+        self.connection.on_connect(rc)
     
     def _on_disconnect(self, client, userdata, rc):
         """Callback quando desconectado do broker."""
@@ -93,13 +225,36 @@ class MQTTClient:
             self.logger.warning(f"⚠️  Desconectado inesperadamente. Código: {rc}")
         else:
             self.logger.info("🔌 Desconectado do broker MQTT")
+        
+        self.connection.on_disconnect(rc)
     
     def _on_publish(self, client, userdata, mid):
-        """Callback quando mensagem é publicada."""
+        """Callback quando mensagem é confirmada (PUBACK/PUBCOMP; QoS 0: enviada)."""
+        acked_at = time.perf_counter()
         with self.lock:
             self.stats['messages_published'] += 1
+            entry = self.inflight.pop(mid, None)
+            if entry is None:
+                # Confirmação chegou antes de `publish` registrar o mid
+                self.early_acks[mid] = acked_at
+                return
+        
+        self._complete(entry, acked_at)
         self.logger.debug(f"📤 Mensagem publicada (MID: {mid})")
     
+    def _complete(self, entry: Tuple[DeliveryHandle, bool], acked_at: float):
+        """Conclui uma entrega: libera a janela, registra latência e avisa."""
+        handle, holds_slot = entry
+        if holds_slot:
+            self.inflight_window.release()
+        
+        with self.lock:
+            self.publish_latency.observe((acked_at - handle.published_at) * 1000)
+        handle._resolve(acked_at)
+        
+        with self.inflight_done:
+            self.inflight_done.notify_all()
+    
     def _on_message(self, client, userdata, msg):
         """Callback quando mensagem é recebida."""
         with self.lock:
@@ -107,92 +262,191 @@ class MQTTClient:
         
         self.logger.debug(f"📨 Mensagem recebida no tópico: {msg.topic}")
         
-        # Executar callback específico do tópico se existir
-        if msg.topic in self.message_callbacks:
+        # Executar callbacks das subscrições que casam com o tópico (inclui wildcards)
+        for subscription, callback in list(self.message_callbacks.items()):
+            if not mqtt.topic_matches_sub(subscription_filter(subscription), msg.topic):
+                continue
+            
+            if self.dispatcher is not None:
+                self.dispatcher.submit(msg.topic, msg.payload, callback)
+                continue
+            
             try:
-                self.message_callbacks[msg.topic](msg.topic, msg.payload.decode('utf-8'))
+                callback(msg.topic, msg.payload.decode('utf-8'))
             except Exception as e:
                 self.logger.error(f"❌ Erro ao processar mensagem: {e}")
     
-    def connect(self, retry_attempts: int = 3, retry_delay: int = 5) -> bool:
+    def connect(self, retry_attempts: int = 3, timeout: float = None) -> bool:
         """
         Conecta ao broker MQTT.
         
+        Retorna assim que o CONNACK chega. Se o broker estiver fora do ar,
+        a thread de rede continua tentando com backoff exponencial e as
+        reconexões seguintes são automáticas.
+        
         Args:
-            retry_attempts: Número de tentativas de reconexão
-            retry_delay: Delay entre tentativas (segundos)
+            retry_attempts: Falhas toleradas antes de desistir da espera
+            timeout: Espera máxima em segundos (padrão: CONNECT_TIMEOUT)
         
         Returns:
             True se conectado com sucesso
         """
-        for attempt in range(1, retry_attempts + 1):
-            try:
-                self.stats['connection_attempts'] += 1
-                self.logger.info(f"🔄 Tentativa {attempt}/{retry_attempts} de conexão ao broker...")
-                
-                self.client.connect(
-                    self.broker['host'],
-                    self.broker['port'],
-                    self.broker['keepalive']
-                )
-                
-                # Iniciar loop em thread separada
-                self.client.loop_start()
-                
-                # Aguardar conexão
-                timeout = 10
-                elapsed = 0
-                while not self.connected and elapsed < timeout:
-                    time.sleep(0.5)
-                    elapsed += 0.5
-                
-                if self.connected:
-                    return True
-                    
-            except Exception as e:
-                self.logger.error(f"❌ Erro na tentativa {attempt}: {e}")
-                if attempt < retry_attempts:
-                    self.logger.info(f"⏳ Aguardando {retry_delay}s antes de tentar novamente...")
-                    time.sleep(retry_delay)
+        try:
+            return self.connection.connect(
+                retry_attempts=retry_attempts,
+                timeout=self.connect_timeout if timeout is None else timeout
+            )
+        except Exception as e:
+            self.logger.error(f"❌ Erro ao conectar: {e}")
+            return False
+    
+    def add_connect_hook(self, hook: Callable[[bool], Any]):
+        """
+        Registra hook(reconnected) executado após cada conexão.
         
-        return False
+        Roda fora da thread de rede, depois da re-subscrição dos tópicos.
+        
+        Args:
+            hook: Função que recebe True quando é uma reconexão
+        """
+        self.connection.add_hook(hook)
     
     def disconnect(self):
         """Desconecta do broker MQTT."""
-        if self.connected:
-            self.client.loop_stop()
-            self.client.disconnect()
+        was_connected = self.connected
+        self.connection.disconnect()
+        if was_connected:
             self.logger.info("👋 Desconectando do broker...")
     
-    def publish(self, topic: str, message: str, retain: bool = False) -> bool:
+    def qos_for(self, message_class: str = None) -> int:
+        """QoS de uma classe de mensagem ('readings', 'alerts', 'status')."""
+        return self.qos_classes.get(message_class, self.qos)
+    
+    def _rejected(self, topic: str, qos: int, rc: int) -> DeliveryHandle:
+        with self.lock:
+            self.stats['publish_rejected'] += 1
+        return DeliveryHandle(topic, qos, rc)
+    
+    def publish(
+        self,
+        topic: str,
+        message: str,
+        retain: bool = False,
+        qos: int = None,
+        message_class: str = None,
+        block: bool = True,
+        timeout: float = None
+    ) -> DeliveryHandle:
         """
         Publica uma mensagem no tópico especificado.
         
+        Mensagens com QoS > 0 ocupam uma vaga da janela de mensagens em voo
+        até o PUBACK; com a janela cheia a chamada aguarda (backpressure)
+        ou, com `block=False`, retorna uma entrega rejeitada.
+        
         Args:
             topic: Tópico MQTT
             message: Mensagem (string JSON)
             retain: Se a mensagem deve ser retida pelo broker
+            qos: QoS explícito (sobrepõe a classe)
+            message_class: Classe da mensagem ('readings', 'alerts', 'status')
+            block: Aguardar vaga na janela de mensagens em voo
+            timeout: Espera máxima pela vaga (padrão: PUBLISH_TIMEOUT)
         
         Returns:
-            True se publicado com sucesso
+            DeliveryHandle: verdadeiro se a mensagem foi aceita
         """
+        if qos is None:
+            qos = self.qos_for(message_class)
+        
         if not self.connected:
             self.logger.error("❌ Não conectado ao broker. Não é possível publicar.")
-            return False
+            return self._rejected(topic, qos, mqtt.MQTT_ERR_NO_CONN)
+        
+        holds_slot = qos > 0
+        if holds_slot:
+            wait = self.publish_timeout if timeout is None else timeout
+            if not self.inflight_window.acquire(blocking=block, timeout=wait if block else None):
+                return self._window_full(topic, qos)
         
+        return self._send(topic, message, qos, retain, holds_slot)
+    
+    def _window_full(self, topic: str, qos: int) -> DeliveryHandle:
+        with self.lock:
+            self.stats['publish_window_timeouts'] += 1
+        self.logger.warning(f"⚠️  Janela de publicação cheia ({self.max_inflight} em voo)")
+        return self._rejected(topic, qos, mqtt.MQTT_ERR_QUEUE_SIZE)
+    
+    def _send(self, topic: str, message: str, qos: int, retain: bool, holds_slot: bool) -> DeliveryHandle:
+        """Entrega a mensagem ao paho e registra o mid em voo (vaga já reservada)."""
+        handle = DeliveryHandle(topic, qos)
         try:
-            result = self.client.publish(topic, message, qos=self.qos, retain=retain)
-            
-            if result.rc == mqtt.MQTT_ERR_SUCCESS:
-                self.logger.debug(f"✅ Publicado em {topic}")
-                return True
-            else:
-                self.logger.error(f"❌ Erro ao publicar: {result.rc}")
-                return False
-                
+            result = self.client.publish(topic, message, qos=qos, retain=retain)
         except Exception as e:
+            if holds_slot:
+                self.inflight_window.release()
             self.logger.error(f"❌ Exceção ao publicar: {e}")
-            return False
+            return self._rejected(topic, qos, mqtt.MQTT_ERR_UNKNOWN)
+        
+        if result.rc != mqtt.MQTT_ERR_SUCCESS:
+            if holds_slot:
+                self.inflight_window.release()
+            self.logger.error(f"❌ Erro ao publicar: {result.rc}")
+            return self._rejected(topic, qos, result.rc)
+        
+        handle.mid = result.mid
+        with self.lock:
+            acked_at = self.early_acks.pop(result.mid, None)
+            if acked_at is None:
+                self.inflight[result.mid] = (handle, holds_slot)
+        
+        if acked_at is not None:
+            self._complete((handle, holds_slot), acked_at)
+        
+        self.logger.debug(f"✅ Publicado em {topic} (QoS {qos})")
+        return handle
+    
+    def publish_many(
+        self,
+        messages: Iterable[Tuple[str, str]],
+        message_class: str = 'readings',
+        retain: bool = False
+    ) -> List[DeliveryHandle]:
+        """
+        Publica um lote de mensagens da mesma classe.
+        
+        Args:
+            messages: Pares (tópico, mensagem)
+            message_class: Classe das mensagens (define o QoS)
+            retain: Se as mensagens devem ser retidas pelo broker
+        
+        Returns:
+            Lista de DeliveryHandle, na ordem do lote
+        """
+        qos = self.qos_for(message_class)
+        return [
+            self.publish(topic, message, retain=retain, qos=qos)
+            for topic, message in messages
+        ]
+    
+    def wait_for_inflight(self, timeout: float = None) -> bool:
+        """
+        Aguarda todas as mensagens em voo serem confirmadas.
+        
+        Args:
+            timeout: Espera máxima em segundos (None = indefinida)
+        
+        Returns:
+            True se não restam mensagens em voo
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self.inflight_done:
+            while self.inflight:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self.inflight_done.wait(remaining)
+        return True
     
     def subscribe(self, topic: str, callback: Callable = None):
         """
@@ -232,6 +486,10 @@ class MQTTClient:
         """Retorna se está conectado ao broker."""
         return self.connected
     
+    def is_connected_for(self, topic: str) -> bool:
+        """Retorna se a conexão que publica o tópico está ativa (aqui, a única)."""
+        return self.connected
+    
     def get_stats(self) -> Dict[str, Any]:
         """
         Retorna estatísticas do cliente.
@@ -243,12 +501,17 @@ class MQTTClient:
             return {
                 'client_id': self.client_id,
                 'connected': self.connected,
-                'broker': f"{self.broker['host']}:{self.broker['port']}",
+                'broker': f"{self.connection.broker['host']}:{self.connection.broker['port']}",
                 'subscribed_topics': len(self.subscribed_topics),
                 'messages_published': self.stats['messages_published'],
                 'messages_received': self.stats['messages_received'],
-                'connection_attempts': self.stats['connection_attempts'],
-                'connection_failures': self.stats['connection_failures']
+                'inflight': len(self.inflight),
+                'max_inflight': self.max_inflight,
+                'publish_rejected': self.stats['publish_rejected'],
+                'publish_window_timeouts': self.stats['publish_window_timeouts'],
+                'publish_latency': self.publish_latency.summary(),
+                'connection_failures': self.stats['connection_failures'],
+                'connection': self.connection.get_stats()
             }
 
 
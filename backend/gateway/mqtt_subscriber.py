@@ -8,6 +8,9 @@ Subscriber para receber e processar mensagens do broker MQTT.
 import logging
 import time
 import json
+import gzip
+import socket
+import uuid
 from typing import Dict, Any, Callable, Optional
 from datetime import datetime
 import sys
@@ -17,6 +20,9 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspa
 
 from backend.gateway.mqtt_client import MQTTClient
 from backend.gateway.config_loader import load_mqtt_config, get_topic
+from backend.gateway.ring_buffer import ReadingRingBuffer
+from backend.gateway.message_dispatcher import MessageDispatcher
+from threading import Lock
 
 
 class MQTTSubscriber:
@@ -24,19 +30,37 @@ class MQTTSubscriber:
     Subscriber MQTT para receber mensagens dos sensores.
     """
     
-    def __init__(self, config: Dict[str, Any] = None, client_id: str = "subscriber_001"):
+    def __init__(self, config: Dict[str, Any] = None, client_id: str = None, share_group: str = None):
         """
         Inicializa o subscriber.
         
         Args:
             config: Dicionário de configuração
-            client_id: ID do cliente subscriber
+            client_id: ID do cliente subscriber (padrão: id único por instância)
+            share_group: Grupo de consumidores para subscrição compartilhada
+                         (padrão: SHARE_GROUP da configuração; vazio = sem grupo)
         """
         self.config = config or load_mqtt_config()
-        self.client_id = client_id
+        subscriber_config = self.config.get('subscriber', {})
+        
+        # Ids fixos fazem o broker derrubar a sessão anterior quando duas
+        # instâncias usam o mesmo id; cada instância recebe o seu
+        self.client_id = client_id or self.generate_client_id(
+            subscriber_config.get('client_id_prefix', 'subscriber')
+        )
+        if share_group is None:
+            share_group = subscriber_config.get('share_group', '')
+        self.share_group = share_group or None
+        self.unsubscribe_grace = subscriber_config.get('unsubscribe_grace', 0.5)
+        self.shared_topics = []
+        
+        # Processamento fora da thread de rede do paho (WORKERS=0 desabilita)
+        self.dispatcher = None
+        if subscriber_config.get('workers', 0) > 0:
+            self.dispatcher = self._create_dispatcher(subscriber_config)
         
         # Cliente MQTT
-        self.mqtt_client = MQTTClient(self.config, client_id=self.client_id)
+        self.mqtt_client = self._create_mqtt_client()
         
         # Callbacks personalizados
         self.custom_callbacks = {}
@@ -50,10 +74,11 @@ class MQTTSubscriber:
             'alerts_received': 0,
             'errors': 0
         }
+        self.stats_lock = Lock()
         
-        # Armazenamento temporário de dados
-        self.sensor_data_cache = []
-        self.max_cache_size = 1000
+        # Armazenamento temporário de dados (ring buffer com índice por sensor)
+        self.max_cache_size = subscriber_config.get('cache_size', 1000)
+        self.sensor_data_cache = ReadingRingBuffer(self.max_cache_size)
         
         # Logging
         self.logger = logging.getLogger(f"Subscriber.{self.client_id}")
@@ -68,6 +93,35 @@ class MQTTSubscriber:
         console_handler.setFormatter(formatter)
         self.logger.addHandler(console_handler)
     
+    def _create_dispatcher(self, subscriber_config: Dict[str, Any]) -> MessageDispatcher:
+        """Cria o pool de workers de processamento."""
+        return MessageDispatcher(
+            workers=subscriber_config['workers'],
+            queue_size=subscriber_config.get('queue_size', 10000),
+            overflow_policy=subscriber_config.get('overflow_policy', 'drop_oldest'),
+            name=f"{self.client_id}-worker"
+        )
+    
+    def _create_mqtt_client(self) -> MQTTClient:
+        """Cria o cliente MQTT do subscriber."""
+        return MQTTClient(self.config, client_id=self.client_id, dispatcher=self.dispatcher)
+    
+    @staticmethod
+    def generate_client_id(prefix: str = 'subscriber') -> str:
+        """Gera um client id único (host, pid e sufixo aleatório)."""
+        return f"{prefix}_{socket.gethostname()}_{os.getpid()}_{uuid.uuid4().hex[:6]}"
+    
+    def _topic(self, topic: str, shared: bool = True) -> str:
+        """Tópico de subscrição, no grupo de consumidores se configurado."""
+        if shared and self.share_group:
+            return f"$share/{self.share_group}/{topic}"
+        return topic
+    
+    def _count(self, key: str):
+        """Incrementa um contador (handlers rodam em várias threads)."""
+        with self.stats_lock:
+            self.stats[key] += 1
+    
     def _on_sensor_message(self, topic: str, message: str):
         """
         Processa mensagem de sensor.
@@ -78,12 +132,10 @@ class MQTTSubscriber:
         """
         try:
             data = json.loads(message)
-            self.stats['sensor_readings'] += 1
+            self._count('sensor_readings')
             
             # Adicionar ao cache
             self.sensor_data_cache.append(data)
-            if len(self.sensor_data_cache) > self.max_cache_size:
-                self.sensor_data_cache.pop(0)
             
             # Log se houver atividade
             if data.get('data', {}).get('activity') == 1:
@@ -98,10 +150,10 @@ class MQTTSubscriber:
                 self.custom_callbacks['sensor'](data)
                 
         except json.JSONDecodeError as e:
-            self.stats['errors'] += 1
+            self._count('errors')
             self.logger.error(f"❌ Erro ao decodificar mensagem de sensor: {e}")
         except Exception as e:
-            self.stats['errors'] += 1
+            self._count('errors')
             self.logger.error(f"❌ Erro ao processar mensagem de sensor: {e}")
     
     def _on_status_message(self, topic: str, message: str):
@@ -114,7 +166,7 @@ class MQTTSubscriber:
         """
         try:
             data = json.loads(message)
-            self.stats['status_updates'] += 1
+            self._count('status_updates')
             
             status = data.get('status')
             details = data.get('details', {})
@@ -131,10 +183,10 @@ class MQTTSubscriber:
                 self.custom_callbacks['status'](data)
                 
         except json.JSONDecodeError as e:
-            self.stats['errors'] += 1
+            self._count('errors')
             self.logger.error(f"❌ Erro ao decodificar mensagem de status: {e}")
         except Exception as e:
-            self.stats['errors'] += 1
+            self._count('errors')
             self.logger.error(f"❌ Erro ao processar mensagem de status: {e}")
     
     def _on_alert_message(self, topic: str, message: str):
@@ -147,7 +199,7 @@ class MQTTSubscriber:
         """
         try:
             data = json.loads(message)
-            self.stats['alerts_received'] += 1
+            self._count('alerts_received')
             
             alert_type = data.get('type')
             severity = data.get('severity')
@@ -168,10 +220,10 @@ class MQTTSubscriber:
                 self.custom_callbacks['alert'](data)
                 
         except json.JSONDecodeError as e:
-            self.stats['errors'] += 1
+            self._count('errors')
             self.logger.error(f"❌ Erro ao decodificar mensagem de alerta: {e}")
         except Exception as e:
-            self.stats['errors'] += 1
+            self._count('errors')
             self.logger.error(f"❌ Erro ao processar mensagem de alerta: {e}")
     
     def set_callback(self, message_type: str, callback: Callable):
@@ -189,36 +241,67 @@ class MQTTSubscriber:
         """Inicia o subscriber e conecta ao broker."""
         self.logger.info(f"🚀 Iniciando Subscriber '{self.client_id}'...")
         
+        if self.dispatcher is not None:
+            self.dispatcher.start()
+        
         # Conectar ao broker
         if not self.mqtt_client.connect():
             self.logger.error("❌ Falha ao conectar ao broker MQTT")
+            self.mqtt_client.disconnect()
+            if self.dispatcher is not None:
+                self.dispatcher.stop()
             return False
         
-        # Subscrever aos tópicos
+        self._subscribe_topics()
+        self.stats['start_time'] = time.time()
+        
+        self.logger.info("✅ Subscriber iniciado com sucesso!")
+        self.logger.info(f"📡 Broker: {self.config['broker']['host']}:{self.config['broker']['port']}")
+        self.logger.info(f"📥 Aguardando mensagens...")
+        
+        return True
+    
+    def _subscribe_topics(self):
+        """Subscreve aos tópicos de sensores, status e alertas."""
         # Sensores (wildcard para todos os sensores)
-        sensor_topic = f"{self.config['topics']['prefix']}/{self.config['topics']['sensors']}/#"
+        # Com grupo de consumidores, cada mensagem vai para uma única instância
+        sensor_topic = self._topic(
+            f"{self.config['topics']['prefix']}/{self.config['topics']['sensors']}/#"
+        )
         self.mqtt_client.subscribe(sensor_topic, self._on_sensor_message)
         
-        # Status
+        # Status (retido, fora do grupo: toda instância acompanha o gateway)
         status_topic = get_topic(self.config, 'status')
         self.mqtt_client.subscribe(status_topic, self._on_status_message)
         
         # Alertas
-        alert_topic = get_topic(self.config, 'alerts')
+        alert_topic = self._topic(get_topic(self.config, 'alerts'))
         self.mqtt_client.subscribe(alert_topic, self._on_alert_message)
         
-        self.stats['start_time'] = time.time()
-        
-        self.logger.info("✅ Subscriber iniciado com sucesso!")
-        self.logger.info(f"📡 Broker: {self.config['broker']['host']}:{self.config['broker']['port']}")
-        self.logger.info(f"📥 Aguardando mensagens...")
-        
-        return True
+        self.shared_topics = [
+            topic for topic in (sensor_topic, alert_topic) if topic.startswith('$share/')
+        ]
+        if self.share_group:
+            self.logger.info(f"👥 Grupo de consumidores: {self.share_group}")
     
     def stop(self):
         """Para o subscriber."""
         self.logger.info("🛑 Parando Subscriber...")
+        
+        # Sair do grupo antes de desconectar: o broker passa a entregar as
+        # próximas mensagens às demais instâncias
+        if self.shared_topics and self.mqtt_client.is_connected():
+            for topic in self.shared_topics:
+                self.mqtt_client.unsubscribe(topic)
+            self.shared_topics = []
+            time.sleep(self.unsubscribe_grace)
+        
         self.mqtt_client.disconnect()
+        
+        # Processar o que já foi recebido antes de encerrar os workers
+        if self.dispatcher is not None:
+            self.dispatcher.stop()
+        
         self.logger.info("👋 Subscriber parado")
     
     def get_stats(self) -> Dict[str, Any]:
@@ -232,6 +315,7 @@ class MQTTSubscriber:
         
         return {
             'client_id': self.client_id,
+            'share_group': self.share_group,
             'uptime_seconds': int(uptime),
             'messages_received': self.stats['messages_received'],
             'sensor_readings': self.stats['sensor_readings'],
@@ -239,7 +323,8 @@ class MQTTSubscriber:
             'alerts_received': self.stats['alerts_received'],
             'errors': self.stats['errors'],
             'cache_size': len(self.sensor_data_cache),
-            'mqtt_stats': self.mqtt_client.get_stats()
+            'mqtt_stats': self.mqtt_client.get_stats(),
+            'dispatcher': self.dispatcher.get_stats() if self.dispatcher else None
         }
     
     def get_recent_readings(self, limit: int = 10) -> list:
@@ -252,37 +337,53 @@ class MQTTSubscriber:
         Returns:
             Lista das leituras mais recentes
         """
-        return self.sensor_data_cache[-limit:]
+        return self.sensor_data_cache.recent(limit)
     
-    def get_readings_by_sensor(self, serial_number: str) -> list:
+    def get_readings_by_sensor(self, serial_number: str, limit: int = None) -> list:
         """
         Retorna leituras de um sensor específico.
         
         Args:
             serial_number: Número de série do sensor
+            limit: Número máximo de leituras (as mais recentes); None = todas
         
         Returns:
             Lista de leituras do sensor
         """
-        return [
-            reading for reading in self.sensor_data_cache
-            if reading.get('sensor', {}).get('serial_number') == serial_number
-        ]
+        return self.sensor_data_cache.by_sensor(serial_number, limit)
     
     def export_data(self, filename: str):
         """
-        Exporta dados do cache para arquivo JSON.
+        Exporta dados do cache para arquivo, escrevendo leitura a leitura.
+        
+        O formato é definido pela extensão: `.ndjson` grava uma leitura por
+        linha; qualquer outra grava um documento JSON compacto. O sufixo
+        `.gz` compacta o arquivo com gzip.
         
         Args:
             filename: Nome do arquivo para exportar
         """
         try:
-            with open(filename, 'w', encoding='utf-8') as f:
-                json.dump({
-                    'export_time': datetime.now().isoformat(),
-                    'stats': self.get_stats(),
-                    'readings': self.sensor_data_cache
-                }, f, indent=2, ensure_ascii=False)
+            compressed = filename.endswith('.gz')
+            ndjson = filename[:-3 if compressed else None].endswith('.ndjson')
+            opener = gzip.open if compressed else open
+            
+            with opener(filename, 'wt', encoding='utf-8') as f:
+                if ndjson:
+                    for reading in self.sensor_data_cache:
+                        f.write(json.dumps(reading, ensure_ascii=False, separators=(',', ':')))
+                        f.write('\n')
+                else:
+                    header = json.dumps({
+                        'export_time': datetime.now().isoformat(),
+                        'stats': self.get_stats()
+                    }, ensure_ascii=False, separators=(',', ':'))
+                    f.write(header[:-1] + ',"readings":[')
+                    for index, reading in enumerate(self.sensor_data_cache):
+                        if index:
+                            f.write(',')
+                        f.write(json.dumps(reading, ensure_ascii=False, separators=(',', ':')))
+                    f.write(']}')
             
             self.logger.info(f"💾 Dados exportados para: {filename}")
             
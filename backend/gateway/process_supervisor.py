@@ -0,0 +1,173 @@
+"""
+Supervisor de Processos
+Sistema de Controle de Acesso - CEU Tres Pontes
+
+Base dos launchers que executam N processos filhos e reiniciam os que caírem.
+"""
+
+import logging
+import multiprocessing
+import time
+from typing import Any, Callable, List, Optional, Tuple
+
+
+class StopFlag:
+    """
+    Sinal de parada compartilhado entre processos.
+
+    Valor compartilhado sem lock, consultado por polling: ao contrário do
+    multiprocessing.Event, `set()` não trava se um processo que esperava
+    pelo sinal foi morto (ex.: SIGKILL) e pode ser chamado de um handler de
+    sinal.
+    """
+
+    def __init__(self, context, poll_interval: float = 0.1):
+        self._value = context.RawValue('b', 0)
+        self.poll_interval = poll_interval
+
+    def set(self):
+        self._value.value = 1
+
+    def is_set(self) -> bool:
+        return bool(self._value.value)
+
+    def wait(self, timeout: float = None) -> bool:
+        """
+        Aguarda o sinal por até `timeout` segundos.
+
+        Returns:
+            True se o sinal foi dado
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while not self._value.value:
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                return False
+            time.sleep(self.poll_interval if remaining is None else min(self.poll_interval, remaining))
+        return True
+
+
+class ProcessSupervisor:
+    """
+    Mantém `instances` processos filhos (contexto 'spawn') de pé.
+
+    Processos que terminam sem pedido de parada são reiniciados após
+    `restart_delay` segundos (dobrando a cada queda seguida, até 60s).
+    Os filhos recebem `stop_event` (StopFlag) e devem encerrar de forma
+    ordenada quando ele for sinalizado.
+
+    Subclasses definem `_process_target(index)` e podem usar `on_tick()`
+    para trabalho periódico no processo pai.
+    """
+
+    process_name = 'worker'
+
+    def __init__(self, instances: int, restart_delay: float = 2.0, logger_name: str = None):
+        """
+        Inicializa o supervisor.
+
+        Args:
+            instances: Número de processos
+            restart_delay: Espera inicial (s) antes de reiniciar um processo
+            logger_name: Nome do logger (padrão: nome da classe)
+        """
+        if instances < 1:
+            raise ValueError("instances deve ser maior que zero")
+
+        self.instances = instances
+        self.restart_delay = restart_delay
+
+        self.context = multiprocessing.get_context('spawn')
+        self.stop_event = StopFlag(self.context)
+        self.processes: List[Optional[multiprocessing.Process]] = [None] * instances
+        self.failures = [0] * instances
+        self.next_start = [0.0] * instances
+        self.started_at = [0.0] * instances
+        self.restarts = 0
+
+        self.logger = logging.getLogger(logger_name or type(self).__name__)
+
+    def _process_target(self, index: int) -> Tuple[Callable, Tuple[Any, ...]]:
+        """Função e argumentos do processo `index`."""
+        raise NotImplementedError
+
+    def _spawn(self, index: int):
+        target, args = self._process_target(index)
+        process = self.context.Process(
+            target=target,
+            args=args,
+            name=f"{self.process_name}-{index}",
+            daemon=False
+        )
+        process.start()
+        self.processes[index] = process
+        self.started_at[index] = time.monotonic()
+        self.logger.info(f"🚀 Instância {index} iniciada (pid {process.pid})")
+
+    def start(self):
+        """Inicia todas as instâncias."""
+        for index in range(self.instances):
+            self._spawn(index)
+
+    def on_tick(self):
+        """Chamado a cada verificação do laço de supervisão."""
+
+    def is_alive(self, index: int) -> bool:
+        process = self.processes[index]
+        return process is not None and process.is_alive()
+
+    def supervise(self, interval: float = 1.0):
+        """
+        Acompanha os processos até a parada, reiniciando os que caírem.
+
+        Args:
+            interval: Intervalo (s) entre verificações
+        """
+        while not self.stop_event.is_set():
+            now = time.monotonic()
+            for index, process in enumerate(self.processes):
+                if process is not None and process.is_alive():
+                    continue
+
+                if process is not None:
+                    # Instância que ficou de pé por um tempo volta ao atraso inicial
+                    if now - self.started_at[index] >= 60:
+                        self.failures[index] = 0
+                    self.failures[index] += 1
+                    delay = min(60.0, self.restart_delay * 2 ** (self.failures[index] - 1))
+                    self.next_start[index] = now + delay
+                    self.processes[index] = None
+                    self.logger.warning(
+                        f"⚠️  Instância {index} saiu (código {process.exitcode}). "
+                        f"Reiniciando em {delay:.0f}s"
+                    )
+                    continue
+
+                if now >= self.next_start[index]:
+                    self.restarts += 1
+                    self._spawn(index)
+
+            self.on_tick()
+            self.stop_event.wait(interval)
+
+    def stop(self, timeout: float = 15.0):
+        """
+        Encerra as instâncias de forma ordenada.
+
+        Processos que não terminam em `timeout` segundos são mortos (SIGKILL).
+
+        Args:
+            timeout: Espera máxima (s) pelo encerramento
+        """
+        self.stop_event.set()
+        deadline = time.monotonic() + timeout
+
+        for index, process in enumerate(self.processes):
+            if process is None:
+                continue
+            process.join(max(0.0, deadline - time.monotonic()))
+            if process.is_alive():
+                self.logger.warning(f"⚠️  Instância {index} não encerrou; finalizando")
+                # Os filhos ignoram SIGTERM (a parada é pelo StopFlag)
+                process.kill()
+                process.join(5)
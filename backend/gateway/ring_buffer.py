@@ -0,0 +1,233 @@
+"""
+Ring Buffer de Leituras
+Sistema de Controle de Acesso - CEU Tres Pontes
+
+Cache em memória de capacidade fixa para as leituras recebidas pelo subscriber.
+"""
+
+import math
+import threading
+from array import array
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+
+class ReadingRingBuffer:
+    """
+    Buffer circular de leituras compactas com índice por sensor.
+
+    Cada leitura ocupa uma posição em arrays numéricos pré-alocados
+    (timestamp, atividade, total de detecções, sensor, gateway). Serial,
+    protocolo, localização e gateway são internados em tabelas pequenas,
+    de modo que nenhum objeto Python é criado por leitura armazenada.
+
+    O índice por sensor é uma lista encadeada dentro dos próprios arrays:
+    cada posição guarda a sequência da leitura anterior do mesmo sensor,
+    e cada sensor guarda a sequência da sua leitura mais recente. As
+    últimas N leituras de um sensor custam O(N), independentemente da
+    capacidade do buffer.
+    """
+
+    def __init__(self, capacity: int = 1000):
+        """
+        Inicializa o buffer.
+
+        Args:
+            capacity: Número máximo de leituras mantidas
+        """
+        if capacity < 1:
+            raise ValueError("capacity deve ser maior que zero")
+
+        self.capacity = capacity
+        self.lock = threading.Lock()
+
+        # Campos numéricos (uma posição por leitura)
+        self._timestamps = array('d', [math.nan]) * capacity
+        self._activity = array('b', [-1]) * capacity
+        self._detections = array('q', [0]) * capacity
+        self._sensor = array('i', [-1]) * capacity
+        self._gateway = array('i', [-1]) * capacity
+        # Sequência da leitura anterior do mesmo sensor (-1 = nenhuma)
+        self._prev = array('q', [-1]) * capacity
+
+        # Tabelas internadas
+        self._sensor_index: Dict[str, int] = {}
+        self._sensor_info: List[Tuple[str, Optional[str], Optional[str]]] = []
+        self._sensor_head: List[int] = []
+        self._gateway_index: Dict[str, int] = {}
+        self._gateway_ids: List[str] = []
+
+        # Total de leituras já inseridas (sequência da próxima)
+        self._count = 0
+
+    def __len__(self) -> int:
+        return min(self._count, self.capacity)
+
+    def _intern_sensor(self, serial: str, protocol: Optional[str], location: Optional[str]) -> int:
+        index = self._sensor_index.get(serial)
+        if index is None:
+            index = len(self._sensor_info)
+            self._sensor_index[serial] = index
+            self._sensor_info.append((serial, protocol, location))
+            self._sensor_head.append(-1)
+        elif self._sensor_info[index][1:] != (protocol, location):
+            # Sensor movido/reconfigurado: manter os dados mais recentes
+            self._sensor_info[index] = (serial, protocol, location)
+        return index
+
+    def _intern_gateway(self, gateway_id: Optional[str]) -> int:
+        if gateway_id is None:
+            return -1
+        index = self._gateway_index.get(gateway_id)
+        if index is None:
+            index = len(self._gateway_ids)
+            self._gateway_index[gateway_id] = index
+            self._gateway_ids.append(gateway_id)
+        return index
+
+    @staticmethod
+    def _parse_timestamp(value: Any) -> float:
+        """Timestamp ISO → epoch; sem fuso, é tratado como UTC (não o fuso do host)."""
+        if not value:
+            return math.nan
+        try:
+            parsed = datetime.fromisoformat(value)
+        except (TypeError, ValueError):
+            return math.nan
+        if parsed.tzinfo is None:
+            parsed = parsed.replace(tzinfo=timezone.utc)
+        return parsed.timestamp()
+
+    def append(self, reading: Dict[str, Any]):
+        """
+        Adiciona uma leitura no formato publicado pelo gateway.
+
+        Apenas os campos de identificação e os numéricos são mantidos;
+        metadados específicos do protocolo são descartados.
+
+        Args:
+            reading: Mensagem de sensor já decodificada
+        """
+        sensor = reading.get('sensor') or {}
+        data = reading.get('data') or {}
+
+        activity = data.get('activity')
+        timestamp = self._parse_timestamp(data.get('timestamp') or reading.get('timestamp'))
+        detections = data.get('total_detections') or 0
+
+        with self.lock:
+            sensor_idx = self._intern_sensor(
+                sensor.get('serial_number'),
+                sensor.get('protocol'),
+                sensor.get('location')
+            )
+            gateway_idx = self._intern_gateway(reading.get('gateway_id'))
+
+            seq = self._count
+            slot = seq % self.capacity
+
+            self._timestamps[slot] = timestamp
+            self._activity[slot] = activity if activity in (0, 1) else -1
+            self._detections[slot] = int(detections)
+            self._sensor[slot] = sensor_idx
+            self._gateway[slot] = gateway_idx
+            self._prev[slot] = self._sensor_head[sensor_idx]
+            self._sensor_head[sensor_idx] = seq
+
+            self._count = seq + 1
+
+    def _record(self, seq: int) -> Dict[str, Any]:
+        """Reconstrói a leitura da sequência `seq` (chamar com lock)"""
+        slot = seq % self.capacity
+        serial, protocol, location = self._sensor_info[self._sensor[slot]]
+        gateway_idx = self._gateway[slot]
+        timestamp = self._timestamps[slot]
+        activity = self._activity[slot]
+
+        return {
+            'gateway_id': self._gateway_ids[gateway_idx] if gateway_idx >= 0 else None,
+            'sensor': {
+                'serial_number': serial,
+                'protocol': protocol,
+                'location': location,
+            },
+            'data': {
+                'activity': activity if activity >= 0 else None,
+                'timestamp': (
+                    None if math.isnan(timestamp)
+                    else datetime.fromtimestamp(timestamp, timezone.utc).isoformat()
+                ),
+                'total_detections': self._detections[slot],
+            }
+        }
+
+    def _oldest_seq(self) -> int:
+        return max(0, self._count - self.capacity)
+
+    def recent(self, limit: int = 10) -> List[Dict[str, Any]]:
+        """
+        Retorna as leituras mais recentes (da mais antiga para a mais nova).
+
+        Args:
+            limit: Número máximo de leituras
+        """
+        with self.lock:
+            start = max(self._oldest_seq(), self._count - max(0, limit))
+            return [self._record(seq) for seq in range(start, self._count)]
+
+    def by_sensor(self, serial_number: str, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Retorna as leituras de um sensor (da mais antiga para a mais nova).
+
+        Args:
+            serial_number: Número de série do sensor
+            limit: Número máximo de leituras (None = todas no buffer)
+        """
+        with self.lock:
+            sensor_idx = self._sensor_index.get(serial_number)
+            if sensor_idx is None:
+                return []
+
+            oldest = self._oldest_seq()
+            records = []
+            seq = self._sensor_head[sensor_idx]
+            while seq >= oldest and (limit is None or len(records) < limit):
+                records.append(self._record(seq))
+                seq = self._prev[seq % self.capacity]
+
+        records.reverse()
+        return records
+
+    def sensors(self) -> List[str]:
+        """Seriais com ao menos uma leitura ainda no buffer"""
+        with self.lock:
+            oldest = self._oldest_seq()
+            return [
+                info[0] for info, head in zip(self._sensor_info, self._sensor_head)
+                if head >= oldest
+            ]
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        """
+        Percorre as leituras da mais antiga para a mais nova.
+
+        Leituras sobrescritas durante a iteração são ignoradas.
+        """
+        with self.lock:
+            seq = self._oldest_seq()
+            end = self._count
+
+        while seq < end:
+            with self.lock:
+                seq = max(seq, self._oldest_seq())
+                if seq >= end:
+                    break
+                record = self._record(seq)
+            yield record
+            seq += 1
+
+    def clear(self):
+        """Descarta todas as leituras (mantém as tabelas internadas)"""
+        with self.lock:
+            self._count = 0
+            self._sensor_head = [-1] * len(self._sensor_head)
@@ -0,0 +1,161 @@
+"""
+Launcher de Subscribers
+Sistema de Controle de Acesso - CEU Tres Pontes
+
+Executa N processos MQTTSubscriber no mesmo host, todos no mesmo grupo de
+consumidores (subscrição compartilhada), e reinicia os que caírem.
+
+Uso:
+    python backend/gateway/subscriber_launcher.py --instances 4 --group ceu_ingestao
+"""
+
+import argparse
+import logging
+import os
+import signal
+import sys
+from typing import Optional
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from backend.gateway.config_loader import load_mqtt_config
+from backend.gateway.process_supervisor import ProcessSupervisor
+
+
+def run_instance(index: int, share_group: str, config_file: Optional[str], stop_event) -> int:
+    """
+    Executa um subscriber até `stop_event` ser sinalizado.
+
+    Roda no processo filho; o processo pai trata os sinais e encerra os
+    filhos pelo evento, para que cada um saia do grupo de forma ordenada.
+
+    Args:
+        index: Número da instância (apenas para log)
+        share_group: Grupo de consumidores
+        config_file: Arquivo de configuração (None = padrão)
+        stop_event: StopFlag de parada
+
+    Returns:
+        Código de saída do processo
+    """
+    from backend.gateway.mqtt_subscriber import MQTTSubscriber
+
+    # Ctrl+C chega a todo o grupo de processos; quem decide é o pai
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, signal.SIG_IGN)
+
+    config = load_mqtt_config(config_file)
+    subscriber = MQTTSubscriber(config, share_group=share_group)
+    subscriber.logger.info(f"🔢 Instância {index} (pid {os.getpid()})")
+
+    if not subscriber.start():
+        return 1
+
+    try:
+        while not stop_event.wait(1.0):
+            pass
+    finally:
+        subscriber.stop()
+
+    return 0
+
+
+def _instance_main(index: int, share_group: str, config_file: Optional[str], stop_event):
+    sys.exit(run_instance(index, share_group, config_file, stop_event))
+
+
+class SubscriberLauncher(ProcessSupervisor):
+    """
+    Supervisor dos processos subscriber.
+
+    Um processo reiniciado volta ao grupo com um client id novo, e o broker
+    passa a dividir as mensagens com ele automaticamente.
+    """
+
+    process_name = 'subscriber'
+
+    def __init__(
+        self,
+        instances: int,
+        share_group: str,
+        config_file: Optional[str] = None,
+        restart_delay: float = 2.0
+    ):
+        """
+        Inicializa o launcher.
+
+        Args:
+            instances: Número de processos subscriber
+            share_group: Grupo de consumidores
+            config_file: Arquivo de configuração MQTT (None = padrão)
+            restart_delay: Espera inicial (s) antes de reiniciar um processo
+        """
+        if not share_group:
+            raise ValueError("share_group é obrigatório: sem grupo cada instância recebe todas as mensagens")
+
+        super().__init__(instances, restart_delay, logger_name="SubscriberLauncher")
+        self.share_group = share_group
+        self.config_file = config_file
+
+    def _process_target(self, index: int):
+        return _instance_main, (index, self.share_group, self.config_file, self.stop_event)
+
+    def start(self):
+        """Inicia todas as instâncias."""
+        self.logger.info(
+            f"👥 Iniciando {self.instances} subscribers no grupo '{self.share_group}'"
+        )
+        super().start()
+
+    def stop(self, timeout: float = 15.0):
+        """
+        Encerra as instâncias de forma ordenada.
+
+        Cada subscriber sai do grupo, processa o que já recebeu e desconecta;
+        processos que não terminam em `timeout` segundos são finalizados.
+
+        Args:
+            timeout: Espera máxima (s) pelo encerramento
+        """
+        super().stop(timeout)
+        self.logger.info("👋 Subscribers encerrados")
+
+
+def main():
+    config = load_mqtt_config()
+    subscriber_config = config.get('subscriber', {})
+
+    parser = argparse.ArgumentParser(description="Executa N subscribers MQTT em um grupo de consumidores")
+    parser.add_argument('--instances', type=int, default=subscriber_config.get('instances', 1),
+                        help="Número de processos (padrão: INSTANCES da configuração)")
+    parser.add_argument('--group', default=subscriber_config.get('share_group') or 'ceu_ingestao',
+                        help="Grupo de consumidores (padrão: SHARE_GROUP da configuração)")
+    parser.add_argument('--config', default=None, help="Arquivo mqtt_config.ini alternativo")
+    args = parser.parse_args()
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+
+    if args.instances > 1:
+        logging.getLogger("SubscriberLauncher").warning(
+            f"⚠️  {args.instances} instâncias no grupo {args.group}: cada uma recebe parte das "
+            f"mensagens; cache e estatísticas em memória não são somados entre elas"
+        )
+
+    launcher = SubscriberLauncher(args.instances, args.group, args.config)
+
+    def handle_signal(signum, frame):
+        launcher.stop_event.set()
+
+    signal.signal(signal.SIGINT, handle_signal)
+    signal.signal(signal.SIGTERM, handle_signal)
+
+    launcher.start()
+    launcher.supervise()
+    launcher.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Configuração do gunicorn para a API
+CEU Tres Pontes - Sistema de Controle de Acesso
+
+Processos × threads (gthread) com a aplicação carregada no master antes do
+fork (preload_app): os workers compartilham as páginas do código e sobem
+mais rápido. Cada worker tem o próprio pool de conexões, dimensionado pelas
+WEB_THREADS (ver SQLALCHEMY_ENGINE_OPTIONS em app/config.py).
+
+Uso:
+    gunicorn -c gunicorn.conf.py wsgi:app
+    WEB_WORKERS=4 WEB_THREADS=8 gunicorn -c gunicorn.conf.py wsgi:app
+
+Variáveis:
+    WEB_BIND       Endereço (padrão: 0.0.0.0:5000)
+    WEB_WORKERS    Processos (padrão: 2; cada um abre o próprio pool no MySQL)
+    WEB_THREADS    Threads por processo (padrão: 4)
+    WEB_TIMEOUT    Segundos até reiniciar um worker travado (padrão: 60)
+    DB_MAX_CONNECTIONS  max_connections do MySQL; o gunicorn não sobe se
+                   workers × (pool + overflow) passar disso (padrão: 151)
+"""
+
+import os
+
+bind = os.environ.get('WEB_BIND', '0.0.0.0:5000')
+workers = int(os.environ.get('WEB_WORKERS', 2))
+threads = int(os.environ.get('WEB_THREADS', 4))
+worker_class = 'gthread'
+preload_app = True
+
+timeout = int(os.environ.get('WEB_TIMEOUT', 60))
+graceful_timeout = 30
+keepalive = 5
+
+# Reciclar workers periodicamente (vazamentos de memória de longo prazo)
+max_requests = int(os.environ.get('WEB_MAX_REQUESTS', 5000))
+max_requests_jitter = max_requests // 10
+
+accesslog = os.environ.get('WEB_ACCESS_LOG', '-') or None
+errorlog = '-'
+loglevel = os.environ.get('WEB_LOG_LEVEL', 'info')
+
+# A aplicação lê WEB_THREADS para dimensionar o pool de conexões
+os.environ['WEB_THREADS'] = str(threads)
+
+# Ocupação e contadores ficam em memória por processo: com vários workers,
+# cada um só vê as próprias gravações e precisa ressincronizar com o banco
+# periodicamente (entre ressincronizações, os totais de cada worker ficam
+# atrasados em relação às gravações dos demais)
+if workers > 1:
+    os.environ.setdefault('OCCUPANCY_RESYNC_INTERVAL', '30')
+    os.environ.setdefault('ROLLING_COUNTERS_RECONCILE_INTERVAL', '30')
+
+
+def on_starting(server):
+    """Recusa subir se o total de conexões dos workers exceder o limite do MySQL"""
+    from app.config import Config
+
+    per_worker = Config.DB_POOL_SIZE + Config.DB_MAX_OVERFLOW
+    total = workers * per_worker
+    limit = int(os.environ.get('DB_MAX_CONNECTIONS', 151))
+    server.log.info(
+        f"{workers} workers × {threads} threads; pool {Config.DB_POOL_SIZE}+{Config.DB_MAX_OVERFLOW} "
+        f"conexões por worker (até {total} no MySQL)"
+    )
+    if total > limit:
+        raise RuntimeError(
+            f"Até {total} conexões excedem DB_MAX_CONNECTIONS={limit}: reduza WEB_WORKERS, "
+            f"DB_POOL_SIZE/DB_MAX_OVERFLOW ou aumente max_connections no MySQL"
+        )
+
+
+def post_fork(server, worker):
+    """Descarta conexões herdadas do master (preload_app)"""
+    from app import db
+
+    app = server.app.wsgi()
+    with app.app_context():
+        # close=False: os sockets pertencem ao master e não devem ser fechados aqui
+        db.engine.dispose(close=False)
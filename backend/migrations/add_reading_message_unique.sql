@@ -0,0 +1,29 @@
+-- ============================================================
+-- SMARTCEU - IDEMPOTÊNCIA DA INGESTÃO MQTT
+-- Chave única (gateway_id, message_id) em readings, usada pelo
+-- filtro de duplicatas de /api/v1/readings/ingest
+-- ============================================================
+
+-- ============================================================
+-- Remover duplicatas existentes (mantém a primeira gravação)
+-- ============================================================
+
+DELETE r FROM readings r
+JOIN readings keep
+    ON keep.gateway_id = r.gateway_id
+   AND keep.message_id = r.message_id
+   AND keep.id < r.id
+WHERE r.message_id IS NOT NULL;
+
+-- Recontar leituras dos sensores após a limpeza
+UPDATE sensors s
+SET s.total_readings = (
+    SELECT COUNT(*) FROM readings r WHERE r.sensor_id = s.id
+);
+
+-- ============================================================
+-- Chave única (leituras sem message_id continuam permitidas)
+-- ============================================================
+
+ALTER TABLE readings
+    ADD UNIQUE KEY uq_readings_gateway_message (gateway_id, message_id);
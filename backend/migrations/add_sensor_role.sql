@@ -0,0 +1,24 @@
+-- ============================================================
+-- SMARTCEU - PAPEL DOS SENSORES NA CONTAGEM DE OCUPAÇÃO
+-- Substitui a identificação de entradas/saídas por
+-- Sensor.location LIKE '%entrada%' / '%saída%'
+-- ============================================================
+
+ALTER TABLE sensors
+    ADD COLUMN role ENUM('entry', 'exit', 'zone') NULL AFTER description,
+    ADD COLUMN zone VARCHAR(50) NULL AFTER role,
+    ADD INDEX ix_sensors_role (role);
+
+-- ============================================================
+-- Preencher papéis a partir da localização atual
+-- (mesma regra usada antes em /statistics/capacity)
+-- ============================================================
+
+UPDATE sensors SET role = 'entry'
+WHERE role IS NULL AND location LIKE '%entrada%';
+
+UPDATE sensors SET role = 'exit'
+WHERE role IS NULL AND (location LIKE '%saída%' OR location LIKE '%saida%');
+
+UPDATE sensors SET zone = 'principal'
+WHERE zone IS NULL AND role IN ('entry', 'exit');
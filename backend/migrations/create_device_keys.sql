@@ -0,0 +1,29 @@
+-- ============================================================
+-- SMARTCEU - CHAVES DE API DOS DISPOSITIVOS
+-- Autenticação da ingestão sem login por usuário/senha:
+-- cada dispositivo envia 'X-Device-Key: dk_<key_id>.<segredo>.<assinatura>',
+-- com um segredo aleatório e a assinatura = HMAC-SHA256(DEVICE_KEY_SECRET,
+-- key_id e segredo). Apenas o HMAC-SHA256 da chave completa é armazenado.
+-- Emissão e revogação: POST/DELETE /api/v1/admin/device-keys
+-- ============================================================
+
+CREATE TABLE IF NOT EXISTS device_keys (
+    id INT PRIMARY KEY AUTO_INCREMENT,
+
+    -- Identificador público (parte da chave antes do '.')
+    key_id VARCHAR(32) NOT NULL,
+
+    -- HMAC-SHA256 (hex) da chave completa com DEVICE_KEY_SECRET
+    key_hash CHAR(64) NOT NULL,
+
+    name VARCHAR(100) NOT NULL,
+    description TEXT NULL,
+
+    is_active BOOLEAN NOT NULL DEFAULT TRUE,
+
+    created_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    revoked_at DATETIME NULL,
+
+    UNIQUE INDEX ix_device_keys_key_id (key_id)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
+COMMENT='Chaves de API dos dispositivos de ingestão';
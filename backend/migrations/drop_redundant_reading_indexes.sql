@@ -0,0 +1,37 @@
+-- ============================================================
+-- SMARTCEU - ÍNDICES DA TABELA READINGS
+-- Remove índices que a carga da aplicação não usa ou que são
+-- prefixo de outro índice. Cada índice é escrito em todo INSERT
+-- da ingestão MQTT; readings é a tabela de maior volume.
+--
+-- Análise e benchmark: python scripts/analyze_reading_indexes.py
+-- Requer add_reading_message_unique.sql (chave única que substitui
+-- ix_readings_gateway_id). idx_sensor_timestamp passa a atender a FK.
+-- Tabelas criadas pelo create_tables_manual.py antigo usam outros nomes:
+-- lá, remover idx_sensor_activity, idx_gateway_timestamp e idx_message_id.
+-- ============================================================
+
+-- Índices mantidos:
+--   PRIMARY                      (id)
+--   idx_sensor_timestamp         (sensor_id, timestamp)  leituras por sensor; atende a FK
+--   idx_timestamp_activity       (timestamp, activity)   contagens por período / detecções
+--   ix_readings_timestamp        (timestamp)             exportação ORDER BY timestamp, id
+--   uq_readings_gateway_message  (gateway_id, message_id) idempotência da ingestão
+--
+-- Índices removidos:
+--   ix_readings_sensor_id   prefixo de idx_sensor_timestamp
+--   ix_readings_gateway_id  prefixo de uq_readings_gateway_message
+--   ix_readings_message_id  nenhuma consulta filtra só por message_id
+--   idx_sensor_activity     sensor + atividade sempre vem com período (idx_sensor_timestamp)
+--   idx_gateway_timestamp   nenhuma consulta filtra por gateway
+
+-- ============================================================
+-- Remover índices redundantes (uma única reconstrução da tabela)
+-- ============================================================
+
+ALTER TABLE readings
+    DROP INDEX idx_gateway_timestamp,
+    DROP INDEX idx_sensor_activity,
+    DROP INDEX ix_readings_gateway_id,
+    DROP INDEX ix_readings_message_id,
+    DROP INDEX ix_readings_sensor_id;
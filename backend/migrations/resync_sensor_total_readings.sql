@@ -0,0 +1,12 @@
+-- ============================================================
+-- SMARTCEU - TOTAL DE LEITURAS POR SENSOR
+-- O total histórico de leituras (overview e /health) passa a ser
+-- SUM(sensors.total_readings), sem COUNT(*) em readings.
+-- Recontagem única para corrigir sensores com leituras gravadas
+-- fora da API (cargas diretas no banco, exclusões antigas).
+-- ============================================================
+
+UPDATE sensors s
+SET s.total_readings = (
+    SELECT COUNT(*) FROM readings r WHERE r.sensor_id = s.id
+);
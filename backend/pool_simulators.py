@@ -3,8 +3,13 @@ Simuladores de Sensores de Monitoramento da Piscina
 Gera dados realistas para temperatura da água, temperatura ambiente e qualidade da água.
 
 Executa continuamente enviando leituras para a API a cada 30 segundos.
+
+Autenticação: com DEVICE_KEY definida (chave emitida em
+POST /api/v1/admin/device-keys), cada envio leva apenas o cabeçalho
+X-Device-Key, sem login. Sem ela, usa login por usuário/senha (JWT).
 """
 
+import os
 import requests
 import time
 import random
@@ -21,6 +26,9 @@ API_BASE_URL = "http://localhost:5000/api/v1"
 USERNAME = "admin"
 PASSWORD = "admin123"
 
+# Chave de API do dispositivo (dispensa o login)
+DEVICE_KEY = os.environ.get("DEVICE_KEY")
+
 # Intervalo entre leituras (30 segundos conforme solicitado)
 READING_INTERVAL = 30  # segundos
 
@@ -67,6 +75,22 @@ def get_auth_token():
         return None
 
 
+def get_auth_headers():
+    """
+    Cabeçalhos de autenticação dos envios.
+    
+    Returns:
+        dict: X-Device-Key, Authorization com JWT, ou None se o login falhar
+    """
+    if DEVICE_KEY:
+        return {"X-Device-Key": DEVICE_KEY}
+    
+    token = get_auth_token()
+    if not token:
+        return None
+    return {"Authorization": f"Bearer {token}"}
+
+
 # ============================================================
 # SIMULADORES DE SENSORES
 # ============================================================
@@ -181,53 +205,44 @@ class WaterQualitySensor:
 # ENVIO DE LEITURAS
 # ============================================================
 
-def send_reading(token, sensor_type, temperature=None, water_quality=None):
+def send_readings(auth_headers, readings):
     """
-    Envia uma leitura para a API.
+    Envia as leituras do ciclo para a API em uma única requisição.
     
     Args:
-        token: Token JWT de autenticação
-        sensor_type: Tipo do sensor
-        temperature: Temperatura (opcional)
-        water_quality: Qualidade da água (opcional)
+        auth_headers: Cabeçalhos de autenticação (ver get_auth_headers)
+        readings: Lista de leituras (sensor_type + temperature ou water_quality)
         
     Returns:
-        bool: True se enviado com sucesso
+        int: Status HTTP da resposta (0 se houve erro de conexão)
     """
-    headers = {
-        "Content-Type": "application/json",
-        "Authorization": f"Bearer {token}"
-    }
+    headers = {**HEADERS, **auth_headers}
     
+    reading_date = date.today().isoformat()
+    reading_time = datetime.now().strftime("%H:%M:%S")
     data = {
-        "sensor_type": sensor_type,
-        "reading_date": date.today().isoformat(),
-        "reading_time": datetime.now().strftime("%H:%M:%S")
+        "readings": [
+            {**reading, "reading_date": reading_date, "reading_time": reading_time}
+            for reading in readings
+        ]
     }
     
-    if temperature is not None:
-        data["temperature"] = temperature
-    
-    if water_quality is not None:
-        data["water_quality"] = water_quality
-    
     try:
         response = requests.post(
-            f"{API_BASE_URL}/pool/readings",
+            f"{API_BASE_URL}/pool/readings/batch",
             json=data,
             headers=headers,
             timeout=5
         )
         
-        if response.status_code == 201:
-            return True
-        else:
-            print(f"   ⚠️  Erro ao enviar {sensor_type}: {response.status_code}")
-            return False
+        if response.status_code != 201:
+            print(f"   ⚠️  Erro ao enviar leituras: {response.status_code}")
+            print(f"   Resposta: {response.text[:200]}")
+        return response.status_code
             
     except Exception as e:
-        print(f"   ❌ Erro de conexão ao enviar {sensor_type}: {e}")
-        return False
+        print(f"   ❌ Erro de conexão ao enviar leituras: {e}")
+        return 0
 
 
 # ============================================================
@@ -242,7 +257,7 @@ def main():
     print("=" * 60)
     print(f"📡 API: {API_BASE_URL}")
     print(f"⏰ Intervalo: {READING_INTERVAL} segundos")
-    print(f"👤 Usuário: {USERNAME}")
+    print(f"👤 Autenticação: {'chave de dispositivo' if DEVICE_KEY else f'usuário {USERNAME}'}")
     print("=" * 60)
     print()
     
@@ -253,9 +268,9 @@ def main():
     
     # Autenticar
     print("🔐 Autenticando...")
-    token = get_auth_token()
+    auth_headers = get_auth_headers()
     
-    if not token:
+    if not auth_headers:
         print("❌ Falha na autenticação. Encerrando.")
         sys.exit(1)
     
@@ -292,36 +307,30 @@ def main():
             # Enviar para API
             print("\n📤 Enviando para API...")
             
-            success_count = 0
+            readings = [
+                {"sensor_type": "water_temp", "temperature": water_temp},
+                {"sensor_type": "ambient_temp", "temperature": ambient_temp},
+                {"sensor_type": "water_quality", "water_quality": water_quality},
+            ]
+            status = send_readings(auth_headers, readings)
             
-            if send_reading(token, "water_temp", temperature=water_temp):
-                print("   ✅ Temperatura da água enviada")
-                success_count += 1
-            
-            if send_reading(token, "ambient_temp", temperature=ambient_temp):
-                print("   ✅ Temperatura ambiente enviada")
-                success_count += 1
-            
-            if send_reading(token, "water_quality", water_quality=water_quality):
-                print("   ✅ Qualidade da água enviada")
-                success_count += 1
+            # Token JWT expirado: renovar e reenviar
+            if status == 401 and not DEVICE_KEY:
+                print("\n🔄 Renovando token de autenticação...")
+                auth_headers = get_auth_headers()
+                if not auth_headers:
+                    print("❌ Falha ao renovar token. Encerrando.")
+                    break
+                status = send_readings(auth_headers, readings)
             
-            if success_count == 3:
-                print(f"\n✅ Todas as leituras enviadas com sucesso!")
+            if status == 201:
+                print("\n✅ Todas as leituras enviadas com sucesso!")
             else:
-                print(f"\n⚠️  {success_count}/3 leituras enviadas")
+                print("\n⚠️  Leituras não enviadas")
             
             # Aguardar próximo ciclo
             print(f"\n⏳ Aguardando {READING_INTERVAL} segundos...")
             time.sleep(READING_INTERVAL)
-            
-            # Re-autenticar a cada 100 leituras (prevenir expiração do token)
-            if reading_count % 100 == 0:
-                print("\n🔄 Renovando token de autenticação...")
-                token = get_auth_token()
-                if not token:
-                    print("❌ Falha ao renovar token. Encerrando.")
-                    break
     
     except KeyboardInterrupt:
         print("\n\n" + "=" * 60)
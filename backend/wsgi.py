@@ -0,0 +1,15 @@
+"""
+WSGI Entry Point (produção)
+CEU Tres Pontes - Sistema de Controle de Acesso
+
+Linux:
+    gunicorn -c gunicorn.conf.py wsgi:app
+
+Windows (sem gunicorn):
+    waitress-serve --threads=8 --port=5000 wsgi:app
+"""
+
+import os
+from app import create_app
+
+app = create_app(os.getenv('FLASK_ENV', 'production'))
@@ -58,10 +58,8 @@ tables_sql = [
         FOREIGN KEY (sensor_id) REFERENCES sensors(id) ON DELETE CASCADE,
         INDEX idx_sensor_timestamp (sensor_id, timestamp),
         INDEX idx_timestamp_activity (timestamp, activity),
-        INDEX idx_sensor_activity (sensor_id, activity),
-        INDEX idx_gateway_timestamp (gateway_id, timestamp),
-        INDEX idx_timestamp (timestamp),
-        INDEX idx_message_id (message_id)
+        INDEX ix_readings_timestamp (timestamp),
+        UNIQUE KEY uq_readings_gateway_message (gateway_id, message_id)
     ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
     """,
     
@@ -485,7 +485,8 @@ User=${APP_USER}
 Group=${APP_USER}
 WorkingDirectory=${PROJECT_DIR}/app/backend
 Environment="PATH=${PROJECT_DIR}/venv/bin"
-ExecStart=${PROJECT_DIR}/venv/bin/python3 app.py
+ExecStart=${PROJECT_DIR}/venv/bin/gunicorn -c gunicorn.conf.py wsgi:app
+ExecReload=/bin/kill -HUP $MAINPID
 Restart=always
 RestartSec=10
 
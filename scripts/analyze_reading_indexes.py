@@ -0,0 +1,458 @@
+#!/usr/bin/env python3
+"""
+Análise dos índices da tabela readings a partir da carga real da aplicação.
+
+1. Executa a carga da aplicação (endpoints de leituras/estatísticas/exportação
+   e as rotinas de fundo: contadores deslizantes e ocupação) com o profiler
+   de SQL ligado e separa as consultas que tocam a tabela readings.
+2. Roda EXPLAIN de cada consulta na tabela real e mapeia consulta → índice.
+3. Propõe o menor conjunto de índices: os usados pela carga, menos os que são
+   prefixo de outro índice mantido, mais os exigidos por chave única e FK.
+4. Em duas tabelas de rascunho (índices atuais × proposta) com as mesmas
+   linhas sintéticas, mede a vazão de INSERT em lotes (como a ingestão MQTT)
+   e a latência de cada consulta. Se a proposta piorar o plano de alguma
+   consulta (leitura completa, filesort), o índice usado antes volta para a
+   proposta e a medição é refeita.
+5. Imprime a migração (DROP INDEX) correspondente.
+
+As tabelas de rascunho (readings_idx_before / readings_idx_after) são
+removidas ao final, a menos que --keep-tables seja usado.
+
+Uso:
+    python scripts/analyze_reading_indexes.py
+    python scripts/analyze_reading_indexes.py --rows 500000 --batch 500
+    python scripts/analyze_reading_indexes.py --no-benchmark --json indices.json
+"""
+import argparse
+import json
+import logging
+import os
+import random
+import re
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'backend'))
+
+# O profiler precisa estar ligado para capturar a carga
+os.environ['SQL_PROFILER_ENABLED'] = 'true'
+
+from sqlalchemy import Column, Index, MetaData, Table, insert, inspect
+from flask_jwt_extended import create_access_token
+from app import create_app, db
+from app.models import Reading, Sensor
+from app.utils.sql_profiler import sql_profiler
+
+
+TABLE = 'readings'
+BEFORE_TABLE = 'readings_idx_before'
+AFTER_TABLE = 'readings_idx_after'
+TABLE_PATTERN = re.compile(rf'\b{TABLE}\b')
+SQLITE_INDEX = re.compile(r'^(?:SEARCH|SCAN) (\w+)(?: AS \w+)? USING (?:COVERING )?INDEX (\w+)')
+SQLITE_PRIMARY = re.compile(r'^(?:SEARCH|SCAN) (\w+)(?: AS \w+)? USING INTEGER PRIMARY KEY')
+
+
+def print_header(title: str):
+    """Imprime cabeçalho formatado."""
+    print("\n" + "=" * 80)
+    print(f"  {title}")
+    print("=" * 80)
+
+
+# ----------------------------------------------------------------------
+# Carga
+# ----------------------------------------------------------------------
+
+def run_workload(app) -> list:
+    """
+    Executa a carga da aplicação e devolve as consultas que tocam readings.
+
+    Returns:
+        Lista de dicionários (fingerprint, statement, parameters, count, total_ms)
+    """
+    from app.services.occupancy_service import occupancy_engine
+    from app.services.rolling_counters import reading_counters
+
+    now = datetime.utcnow()
+    sensor_id = db.session.query(Sensor.id).order_by(Sensor.id).limit(1).scalar() or 1
+    yesterday = (now - timedelta(days=1)).isoformat()
+    token = create_access_token(identity='0', additional_claims={'role': 'admin'})
+    headers = {'Authorization': f'Bearer {token}'}
+
+    endpoints = [
+        '/api/v1/readings?limit=100',
+        f'/api/v1/readings?sensor_id={sensor_id}&start_date={yesterday}&limit=100',
+        f'/api/v1/readings/sensor/{sensor_id}/latest',
+        '/api/v1/statistics/overview?window=60',
+        '/api/v1/statistics/activity?period=day',
+        f'/api/v1/statistics/activity?period=week&sensor_id={sensor_id}',
+        '/api/v1/statistics/sensors',
+        '/api/v1/statistics/capacity',
+        '/api/v1/statistics/export?format=ndjson&period=day',
+        f'/api/v1/sensors/{sensor_id}',
+    ]
+
+    sql_profiler.reset()
+    client = app.test_client()
+    for path in endpoints:
+        response = client.get(path, headers=headers)
+        response.get_data()
+        print(f"  {response.status_code}  GET {path}")
+
+    for name, job in (
+        ('reading_counters.reconcile(force_rebuild=True)', lambda: reading_counters.reconcile(force_rebuild=True)),
+        ('reading_counters.reconcile()', reading_counters.reconcile),
+        ('occupancy_engine.recover()', occupancy_engine.recover),
+    ):
+        job()
+        print(f"  ✔    {name}")
+    db.session.rollback()
+
+    with sql_profiler.lock:
+        return [
+            {
+                'fingerprint': fingerprint,
+                'statement': stats.statement,
+                'parameters': stats.parameters,
+                'count': stats.count,
+                'total_ms': round(stats.total * 1000, 3),
+            }
+            for fingerprint, stats in sql_profiler.queries.items()
+            if TABLE_PATTERN.search(fingerprint) and fingerprint.lower().startswith(('select', 'with'))
+        ]
+
+
+# ----------------------------------------------------------------------
+# Índices e planos
+# ----------------------------------------------------------------------
+
+def table_indexes(engine, table: str = TABLE) -> dict:
+    """Índices da tabela: nome → {'columns', 'unique'}"""
+    inspector = inspect(engine)
+    indexes = {
+        index['name']: {'columns': list(index['column_names']), 'unique': bool(index['unique'])}
+        for index in inspector.get_indexes(table)
+    }
+    for constraint in inspector.get_unique_constraints(table):
+        indexes.setdefault(constraint['name'], {'columns': list(constraint['column_names']), 'unique': True})
+    return indexes
+
+
+def foreign_key_columns(engine, table: str = TABLE) -> list:
+    return [fk['constrained_columns'] for fk in inspect(engine).get_foreign_keys(table)]
+
+
+def explain_query(engine, statement: str, parameters, table: str = TABLE) -> dict:
+    """
+    Plano da consulta: índices usados na tabela e alertas
+
+    Returns:
+        Dicionário com 'indexes' (set), 'flags' (set) e 'error'
+    """
+    result = sql_profiler.explain(engine, statement, parameters)
+    if 'error' in result:
+        return {'indexes': set(), 'flags': set(), 'error': result['error']}
+
+    used = set()
+    for row in result['plan']:
+        if 'detail' in row:
+            detail = row['detail'] or ''
+            match = SQLITE_INDEX.match(detail)
+            if match and match.group(1) == table:
+                used.add(match.group(2))
+            elif (match := SQLITE_PRIMARY.match(detail)) and match.group(1) == table:
+                used.add('PRIMARY')
+        elif row.get('table') == table and row.get('key'):
+            used.update(row['key'].split(','))
+
+    prefix = f'{table}__'
+    used = {name[len(prefix):] if name.startswith(prefix) else name for name in used}
+    flags = {flag.replace(f':{table}', ':readings') for flag in result['flags']}
+    return {'indexes': used, 'flags': flags, 'error': None}
+
+
+def propose_indexes(indexes: dict, used: set, foreign_keys: list) -> dict:
+    """
+    Menor conjunto de índices que atende a carga
+
+    Args:
+        indexes: Índices atuais
+        used: Índices escolhidos pelo otimizador na carga
+        foreign_keys: Colunas de cada FK (exigem índice com a coluna à esquerda)
+
+    Returns:
+        Dicionário nome → motivo, para os índices mantidos
+    """
+    keep = {name: 'chave única' for name, index in indexes.items() if index['unique']}
+    keep.update({name: 'usado pela carga' for name in used if name in indexes and name not in keep})
+
+    # Índice que é prefixo de outro mantido: o maior atende as mesmas buscas
+    for name in sorted(keep, key=lambda n: len(indexes[n]['columns'])):
+        columns = indexes[name]['columns']
+        if indexes[name]['unique']:
+            continue
+        for other in keep:
+            other_columns = indexes[other]['columns']
+            if other != name and len(other_columns) > len(columns) and other_columns[:len(columns)] == columns:
+                del keep[name]
+                break
+
+    for columns in foreign_keys:
+        if not any(indexes[name]['columns'][:len(columns)] == columns for name in keep):
+            candidates = [n for n, index in indexes.items() if index['columns'][:len(columns)] == columns]
+            if candidates:
+                keep[min(candidates, key=lambda n: len(indexes[n]['columns']))] = f"FK ({', '.join(columns)})"
+    return keep
+
+
+def drop_reasons(indexes: dict, keep: dict, used: set) -> dict:
+    reasons = {}
+    for name, index in indexes.items():
+        if name in keep:
+            continue
+        covering = [
+            other for other in keep
+            if indexes[other]['columns'][:len(index['columns'])] == index['columns']
+        ]
+        if covering:
+            reasons[name] = f"prefixo de {covering[0]}"
+        elif name in used:
+            reasons[name] = "usado, mas atendido por outro índice"
+        else:
+            reasons[name] = "não usado pela carga"
+    return reasons
+
+
+# ----------------------------------------------------------------------
+# Tabelas de rascunho
+# ----------------------------------------------------------------------
+
+def create_scratch_table(engine, name: str, indexes: dict, keep) -> Table:
+    """Cópia de readings (sem FK) apenas com os índices informados"""
+    columns = [
+        Column(column.name, column.type, primary_key=column.primary_key,
+               nullable=column.nullable, autoincrement=column.autoincrement)
+        for column in Reading.__table__.columns
+    ]
+    table = Table(name, MetaData(), *columns)
+    for index_name in sorted(keep):
+        index = indexes[index_name]
+        Index(f'{name}__{index_name}', *[table.c[c] for c in index['columns']], unique=index['unique'])
+
+    table.drop(engine, checkfirst=True)
+    table.create(engine)
+    return table
+
+
+def add_scratch_index(engine, table: Table, indexes: dict, index_name: str) -> None:
+    index = indexes[index_name]
+    Index(f'{table.name}__{index_name}', *[table.c[c] for c in index['columns']],
+          unique=index['unique']).create(engine)
+
+
+def synthetic_rows(count: int, days: int, sensor_ids: list) -> list:
+    """Leituras sintéticas nos últimos dias, com message_id único por gateway"""
+    random.seed(42)
+    now = datetime.utcnow()
+    span = days * 86400
+    rows = []
+    for i in range(count):
+        timestamp = now - timedelta(seconds=random.random() * span)
+        gateway_id = f"gateway_{i % 4:02d}"
+        rows.append({
+            'sensor_id': random.choice(sensor_ids),
+            'activity': 1 if random.random() < 0.3 else 0,
+            'timestamp': timestamp,
+            'sensor_metadata': {'battery_level': random.randint(20, 100), 'rssi_dbm': random.randint(-120, -40)},
+            'message_id': f"{gateway_id}_{i:09d}",
+            'gateway_id': gateway_id,
+            'created_at': timestamp,
+        })
+    return rows
+
+
+def load_rows(engine, table: Table, rows: list, batch: int) -> float:
+    """Insere as linhas em lotes (INSERT IGNORE, um commit por lote) e devolve linhas/s"""
+    started = time.perf_counter()
+    for start in range(0, len(rows), batch):
+        stmt = insert(table).prefix_with('IGNORE', dialect='mysql').prefix_with('OR IGNORE', dialect='sqlite')
+        with engine.begin() as conn:
+            conn.execute(stmt, rows[start:start + batch])
+    elapsed = time.perf_counter() - started
+
+    with engine.begin() as conn:
+        if engine.dialect.name == 'mysql':
+            conn.exec_driver_sql(f'ANALYZE TABLE {table.name}')
+        else:
+            conn.exec_driver_sql('ANALYZE')
+    return len(rows) / elapsed if elapsed else 0.0
+
+
+def query_latency(engine, statement: str, parameters, repeat: int) -> float:
+    """Melhor tempo (ms) da consulta completa, incluindo a leitura das linhas"""
+    best = float('inf')
+    with engine.connect() as conn:
+        for _ in range(repeat):
+            started = time.perf_counter()
+            conn.exec_driver_sql(statement, parameters or ()).fetchall()
+            best = min(best, time.perf_counter() - started)
+    return best * 1000
+
+
+def on_table(statement: str, table: str) -> str:
+    return TABLE_PATTERN.sub(table, statement)
+
+
+def short(fingerprint: str, width: int = 100) -> str:
+    return fingerprint if len(fingerprint) <= width else fingerprint[:width - 3] + '...'
+
+
+# ----------------------------------------------------------------------
+# Relatório
+# ----------------------------------------------------------------------
+
+def analyze(args) -> dict:
+    app = create_app(os.getenv('FLASK_ENV', 'development'))
+    app.logger.setLevel(logging.CRITICAL)
+
+    with app.app_context():
+        engine = db.engine
+        print_header(f"CARGA DA APLICAÇÃO ({engine.dialect.name})")
+        queries = run_workload(app)
+        indexes = table_indexes(engine)
+        foreign_keys = foreign_key_columns(engine)
+
+        print_header(f"CONSULTAS EM {TABLE.upper()} → ÍNDICE USADO ({len(queries)})")
+        used = set()
+        for position, query in enumerate(queries, 1):
+            plan = explain_query(engine, query['statement'], query['parameters'])
+            query['indexes'] = sorted(plan['indexes'])
+            query['flags'] = sorted(plan['flags'])
+            used |= plan['indexes']
+            flags = f"  ⚠️  {', '.join(query['flags'])}" if query['flags'] else ''
+            print(f"  Q{position:<3} {query['count']:>4}x  {', '.join(query['indexes']) or '(nenhum)'}{flags}")
+            print(f"        {short(query['fingerprint'])}")
+            if plan['error']:
+                print(f"        ⚪ EXPLAIN: {plan['error']}")
+
+        print_header(f"ÍNDICES ATUAIS ({len(indexes)})")
+        for name, index in sorted(indexes.items()):
+            users = [f"Q{i}" for i, q in enumerate(queries, 1) if name in q['indexes']]
+            unique = ' único' if index['unique'] else ''
+            print(f"  {name:32s} ({', '.join(index['columns'])}){unique}  ← {', '.join(users) or '-'}")
+
+        keep = propose_indexes(indexes, used, foreign_keys)
+        result = {
+            'dialect': engine.dialect.name,
+            'indexes': indexes,
+            'queries': [{k: v for k, v in q.items() if k != 'parameters'} for q in queries],
+        }
+
+        if args.benchmark:
+            keep, result['benchmark'] = benchmark(engine, queries, indexes, keep, args)
+
+        drop = drop_reasons(indexes, keep, used)
+        print_header(f"PROPOSTA: {len(keep)} DE {len(indexes)} ÍNDICES")
+        for name, reason in sorted(keep.items()):
+            print(f"  ✅ manter  {name:32s} {reason}")
+        for name, reason in sorted(drop.items()):
+            print(f"  ❌ remover {name:32s} {reason}")
+
+        migration = migration_sql(drop)
+        result.update({'keep': keep, 'drop': drop, 'migration': migration})
+        if drop:
+            print_header("MIGRAÇÃO")
+            print(migration)
+        return result
+
+
+def benchmark(engine, queries: list, indexes: dict, keep: dict, args):
+    """
+    Compara índices atuais × proposta em tabelas de rascunho
+
+    Returns:
+        Tupla (proposta ajustada, resultados)
+    """
+    print_header(f"BENCHMARK: {args.rows} LINHAS, LOTES DE {args.batch}")
+    sensor_ids = [row[0] for row in db.session.query(Sensor.id).all()] or list(range(1, 51))
+    rows = synthetic_rows(args.rows, args.days, sensor_ids)
+
+    before = create_scratch_table(engine, BEFORE_TABLE, indexes, indexes)
+    insert_before = load_rows(engine, before, rows, args.batch)
+    after = create_scratch_table(engine, AFTER_TABLE, indexes, keep)
+    insert_after = load_rows(engine, after, rows, args.batch)
+
+    # Proposta não pode piorar o plano de nenhuma consulta
+    restored = {}
+    for query in queries:
+        before_plan = explain_query(engine, on_table(query['statement'], BEFORE_TABLE), query['parameters'], BEFORE_TABLE)
+        after_plan = explain_query(engine, on_table(query['statement'], AFTER_TABLE), query['parameters'], AFTER_TABLE)
+        regressions = after_plan['flags'] - before_plan['flags']
+        missing = before_plan['indexes'] & (set(indexes) - set(keep))
+        if regressions and missing:
+            for name in sorted(missing):
+                add_scratch_index(engine, after, indexes, name)
+                keep[name] = f"evita {', '.join(sorted(regressions))}"
+                restored[name] = query['fingerprint']
+        query['plan_before'] = sorted(before_plan['indexes'])
+
+    if restored:
+        print(f"  ↩️  Índices devolvidos à proposta: {', '.join(sorted(restored))} (medindo de novo)")
+        after = create_scratch_table(engine, AFTER_TABLE, indexes, keep)
+        insert_after = load_rows(engine, after, rows, args.batch)
+
+    change = (insert_after - insert_before) / insert_before * 100 if insert_before else 0.0
+    print(f"  INSERT  atuais ({len(indexes)}): {insert_before:10.0f} linhas/s")
+    print(f"  INSERT  proposta ({len(keep)}): {insert_after:8.0f} linhas/s ({change:+.1f}%)")
+    print()
+
+    latencies = []
+    for position, query in enumerate(queries, 1):
+        before_ms = query_latency(engine, on_table(query['statement'], BEFORE_TABLE), query['parameters'], args.repeat)
+        after_ms = query_latency(engine, on_table(query['statement'], AFTER_TABLE), query['parameters'], args.repeat)
+        after_plan = explain_query(engine, on_table(query['statement'], AFTER_TABLE), query['parameters'], AFTER_TABLE)
+        delta = (after_ms - before_ms) / before_ms * 100 if before_ms else 0.0
+        flag = '⚠️ ' if delta > 20 else '  '
+        print(f"  {flag}Q{position:<3} {before_ms:9.2f} → {after_ms:9.2f} ms ({delta:+6.1f}%)  "
+              f"{', '.join(query['plan_before']) or '-'} → {', '.join(sorted(after_plan['indexes'])) or '-'}")
+        latencies.append({'query': position, 'before_ms': round(before_ms, 3), 'after_ms': round(after_ms, 3)})
+
+    if not args.keep_tables:
+        before.drop(engine)
+        after.drop(engine)
+
+    return keep, {
+        'rows': args.rows,
+        'batch': args.batch,
+        'insert_rows_per_s': {'before': round(insert_before), 'after': round(insert_after)},
+        'restored': restored,
+        'latency': latencies,
+    }
+
+
+def migration_sql(drop: dict) -> str:
+    if not drop:
+        return ''
+    statements = ',\n'.join(f"    DROP INDEX {name}" for name in sorted(drop))
+    return f"ALTER TABLE {TABLE}\n{statements};"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Análise dos índices de readings a partir da carga da aplicação")
+    parser.add_argument('--rows', type=int, default=100000, help="Linhas sintéticas do benchmark")
+    parser.add_argument('--days', type=int, default=30, help="Período coberto pelas linhas sintéticas")
+    parser.add_argument('--batch', type=int, default=500, help="Linhas por INSERT (padrão: INGEST_BATCH_SIZE)")
+    parser.add_argument('--repeat', type=int, default=5, help="Execuções de cada consulta (vale a melhor)")
+    parser.add_argument('--no-benchmark', dest='benchmark', action='store_false',
+                        help="Apenas a análise dos planos na tabela real")
+    parser.add_argument('--keep-tables', action='store_true', help="Mantém as tabelas de rascunho")
+    parser.add_argument('--json', default=None, help="Salva o resultado em JSON")
+    args = parser.parse_args()
+
+    result = analyze(args)
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(result, f, indent=2, default=str, ensure_ascii=False)
+        print(f"\n💾 Resultado salvo em: {args.json}")
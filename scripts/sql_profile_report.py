@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Relatório do profiler de SQL da API.
+
+Autentica como administrador, lê GET /api/v1/admin/sql-profile e imprime
+os fingerprints mais custosos (contagem, tempo total/médio/máximo e
+participação no tempo de SQL). Com --explain, mostra o plano de cada um e
+destaca leituras completas de tabela e ordenações sem índice.
+
+Os números são do processo que atendeu a requisição (com vários workers,
+cada um tem o seu profiler).
+
+Uso:
+    python scripts/sql_profile_report.py --top 15 --explain
+    python scripts/sql_profile_report.py --sort max --json relatorio.json
+    python scripts/sql_profile_report.py --reset
+"""
+import argparse
+import json
+import os
+import sys
+
+import requests
+
+
+def login(api: str, username: str, password: str) -> str:
+    response = requests.post(f"{api}/auth/login", json={"username": username, "password": password}, timeout=10)
+    if response.status_code != 200:
+        print(f"❌ Falha na autenticação ({response.status_code}): {response.text[:200]}")
+        sys.exit(1)
+    return response.json()['access_token']
+
+
+def print_report(report: dict) -> None:
+    print(f"📊 Consultas desde {report['since']}: {report['total_queries']} "
+          f"em {report['total_ms'] / 1000:.2f} s, {report['fingerprints']} fingerprints"
+          + (f" ({report['dropped']} execuções fora do limite)" if report['dropped'] else ""))
+    print(f"   Ordenado por: {report['sort']}")
+
+    for position, query in enumerate(report['queries'], 1):
+        print()
+        print(f"#{position:<3} {query['share']:5.1f}%  {query['count']:>8} x  "
+              f"total {query['total_ms']:10.1f} ms  média {query['avg_ms']:8.2f} ms  "
+              f"máx {query['max_ms']:8.2f} ms  linhas {query['rows']}")
+        print(f"     {query['fingerprint']}")
+
+        explain = query.get('explain')
+        if not explain:
+            continue
+        if 'error' in explain:
+            print(f"     ⚪ EXPLAIN: {explain['error']}")
+            continue
+        for row in explain['plan']:
+            print(f"     · {json.dumps(row, default=str, ensure_ascii=False)}")
+        if explain['flags']:
+            print(f"     ⚠️  {', '.join(explain['flags'])}")
+        else:
+            print("     ✅ Sem leitura completa nem filesort")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Relatório do profiler de SQL da API")
+    parser.add_argument('--url', default=os.environ.get('API_URL', 'http://localhost:5000'),
+                        help="Endereço da API (padrão: http://localhost:5000)")
+    parser.add_argument('--username', default=os.environ.get('ADMIN_USERNAME', 'admin'))
+    parser.add_argument('--password', default=os.environ.get('ADMIN_PASSWORD', 'admin123'))
+    parser.add_argument('--top', type=int, default=20, help="Quantidade de fingerprints")
+    parser.add_argument('--sort', choices=('total', 'count', 'max', 'avg'), default='total')
+    parser.add_argument('--explain', action='store_true', help="Inclui o plano de execução")
+    parser.add_argument('--json', default=None, help="Salva o relatório completo em JSON")
+    parser.add_argument('--reset', action='store_true', help="Zera o profiler")
+    args = parser.parse_args()
+
+    api = f"{args.url.rstrip('/')}/api/v1"
+    headers = {"Authorization": f"Bearer {login(api, args.username, args.password)}"}
+
+    if args.reset:
+        response = requests.delete(f"{api}/admin/sql-profile", headers=headers, timeout=10)
+        print("✅ Profiler zerado" if response.ok else f"❌ {response.status_code}: {response.text[:200]}")
+        sys.exit(0 if response.ok else 1)
+
+    response = requests.get(
+        f"{api}/admin/sql-profile",
+        params={'top': args.top, 'sort': args.sort, 'explain': str(args.explain).lower()},
+        headers=headers,
+        timeout=60,
+    )
+    if not response.ok:
+        print(f"❌ {response.status_code}: {response.text[:200]}")
+        sys.exit(1)
+
+    report = response.json()
+    print_report(report)
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        print(f"\n💾 Relatório salvo em: {args.json}")
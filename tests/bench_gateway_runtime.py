@@ -0,0 +1,263 @@
+"""
+Benchmark: Gateway com threads x Gateway asyncio
+Sistema de Controle de Acesso - CEU Tres Pontes
+
+Roda o Gateway (threads) e o AsyncGateway (asyncio) contra um broker
+"sumidouro" em outro processo, para vários tamanhos de frota, e compara
+leituras publicadas por segundo, CPU por mil leituras, trocas de contexto
+e número de threads.
+
+Uso:
+    python tests/bench_gateway_runtime.py --sensors 100 1000 5000 --duration 5
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import multiprocessing
+import os
+import resource
+import socket
+import sys
+import threading
+import time
+
+# Adicionar paths
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.gateway.config_loader import load_mqtt_config
+from backend.gateway.gateway import Gateway
+from backend.gateway.async_gateway import AsyncGateway
+from sensores import LoRaSensor, ZigBeeSensor, SigfoxSensor, RFIDSensor
+
+
+def print_header(title: str):
+    """Imprime cabeçalho formatado."""
+    print("\n" + "=" * 80)
+    print(f"  {title}")
+    print("=" * 80)
+
+
+# ----------------------------------------------------------------------
+# Broker sumidouro: responde CONNACK/PUBACK/SUBACK/PINGRESP e descarta o resto
+# ----------------------------------------------------------------------
+
+def _read_packet(conn: socket.socket, buffer: bytearray):
+    """Extrai um pacote MQTT completo do buffer (lendo do socket se preciso)."""
+    while True:
+        if len(buffer) >= 2:
+            multiplier, length, index = 1, 0, 1
+            while index < len(buffer):
+                byte = buffer[index]
+                length += (byte & 0x7F) * multiplier
+                multiplier *= 128
+                index += 1
+                if not byte & 0x80:
+                    break
+            else:
+                index = None
+            if index is not None and len(buffer) >= index + length:
+                packet_type = buffer[0]
+                body = bytes(buffer[index:index + length])
+                del buffer[:index + length]
+                return packet_type, body
+        chunk = conn.recv(65536)
+        if not chunk:
+            return None, None
+        buffer.extend(chunk)
+
+
+def _sink_connection(conn: socket.socket, counter):
+    buffer = bytearray()
+    received = 0
+    try:
+        while True:
+            packet_type, body = _read_packet(conn, buffer)
+            if packet_type is None:
+                break
+            kind = packet_type >> 4
+            if kind == 1:                                   # CONNECT
+                conn.sendall(b'\x20\x02\x00\x00')
+            elif kind == 3:                                 # PUBLISH
+                received += 1
+                qos = (packet_type >> 1) & 0x03
+                if qos:
+                    topic_length = int.from_bytes(body[:2], 'big')
+                    mid = body[2 + topic_length:4 + topic_length]
+                    conn.sendall(b'\x40\x02' + mid if qos == 1 else b'\x50\x02' + mid)
+                if received % 1000 == 0:
+                    with counter.get_lock():
+                        counter.value += 1000
+                    received = 0
+            elif kind == 6:                                 # PUBREL (QoS 2)
+                conn.sendall(b'\x70\x02' + body[:2])
+            elif kind == 8:                                 # SUBSCRIBE
+                conn.sendall(b'\x90\x03' + body[:2] + b'\x01')
+            elif kind == 12:                                # PINGREQ
+                conn.sendall(b'\xd0\x00')
+            elif kind == 14:                                # DISCONNECT
+                break
+    except OSError:
+        pass
+    finally:
+        with counter.get_lock():
+            counter.value += received
+        conn.close()
+
+
+def _sink_main(port_value, counter, ready):
+    server = socket.socket()
+    server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    server.bind(('127.0.0.1', 0))
+    server.listen(64)
+    port_value.value = server.getsockname()[1]
+    ready.set()
+    while True:
+        conn, _ = server.accept()
+        conn.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        threading.Thread(target=_sink_connection, args=(conn, counter), daemon=True).start()
+
+
+def start_sink_broker():
+    """Inicia o broker sumidouro em outro processo; retorna (processo, porta, contador)."""
+    context = multiprocessing.get_context('spawn')
+    port_value = context.Value('i', 0)
+    counter = context.Value('q', 0)
+    ready = context.Event()
+    process = context.Process(target=_sink_main, args=(port_value, counter, ready), daemon=True)
+    process.start()
+    ready.wait(10)
+    return process, port_value.value, counter
+
+
+# ----------------------------------------------------------------------
+# Execução
+# ----------------------------------------------------------------------
+
+def build_config(port: int, connections: int = 1) -> dict:
+    config = load_mqtt_config()
+    config['broker'].update(host='127.0.0.1', port=port, username='', password='',
+                            hosts=[{'host': '127.0.0.1', 'port': port}])
+    config['gateway']['connections'] = connections
+    config['gateway']['publish_interval'] = 1
+    config['gateway']['batch_size'] = 100
+    config['logging']['level'] = 'WARNING'
+    return config
+
+
+def build_sensors(count: int) -> list:
+    classes = (LoRaSensor, ZigBeeSensor, SigfoxSensor, RFIDSensor)
+    return [classes[i % len(classes)](location=f"Bench {i}") for i in range(count)]
+
+
+def _usage():
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    return usage.ru_utime + usage.ru_stime, usage.ru_nvcsw + usage.ru_nivcsw
+
+
+def _result(runtime, sensors, duration, gateway, cpu, switches, threads):
+    published = gateway.stats['readings_published']
+    per_thousand = 1000 / published if published else None
+    return {
+        'runtime': runtime,
+        'sensors': sensors,
+        'duration_s': duration,
+        'readings_published': published,
+        'readings_per_s': round(published / duration, 1),
+        'cpu_s': round(cpu, 3),
+        'cpu_ms_per_1k': round(cpu * 1000 * per_thousand, 2) if per_thousand else None,
+        'context_switches': switches,
+        'context_switches_per_1k': round(switches * per_thousand, 1) if per_thousand else None,
+        'threads': threads,
+        'errors': gateway.stats['errors'],
+    }
+
+
+def run_threaded(config: dict, sensors: int, duration: float) -> dict:
+    gateway = Gateway(config)
+    gateway.logger.setLevel(logging.WARNING)
+    gateway.register_sensors(build_sensors(sensors))
+
+    cpu_start, switches_start = _usage()
+    gateway.start()
+    time.sleep(duration)
+    threads = threading.active_count()
+    gateway.stop()
+    cpu_end, switches_end = _usage()
+
+    return _result('threads', sensors, duration, gateway,
+                   cpu_end - cpu_start, switches_end - switches_start, threads)
+
+
+def run_async(config: dict, sensors: int, duration: float) -> dict:
+    gateway = None
+
+    async def main():
+        nonlocal gateway
+        gateway = AsyncGateway(config)
+        gateway.logger.setLevel(logging.WARNING)
+        gateway.register_sensors(build_sensors(sensors))
+        await gateway.run(duration)
+
+    cpu_start, switches_start = _usage()
+    asyncio.run(main())
+    cpu_end, switches_end = _usage()
+
+    return _result('asyncio', sensors, duration, gateway,
+                   cpu_end - cpu_start, switches_end - switches_start, 1)
+
+
+def run_benchmark(fleet_sizes, duration: float, connections: int = 1) -> list:
+    """
+    Compara os dois runtimes para cada tamanho de frota.
+
+    Args:
+        fleet_sizes: Quantidades de sensores
+        duration: Segundos de execução por rodada
+        connections: Conexões MQTT do Gateway com threads (pool se > 1)
+
+    Returns:
+        Lista de resultados (um por runtime e frota)
+    """
+    print_header("BENCHMARK: GATEWAY THREADS x ASYNCIO")
+
+    process, port, counter = start_sink_broker()
+    config = build_config(port, connections)
+    results = []
+
+    try:
+        for sensors in fleet_sizes:
+            for runner in (run_threaded, run_async):
+                result = runner(config, sensors, duration)
+                results.append(result)
+                print(
+                    f"  {result['runtime']:8s} {sensors:6d} sensores | "
+                    f"{result['readings_per_s']:9.1f} leituras/s | "
+                    f"CPU {result['cpu_ms_per_1k'] or 0:7.2f} ms/1k | "
+                    f"trocas de contexto {result['context_switches_per_1k'] or 0:7.1f}/1k | "
+                    f"threads {result['threads']}"
+                )
+        print(f"\n📨 Mensagens recebidas pelo broker: {counter.value}")
+    finally:
+        process.terminate()
+
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compara o Gateway com threads e o AsyncGateway")
+    parser.add_argument('--sensors', type=int, nargs='+', default=[100, 1000, 5000])
+    parser.add_argument('--duration', type=float, default=5.0)
+    parser.add_argument('--connections', type=int, default=1,
+                        help="Conexões MQTT do Gateway com threads")
+    parser.add_argument('--output', default=None, help="Arquivo JSON com os resultados")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    results = run_benchmark(args.sensors, args.duration, args.connections)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        print(f"💾 Resultados salvos em: {args.output}")
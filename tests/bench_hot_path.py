@@ -0,0 +1,234 @@
+"""
+Microbenchmark: Caminho Quente do Gateway
+Sistema de Controle de Acesso - CEU Tres Pontes
+
+Mede, por protocolo de sensor, o custo por chamada de cada etapa que uma
+leitura percorre (sem broker nem banco):
+
+    simulate_detection → _get_protocol_specific_data → format_sensor_reading
+    (_extract_metadata, json.dumps) → get_topic → json.loads e
+    MQTTSubscriber._on_sensor_message no subscriber
+
+Salva o resultado como baseline e compara execuções, apontando as etapas
+que ficaram mais lentas que o limite. Cada execução mede também uma carga
+fixa de calibração; com --normalize, a comparação desconta a diferença de
+velocidade da máquina entre as execuções (ex.: baseline de outro host).
+
+Uso:
+    python tests/bench_hot_path.py --save-baseline baseline.json
+    python tests/bench_hot_path.py --compare baseline.json --threshold 15
+"""
+
+import argparse
+import json
+import logging
+import os
+import platform
+import random
+import sys
+import timeit
+from datetime import datetime
+
+# Adicionar paths
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sensores import LoRaSensor, ZigBeeSensor, SigfoxSensor, RFIDSensor
+from backend.gateway.config_loader import load_mqtt_config, get_topic
+from backend.gateway.message_formatter import MessageFormatter
+from backend.gateway.mqtt_subscriber import MQTTSubscriber
+
+
+SENSOR_CLASSES = (LoRaSensor, ZigBeeSensor, SigfoxSensor, RFIDSensor)
+
+
+def print_header(title: str):
+    """Imprime cabeçalho formatado."""
+    print("\n" + "=" * 80)
+    print(f"  {title}")
+    print("=" * 80)
+
+
+def measure_all(functions: dict, repeat: int = 7, min_time: float = 0.05) -> dict:
+    """
+    Custo por chamada de cada função, em nanossegundos.
+
+    As rodadas são intercaladas (uma de cada função por passada) e vale a
+    melhor: picos de ruído da máquina afetam passadas, não funções inteiras.
+
+    Args:
+        functions: Dicionário nome → função sem argumentos
+        repeat: Passadas
+        min_time: Duração mínima (s) de cada rodada
+
+    Returns:
+        Dicionário nome → nanossegundos por chamada
+    """
+    timers = {}
+    for name, function in functions.items():
+        timer = timeit.Timer(function)
+        number, elapsed = timer.autorange()
+        while elapsed < min_time:
+            number *= 2
+            elapsed = timer.timeit(number)
+        timers[name] = (timer, number)
+
+    best = {name: float('inf') for name in functions}
+    for _ in range(repeat):
+        for name, (timer, number) in timers.items():
+            best[name] = min(best[name], timer.timeit(number) / number * 1e9)
+    return {name: round(value, 1) for name, value in best.items()}
+
+
+def calibration_workload():
+    """Carga fixa em Python puro, referência da velocidade da máquina."""
+    data = {f"k{i}": i for i in range(64)}
+    return sum(value for key, value in data.items() if key.endswith('1'))
+
+
+def build_cases(config: dict) -> dict:
+    """
+    Funções a medir, por nome ('<Protocolo>.<etapa>').
+
+    Args:
+        config: Configuração MQTT (tópicos)
+
+    Returns:
+        Dicionário nome → função sem argumentos
+    """
+    subscriber = MQTTSubscriber(config, client_id="bench_hot_path", share_group="")
+    subscriber.logger.setLevel(logging.WARNING)
+
+    # Seriais e sorteios fixos: mensagens do mesmo tamanho em toda execução
+    random.seed(42)
+
+    cases = {}
+    for index, sensor_class in enumerate(SENSOR_CLASSES):
+        sensor = sensor_class(location="Bancada", serial_number=f"BENCH-{index:02d}-000001")
+        formatter = MessageFormatter("bench")
+        reading = sensor.simulate_detection(force_detection=True)
+        message = formatter.format_sensor_reading(reading)
+        message_dict = json.loads(message)
+        topic = get_topic(config, 'sensors', sensor.serial_number)
+        name = sensor.protocol
+
+        def pipeline(sensor=sensor, formatter=formatter):
+            reading = sensor.simulate_detection()
+            json.loads(formatter.format_sensor_reading(reading))
+            get_topic(config, 'sensors', reading['serial_number'])
+
+        cases.update({
+            f"{name}.simulate_detection": sensor.simulate_detection,
+            f"{name}._get_protocol_specific_data": sensor._get_protocol_specific_data,
+            f"{name}._extract_metadata": lambda f=formatter, r=reading: f._extract_metadata(r),
+            f"{name}.format_sensor_reading": lambda f=formatter, r=reading: f.format_sensor_reading(r),
+            f"{name}.json.dumps": lambda m=message_dict: json.dumps(m, ensure_ascii=False),
+            f"{name}.get_topic": lambda s=sensor.serial_number: get_topic(config, 'sensors', s),
+            f"{name}.json.loads": lambda m=message: json.loads(m),
+            f"{name}.subscriber._on_sensor_message":
+                lambda t=topic, m=message: subscriber._on_sensor_message(t, m),
+            f"{name}.pipeline": pipeline,
+        })
+    return cases
+
+
+def run_benchmark(repeat: int = 7, only: str = None) -> dict:
+    """
+    Mede todas as etapas.
+
+    Args:
+        repeat: Passadas sobre todas as etapas
+        only: Mede apenas nomes que contêm este texto
+
+    Returns:
+        Resultado com metadados e ns por chamada de cada etapa
+    """
+    print_header("MICROBENCHMARK: CAMINHO QUENTE DO GATEWAY")
+
+    config = load_mqtt_config()
+    cases = {
+        name: function for name, function in build_cases(config).items()
+        if not only or only in name
+    }
+    cases['(calibração)'] = calibration_workload
+
+    results = measure_all(cases, repeat)
+    calibration = results.pop('(calibração)')
+    print(f"  {'(calibração)':45s} {calibration / 1000:10.2f} µs")
+    for name, value in results.items():
+        print(f"  {name:45s} {value / 1000:10.2f} µs")
+
+    return {
+        'created_at': datetime.now().isoformat(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'calibration_ns': calibration,
+        'results_ns': results,
+    }
+
+
+def compare(current: dict, baseline: dict, threshold: float, normalize: bool = False) -> list:
+    """
+    Compara com um baseline.
+
+    Args:
+        current: Resultado atual
+        baseline: Resultado salvo
+        threshold: Aumento percentual tolerado
+        normalize: Ajustar o baseline pela carga de calibração
+
+    Returns:
+        Lista de (nome, baseline ns, atual ns, variação %) acima do limite
+    """
+    print_header(f"COMPARAÇÃO COM BASELINE ({baseline.get('created_at')}, limite {threshold:.0f}%)")
+
+    if baseline.get('python') != current['python']:
+        print(f"⚠️  Baseline gerado com Python {baseline.get('python')}; atual: {current['python']}")
+
+    # Baseline ajustado à velocidade atual da máquina
+    scale = 1.0
+    if normalize and baseline.get('calibration_ns') and current.get('calibration_ns'):
+        scale = current['calibration_ns'] / baseline['calibration_ns']
+        print(f"⚖️  Máquina {(scale - 1) * 100:+.1f}% em relação ao baseline (calibração)")
+
+    regressions = []
+    for name, value in current['results_ns'].items():
+        reference = baseline['results_ns'].get(name)
+        if not reference:
+            print(f"  {name:45s} {'(novo)':>10s}")
+            continue
+        reference *= scale
+        change = (value - reference) / reference * 100
+        flag = '❌' if change > threshold else '✅'
+        print(f"  {flag} {name:43s} {reference / 1000:8.2f} → {value / 1000:8.2f} µs ({change:+6.1f}%)")
+        if change > threshold:
+            regressions.append((name, reference, value, round(change, 1)))
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Microbenchmark do caminho quente do gateway")
+    parser.add_argument('--repeat', type=int, default=7, help="Passadas sobre as etapas (vale a melhor)")
+    parser.add_argument('--only', default=None, help="Mede apenas etapas que contêm este texto")
+    parser.add_argument('--save-baseline', default=None, help="Salva o resultado como baseline (JSON)")
+    parser.add_argument('--compare', default=None, help="Baseline (JSON) para comparação")
+    parser.add_argument('--threshold', type=float, default=15.0,
+                        help="Aumento percentual considerado regressão (padrão: 15)")
+    parser.add_argument('--normalize', action='store_true',
+                        help="Desconta a diferença de velocidade da máquina (calibração)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    result = run_benchmark(args.repeat, args.only)
+
+    if args.save_baseline:
+        with open(args.save_baseline, 'w', encoding='utf-8') as f:
+            json.dump(result, f, indent=2)
+        print(f"\n💾 Baseline salvo em: {args.save_baseline}")
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            regressions = compare(result, json.load(f), args.threshold, args.normalize)
+        if regressions:
+            print(f"\n❌ {len(regressions)} etapa(s) acima do limite de {args.threshold:.0f}%")
+            sys.exit(1)
+        print("\n✅ Sem regressões")
@@ -0,0 +1,243 @@
+"""
+Benchmark: Escala da API por Número de Workers
+Sistema de Controle de Acesso - CEU Tres Pontes
+
+Sobe a API com gunicorn (backend/gunicorn.conf.py) para cada número de
+workers, gera carga com clientes HTTP concorrentes (conexões keep-alive) e
+mede vazão e latência (p50/p95/p99). O resultado é a curva de escala:
+requisições/s por número de workers.
+
+Requer gunicorn (Linux) e o banco configurado em backend/.env.
+
+Uso:
+    python tests/bench_web_workers.py --workers 1 2 4 8 --threads 4 --clients 32
+    python tests/bench_web_workers.py --workers 1 2 4 --duration 20 --output escala.json
+"""
+
+import argparse
+import http.client
+import json
+import os
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+# Adicionar paths
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.gateway.message_dispatcher import LatencyHistogram
+
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'backend')
+
+# Endpoints de leitura usados pelo dashboard (autenticados, exceto /health)
+DEFAULT_PATHS = [
+    '/health/detailed',
+    '/api/v1/statistics/overview',
+    '/api/v1/sensors',
+    '/api/v1/readings/sensor/1/latest',
+]
+
+
+def print_header(title: str):
+    """Imprime cabeçalho formatado."""
+    print("\n" + "=" * 80)
+    print(f"  {title}")
+    print("=" * 80)
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def start_server(workers: int, threads: int, port: int, wsgi: str, chdir: str) -> subprocess.Popen:
+    """
+    Sobe o gunicorn e aguarda /health responder.
+
+    Args:
+        workers: Processos
+        threads: Threads por processo
+        port: Porta local
+        wsgi: Módulo WSGI ('wsgi:app')
+        chdir: Diretório do módulo WSGI
+
+    Returns:
+        Processo do master
+    """
+    env = dict(os.environ, WEB_WORKERS=str(workers), WEB_THREADS=str(threads),
+               WEB_BIND=f'127.0.0.1:{port}', WEB_ACCESS_LOG='', WEB_LOG_LEVEL='warning')
+    # Log em arquivo: um pipe cheio bloquearia os workers
+    log = tempfile.TemporaryFile()
+    process = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '-c', os.path.join(BACKEND_DIR, 'gunicorn.conf.py'),
+         '--chdir', chdir, wsgi],
+        env=env,
+        stdout=log,
+        stderr=subprocess.STDOUT,
+    )
+
+    deadline = time.time() + 60
+    while time.time() < deadline:
+        if process.poll() is not None:
+            log.seek(0)
+            raise RuntimeError(f"gunicorn terminou: {log.read().decode(errors='replace')[-2000:]}")
+        try:
+            connection = http.client.HTTPConnection('127.0.0.1', port, timeout=2)
+            connection.request('GET', '/health')
+            if connection.getresponse().status == 200:
+                connection.close()
+                return process
+        except OSError:
+            time.sleep(0.2)
+    stop_server(process)
+    raise RuntimeError("gunicorn não respondeu em 60 s")
+
+
+def stop_server(process: subprocess.Popen):
+    process.send_signal(signal.SIGTERM)
+    try:
+        process.wait(30)
+    except subprocess.TimeoutExpired:
+        process.kill()
+        process.wait()
+
+
+def login(port: int, username: str, password: str) -> str:
+    connection = http.client.HTTPConnection('127.0.0.1', port, timeout=10)
+    body = json.dumps({'username': username, 'password': password})
+    connection.request('POST', '/api/v1/auth/login', body, {'Content-Type': 'application/json'})
+    response = connection.getresponse()
+    data = response.read()
+    connection.close()
+    if response.status != 200:
+        raise RuntimeError(f"Login falhou ({response.status}): {data[:200]!r}")
+    return json.loads(data)['access_token']
+
+
+def generate_load(port: int, paths: list, headers: dict, clients: int, duration: float) -> dict:
+    """
+    Clientes concorrentes em laço fechado (uma requisição por vez cada).
+
+    Returns:
+        Dicionário com requisições, erros, req/s e latências (ms)
+    """
+    histogram = LatencyHistogram()
+    lock = threading.Lock()
+    counts = {'requests': 0, 'errors': 0, 'rejected': 0}
+    deadline = time.perf_counter() + duration
+
+    def client(index: int):
+        connection = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+        local = LatencyHistogram()
+        requests = errors = rejected = 0
+        position = index
+        while time.perf_counter() < deadline:
+            path = paths[position % len(paths)]
+            position += 1
+            started = time.perf_counter()
+            try:
+                connection.request('GET', path, headers=headers)
+                response = connection.getresponse()
+                response.read()
+            except (OSError, http.client.HTTPException):
+                errors += 1
+                connection.close()
+                connection = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+                continue
+            local.observe((time.perf_counter() - started) * 1000)
+            requests += 1
+            if response.status == 503:
+                rejected += 1
+            elif response.status >= 400:
+                errors += 1
+        connection.close()
+        with lock:
+            histogram.merge(local)
+            counts['requests'] += requests
+            counts['errors'] += errors
+            counts['rejected'] += rejected
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(clients)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    return {
+        **counts,
+        'requests_per_s': round(counts['requests'] / elapsed, 1),
+        'latency_ms': histogram.summary(),
+    }
+
+
+def run_scaling(args) -> list:
+    print_header("BENCHMARK: ESCALA DA API POR WORKERS")
+    print(f"🧪 Threads por worker: {args.threads} | clientes: {args.clients} | "
+          f"{args.duration:.0f} s por ponto (+{args.warmup:.0f} s de aquecimento)")
+    print(f"   Endpoints: {', '.join(args.paths)}")
+
+    results = []
+    for workers in args.workers:
+        port = free_port()
+        process = start_server(workers, args.threads, port, args.wsgi, args.chdir)
+        try:
+            headers = {'Authorization': f"Bearer {login(port, args.username, args.password)}"}
+            generate_load(port, args.paths, headers, args.clients, args.warmup)
+            result = generate_load(port, args.paths, headers, args.clients, args.duration)
+        finally:
+            stop_server(process)
+
+        result['workers'] = workers
+        results.append(result)
+        latency = result['latency_ms']
+        print(f"  {workers:3d} workers: {result['requests_per_s']:9.1f} req/s  "
+              f"p50 {latency['p50_ms']:7.1f} ms  p95 {latency['p95_ms']:7.1f} ms  p99 {latency['p99_ms']:7.1f} ms  "
+              f"erros {result['errors']}  503 {result['rejected']}")
+
+    base = results[0]['requests_per_s'] / results[0]['workers'] if results and results[0]['requests_per_s'] else 0
+    print_header("CURVA DE ESCALA")
+    for result in results:
+        ideal = base * result['workers']
+        efficiency = result['requests_per_s'] / ideal * 100 if ideal else 0
+        bar = '█' * int(result['requests_per_s'] / max(r['requests_per_s'] for r in results) * 40)
+        print(f"  {result['workers']:3d} │ {bar:40s} {result['requests_per_s']:9.1f} req/s ({efficiency:5.1f}% do linear)")
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Curva de escala da API por número de workers (gunicorn)")
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4], help="Números de workers a medir")
+    parser.add_argument('--threads', type=int, default=4, help="Threads por worker")
+    parser.add_argument('--clients', type=int, default=32, help="Clientes HTTP concorrentes")
+    parser.add_argument('--duration', type=float, default=15.0, help="Segundos de medição por ponto")
+    parser.add_argument('--warmup', type=float, default=3.0, help="Segundos de aquecimento por ponto")
+    parser.add_argument('--paths', nargs='+', default=DEFAULT_PATHS, help="Endpoints GET (alternados)")
+    parser.add_argument('--username', default=os.environ.get('ADMIN_USERNAME', 'admin'))
+    parser.add_argument('--password', default=os.environ.get('ADMIN_PASSWORD', 'admin123'))
+    parser.add_argument('--wsgi', default='wsgi:app', help="Módulo WSGI (padrão: wsgi:app)")
+    parser.add_argument('--chdir', default=BACKEND_DIR, help="Diretório do módulo WSGI")
+    parser.add_argument('--output', default=None, help="Salva o resultado em JSON")
+    args = parser.parse_args()
+
+    results = run_scaling(args)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({
+                'created_at': datetime.now().isoformat(),
+                'threads': args.threads,
+                'clients': args.clients,
+                'duration': args.duration,
+                'paths': args.paths,
+                'results': results,
+            }, f, indent=2)
+        print(f"\n💾 Resultado salvo em: {args.output}")
@@ -0,0 +1,187 @@
+"""
+Teste do Broker MQTT em Processo
+Sistema de Controle de Acesso - CEU Tres Pontes
+
+Verifica o InProcessBroker com o próprio MQTTClient do gateway:
+publicação QoS 0/1, curingas, mensagens retidas, subscrição
+compartilhada e o fluxo Gateway → broker → subscriber. Não requer
+Mosquitto nem rede.
+"""
+
+import sys
+import os
+import time
+import uuid
+import logging
+
+# Adicionar paths
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.gateway.config_loader import load_mqtt_config, get_topic
+from backend.gateway.inprocess_broker import InProcessBroker, topic_matches
+from backend.gateway.mqtt_client import MQTTClient
+
+
+def print_header(title: str):
+    """Imprime cabeçalho formatado."""
+    print("\n" + "=" * 80)
+    print(f"  {title}")
+    print("=" * 80)
+
+
+def wait_for(predicate, timeout: float = 5.0) -> bool:
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.05)
+    return predicate()
+
+
+def new_client(config, name: str) -> MQTTClient:
+    client = MQTTClient(config, client_id=f"{name}_{uuid.uuid4().hex[:6]}")
+    client.logger.setLevel(logging.WARNING)
+    assert client.connect(), f"{name} não conectou"
+    return client
+
+
+def test_topic_matching() -> bool:
+    """Testa o casamento de tópicos com curingas."""
+    print_header("TESTE: CURINGAS")
+
+    cases = [
+        ('ceu/sensors/+', 'ceu/sensors/LORA-1', True),
+        ('ceu/sensors/+', 'ceu/sensors/LORA-1/extra', False),
+        ('ceu/#', 'ceu/sensors/LORA-1', True),
+        ('ceu/#', 'ceu', True),
+        ('#', '$SYS/broker/uptime', False),
+        ('ceu/+/status', 'ceu/gateway/status', True),
+        ('ceu/status', 'ceu/alerts', False),
+    ]
+    ok = True
+    for topic_filter, topic, expected in cases:
+        result = topic_matches(topic_filter, topic)
+        ok = ok and result == expected
+        print(f"  {'✅' if result == expected else '❌'} {topic_filter:18s} x {topic:28s} -> {result}")
+    return ok
+
+
+def test_publish_subscribe(config) -> bool:
+    """Testa QoS 0/1, curinga e mensagem retida."""
+    print_header("TESTE: PUBLICAÇÃO E SUBSCRIÇÃO")
+
+    received = []
+    subscriber = new_client(config, "sub")
+    subscriber.subscribe(get_topic(config, 'sensors', '+'), lambda t, m: received.append((t, m)))
+
+    publisher = new_client(config, "pub")
+    time.sleep(0.2)
+
+    handles = [
+        publisher.publish(get_topic(config, 'sensors', f"LORA-{i}"), f"leitura {i}", qos=i % 2)
+        for i in range(10)
+    ]
+    acked = all(handle.wait(5) for handle in handles if handle.qos)
+    wait_for(lambda: len(received) >= 10)
+    print(f"📨 Recebidas {len(received)}/10 (QoS 1 confirmadas: {acked})")
+    ok = len(received) == 10 and acked
+
+    # Retida: um subscriber novo recebe o último status ao subscrever
+    status_topic = get_topic(config, 'status')
+    publisher.publish(status_topic, 'online', retain=True, qos=1).wait(5)
+    late = []
+    late_subscriber = new_client(config, "late")
+    late_subscriber.subscribe(status_topic, lambda t, m: late.append(m))
+    wait_for(lambda: late)
+    print(f"📌 Retida entregue ao subscriber novo: {late}")
+    ok = ok and late == ['online']
+
+    for client in (subscriber, publisher, late_subscriber):
+        client.disconnect()
+    return ok
+
+
+def test_shared_subscription(config, instances: int = 3, messages: int = 90) -> bool:
+    """Testa a distribuição entre membros de um grupo $share."""
+    print_header("TESTE: SUBSCRIÇÃO COMPARTILHADA")
+
+    counts = [0] * instances
+    members = []
+    for index in range(instances):
+        def on_message(topic, message, index=index):
+            counts[index] += 1
+        member = new_client(config, f"member{index}")
+        member.subscribe(f"$share/teste/{get_topic(config, 'sensors', '+')}", on_message)
+        members.append(member)
+
+    publisher = new_client(config, "pub")
+    time.sleep(0.2)
+    for i in range(messages):
+        publisher.publish(get_topic(config, 'sensors', f"SIG-{i % 8}"), str(i), qos=1)
+    publisher.wait_for_inflight(5)
+    wait_for(lambda: sum(counts) >= messages)
+
+    print(f"📊 Distribuição entre {instances} membros: {counts}")
+    ok = sum(counts) == messages and all(counts)
+
+    for client in members + [publisher]:
+        client.disconnect()
+    return ok
+
+
+def test_gateway_flow(config, duration: float = 3.0) -> bool:
+    """Testa Gateway → broker → subscriber com sensores simulados."""
+    from sensores import LoRaSensor, ZigBeeSensor, SigfoxSensor, RFIDSensor
+    from backend.gateway.gateway import Gateway
+
+    print_header("TESTE: GATEWAY → BROKER → SUBSCRIBER")
+
+    received = []
+    subscriber = new_client(config, "sub")
+    subscriber.subscribe(get_topic(config, 'sensors', '+'), lambda t, m: received.append(t))
+
+    config['gateway']['publish_interval'] = 1
+    gateway = Gateway(config)
+    gateway.logger.setLevel(logging.WARNING)
+    gateway.register_sensors([
+        LoRaSensor(location="Entrada Principal"),
+        ZigBeeSensor(location="Saída Norte"),
+        SigfoxSensor(location="Portão Sul"),
+        RFIDSensor(location="Catraca 1"),
+    ])
+    gateway.start()
+    time.sleep(duration)
+    gateway.stop()
+
+    published = gateway.stats['readings_published']
+    wait_for(lambda: len(received) >= published)
+    print(f"📨 Publicadas {published}, recebidas {len(received)}")
+
+    subscriber.disconnect()
+    return published > 0 and len(received) == published
+
+
+def run_all_tests() -> bool:
+    logging.basicConfig(level=logging.WARNING)
+
+    with InProcessBroker() as broker:
+        config = broker.configure(load_mqtt_config())
+        print(f"🧪 Broker em processo na porta {broker.port}")
+
+        results = {
+            'curingas': test_topic_matching(),
+            'publicação/subscrição': test_publish_subscribe(config),
+            'subscrição compartilhada': test_shared_subscription(config),
+            'gateway': test_gateway_flow(config),
+        }
+        print(f"\n📈 Broker: {broker.get_stats()}")
+
+    print_header("RESUMO")
+    for name, passed in results.items():
+        print(f"  {'✅' if passed else '❌'} {name}")
+    return all(results.values())
+
+
+if __name__ == "__main__":
+    success = run_all_tests()
+    sys.exit(0 if success else 1)
@@ -4,18 +4,30 @@ Sistema de Controle de Acesso - CEU Tres Pontes
 
 Testa a comunicação completa:
 Sensores → Gateway → MQTT Broker → Subscriber
+
+Com --benchmark, mede a latência de cada etapa até o commit no banco:
+    python tests/test_mqtt_integration.py --benchmark --sensors 100 1000 --output e2e.json
 """
 
 import sys
 import os
+import json
+import logging
+import queue
 import time
 import threading
+import uuid
+from datetime import datetime
 
 # Adicionar paths
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from sensores import LoRaSensor, ZigBeeSensor, SigfoxSensor, RFIDSensor
+from backend.gateway.config_loader import load_mqtt_config
 from backend.gateway.gateway import Gateway
+from backend.gateway.gateway_launcher import build_sensor, simulated_sensor_specs
+from backend.gateway.inprocess_broker import InProcessBroker
+from backend.gateway.message_dispatcher import LatencyHistogram
 from backend.gateway.mqtt_subscriber import MQTTSubscriber
 
 
@@ -96,7 +108,8 @@ def test_phase2_integration(duration: int = 60):
             detections_count[0] += 1
     
     try:
-        subscriber = MQTTSubscriber(client_id="test_integration_subscriber")
+        # Fora do grupo de consumidores: o teste precisa receber todas as mensagens
+        subscriber = MQTTSubscriber(client_id="test_integration_subscriber", share_group="")
         subscriber.set_callback('sensor', on_detection_callback)
         
         if not subscriber.start():
@@ -252,6 +265,252 @@ def test_phase2_integration(duration: int = 60):
     print("\n✅ Sistema finalizado!\n")
 
 
+# ======================================================================
+# Benchmark de latência ponta a ponta
+# ======================================================================
+
+LATENCY_STAGES = ('buffer', 'broker', 'ingest', 'total')
+
+
+def _elapsed_ms(start: datetime, end: datetime) -> float:
+    return max(0.0, (end - start).total_seconds() * 1000)
+
+
+class IngestionPipeline:
+    """
+    Grava no banco as leituras recebidas pelo subscriber, em lotes, e mede
+    a latência de cada etapa a partir dos timestamps das mensagens:
+
+        buffer: detecção no sensor → formatação no gateway (fila do gateway)
+        broker: formatação → recebimento no subscriber (publicação e broker)
+        ingest: recebimento → commit no banco (lote e IngestionService)
+        total:  detecção no sensor → commit no banco
+    """
+
+    def __init__(self, app, batch_size: int = 500, max_wait: float = 0.05):
+        self.app = app
+        self.batch_size = batch_size
+        self.max_wait = max_wait
+        self.queue = queue.Queue()
+        self.histograms = {stage: LatencyHistogram() for stage in LATENCY_STAGES}
+        self.committed = 0
+        self.errors = 0
+        self.first_commit = None
+        self.last_commit = None
+        self.thread = None
+        self.running = False
+
+    def on_message(self, data: dict):
+        """Callback 'sensor' do MQTTSubscriber."""
+        self.queue.put((data, datetime.now()))
+
+    def start(self):
+        self.running = True
+        self.thread = threading.Thread(target=self._run, name="bench-ingest", daemon=True)
+        self.thread.start()
+
+    def stop(self, timeout: float = 30.0):
+        """Processa o que já chegou e para."""
+        deadline = time.time() + timeout
+        while not self.queue.empty() and time.time() < deadline:
+            time.sleep(0.05)
+        self.running = False
+        self.thread.join(timeout=5)
+
+    def _next_batch(self) -> list:
+        batch = []
+        deadline = time.time() + self.max_wait
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self.queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        from app.services.ingestion_service import IngestionService
+
+        with self.app.app_context():
+            while self.running or not self.queue.empty():
+                batch = self._next_batch()
+                if not batch:
+                    continue
+                try:
+                    result = IngestionService.ingest_mqtt_messages([data for data, _ in batch])
+                except Exception as e:
+                    self.errors += len(batch)
+                    print(f"❌ Erro na ingestão: {e}")
+                    continue
+
+                committed_at = datetime.now()
+                self.errors += len(result['errors'])
+                self.committed += result['inserted']
+                self.first_commit = self.first_commit or time.time()
+                self.last_commit = time.time()
+
+                for data, received_at in batch:
+                    sensed_at = datetime.fromisoformat(data['data']['timestamp'])
+                    formatted_at = datetime.fromisoformat(data['timestamp'])
+                    self.histograms['buffer'].observe(_elapsed_ms(sensed_at, formatted_at))
+                    self.histograms['broker'].observe(_elapsed_ms(formatted_at, received_at))
+                    self.histograms['ingest'].observe(_elapsed_ms(received_at, committed_at))
+                    self.histograms['total'].observe(_elapsed_ms(sensed_at, committed_at))
+
+
+def create_benchmark_app(database_url: str = None):
+    """
+    Cria a aplicação Flask de teste com as tabelas criadas.
+
+    Args:
+        database_url: URL do banco (padrão: banco de testes do TestingConfig)
+
+    Returns:
+        Aplicação Flask
+    """
+    sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'backend'))
+    from app.config import TestingConfig
+
+    if database_url:
+        TestingConfig.SQLALCHEMY_DATABASE_URI = database_url
+
+    from app import create_app, db
+
+    app = create_app('testing')
+    with app.app_context():
+        db.create_all()
+    return app
+
+
+def register_benchmark_sensors(app, specs: list):
+    """Cadastra os sensores simulados que ainda não existem no banco."""
+    from app import db
+    from app.models.sensor import Sensor
+
+    with app.app_context():
+        existing = {
+            serial for (serial,) in db.session.query(Sensor.serial_number)
+            .filter(Sensor.serial_number.in_([spec['serial_number'] for spec in specs]))
+        }
+        db.session.add_all([
+            Sensor(serial_number=spec['serial_number'], protocol=spec['protocol'],
+                   location=spec['location'], status='active', total_readings=0)
+            for spec in specs if spec['serial_number'] not in existing
+        ])
+        db.session.commit()
+
+
+def run_latency_round(app, config: dict, sensors: int, duration: float,
+                      interval: float, ingest_batch: int) -> dict:
+    """
+    Roda gateway, broker e ingestão juntos por `duration` segundos.
+
+    Args:
+        app: Aplicação Flask (banco)
+        config: Configuração MQTT apontando para o broker
+        sensors: Tamanho da frota
+        duration: Segundos de coleta
+        interval: Intervalo de coleta do gateway (s)
+        ingest_batch: Tamanho máximo do lote de ingestão
+
+    Returns:
+        Resultado da rodada (latências por etapa e vazão)
+    """
+    specs = simulated_sensor_specs(sensors)
+    register_benchmark_sensors(app, specs)
+
+    # Gateway id novo por rodada: message_ids não colidem com rodadas anteriores
+    config['gateway']['id'] = f"bench_{uuid.uuid4().hex[:8]}"
+    config['gateway']['publish_interval'] = interval
+
+    pipeline = IngestionPipeline(app, batch_size=ingest_batch)
+    subscriber = MQTTSubscriber(config, client_id=f"bench_sub_{uuid.uuid4().hex[:6]}", share_group="")
+    subscriber.logger.setLevel(logging.WARNING)
+    subscriber.set_callback('sensor', pipeline.on_message)
+
+    gateway = Gateway(config)
+    gateway.logger.setLevel(logging.WARNING)
+    gateway.register_sensors([build_sensor(spec) for spec in specs])
+
+    pipeline.start()
+    if not subscriber.start():
+        raise RuntimeError("Subscriber não conectou ao broker")
+    gateway.start()
+    if not gateway.running:
+        subscriber.stop()
+        raise RuntimeError("Gateway não conectou ao broker")
+
+    time.sleep(duration)
+    gateway.stop()
+    pipeline.stop()
+    subscriber.stop()
+
+    elapsed = (pipeline.last_commit - pipeline.first_commit) if pipeline.first_commit else 0
+    return {
+        'sensors': sensors,
+        'interval_s': interval,
+        'offered_per_s': round(sensors / interval, 1),
+        'duration_s': duration,
+        'readings_published': gateway.stats['readings_published'],
+        'readings_committed': pipeline.committed,
+        'committed_per_s': round(pipeline.committed / elapsed, 1) if elapsed else None,
+        'errors': pipeline.errors + gateway.stats['errors'],
+        'latency_ms': {stage: pipeline.histograms[stage].summary() for stage in LATENCY_STAGES},
+    }
+
+
+def run_latency_benchmark(fleet_sizes, duration: float = 10.0, interval: float = 1.0,
+                          ingest_batch: int = 500, database_url: str = None,
+                          external_broker: bool = False) -> list:
+    """
+    Benchmark de latência sensor → banco para vários tamanhos de frota.
+
+    Args:
+        fleet_sizes: Quantidades de sensores
+        duration: Segundos de coleta por rodada
+        interval: Intervalo de coleta do gateway (s)
+        ingest_batch: Tamanho máximo do lote de ingestão
+        database_url: URL do banco (padrão: banco de testes)
+        external_broker: Usar o broker de mqtt_config.ini em vez do InProcessBroker
+
+    Returns:
+        Lista de resultados (um por frota)
+    """
+    print_header("BENCHMARK: LATÊNCIA SENSOR → BANCO")
+    logging.getLogger().setLevel(logging.WARNING)
+
+    app = create_benchmark_app(database_url)
+    config = load_mqtt_config()
+    config['logging']['level'] = 'WARNING'
+
+    broker = None
+    if not external_broker:
+        broker = InProcessBroker()
+        broker.start()
+        broker.configure(config)
+
+    results = []
+    try:
+        for sensors in fleet_sizes:
+            result = run_latency_round(app, config, sensors, duration, interval, ingest_batch)
+            results.append(result)
+
+            print(f"\n🏭 {sensors} sensores | oferta {result['offered_per_s']}/s | "
+                  f"gravadas {result['readings_committed']} ({result['committed_per_s']}/s) | "
+                  f"erros {result['errors']}")
+            for stage in LATENCY_STAGES:
+                summary = result['latency_ms'][stage]
+                print(f"   {stage:7s} p50 {summary['p50_ms']} ms | p95 {summary['p95_ms']} ms | "
+                      f"p99 {summary['p99_ms']} ms | máx {summary['max_ms']} ms")
+    finally:
+        if broker is not None:
+            broker.stop()
+
+    return results
+
+
 if __name__ == "__main__":
     import argparse
     
@@ -262,11 +521,34 @@ if __name__ == "__main__":
         default=60,
         help='Duração do teste em segundos (padrão: 60)'
     )
+    parser.add_argument('--benchmark', action='store_true',
+                        help='Benchmark de latência sensor → banco (não interativo)')
+    parser.add_argument('--sensors', type=int, nargs='+', default=[100, 1000],
+                        help='Tamanhos de frota do benchmark')
+    parser.add_argument('--interval', type=float, default=1.0,
+                        help='Intervalo de coleta do gateway no benchmark (s)')
+    parser.add_argument('--ingest-batch', type=int, default=500,
+                        help='Tamanho máximo do lote de ingestão no benchmark')
+    parser.add_argument('--database-url', default=None,
+                        help='Banco do benchmark (padrão: banco de testes; ex.: sqlite:///bench.db)')
+    parser.add_argument('--external-broker', action='store_true',
+                        help='Usar o broker de mqtt_config.ini no benchmark')
+    parser.add_argument('--output', default=None, help='Arquivo JSON com os resultados do benchmark')
     
     args = parser.parse_args()
     
     try:
-        test_phase2_integration(duration=args.duration)
+        if args.benchmark:
+            results = run_latency_benchmark(
+                args.sensors, args.duration, args.interval, args.ingest_batch,
+                args.database_url, args.external_broker
+            )
+            if args.output:
+                with open(args.output, 'w', encoding='utf-8') as f:
+                    json.dump(results, f, indent=2)
+                print(f"\n💾 Resultados salvos em: {args.output}")
+        else:
+            test_phase2_integration(duration=args.duration)
     except Exception as e:
         print(f"\n❌ ERRO CRÍTICO: {e}")
         import traceback
@@ -0,0 +1,136 @@
+"""
+Teste de Subscrição Compartilhada - Grupo de Consumidores
+Sistema de Controle de Acesso - CEU Tres Pontes
+
+Verifica que várias instâncias do MQTTSubscriber no mesmo grupo
+($share/<grupo>/...) dividem as mensagens, sem duplicar, e que o grupo
+se rebalanceia quando uma instância sai.
+
+Usa o broker de mqtt_config.ini (Mosquitto >= 1.6) se estiver no ar;
+senão, o InProcessBroker.
+"""
+
+import sys
+import os
+import json
+import socket
+import time
+import uuid
+import logging
+
+# Adicionar paths
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.gateway.config_loader import load_mqtt_config, get_topic
+from backend.gateway.inprocess_broker import InProcessBroker
+from backend.gateway.mqtt_client import MQTTClient
+from backend.gateway.mqtt_subscriber import MQTTSubscriber
+
+
+def print_header(title: str):
+    """Imprime cabeçalho formatado."""
+    print("\n" + "=" * 80)
+    print(f"  {title}")
+    print("=" * 80)
+
+
+def broker_available(config) -> bool:
+    """Verifica se há um broker aceitando conexões."""
+    try:
+        with socket.create_connection((config['broker']['host'], config['broker']['port']), timeout=2):
+            return True
+    except OSError:
+        return False
+
+
+def publish_readings(client: MQTTClient, config, start: int, count: int, sensors: int = 8):
+    """Publica `count` leituras distribuídas entre `sensors` seriais."""
+    for i in range(start, start + count):
+        serial = f"TEST-SHARE-{i % sensors:02d}"
+        message = {
+            'message_id': f"share_test_{i}",
+            'gateway_id': 'share_test',
+            'sensor': {'serial_number': serial, 'protocol': 'LoRa', 'location': 'Teste'},
+            'data': {'activity': 1, 'total_detections': i},
+        }
+        client.publish(get_topic(config, 'sensors', serial), json.dumps(message))
+
+
+def wait_for(predicate, timeout: float = 10.0) -> bool:
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.1)
+    return predicate()
+
+
+def test_shared_subscription(instances: int = 3, messages: int = 300) -> bool:
+    """
+    Distribui mensagens entre instâncias de um grupo e testa o rebalanceamento.
+
+    Args:
+        instances: Número de subscribers no grupo
+        messages: Mensagens publicadas em cada fase
+
+    Returns:
+        True se o teste passou
+    """
+    print_header("TESTE: SUBSCRIÇÃO COMPARTILHADA")
+
+    config = load_mqtt_config()
+    if not broker_available(config):
+        print(f"🧪 Broker indisponível em {config['broker']['host']}:{config['broker']['port']}. "
+              f"Usando broker em processo.")
+        with InProcessBroker() as broker:
+            return _run_shared_subscription(broker.configure(config), instances, messages)
+
+    return _run_shared_subscription(config, instances, messages)
+
+
+def _run_shared_subscription(config, instances: int, messages: int) -> bool:
+
+    group = f"teste_{uuid.uuid4().hex[:8]}"
+    subscribers = [MQTTSubscriber(config, share_group=group) for _ in range(instances)]
+    for subscriber in subscribers:
+        subscriber.logger.setLevel(logging.WARNING)
+        assert subscriber.start(), "Subscriber não conectou"
+
+    publisher = MQTTClient(config, client_id=f"share_publisher_{uuid.uuid4().hex[:6]}")
+    assert publisher.connect(), "Publisher não conectou"
+    time.sleep(1)
+
+    def received(group_members):
+        return sum(s.get_stats()['sensor_readings'] for s in group_members)
+
+    # Fase 1: todas as instâncias no grupo
+    publish_readings(publisher, config, 0, messages)
+    wait_for(lambda: received(subscribers) >= messages)
+
+    counts = [s.get_stats()['sensor_readings'] for s in subscribers]
+    print(f"\n📊 Fase 1 - distribuição entre {instances} instâncias: {counts}")
+    ok = sum(counts) == messages and all(count > 0 for count in counts)
+
+    # Fase 2: uma instância sai do grupo; as demais recebem tudo
+    leaving = subscribers.pop()
+    leaving.stop()
+    before = received(subscribers)
+
+    publish_readings(publisher, config, messages, messages)
+    wait_for(lambda: received(subscribers) - before >= messages)
+
+    phase2 = received(subscribers) - before
+    print(f"📊 Fase 2 - após saída de uma instância: {phase2}/{messages} mensagens")
+    ok = ok and phase2 == messages
+
+    for subscriber in subscribers:
+        subscriber.stop()
+    publisher.disconnect()
+
+    print("\n✅ Teste passou!" if ok else "\n❌ Teste falhou!")
+    return ok
+
+
+if __name__ == "__main__":
+    success = test_shared_subscription()
+    sys.exit(0 if success else 1)